@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("base", "0002_book_base_book_uploaded_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="version",
+            field=models.PositiveIntegerField(
+                db_default=1,
+                help_text="Версия записи, увеличивается при каждом изменении",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("base", "0003_book_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="isbn",
+            field=models.CharField(
+                blank=True,
+                help_text="13-значный ISBN",
+                max_length=13,
+                null=True,
+                unique=True,
+            ),
+        ),
+    ]
@@ -45,6 +45,12 @@ class Book(models.Model):
         blank=True,
         related_name='books',
     )
+    # Row version for optimistic concurrency: the gRPC UpdateBook bumps it on every write
+    # and, given an expected_version, only updates a row still at that version
+    version = models.PositiveIntegerField (
+        db_default=1,
+        help_text="Версия записи, увеличивается при каждом изменении",
+    )
 
     def __str__ (
         self,
@@ -56,3 +62,10 @@ class Book(models.Model):
         ordering = [
             '-uploaded_at',
         ]
+        indexes = [
+            # Keyset pagination in ListBooks: WHERE (uploaded_at, id) < (...) ORDER BY both DESC
+            models.Index (
+                fields=['-uploaded_at', '-id'],
+                name='base_book_uploaded_at_id_idx',
+            ),
+        ]
@@ -1,17 +1,36 @@
+import os
+import asyncio
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import grpc
 from fastapi.responses import JSONResponse  
+from google.protobuf.json_format import MessageToDict
+from google.protobuf.field_mask_pb2 import FieldMask
 
 from fastapi_service.controllers.rabbitmq_controller.rabbitmq_controller import RabbitMQController
 from grpc_service.books_pb import books_pb2
 
 from fastapi_service.modules.logger.logger import LoggerModule
+from fastapi_service.modules.book_import.book_import_reader import BookImportReader
+
+# Trailing metadata in which a failed ImportBooks reports the rows it had already committed.
+IMPORTED_ROWS_KEY = 'imported-rows'
 
 class BookController:
     
     """
     Controller for managing book operations.
 
-    This class provides methods for interacting with books via gRPC and 
-    queues operations for book creation, deletion, and editing via RabbitMQ.
+    This class provides methods for interacting with books via gRPC. Writes
+    call the book service directly and answer with the row it wrote.
+
+    Every gRPC call carries a deadline, `GRPC_DEADLINE_SECONDS` by default or
+    `GRPC_DEADLINE_<ROUTE>_SECONDS` for one route, which the book service
+    hands down to its database queries. A call that runs out of time is
+    answered with 504.
+
+    Read methods take an optional list of book fields, sent as a FieldMask so
+    the book service selects and returns only those columns.
     """
     
     def __init__ (
@@ -30,9 +49,28 @@ class BookController:
         self.grpc_stub = grpc_stub
         self.logger = logger.logger_initialization()
         self.rabbitmq_controller = RabbitMQController()
+        self.import_batch_size = int(os.getenv('BOOK_IMPORT_BATCH_SIZE', '1000'))
+        self.import_max_errors = int(os.getenv('BOOK_IMPORT_MAX_ERRORS', '1000'))
+        
+        default_deadline = os.getenv('GRPC_DEADLINE_SECONDS', '5')
+        self.deadlines = {
+            route: float(os.getenv(f'GRPC_DEADLINE_{route.upper()}_SECONDS', default))
+            for route, default in (
+                ('get_all_books', default_deadline),
+                ('list_books', default_deadline),
+                ('batch_get_books', default_deadline),
+                ('get_book_by_id', default_deadline),
+                ('create_book', default_deadline),
+                ('edit_book', default_deadline),
+                ('delete_book', default_deadline),
+                # Imports stream whole files, so they get minutes rather than seconds.
+                ('import_books', '300'),
+            )
+        }
 
     async def get_all_books (
         self, 
+        fields: Optional[List[str]] = None,
     ) -> JSONResponse:
         
         """
@@ -40,22 +78,29 @@ class BookController:
 
         Publishes a message to RabbitMQ indicating that book retrieval is being performed.
 
+        :param fields: Book fields to return, all of them when omitted.
         :return: JSONResponse containing a list of all books or an error message.
         """
         
         try:
-            request = books_pb2.EmptyRequest()
+            request = books_pb2.EmptyRequest(fields=self.__field_mask(fields))
             self.rabbitmq_controller.publish('Fetching all books')
-            books = self.grpc_stub.GetAllBooks(request)
+            books = self.grpc_stub.GetAllBooks(request, timeout=self.deadlines['get_all_books'])
             
             return JSONResponse (
                 {
                     'STATUS': 'SUCCESS', 
-                    'BOOKS': books,
+                    'BOOKS': [
+                        MessageToDict(book, preserving_proto_field_name=True) 
+                        for book in books.books
+                    ],
                 }, 
                 status_code=200,
             )
         
+        except grpc.RpcError as e:
+            return self.__rpc_error_response('get_all_books', e)
+        
         except Exception as e:
             
             self.logger.fatal (
@@ -72,9 +117,126 @@ class BookController:
                 status_code=500,
             )
 
+    async def list_books (
+        self, 
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> JSONResponse:
+        
+        """
+        Retrieves one keyset-paginated page of books from the book service.
+
+        Pass the returned `NEXT_CURSOR` back as `cursor` to fetch the following
+        page; it is `None` once the last page has been reached.
+
+        :param limit: Maximum number of books on the page, the service default when omitted.
+        :param cursor: Opaque cursor from the previous page, or None for the first page.
+        :param fields: Book fields to return, all of them when omitted.
+        :return: JSONResponse containing the page of books and the next cursor, or an error message.
+        """
+        
+        try:
+            request = books_pb2.ListBooksRequest (
+                page_size=limit or 0,
+                cursor=cursor or '',
+                fields=self.__field_mask(fields),
+            )
+            page = self.grpc_stub.ListBooks(request, timeout=self.deadlines['list_books'])
+            
+            return JSONResponse (
+                {
+                    'STATUS': 'SUCCESS', 
+                    'BOOKS': [
+                        MessageToDict(book, preserving_proto_field_name=True) 
+                        for book in page.books
+                    ],
+                    'NEXT_CURSOR': page.next_cursor or None,
+                }, 
+                status_code=200,
+            )
+        
+        except grpc.RpcError as e:
+            return self.__rpc_error_response('list_books', e)
+        
+        except Exception as e:
+            
+            self.logger.fatal (
+                'Exception in list_books: %s', 
+                str(e), 
+                exc_info=True,
+            )
+            
+            return JSONResponse (
+                {
+                    'STATUS': 'FAILED', 
+                    'DETAIL': str(e),
+                }, 
+                status_code=500,
+            )
+    
+    async def batch_get_books (
+        self, 
+        book_ids: List[int],
+        fields: Optional[List[str]] = None,
+    ) -> JSONResponse:
+        
+        """
+        Retrieves several books by ID in a single call to the book service.
+
+        Results follow the order of `book_ids`; an ID with no matching book is
+        reported with `found` set to False and `book` set to None.
+
+        :param book_ids: The IDs of the books to retrieve.
+        :param fields: Book fields to return, all of them when omitted.
+        :return: JSONResponse containing one result per requested ID, or an error message.
+        """
+        
+        try:
+            request = books_pb2.BatchGetBooksRequest (
+                book_ids=book_ids,
+                fields=self.__field_mask(fields),
+            )
+            batch = self.grpc_stub.BatchGetBooks(request, timeout=self.deadlines['batch_get_books'])
+            
+            return JSONResponse (
+                {
+                    'STATUS': 'SUCCESS', 
+                    'RESULTS': [
+                        {
+                            'book_id': result.book_id,
+                            'found': result.found,
+                            'book': MessageToDict(result.book, preserving_proto_field_name=True) if result.found else None,
+                        }
+                        for result in batch.results
+                    ],
+                }, 
+                status_code=200,
+            )
+        
+        except grpc.RpcError as e:
+            return self.__rpc_error_response('batch_get_books', e)
+        
+        except Exception as e:
+            
+            self.logger.fatal (
+                'Exception in batch_get_books: %s', 
+                str(e), 
+                exc_info=True,
+            )
+            
+            return JSONResponse (
+                {
+                    'STATUS': 'FAILED', 
+                    'DETAIL': str(e),
+                }, 
+                status_code=500,
+            )
+    
     async def get_book_by_id (
         self, 
         book_id: int, 
+        fields: Optional[List[str]] = None,
     ) -> JSONResponse:
         
         """
@@ -83,23 +245,30 @@ class BookController:
         Publishes a message to RabbitMQ indicating that a book retrieval is requested.
 
         :param book_id: The ID of the book to retrieve.
+        :param fields: Book fields to return, all of them when omitted.
         :return: JSONResponse containing the book details or an error message.
         """
         
         try:
-            request = books_pb2.GetBookByIdRequest(book_id=book_id)
+            request = books_pb2.BookRequest (
+                book_id=book_id,
+                fields=self.__field_mask(fields),
+            )
             self.rabbitmq_controller.publish(f'Fetching book by id: {book_id}')
             
-            book = self.grpc_stub.GetBookById(request)
+            book = self.grpc_stub.GetBookById(request, timeout=self.deadlines['get_book_by_id'])
             
             return JSONResponse (
                 {
                     'STATUS': 'SUCCESS', 
-                    'BOOK': book,
+                    'BOOK': MessageToDict(book, preserving_proto_field_name=True),
                 }, 
                 status_code=200,
             )
         
+        except grpc.RpcError as e:
+            return self.__rpc_error_response('get_book_by_id', e)
+        
         except Exception as e:
             
             self.logger.fatal (
@@ -121,35 +290,48 @@ class BookController:
         book_id: int, 
         book_name: str, 
         author: str, 
+        expected_version: Optional[int] = None,
     ) -> JSONResponse:
         
         """
-        Queues an edit operation for a book.
+        Updates a book through the book service.
 
-        Publishes a message to RabbitMQ with the book edit request.
+        UpdateBook returns the updated row, so the response carries the
+        whole book, its new `version` included, without a follow-up read.
 
         :param book_id: The ID of the book to edit.
         :param book_name: The new name of the book.
         :param author: The new author of the book.
-        :return: JSONResponse confirming that the edit request has been queued.
+        :param expected_version: Only update the book if it is still at this version.
+        :return: JSONResponse with the updated book, 404 if it does not exist,
+                 409 if it has moved past `expected_version`.
         """
         
         try:
-            message = f"Editing Book|{book_id}|{book_name}|{author}"
-            self.rabbitmq_controller.publish(message)
+            request = books_pb2.UpdateBookRequest (
+                book_id=book_id,
+                book_name=book_name,
+                author=author,
+                expected_version=expected_version or 0,
+            )
+            book = self.grpc_stub.UpdateBook(request, timeout=self.deadlines['edit_book'])
             
             self.logger.info (
-                'Edit book task queued successfully for book_id: %s', 
-                book_id,
+                'Book updated: %s', 
+                book.id,
             )
             
             return JSONResponse (
                 {
-                    'STATUS': 'SUCCESS',
+                    'STATUS': 'SUCCESS', 
+                    'BOOK': MessageToDict(book, preserving_proto_field_name=True),
                 }, 
                 status_code=200,
             )
         
+        except grpc.RpcError as e:
+            return self.__rpc_error_response('edit_book', e)
+        
         except Exception as e:
             
             self.logger.fatal (
@@ -170,37 +352,39 @@ class BookController:
         self, 
         book_id: int, 
     ) -> JSONResponse:
-        
-        """
-        Queues a delete operation for a book.
 
-        Publishes a message to RabbitMQ with the book deletion request.
+        """
+        Deletes a book through the book service.
 
         :param book_id: The ID of the book to delete.
-        :return: JSONResponse confirming that the delete request has been queued.
+        :return: JSONResponse with the deleted book, 404 if it does not exist.
         """
         
         try:
-            message = f"Deleting Book|{book_id}"
-            self.rabbitmq_controller.publish(message)
+            request = books_pb2.DeleteBookRequest(book_id=book_id)
+            book = self.grpc_stub.DeleteBook(request, timeout=self.deadlines['delete_book'])
             
             self.logger.info (
-                'Delete book task queued successfully for book_id: %s', 
-                book_id,
+                'Book deleted: %s', 
+                book.id,
             )
             
             return JSONResponse (
                 {
-                    'STATUS': 'SUCCESS',
+                    'STATUS': 'SUCCESS', 
+                    'BOOK': MessageToDict(book, preserving_proto_field_name=True),
                 }, 
                 status_code=200,
             )
         
+        except grpc.RpcError as e:
+            return self.__rpc_error_response('delete_book', e)
+        
         except Exception as e:
             
             self.logger.fatal (
-                "Exception in delete_book: %s", 
-                str(e),
+                'Exception in delete_book: %s', 
+                str(e), 
                 exc_info=True,
             )
             
@@ -219,31 +403,39 @@ class BookController:
     ) -> JSONResponse:
         
         """
-        Queues a create operation for a new book.
+        Creates a book through the book service.
 
-        Publishes a message to RabbitMQ with the book creation request.
+        PostBook returns the stored row, so the response carries the new book,
+        its id and upload time included, without a follow-up read.
 
         :param book_name: The name of the new book.
         :param book_author: The author of the new book.
-        :return: JSONResponse confirming that the create request has been queued.
+        :return: JSONResponse with the created book.
         """
         
         try:
-            message = f"Posting Book|{book_name}|{book_author}"
-            self.rabbitmq_controller.publish(message)
+            request = books_pb2.PostBookRequest (
+                book_name=book_name,
+                book_author=book_author,
+            )
+            book = self.grpc_stub.PostBook(request, timeout=self.deadlines['create_book'])
             
             self.logger.info (
-                'Create book task queued successfully for book: %s', 
-                book_name,
+                'Book created: %s', 
+                book.id,
             )
             
             return JSONResponse (
                 {
-                    'STATUS': 'SUCCESS',
+                    'STATUS': 'SUCCESS', 
+                    'BOOK': MessageToDict(book, preserving_proto_field_name=True),
                 }, 
                 status_code=201,
             )
         
+        except grpc.RpcError as e:
+            return self.__rpc_error_response('create_book', e)
+        
         except Exception as e:
             
             self.logger.fatal (
@@ -259,3 +451,184 @@ class BookController:
                 }, 
                 status_code=500,
             )
+    
+    async def import_books (
+        self, 
+        body: AsyncIterator[bytes], 
+        file_format: str,
+    ) -> JSONResponse:
+        
+        """
+        Streams an uploaded CSV or JSON Lines file into the ImportBooks RPC.
+
+        The request body is read chunk by chunk while the blocking client-streaming
+        call runs in a worker thread, so each body chunk is parsed and forwarded
+        before the next one is read and memory use does not grow with the upload.
+        Unlike create_book, rows are written directly rather than queued through
+        RabbitMQ, because the service loads them with COPY in bulk.
+
+        :param body: The raw request body as an async iterator of byte chunks.
+        :param file_format: Either `csv` or `jsonl`.
+        :return: JSONResponse with received, imported and failed counts and per-row errors.
+                 If the import fails part way, the error response still counts
+                 the rows committed before the failure under IMPORTED.
+        """
+        
+        loop = asyncio.get_running_loop()
+        
+        def chunks() -> Iterator[bytes]:
+            
+            # Runs on a gRPC thread: pull each body chunk from the event loop on demand.
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(body.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    return
+        
+        reader = BookImportReader (
+            chunks(), 
+            file_format, 
+            batch_size=self.import_batch_size, 
+            max_errors=self.import_max_errors,
+        )
+        
+        try:
+            summary = await asyncio.to_thread (
+                self.grpc_stub.ImportBooks, 
+                reader.requests(),
+                timeout=self.deadlines['import_books'],
+            )
+            
+            if reader.fatal_error:
+                return JSONResponse (
+                    {
+                        'STATUS': 'FAILED', 
+                        'DETAIL': reader.fatal_error,
+                    }, 
+                    status_code=400,
+                )
+            
+            errors = sorted (
+                [(error.line, error.message) for error in summary.errors] + reader.errors,
+            )[:self.import_max_errors]
+            
+            self.logger.info (
+                'Imported %s of %s books', 
+                summary.imported, 
+                summary.received + reader.failed,
+            )
+            
+            return JSONResponse (
+                {
+                    'STATUS': 'SUCCESS', 
+                    'RECEIVED': summary.received + reader.failed,
+                    'IMPORTED': summary.imported,
+                    'FAILED': summary.failed + reader.failed,
+                    'ERRORS': [
+                        {'line': line, 'message': message} 
+                        for line, message in errors
+                    ],
+                }, 
+                status_code=200,
+            )
+        
+        except grpc.RpcError as e:
+            
+            # The book service commits chunk by chunk, so rows may have been kept.
+            metadata = dict(e.trailing_metadata() or ())
+            
+            return self.__rpc_error_response (
+                'import_books', 
+                e, 
+                IMPORTED=int(metadata.get(IMPORTED_ROWS_KEY, 0)),
+            )
+        
+        except Exception as e:
+            
+            self.logger.fatal (
+                'Exception in import_books: %s', 
+                str(e), 
+                exc_info=True,
+            )
+            
+            return JSONResponse (
+                {
+                    'STATUS': 'FAILED', 
+                    'DETAIL': str(e),
+                }, 
+                status_code=500,
+            )
+    
+    def __field_mask (
+        self, 
+        fields: Optional[List[str]],
+    ) -> Optional[FieldMask]:
+        
+        """
+        Builds the FieldMask for a read request.
+
+        Names are passed through as given; the book service rejects unknown
+        ones with INVALID_ARGUMENT, which is answered with 400.
+
+        :param fields: Book fields to return, or None for all of them.
+        :return: The mask, or None to leave it unset when every field is wanted.
+        """
+        
+        return FieldMask(paths=fields) if fields else None
+    
+    def __rpc_error_response (
+        self, 
+        route: str, 
+        e: grpc.RpcError,
+        **fields: Any,
+    ) -> JSONResponse:
+        
+        """
+        Maps a failed gRPC call to an HTTP error response.
+
+        Deadline expiry becomes 504, invalid arguments, which are the caller's
+        fault, become 400, a missing book 404 and a stale `expected_version`
+        409; anything else is logged and reported as 500.
+
+        :param route: The controller method the call was made from.
+        :param e: The error raised by the gRPC stub.
+        :param fields: Extra fields for the response body.
+        :return: JSONResponse with the matching status code and the error details.
+        """
+        
+        code = e.code()
+        
+        if code == grpc.StatusCode.DEADLINE_EXCEEDED:
+            status_code = 504
+            self.logger.warning (
+                'Deadline of %ss exceeded in %s', 
+                self.deadlines[route], 
+                route,
+            )
+        
+        elif code == grpc.StatusCode.INVALID_ARGUMENT:
+            status_code = 400
+        
+        elif code == grpc.StatusCode.NOT_FOUND:
+            status_code = 404
+        
+        elif code == grpc.StatusCode.ABORTED:
+            status_code = 409
+        
+        else:
+            status_code = 500
+            self.logger.fatal (
+                'RPC error in %s: %s', 
+                route, 
+                e.details(), 
+                exc_info=True,
+            )
+        
+        return JSONResponse (
+            {
+                'STATUS': 'FAILED', 
+                'DETAIL': e.details(),
+                **fields,
+            }, 
+            status_code=status_code,
+        )
@@ -3,6 +3,7 @@ import uvicorn
 from fastapi import FastAPI
 
 from fastapi_service.routers.books.books import BookEndpoints
+from fastapi_service.routers.metrics.metrics import MetricsEndpoints
 from fastapi_service.lifecycle_events.startup_events.startup_handler import StartupHandler
 from fastapi_service.lifecycle_events.shutdown_events.shutdown_handler import ShutdownHandler
     
@@ -28,6 +29,7 @@ class AppFactory:
         self.shutdown_handler = ShutdownHandler()
         
         self.books_endpoint = BookEndpoints()
+        self.metrics_endpoint = MetricsEndpoints()
         
         self.fastapi_app = FastAPI()
         
@@ -68,6 +70,7 @@ class AppFactory:
         """
         
         self.fastapi_app.include_router(self.books_endpoint.router)
+        self.fastapi_app.include_router(self.metrics_endpoint.router)
     
     def create (
         self,
@@ -0,0 +1,193 @@
+import csv
+import json
+import codecs
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from grpc_service.books_pb import books_pb2
+
+CSV_FORMAT = 'csv'
+JSONL_FORMAT = 'jsonl'
+
+# Content types accepted by the import endpoint, mapped to the format they carry.
+IMPORT_CONTENT_TYPES = {
+    'text/csv': CSV_FORMAT,
+    'application/csv': CSV_FORMAT,
+    'application/x-ndjson': JSONL_FORMAT,
+    'application/jsonl': JSONL_FORMAT,
+    'application/jsonlines': JSONL_FORMAT,
+    'application/x-jsonlines': JSONL_FORMAT,
+}
+
+class BookImportReader:
+    
+    """
+    Turns a raw CSV or JSON Lines byte stream into ImportBooks request messages.
+
+    The source is consumed lazily, one body chunk at a time, and rows are
+    forwarded in batches of `batch_size`, so an upload of any size is relayed
+    to the book service without ever being held in memory. Rows that cannot
+    be parsed never reach the service; they are counted and reported here.
+
+    CSV input needs a header with `book_name` and either `book_author` or
+    `author`. JSON Lines input holds one object per line with the same keys.
+    """
+    
+    def __init__ (
+        self,
+        chunks: Iterable[bytes],
+        file_format: str,
+        batch_size: int = 1000,
+        max_errors: int = 1000,
+    ) -> None:
+        
+        """
+        Initializes the BookImportReader.
+
+        :param chunks: The raw upload, as an iterable of byte chunks.
+        :param file_format: Either `csv` or `jsonl`.
+        :param batch_size: Number of rows per ImportBooksRequest message.
+        :param max_errors: Maximum number of parse errors kept for the report.
+        """
+        
+        if file_format not in (CSV_FORMAT, JSONL_FORMAT):
+            raise ValueError(f'Unsupported import format: {file_format}')
+        
+        self.chunks = chunks
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        
+        self.failed = 0
+        self.errors: List[Tuple[int, str]] = []
+        self.fatal_error: Optional[str] = None
+    
+    def requests (
+        self,
+    ) -> Iterator[books_pb2.ImportBooksRequest]:
+        
+        """
+        Yields the parsed rows as ImportBooksRequest batches.
+
+        A problem that makes the whole file unreadable, such as a missing CSV
+        header, ends the stream early and is kept in `fatal_error`.
+
+        :return: An iterator suitable as the request stream of ImportBooks.
+        """
+        
+        rows = self._csv_rows() if self.file_format == CSV_FORMAT else self._jsonl_rows()
+        request = books_pb2.ImportBooksRequest()
+        
+        try:
+            for line, book_name, author in rows:
+                request.rows.add(line=line, book_name=book_name, author=author)
+                
+                if len(request.rows) >= self.batch_size:
+                    yield request
+                    request = books_pb2.ImportBooksRequest()
+        
+        except (ValueError, csv.Error) as e:
+            self.fatal_error = str(e)
+            return
+        
+        if request.rows:
+            yield request
+    
+    def _lines (
+        self,
+    ) -> Iterator[str]:
+        
+        """
+        Decodes the byte chunks as UTF-8 and re-splits them into lines.
+
+        :return: An iterator of lines, each keeping its line terminator.
+        """
+        
+        decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+        pending = ''
+        
+        for chunk in self.chunks:
+            # Split on '\n' only: '\r\n' may straddle two chunks, and CSV quoted
+            # fields may legitimately contain other Unicode line separators.
+            *lines, pending = (pending + decoder.decode(chunk)).split('\n')
+            for line in lines:
+                yield line + '\n'
+        
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+    
+    def _csv_rows (
+        self,
+    ) -> Iterator[Tuple[int, str, str]]:
+        
+        """
+        Parses CSV records, tolerating quoted fields that span several lines.
+
+        :return: An iterator of `(line, book_name, author)` tuples.
+        """
+        
+        reader = csv.DictReader(self._lines())
+        fields = reader.fieldnames or []
+        author_field = 'book_author' if 'book_author' in fields else 'author'
+        
+        if 'book_name' not in fields or author_field not in fields:
+            raise ValueError('CSV header must contain book_name and book_author (or author).')
+        
+        for record in reader:
+            book_name, author = record.get('book_name'), record.get(author_field)
+            
+            if book_name is None or author is None:
+                self._record_error(reader.line_num, 'Row has fewer columns than the header.')
+                continue
+            
+            yield reader.line_num, book_name, author
+    
+    def _jsonl_rows (
+        self,
+    ) -> Iterator[Tuple[int, str, str]]:
+        
+        """
+        Parses JSON Lines records, skipping blank lines.
+
+        :return: An iterator of `(line, book_name, author)` tuples.
+        """
+        
+        for line_number, line in enumerate(self._lines(), start=1):
+            if not line.strip():
+                continue
+            
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                self._record_error(line_number, f'Invalid JSON: {e.msg}.')
+                continue
+            
+            if not isinstance(record, dict):
+                self._record_error(line_number, 'Expected a JSON object.')
+                continue
+            
+            book_name = record.get('book_name')
+            author = record.get('book_author', record.get('author'))
+            
+            if not isinstance(book_name, str) or not isinstance(author, str):
+                self._record_error(line_number, 'book_name and book_author must be strings.')
+                continue
+            
+            yield line_number, book_name, author
+    
+    def _record_error (
+        self,
+        line: int,
+        message: str,
+    ) -> None:
+        
+        """
+        Counts an unparseable row, keeping its error only while under `max_errors`.
+
+        :param line: The row's line number in the upload.
+        :param message: Why the row could not be parsed.
+        """
+        
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, message))
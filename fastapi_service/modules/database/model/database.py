@@ -1,12 +1,15 @@
 import os
+import threading
 import psycopg2
-from psycopg2 import pool
 from typing import Optional
 
+from grpc_service.modules.database.connection_pool.connection_pool import InstrumentedConnectionPool
+
 class Database:
     
     instance: Optional["Database"] = None
-    pool: Optional[psycopg2.pool.SimpleConnectionPool] = None
+    pool: Optional[InstrumentedConnectionPool] = None
+    lock = threading.Lock()
 
     def __new__ (
         cls,
@@ -36,6 +39,11 @@ class Database:
         self.db_user = os.getenv('DB_USER')
         self.password = os.getenv('DB_PASSWORD')
         self.database = os.getenv('DB_NAME')
+        self.pool_min_size = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+        self.pool_max_size = int(os.getenv('DB_POOL_MAX_SIZE', '20'))
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+        self.pool_max_age = float(os.getenv('DB_POOL_MAX_AGE', '1800'))
+        self.pool_health_check_after = float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30'))
     
     def connect (
         self,
@@ -44,17 +52,23 @@ class Database:
         """
         Establishes a connection pool to the PostgreSQL database if not already initialized.
 
-        The connection pool allows multiple connections to be managed efficiently.
+        The pool is thread-safe and opens `DB_POOL_MIN_SIZE` connections up front.
+        The lock keeps concurrent first callers from creating two pools.
         """
         
-        if self.pool is None:
-            self.pool = pool.SimpleConnectionPool (
-                1, 20,  # minconn, maxconn
-                host=self.host,
-                user=self.db_user,
-                password=self.password,
-                database=self.database
-            )
+        with self.lock:
+            if self.pool is None:
+                self.pool = InstrumentedConnectionPool (
+                    self.pool_min_size,
+                    self.pool_max_size,
+                    timeout=self.pool_timeout,
+                    max_age=self.pool_max_age,
+                    health_check_after=self.pool_health_check_after,
+                    host=self.host,
+                    user=self.db_user,
+                    password=self.password,
+                    database=self.database,
+                )
             
     def get_connection (
         self,
@@ -64,9 +78,14 @@ class Database:
         Retrieves a database connection from the connection pool.
 
         If the pool is not initialized, it will establish a connection first.
+        When every connection is checked out the call waits up to
+        `DB_POOL_TIMEOUT` seconds for one to be returned.
 
         Returns:
             psycopg2.extensions.connection: A database connection from the pool.
+
+        Raises:
+            PoolTimeout: If no connection became available within the timeout.
         """
         
         if self.pool is None:
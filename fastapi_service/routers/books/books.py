@@ -1,18 +1,67 @@
-from fastapi import APIRouter, Depends
+import os
+from typing import List, Optional
+
+import grpc
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 
 from fastapi_service.schemas.book.book import Book
 from fastapi_service.schemas.book_response.book_response import BookResponse
 from fastapi_service.schemas.books_response.books_response import BooksResponse
 from fastapi_service.controllers.book_controller.book_controller import BookController
+from fastapi_service.modules.book_import.book_import_reader import IMPORT_CONTENT_TYPES
+from grpc_service.books_pb import books_pb2_grpc
 
 from fastapi_service.routers.base_router.base_router import BaseRouter
 
+FIELDS_PATTERN = r"^\s*\w+\s*(,\s*\w+\s*)*$"
+
+def split_fields (
+    fields: Optional[str],
+) -> Optional[List[str]]:
+    
+    """
+    Splits a `fields=id,book_name` query parameter into field names.
+
+    Args:
+        fields (Optional[str]): The raw query parameter.
+
+    Returns:
+        Optional[List[str]]: The field names, or None when the parameter was not given.
+    """
+    
+    if fields is None:
+        return None
+    return [field.strip() for field in fields.split(",")]
+
+_book_stub = None
+
+def get_book_controller() -> BookController:
+    
+    """
+    Builds the BookController handed to each request.
+
+    Every controller shares one stub, on a channel to `GRPC_SERVER_ADDRESS`
+    (`localhost:$GRPC_SERVER_PORT` by default) opened on first use.
+
+    Returns:
+        BookController: A controller bound to the book service.
+    """
+    
+    global _book_stub
+    if _book_stub is None:
+        address = os.getenv (
+            'GRPC_SERVER_ADDRESS', 
+            f"localhost:{os.getenv('GRPC_SERVER_PORT', '50051')}",
+        )
+        _book_stub = books_pb2_grpc.BookServiceStub(grpc.insecure_channel(address))
+    return BookController(_book_stub)
+
 class BookEndpoints(BaseRouter):
     
     """
     Class-based endpoints for book operations.
-    
+
     This class encapsulates all the routes related to books,
     creating an internal APIRouter with the necessary endpoints.
     """
@@ -30,7 +79,7 @@ class BookEndpoints(BaseRouter):
         
         self.router = APIRouter(prefix="/books", tags=["Books"])
         self._setup_routes()
-        
+    
     def _setup_routes (
         self,
     ) -> None:
@@ -46,7 +95,25 @@ class BookEndpoints(BaseRouter):
                 "methods": ["GET"],
                 "response_model": BooksResponse,
                 "summary": "Get all books",
-                "description": "Retrieve a list of all books in the database.",
+                "description": (
+                    "Retrieve a list of all books in the database. Pass `limit` and/or "
+                    "`cursor` to page through them newest first instead; follow "
+                    "`next_cursor` until it is null. Pass `ids=1,2,3` to fetch "
+                    "specific books in one call, in the given order. Pass "
+                    "`fields=id,book_name` to receive only those fields."
+                ),
+            },
+            {
+                "path": "/import",
+                "endpoint": self.import_books,
+                "methods": ["POST"],
+                "summary": "Bulk import books",
+                "description": (
+                    "Stream a CSV (`text/csv`, header `book_name,book_author`) or JSON Lines "
+                    "(`application/x-ndjson`) file as the raw request body. The body is "
+                    "relayed to the book service as it arrives and loaded with COPY; the "
+                    "response reports received, imported and failed counts with per-row errors."
+                ),
             },
             {
                 "path": "/{book_id}",
@@ -54,6 +121,7 @@ class BookEndpoints(BaseRouter):
                 "methods": ["GET"],
                 "response_model": BookResponse,
                 "summary": "Get book by ID",
+                "description": "Pass `fields=id,book_name` to receive only those fields.",
             },
             {
                 "path": "/",
@@ -82,29 +150,99 @@ class BookEndpoints(BaseRouter):
             self.router.add_api_route(**route)
 
     async def get_all_books (
+        self,
         token: str,
-        controller: BookController = Depends(BookController),
+        limit: Optional[int] = Query(None, ge=1),
+        cursor: Optional[str] = None,
+        ids: Optional[str] = Query(None, pattern=r"^\s*\d+\s*(,\s*\d+\s*)*$"),
+        fields: Optional[str] = Query(None, pattern=FIELDS_PATTERN),
+        controller: BookController = Depends(get_book_controller),
     ) -> JSONResponse:
         
         """
-        Retrieve all books.
+        Retrieve all books, one keyset-paginated page of them, or specific books by ID.
 
         Args:
             token (str): Authentication token extracted from the request header.
+            limit (Optional[int]): Page size. When `limit` or `cursor` is given the list is paginated.
+            cursor (Optional[str]): The `next_cursor` returned with the previous page.
+            ids (Optional[str]): Comma-separated book IDs to fetch in a single batch.
+            fields (Optional[str]): Comma-separated book fields to return, all of them when omitted.
             controller (BookController): The controller responsible for book operations.
 
         Returns:
-            JSONResponse: A response containing the list of books.
+            JSONResponse: A response containing the list of books, plus `next_cursor` when paginated
+                          or one result per ID when `ids` is given.
         """
         
+        if ids is not None:
+            if limit is not None or cursor is not None:
+                raise HTTPException (
+                    status_code=400, 
+                    detail="ids cannot be combined with limit or cursor.",
+                )
+            
+            return await controller.batch_get_books (
+                [int(book_id) for book_id in ids.split(",")],
+                fields=split_fields(fields),
+            )
+        
+        if limit is not None or cursor is not None:
+            return await controller.list_books (
+                limit, 
+                cursor,
+                fields=split_fields(fields),
+            )
+        
         return await controller.get_all_books (
-            token,
+            fields=split_fields(fields),
         )
 
+    async def import_books (
+        self,
+        token: str,
+        request: Request,
+        format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+        controller: BookController = Depends(get_book_controller),
+    ) -> JSONResponse:
+        
+        """
+        Bulk import books from a streamed CSV or JSON Lines request body.
+
+        The file is sent as the raw body rather than as multipart form data,
+        because FastAPI spools multipart uploads to a temporary file before the
+        handler runs; the raw body can be relayed while it is still arriving.
+
+        Args:
+            token (str): Authentication token.
+            request (Request): The incoming request, whose body is the file.
+            format (Optional[str]): `csv` or `jsonl`; taken from Content-Type when omitted.
+            controller (BookController): The controller responsible for book operations.
+
+        Returns:
+            JSONResponse: A response containing the import counts and per-row errors.
+        """
+        
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        file_format = format or IMPORT_CONTENT_TYPES.get(content_type)
+        
+        if file_format is None:
+            raise HTTPException (
+                status_code=415, 
+                detail="Send text/csv or application/x-ndjson, or pass ?format=csv|jsonl.",
+            )
+        
+        return await controller.import_books (
+            request.stream(), 
+            file_format,
+        )
+    
     async def get_book_by_id (
+        self,
         book_id: int,
         token: str,
-        controller: BookController = Depends(BookController),
+        fields: Optional[str] = Query(None, pattern=FIELDS_PATTERN),
+        controller: BookController = Depends(get_book_controller),
     ) -> JSONResponse:
         
         """
@@ -113,6 +251,7 @@ class BookEndpoints(BaseRouter):
         Args:
             book_id (int): The ID of the book to retrieve.
             token (str): Authentication token.
+            fields (Optional[str]): Comma-separated book fields to return, all of them when omitted.
             controller (BookController): The controller responsible for book operations.
 
         Returns:
@@ -121,13 +260,14 @@ class BookEndpoints(BaseRouter):
         
         return await controller.get_book_by_id (
             book_id, 
-            token,
+            fields=split_fields(fields),
         )
 
     async def post_book (
+        self,
         book: Book,
         token: str,
-        controller: BookController = Depends(BookController),
+        controller: BookController = Depends(get_book_controller),
     ) -> JSONResponse:
         
         """
@@ -144,15 +284,16 @@ class BookEndpoints(BaseRouter):
         
         return await controller.create_book (
             book.book_name, 
-            book.book_author, 
-            token,
+            book.book_author,
         )
 
     async def edit_book (
+        self,
         book_id: int,
         book: Book,
         token: str,
-        controller: BookController = Depends(BookController),
+        expected_version: Optional[int] = Query(None, ge=1),
+        controller: BookController = Depends(get_book_controller),
     ) -> JSONResponse:
         
         """
@@ -162,6 +303,8 @@ class BookEndpoints(BaseRouter):
             book_id (int): The ID of the book to update.
             book (Book): The updated book data.
             token (str): Authentication token.
+            expected_version (Optional[int]): The `version` the client last read; the update
+                is refused with 409 if the book has changed since.
             controller (BookController): The controller responsible for book operations.
 
         Returns:
@@ -172,13 +315,14 @@ class BookEndpoints(BaseRouter):
             book_id, 
             book.book_name, 
             book.book_author, 
-            token,
+            expected_version=expected_version,
         )
 
     async def delete_book (
+        self,
         book_id: int,
         token: str,
-        controller: BookController = Depends(BookController),
+        controller: BookController = Depends(get_book_controller),
     ) -> JSONResponse:
         
         """
@@ -194,6 +338,5 @@ class BookEndpoints(BaseRouter):
         """
         
         return await controller.delete_book (
-            book_id, 
-            token,
+            book_id,
         )
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from fastapi_service.routers.base_router.base_router import BaseRouter
+
+class MetricsEndpoints(BaseRouter):
+    
+    """
+    Class-based endpoint exposing the process metrics for Prometheus.
+
+    The route is left unprotected so that a scraper does not need a JWT.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initialize the MetricsEndpoints and set up the router.
+        """
+        
+        super().__init__(auto_protect=False)
+        
+        self.router = APIRouter(tags=["Metrics"])
+        self._setup_routes()
+    
+    def _setup_routes (
+        self,
+    ) -> None:
+        
+        """
+        Registers the `/metrics` route with the router.
+        """
+        
+        self.router.add_api_route (
+            "/metrics",
+            self.get_metrics,
+            methods=["GET"],
+            summary="Prometheus metrics",
+            include_in_schema=False,
+        )
+    
+    async def get_metrics (
+        self,
+    ) -> Response:
+        
+        """
+        Render every registered metric in the Prometheus text exposition format.
+
+        Returns:
+            Response: The metrics as `text/plain; version=0.0.4`.
+        """
+        
+        return Response (
+            generate_latest(REGISTRY),
+            media_type=CONTENT_TYPE_LATEST,
+        )
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 from fastapi_service.schemas.book_response.book_response import BookResponse
 
@@ -11,6 +11,8 @@ class BooksResponse(BaseModel):
 
     Attributes:
         books (List[BookResponse]): A list of books with their details, including their ID, name, and author.
+        next_cursor (Optional[str]): Cursor of the next page when the list is paginated, None on the last page.
     """
 
     books: List[BookResponse]
+    next_cursor: Optional[str] = None
@@ -3,6 +3,8 @@ import json
 import unittest
 from unittest.mock import MagicMock, patch
 
+import grpc
+
 from grpc_service.books_pb import books_pb2
 
 from fastapi_service.controllers.book_controller.book_controller import BookController
@@ -47,16 +49,20 @@ class TestBookController(unittest.TestCase):
         Test retrieving all books successfully.
 
         This test ensures:
-        - The correct gRPC method is called.
-        - The correct response is returned.
+        - The requested fields reach the service as a FieldMask.
+        - Only the fields the service filled in are serialized.
         - The RabbitMQ message is published.
         """
         
-        mock_books = ['book1', 'book2', 'book3']
-        self.mock_grpc_stub.GetAllBooks.return_value = mock_books
+        self.mock_grpc_stub.GetAllBooks.return_value = books_pb2.BooksResponse (
+            books=[
+                books_pb2.BookResponse(id=1, book_name='Book1'),
+                books_pb2.BookResponse(id=2, book_name='Book2'),
+            ],
+        )
         
         response = asyncio.run (
-            self.controller.get_all_books(),
+            self.controller.get_all_books(fields=['id', 'book_name']),
         )
         
         self.assertEqual(response.status_code, 200)
@@ -64,12 +70,18 @@ class TestBookController(unittest.TestCase):
             json.loads(response.body.decode()), 
             {
                 'STATUS': 'SUCCESS', 
-                'BOOKS': mock_books,
+                'BOOKS': [
+                    {'id': 1, 'book_name': 'Book1'},
+                    {'id': 2, 'book_name': 'Book2'},
+                ],
             },
         )
-        self.mock_grpc_stub.GetAllBooks.assert_called_once()
+        self.mock_grpc_stub.GetAllBooks.assert_called_once_with (
+            books_pb2.EmptyRequest(fields={'paths': ['id', 'book_name']}),
+            timeout=5.0,
+        )
         self.mock_rabbitmq_controller.publish.assert_called_once_with('Fetching all books')
-        
+    
     @patch.object(RabbitMQController, 'publish')
     def test_get_book_by_id_success (
         self, 
@@ -86,15 +98,13 @@ class TestBookController(unittest.TestCase):
         """
         
         book_id = 1
-        mock_book = {
-            'id': book_id, 
-            'name': 'Test Book', 
-            'author': 'Test Author',
-        }
-        self.mock_grpc_stub.GetBookById.return_value = mock_book
+        self.mock_grpc_stub.GetBookById.return_value = books_pb2.BookResponse (
+            id=book_id, 
+            author='Test Author',
+        )
         
         response = asyncio.run (
-            self.controller.get_book_by_id(book_id),
+            self.controller.get_book_by_id(book_id, fields=['id', 'author']),
         )
         
         self.assertEqual(response.status_code, 200)
@@ -102,32 +112,35 @@ class TestBookController(unittest.TestCase):
             json.loads(response.body.decode()), 
             {
                 'STATUS': 'SUCCESS', 
-                'BOOK': mock_book,
+                'BOOK': {'id': book_id, 'author': 'Test Author'},
             },
         )
         self.mock_grpc_stub.GetBookById.assert_called_once_with (
-            books_pb2.GetBookByIdRequest(book_id=book_id)
+            books_pb2.BookRequest(book_id=book_id, fields={'paths': ['id', 'author']}),
+            timeout=5.0,
         )
         self.mock_rabbitmq_controller.publish.assert_called_once_with(f'Fetching book by id: {book_id}')
-        
-    @patch.object(RabbitMQController, 'publish')
+    
     def test_edit_book_success (
         self, 
-        mock_publish,
     ) -> None:
         
         """
         Test editing a book successfully.
 
         This test ensures:
-        - The book is updated correctly.
-        - The correct response is returned.
-        - The RabbitMQ message is published.
+        - UpdateBook is called with the new fields and the route's deadline.
+        - The updated book is returned without a follow-up read.
         """
         
         book_id = 1
         book_name = 'New Book'
         author = 'New Author'
+        self.mock_grpc_stub.UpdateBook.return_value = books_pb2.BookResponse (
+            id=book_id,
+            book_name=book_name,
+            author=author,
+        )
         
         response = asyncio.run (
             self.controller.edit_book (
@@ -142,26 +155,51 @@ class TestBookController(unittest.TestCase):
             json.loads(response.body.decode()), 
             {
                 'STATUS': 'SUCCESS',
+                'BOOK': {'id': book_id, 'book_name': book_name, 'author': author},
             },
         )
-        self.mock_rabbitmq_controller.publish.assert_called_once_with(f'Editing Book|{book_id}|{book_name}|{author}')
+        self.mock_grpc_stub.UpdateBook.assert_called_once_with (
+            books_pb2.UpdateBookRequest(book_id=book_id, book_name=book_name, author=author),
+            timeout=5.0,
+        )
+        self.mock_grpc_stub.GetBookById.assert_not_called()
+    
+    def test_edit_book_version_conflict (
+        self,
+    ) -> None:
         
-    @patch.object(RabbitMQController, 'publish')
+        """
+        Test that an `expected_version` the book has moved past is answered with 409.
+        """
+        
+        error = grpc.RpcError()
+        error.code = lambda: grpc.StatusCode.ABORTED
+        error.details = lambda: 'Book is at version 3, not 2.'
+        self.mock_grpc_stub.UpdateBook.side_effect = error
+        
+        response = asyncio.run(self.controller.edit_book(1, 'New Book', '', expected_version=2))
+        
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(json.loads(response.body.decode())['DETAIL'], 'Book is at version 3, not 2.')
+        self.mock_grpc_stub.UpdateBook.assert_called_once_with (
+            books_pb2.UpdateBookRequest(book_id=1, book_name='New Book', expected_version=2),
+            timeout=5.0,
+        )
+    
     def test_delete_book_success (
         self, 
-        mock_publish,
     ) -> None:
         
         """
         Test deleting a book successfully.
 
         This test ensures:
-        - The book is deleted correctly.
-        - The correct response is returned.
-        - The RabbitMQ message is published.
+        - DeleteBook is called with the book's ID.
+        - The deleted book is returned.
         """
         
         book_id = 1
+        self.mock_grpc_stub.DeleteBook.return_value = books_pb2.BookResponse(id=book_id, book_name='Old Book')
         
         response = asyncio.run (
             self.controller.delete_book (
@@ -174,27 +212,51 @@ class TestBookController(unittest.TestCase):
             json.loads(response.body.decode()), 
             {
                 'STATUS': 'SUCCESS',
+                'BOOK': {'id': book_id, 'book_name': 'Old Book'},
             },
         )
-        self.mock_rabbitmq_controller.publish.assert_called_once_with(f'Deleting Book|{book_id}')
+        self.mock_grpc_stub.DeleteBook.assert_called_once_with (
+            books_pb2.DeleteBookRequest(book_id=book_id),
+            timeout=5.0,
+        )
+    
+    def test_delete_book_not_found (
+        self,
+    ) -> None:
         
-    @patch.object(RabbitMQController, 'publish')
+        """
+        Test that deleting a missing book is answered with 404.
+        """
+        
+        error = grpc.RpcError()
+        error.code = lambda: grpc.StatusCode.NOT_FOUND
+        error.details = lambda: 'Book not found.'
+        self.mock_grpc_stub.DeleteBook.side_effect = error
+        
+        response = asyncio.run(self.controller.delete_book(1))
+        
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.body.decode())['DETAIL'], 'Book not found.')
+    
     def test_create_book_success (
         self, 
-        mock_publish,
     ) -> None:
         
         """
         Test creating a book successfully.
 
         This test ensures:
-        - The book is created correctly.
-        - The correct response is returned.
-        - The RabbitMQ message is published.
+        - PostBook is called with the new book.
+        - The stored book, id included, is returned with 201.
         """
         
         book_name = 'New Book'
         book_author = 'New Author'
+        self.mock_grpc_stub.PostBook.return_value = books_pb2.BookResponse (
+            id=7,
+            book_name=book_name,
+            author=book_author,
+        )
         
         response = asyncio.run (
             self.controller.create_book (
@@ -208,27 +270,29 @@ class TestBookController(unittest.TestCase):
             json.loads(response.body.decode()), 
             {
                 'STATUS': 'SUCCESS',
+                'BOOK': {'id': 7, 'book_name': book_name, 'author': book_author},
             },
         )
-        self.mock_rabbitmq_controller.publish.assert_called_once_with(f'Posting Book|{book_name}|{book_author}')
+        self.mock_grpc_stub.PostBook.assert_called_once_with (
+            books_pb2.PostBookRequest(book_name=book_name, book_author=book_author),
+            timeout=5.0,
+        )
 
-    @patch.object(RabbitMQController, 'publish')
     def test_create_book_error (
         self, 
-        mock_publish,
     ) -> None:
         
         """
         Test handling an error when creating a book.
 
         This test ensures:
-        - Errors in RabbitMQ publishing are caught.
+        - Unexpected errors from the call are caught.
         - The correct response is returned.
         """
         
         book_name = 'New Book'
         book_author = 'New Author'
-        self.mock_rabbitmq_controller.publish.side_effect = Exception('Error publishing to RabbitMQ')
+        self.mock_grpc_stub.PostBook.side_effect = Exception('Book service unavailable')
         
         response = asyncio.run (
             self.controller.create_book (
@@ -242,11 +306,220 @@ class TestBookController(unittest.TestCase):
             json.loads(response.body.decode()), 
             {
                 'STATUS': 'FAILED', 
-                'DETAIL': 'Error publishing to RabbitMQ',
+                'DETAIL': 'Book service unavailable',
             },
         )
-        self.mock_rabbitmq_controller.publish.assert_called_once_with(f'Posting Book|{book_name}|{book_author}')
 
+    def test_list_books_success (
+        self,
+    ) -> None:
+        
+        """
+        Test retrieving one page of books.
+
+        This test ensures:
+        - The limit and cursor are forwarded to the ListBooks RPC.
+        - Books are serialized and the next cursor is returned.
+        """
+        
+        page = books_pb2.ListBooksResponse (
+            books=[books_pb2.BookResponse(id=2, book_name='Book', author='Author')],
+            next_cursor='abc',
+        )
+        self.mock_grpc_stub.ListBooks.return_value = page
+        
+        response = asyncio.run (
+            self.controller.list_books(1, 'xyz'),
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual (
+            json.loads(response.body.decode()), 
+            {
+                'STATUS': 'SUCCESS', 
+                'BOOKS': [{'id': 2, 'book_name': 'Book', 'author': 'Author'}],
+                'NEXT_CURSOR': 'abc',
+            },
+        )
+        self.mock_grpc_stub.ListBooks.assert_called_once_with (
+            books_pb2.ListBooksRequest(page_size=1, cursor='xyz'),
+            timeout=5.0,
+        )
+    
+    def test_list_books_invalid_cursor (
+        self,
+    ) -> None:
+        
+        """
+        Test that an INVALID_ARGUMENT from the service becomes a 400.
+        """
+        
+        error = grpc.RpcError()
+        error.code = lambda: grpc.StatusCode.INVALID_ARGUMENT
+        error.details = lambda: "Invalid cursor: 'xyz'"
+        self.mock_grpc_stub.ListBooks.side_effect = error
+        
+        response = asyncio.run (
+            self.controller.list_books(None, 'xyz'),
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual (
+            json.loads(response.body.decode())['DETAIL'], 
+            "Invalid cursor: 'xyz'",
+        )
+
+    def test_batch_get_books_success (
+        self,
+    ) -> None:
+        
+        """
+        Test retrieving several books by ID.
+
+        This test ensures:
+        - All IDs are sent in one BatchGetBooks call.
+        - Missing books are reported in place with `found` set to False.
+        """
+        
+        batch = books_pb2.BatchGetBooksResponse()
+        batch.results.add(book_id=2, found=True).book.CopyFrom (
+            books_pb2.BookResponse(id=2, book_name='Book', author='Author'),
+        )
+        batch.results.add(book_id=9)
+        self.mock_grpc_stub.BatchGetBooks.return_value = batch
+        
+        response = asyncio.run (
+            self.controller.batch_get_books([2, 9]),
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual (
+            json.loads(response.body.decode())['RESULTS'], 
+            [
+                {'book_id': 2, 'found': True, 'book': {'id': 2, 'book_name': 'Book', 'author': 'Author'}},
+                {'book_id': 9, 'found': False, 'book': None},
+            ],
+        )
+        self.mock_grpc_stub.BatchGetBooks.assert_called_once_with (
+            books_pb2.BatchGetBooksRequest(book_ids=[2, 9]),
+            timeout=5.0,
+        )
+    
+    def test_fields_are_sent_as_field_mask (
+        self,
+    ) -> None:
+        
+        """
+        Test that requested fields reach the service as a FieldMask and only they are serialized.
+        """
+        
+        self.mock_grpc_stub.ListBooks.return_value = books_pb2.ListBooksResponse (
+            books=[books_pb2.BookResponse(book_name='Book')],
+        )
+        
+        response = asyncio.run (
+            self.controller.list_books(1, None, fields=['book_name']),
+        )
+        
+        self.assertEqual(json.loads(response.body.decode())['BOOKS'], [{'book_name': 'Book'}])
+        self.mock_grpc_stub.ListBooks.assert_called_once_with (
+            books_pb2.ListBooksRequest(page_size=1, fields={'paths': ['book_name']}),
+            timeout=5.0,
+        )
+    
+    def test_batch_get_books_deadline_exceeded (
+        self,
+    ) -> None:
+        
+        """
+        Test that a call running past its deadline becomes a 504.
+        """
+        
+        error = grpc.RpcError()
+        error.code = lambda: grpc.StatusCode.DEADLINE_EXCEEDED
+        error.details = lambda: 'Deadline Exceeded'
+        self.mock_grpc_stub.BatchGetBooks.side_effect = error
+        
+        response = asyncio.run (
+            self.controller.batch_get_books([2, 9]),
+        )
+        
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual (
+            json.loads(response.body.decode())['DETAIL'], 
+            'Deadline Exceeded',
+        )
+
+    def test_import_books_streams_body (
+        self,
+    ) -> None:
+        
+        """
+        Test importing books from a streamed request body.
+
+        This test ensures:
+        - The body is relayed to ImportBooks as a stream of request batches.
+        - Service counts are merged with rows rejected while parsing.
+        """
+        
+        async def body():
+            yield b'book_name,book_author\nDune,Her'
+            yield b'bert\nEmma\n'
+        
+        def import_books(requests, timeout):
+            self.assertEqual(timeout, 300.0)
+            rows = [row for request in requests for row in request.rows]
+            self.assertEqual([row.book_name for row in rows], ['Dune'])
+            return books_pb2.ImportBooksResponse(received=1, imported=1)
+        
+        self.mock_grpc_stub.ImportBooks.side_effect = import_books
+        
+        response = asyncio.run (
+            self.controller.import_books(body(), 'csv'),
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual (
+            json.loads(response.body.decode()), 
+            {
+                'STATUS': 'SUCCESS', 
+                'RECEIVED': 2,
+                'IMPORTED': 1,
+                'FAILED': 1,
+                'ERRORS': [{'line': 3, 'message': 'Row has fewer columns than the header.'}],
+            },
+        )
+
+    def test_import_books_reports_rows_kept_on_failure (
+        self,
+    ) -> None:
+        
+        """
+        Test that an import failing part way reports the rows the book service had committed.
+        """
+        
+        async def body():
+            yield b'book_name,book_author\nDune,Herbert\n'
+        
+        error = grpc.RpcError()
+        error.code = lambda: grpc.StatusCode.DEADLINE_EXCEEDED
+        error.details = lambda: 'Deadline exceeded: canceling statement'
+        error.trailing_metadata = lambda: (('imported-rows', '5000'),)
+        self.mock_grpc_stub.ImportBooks.side_effect = error
+        
+        response = asyncio.run (
+            self.controller.import_books(body(), 'csv'),
+        )
+        
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual (
+            json.loads(response.body.decode()), 
+            {
+                'STATUS': 'FAILED', 
+                'DETAIL': 'Deadline exceeded: canceling statement',
+                'IMPORTED': 5000,
+            },
+        )
 
 if __name__ == '__main__':
     unittest.main()
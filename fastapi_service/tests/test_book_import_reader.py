@@ -0,0 +1,76 @@
+import unittest
+
+from fastapi_service.modules.book_import.book_import_reader import BookImportReader
+
+class TestBookImportReader(unittest.TestCase):
+    
+    """
+    Unit tests for the `BookImportReader` class.
+
+    This test suite ensures that:
+    - CSV and JSON Lines uploads are parsed across arbitrary chunk boundaries.
+    - Rows are batched into ImportBooksRequest messages.
+    - Unparseable rows and unreadable files are reported.
+    """
+    
+    def test_csv_split_across_chunks (
+        self,
+    ) -> None:
+        
+        """
+        Test parsing a CSV whose records and CRLF terminators straddle chunk boundaries.
+        """
+        
+        data = b'book_name,book_author\r\nDune,Herbert\r\n"War,\nand Peace",Tolstoy\r\nEmma,Austen\r\n'
+        chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+        
+        reader = BookImportReader(chunks, 'csv', batch_size=2)
+        requests = list(reader.requests())
+        
+        self.assertEqual([len(request.rows) for request in requests], [2, 1])
+        self.assertEqual (
+            [(row.line, row.book_name, row.author) for request in requests for row in request.rows],
+            [(2, 'Dune', 'Herbert'), (4, 'War,\nand Peace', 'Tolstoy'), (5, 'Emma', 'Austen')],
+        )
+        self.assertEqual(reader.failed, 0)
+    
+    def test_csv_missing_header (
+        self,
+    ) -> None:
+        
+        """
+        Test that a CSV without the required columns ends the stream with a fatal error.
+        """
+        
+        reader = BookImportReader([b'title,writer\nDune,Herbert\n'], 'csv')
+        
+        self.assertEqual(list(reader.requests()), [])
+        self.assertIn('book_name', reader.fatal_error)
+    
+    def test_jsonl_rows_and_errors (
+        self,
+    ) -> None:
+        
+        """
+        Test parsing JSON Lines, skipping blank lines and reporting bad ones by line number.
+        """
+        
+        data = (
+            b'{"book_name": "Dune", "book_author": "Herbert"}\n'
+            b'\n'
+            b'{"book_name": "Emma"\n'
+            b'[1, 2]\n'
+            b'{"book_name": "Ulysses", "author": "Joyce"}'
+        )
+        
+        reader = BookImportReader([data], 'jsonl', max_errors=1)
+        rows = [row for request in reader.requests() for row in request.rows]
+        
+        self.assertEqual([(row.line, row.book_name) for row in rows], [(1, 'Dune'), (5, 'Ulysses')])
+        self.assertEqual(reader.failed, 2)
+        self.assertEqual(len(reader.errors), 1)
+        self.assertEqual(reader.errors[0][0], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
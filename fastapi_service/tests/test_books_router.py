@@ -0,0 +1,240 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from fastapi_service.decorators.jwt_ssecurity.jwt_security import JWTSecurity
+from fastapi_service.routers.books.books import BookEndpoints, get_book_controller
+
+class TestBookEndpoints(unittest.TestCase):
+    
+    """
+    Tests for the `/books` routes, driven through `TestClient`.
+
+    This test suite ensures that:
+    - Requests reach the matching `BookController` method with the right arguments.
+    - The token is validated but not forwarded to the controller.
+    - The controller's response is returned to the client unchanged.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Mount the book routes on a fresh app with a mock controller and JWT validation stubbed out.
+        """
+        
+        self.controller = MagicMock()
+        
+        app = FastAPI()
+        app.include_router(BookEndpoints().router)
+        app.dependency_overrides[get_book_controller] = lambda: self.controller
+        
+        validate_jwt = patch.object (
+            JWTSecurity,
+            'validate_jwt',
+            new_callable=AsyncMock,
+            return_value=True,
+        )
+        self.mock_validate_jwt = validate_jwt.start()
+        self.addCleanup(validate_jwt.stop)
+        
+        self.client = TestClient(app)
+    
+    def test_get_all_books_page (
+        self,
+    ) -> None:
+        
+        """
+        Test that GET /books/?limit=&cursor= asks the controller for one page.
+        """
+        
+        self.controller.list_books = AsyncMock (
+            return_value=JSONResponse(status_code=200, content={'BOOKS': [], 'next_cursor': None}),
+        )
+        
+        response = self.client.get (
+            '/books/',
+            params={'token': 'valid_token', 'limit': 2, 'cursor': 'abc'},
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'BOOKS': [], 'next_cursor': None})
+        self.controller.list_books.assert_awaited_once_with(2, 'abc', fields=None)
+        self.mock_validate_jwt.assert_awaited_once_with('valid_token')
+    
+    def test_get_books_by_ids (
+        self,
+    ) -> None:
+        
+        """
+        Test that GET /books/?ids= fetches the listed books in one batch, in order.
+        """
+        
+        self.controller.batch_get_books = AsyncMock (
+            return_value=JSONResponse(status_code=200, content={'RESULTS': []}),
+        )
+        
+        response = self.client.get (
+            '/books/',
+            params={'token': 'valid_token', 'ids': '3,1'},
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.controller.batch_get_books.assert_awaited_once_with([3, 1], fields=None)
+    
+    def test_get_books_by_ids_with_limit (
+        self,
+    ) -> None:
+        
+        """
+        Test that `ids` combined with `limit` is refused with 400.
+        """
+        
+        self.controller.batch_get_books = AsyncMock()
+        
+        response = self.client.get (
+            '/books/',
+            params={'token': 'valid_token', 'ids': '3,1', 'limit': 2},
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        self.controller.batch_get_books.assert_not_awaited()
+    
+    def test_import_books (
+        self,
+    ) -> None:
+        
+        """
+        Test that POST /books/import relays a CSV body with its format to the controller.
+        """
+        
+        self.controller.import_books = AsyncMock (
+            return_value=JSONResponse(status_code=200, content={'received': 1, 'imported': 1, 'failed': 0, 'errors': []}),
+        )
+        
+        response = self.client.post (
+            '/books/import',
+            params={'token': 'valid_token'},
+            content=b'book_name,book_author\nDune,Frank Herbert\n',
+            headers={'content-type': 'text/csv'},
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['imported'], 1)
+        self.controller.import_books.assert_awaited_once()
+        self.assertEqual(self.controller.import_books.await_args.args[1], 'csv')
+    
+    def test_import_books_unknown_format (
+        self,
+    ) -> None:
+        
+        """
+        Test that a body that is neither CSV nor JSON Lines is refused with 415.
+        """
+        
+        self.controller.import_books = AsyncMock()
+        
+        response = self.client.post (
+            '/books/import',
+            params={'token': 'valid_token'},
+            content=b'%PDF-1.7',
+            headers={'content-type': 'application/pdf'},
+        )
+        
+        self.assertEqual(response.status_code, 415)
+        self.controller.import_books.assert_not_awaited()
+    
+    def test_get_book_by_id_fields (
+        self,
+    ) -> None:
+        
+        """
+        Test that `?fields=` is split into field names for the controller.
+        """
+        
+        self.controller.get_book_by_id = AsyncMock (
+            return_value=JSONResponse(status_code=200, content={'BOOK': {'id': 7, 'book_name': 'Dune'}}),
+        )
+        
+        response = self.client.get (
+            '/books/7',
+            params={'token': 'valid_token', 'fields': 'id, book_name'},
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'BOOK': {'id': 7, 'book_name': 'Dune'}})
+        self.controller.get_book_by_id.assert_awaited_once_with(7, fields=['id', 'book_name'])
+    
+    def test_post_book (
+        self,
+    ) -> None:
+        
+        """
+        Test that POST /books/ creates the book from the request body and returns it.
+        """
+        
+        book = {'id': 7, 'book_name': 'Dune', 'author': 'Frank Herbert'}
+        self.controller.create_book = AsyncMock (
+            return_value=JSONResponse(status_code=200, content={'BOOK': book}),
+        )
+        
+        response = self.client.post (
+            '/books/',
+            params={'token': 'valid_token'},
+            json={'book_name': 'Dune', 'book_author': 'Frank Herbert'},
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'BOOK': book})
+        self.controller.create_book.assert_awaited_once_with('Dune', 'Frank Herbert')
+        self.mock_validate_jwt.assert_awaited_once_with('valid_token')
+    
+    def test_delete_book (
+        self,
+    ) -> None:
+        
+        """
+        Test that DELETE /books/{book_id} deletes that book and returns the controller's answer.
+        """
+        
+        book = {'id': 7, 'book_name': 'Dune', 'author': 'Frank Herbert'}
+        self.controller.delete_book = AsyncMock (
+            return_value=JSONResponse(status_code=200, content={'BOOK': book}),
+        )
+        
+        response = self.client.delete (
+            '/books/7',
+            params={'token': 'valid_token'},
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'BOOK': book})
+        self.controller.delete_book.assert_awaited_once_with(7)
+        self.mock_validate_jwt.assert_awaited_once_with('valid_token')
+    
+    def test_delete_book_not_found (
+        self,
+    ) -> None:
+        
+        """
+        Test that the controller's 404 for a missing book reaches the client.
+        """
+        
+        self.controller.delete_book = AsyncMock (
+            return_value=JSONResponse(status_code=404, content={'error': 'Book not found'}),
+        )
+        
+        response = self.client.delete (
+            '/books/404',
+            params={'token': 'valid_token'},
+        )
+        
+        self.assertEqual(response.status_code, 404)
+        self.controller.delete_book.assert_awaited_once_with(404)
+
+if __name__ == '__main__':
+    unittest.main()
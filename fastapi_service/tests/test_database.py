@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import patch, MagicMock
+from fastapi_service.modules.database.model import database
 from fastapi_service.modules.database.model.database import Database
+from grpc_service.modules.database.model import database as grpc_database
 
 class TestDatabase(unittest.TestCase):
     
@@ -24,7 +26,7 @@ class TestDatabase(unittest.TestCase):
         
         Database.instance = None
 
-    @patch('fastapi_service.modules.database.model.database.pool.SimpleConnectionPool')
+    @patch('fastapi_service.modules.database.model.database.InstrumentedConnectionPool')
     def test_singleton_instance (
         self, 
         mock_pool,
@@ -40,7 +42,7 @@ class TestDatabase(unittest.TestCase):
         db2 = Database()
         self.assertIs(db1, db2)  
 
-    @patch('fastapi_service.modules.database.model.database.pool.SimpleConnectionPool')
+    @patch('fastapi_service.modules.database.model.database.InstrumentedConnectionPool')
     def test_connect_initialization (
         self, 
         mock_pool,
@@ -59,13 +61,16 @@ class TestDatabase(unittest.TestCase):
         mock_pool.assert_called_once_with (
             1, 
             20, 
+            timeout=30.0,
+            max_age=1800.0,
+            health_check_after=30.0,
             host='localhost', 
             user='test_task', 
             password='Lovell32bd', 
             database='test_task_database',
         )
 
-    @patch('fastapi_service.modules.database.model.database.pool.SimpleConnectionPool')
+    @patch('fastapi_service.modules.database.model.database.InstrumentedConnectionPool')
     def test_get_connection (
         self, 
         mock_pool,
@@ -92,7 +97,7 @@ class TestDatabase(unittest.TestCase):
         )
         mock_pool.return_value.getconn.assert_called_once()
 
-    @patch('fastapi_service.modules.database.model.database.pool.SimpleConnectionPool')
+    @patch('fastapi_service.modules.database.model.database.InstrumentedConnectionPool')
     def test_release_connection (
         self, 
         mock_pool,
@@ -111,7 +116,7 @@ class TestDatabase(unittest.TestCase):
         db.release_connection(mock_conn)
         mock_pool.return_value.putconn.assert_called_once_with(mock_conn)
 
-    @patch('fastapi_service.modules.database.model.database.pool.SimpleConnectionPool')
+    @patch('fastapi_service.modules.database.model.database.InstrumentedConnectionPool')
     def test_close_all (
         self, 
         mock_pool,
@@ -129,5 +134,18 @@ class TestDatabase(unittest.TestCase):
         db.close_all()
         mock_pool.return_value.closeall.assert_called_once()
 
+    def test_pool_shared_with_grpc_service (
+        self,
+    ) -> None:
+        
+        """
+        Test that both services build their pools from one module.
+
+        The pool metrics and their collector are then registered once, even
+        with both services' database modules imported in the same process.
+        """
+        
+        self.assertIs(database.InstrumentedConnectionPool, grpc_database.InstrumentedConnectionPool)
+
 if __name__ == '__main__':
     unittest.main()
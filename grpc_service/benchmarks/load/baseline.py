@@ -0,0 +1,115 @@
+import json
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Latency percentiles compared against the baseline; a higher value is a regression.
+COMPARED_PERCENTILES = ('p50', 'p99')
+
+def load_report (
+    path: str,
+) -> Dict[str, Any]:
+    
+    """
+    Reads a JSON report written by the load generator.
+
+    Args:
+        path (str): The report file.
+
+    Returns:
+        Dict[str, Any]: The report.
+    """
+    
+    with open(path, encoding='utf-8') as report:
+        return json.load(report)
+
+def save_report (
+    report: Dict[str, Any],
+    path: str,
+) -> None:
+    
+    """
+    Writes a report so later runs can be compared against it.
+
+    Args:
+        report (Dict[str, Any]): The report of a run.
+        path (str): The file to write.
+    """
+    
+    with open(path, 'w', encoding='utf-8') as baseline:
+        json.dump(report, baseline, indent=2)
+        baseline.write('\n')
+
+def compare_to_baseline (
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+) -> List[Dict[str, Any]]:
+    
+    """
+    Lists the metrics of a run that are worse than the baseline by more than `tolerance`.
+
+    Throughput (overall and per operation) regresses when it drops, and the
+    p50 and p99 latencies when they rise. Operations missing from either
+    report are skipped, so changing the mix does not produce false alarms.
+
+    Args:
+        report (Dict[str, Any]): The report of the new run.
+        baseline (Dict[str, Any]): The stored report to compare against.
+        tolerance (float): Allowed relative change, e.g. 0.1 for 10%.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per regression with the metric's path,
+            its baseline and current values and the relative change.
+    """
+    
+    regressions = []
+    
+    for metric, current, expected, higher_is_better in _compared_metrics(report, baseline):
+        if not expected:
+            continue
+        
+        change = (current - expected) / expected
+        worse = -change if higher_is_better else change
+        
+        if worse > tolerance:
+            regressions.append({
+                'metric': metric,
+                'baseline': expected,
+                'current': current,
+                'change': round(change, 4),
+            })
+    
+    return regressions
+
+def _compared_metrics (
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+) -> Iterator[Tuple[str, float, float, bool]]:
+    
+    """
+    Yields `(metric, current, baseline, higher_is_better)` for every metric both reports have.
+    """
+    
+    yield 'throughput_rps', report['throughput_rps'], baseline['throughput_rps'], True
+    
+    for percentile in COMPARED_PERCENTILES:
+        yield (
+            f'latency_us.percentiles.{percentile}',
+            report['latency_us']['percentiles'][percentile],
+            baseline['latency_us']['percentiles'][percentile],
+            False,
+        )
+    
+    for name, operation in report['operations'].items():
+        expected = baseline['operations'].get(name)
+        if expected is None:
+            continue
+        
+        yield f'operations.{name}.throughput_rps', operation['throughput_rps'], expected['throughput_rps'], True
+        
+        for percentile in COMPARED_PERCENTILES:
+            yield (
+                f'operations.{name}.latency_us.percentiles.{percentile}',
+                operation['latency_us']['percentiles'][percentile],
+                expected['latency_us']['percentiles'][percentile],
+                False,
+            )
@@ -0,0 +1,194 @@
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+REPORTED_PERCENTILES = (50.0, 75.0, 90.0, 99.0, 99.9, 99.99)
+
+class LatencyHistogram:
+    
+    """
+    HDR-style latency histogram with a fixed relative precision.
+
+    Values are recorded in whole microseconds into log-linear buckets, as
+    HdrHistogram does: every power-of-two range is split into the same
+    number of sub-buckets, so any recorded value is known to within
+    `10 ** -significant_figures` of itself whether it is 40 µs or 40 s.
+    Memory is bounded by the spread of the values, not by their count, and
+    histograms recorded by separate workers merge exactly.
+    """
+    
+    def __init__ (
+        self,
+        significant_figures: int = 3,
+    ) -> None:
+        
+        """
+        Initializes an empty histogram.
+
+        Args:
+            significant_figures (int, optional): Decimal digits of precision kept per value.
+        """
+        
+        self.significant_figures = significant_figures
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        
+        # (shift, sub-bucket) -> count; ordering the keys orders the values.
+        self.counts: Counter = Counter()
+        self.total = 0
+        self.sum = 0
+        self.min: Optional[int] = None
+        self.max = 0
+    
+    def record (
+        self,
+        seconds: float,
+    ) -> None:
+        
+        """
+        Records one latency.
+
+        Args:
+            seconds (float): The latency in seconds; negative values count as 0.
+        """
+        
+        self.record_value(max(0, round(seconds * 1_000_000)))
+    
+    def record_value (
+        self,
+        value: int,
+    ) -> None:
+        
+        """
+        Records one value in microseconds.
+
+        Args:
+            value (int): The value to record.
+        """
+        
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        self.counts[(shift, value >> shift)] += 1
+        
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+    
+    def merge (
+        self,
+        other: 'LatencyHistogram',
+    ) -> None:
+        
+        """
+        Adds every value recorded by another histogram of the same precision.
+
+        Args:
+            other (LatencyHistogram): The histogram to add.
+
+        Raises:
+            ValueError: If the precisions differ.
+        """
+        
+        if other.significant_figures != self.significant_figures:
+            raise ValueError('Only histograms with the same significant figures can be merged.')
+        
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+    
+    def value_at_percentile (
+        self,
+        percentile: float,
+    ) -> int:
+        
+        """
+        Returns the value at or below which `percentile` percent of the values fall.
+
+        As in HdrHistogram, the highest value equivalent to the bucket is
+        reported, capped at the largest value recorded.
+
+        Args:
+            percentile (float): A percentile between 0 and 100.
+
+        Returns:
+            int: The value in microseconds, or 0 for an empty histogram.
+        """
+        
+        if not self.total:
+            return 0
+        
+        target = max(1, math.ceil(percentile / 100 * self.total))
+        seen = 0
+        
+        for (shift, sub_bucket), count in self.__buckets():
+            seen += count
+            if seen >= target:
+                return min(((sub_bucket + 1) << shift) - 1, self.max)
+        
+        return self.max
+    
+    def summary (
+        self,
+    ) -> Dict[str, Any]:
+        
+        """
+        Describes the distribution for a JSON report.
+
+        Returns:
+            Dict[str, Any]: Count, min, mean, max and the reported percentiles in
+                microseconds, plus `buckets`: every non-empty bucket as
+                `[lowest value, count]`, enough to rebuild the distribution.
+        """
+        
+        return {
+            'count': self.total,
+            'min': self.min or 0,
+            'mean': round(self.sum / self.total, 1) if self.total else 0.0,
+            'max': self.max,
+            'percentiles': {
+                f'p{percentile:g}': self.value_at_percentile(percentile)
+                for percentile in REPORTED_PERCENTILES
+            },
+            'buckets': [
+                [sub_bucket << shift, count]
+                for (shift, sub_bucket), count in self.__buckets()
+            ],
+        }
+    
+    @classmethod
+    def merged (
+        cls,
+        histograms: Iterable['LatencyHistogram'],
+        significant_figures: int = 3,
+    ) -> 'LatencyHistogram':
+        
+        """
+        Builds one histogram holding the values of several.
+
+        Args:
+            histograms (Iterable[LatencyHistogram]): The histograms to combine.
+            significant_figures (int, optional): Their common precision.
+
+        Returns:
+            LatencyHistogram: A new histogram.
+        """
+        
+        combined = cls(significant_figures)
+        
+        for histogram in histograms:
+            combined.merge(histogram)
+        
+        return combined
+    
+    def __buckets (
+        self,
+    ) -> List[Tuple[Tuple[int, int], int]]:
+        
+        """
+        Returns the non-empty buckets in value order.
+        """
+        
+        return sorted(self.counts.items())
@@ -0,0 +1,643 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+import threading
+from uuid import uuid4
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import grpc
+
+import grpc_service.books_pb.books_pb2 as books_pb2
+import grpc_service.books_pb.books_pb2_grpc as books_pb2_grpc
+from grpc_service.grpc_server.grpc_server import GRPCServerFactory, SYNC_SERVER_MODE, ASYNC_SERVER_MODE
+from grpc_service.controllers.book_controller.book_controller import BookService
+from grpc_service.controllers.async_book_controller.async_book_controller import AsyncBookService
+from grpc_service.modules.database.async_model.async_database import AsyncDatabase
+from grpc_service.modules.database.storage_backend.storage_backend import POSTGRES_BACKEND, MEMORY_BACKEND, STORAGE_BACKENDS
+from grpc_service.modules.database.storage_backend.backend_factory import create_storage_backend, create_async_storage_backend
+from grpc_service.modules.database.memory_controller.memory_database_controller import InMemoryDatabaseController, AsyncInMemoryDatabaseController
+from grpc_service.benchmarks.load.latency_histogram import LatencyHistogram
+from grpc_service.benchmarks.load.baseline import compare_to_baseline, load_report, save_report
+
+OPERATIONS = ('get', 'get_all', 'post', 'update', 'delete')
+DEFAULT_MIX = 'get=70,get_all=5,post=10,update=10,delete=5'
+
+# Answers that count towards throughput and latency; NOT_FOUND is a valid outcome of a lookup.
+SUCCESS_CODES = ('OK', 'NOT_FOUND')
+
+def parse_mix (
+    mix: str,
+) -> Dict[str, int]:
+    
+    """
+    Parses an operation mix such as `get=70,post=10`.
+
+    Args:
+        mix (str): Comma-separated `operation=weight` pairs.
+
+    Raises:
+        ValueError: On an unknown operation, a negative weight, or no positive weight.
+
+    Returns:
+        Dict[str, int]: Operation -> relative weight, without zero weights.
+    """
+    
+    weights = {}
+    
+    for pair in mix.split(','):
+        operation, _, weight = pair.partition('=')
+        operation = operation.strip()
+        
+        if operation not in OPERATIONS:
+            raise ValueError(f'Unknown operation {operation!r}; expected any of {", ".join(OPERATIONS)}.')
+        if int(weight) < 0:
+            raise ValueError(f'Weight of {operation} must not be negative.')
+        
+        if int(weight):
+            weights[operation] = int(weight)
+    
+    if not weights:
+        raise ValueError('The mix needs at least one operation with a positive weight.')
+    
+    return weights
+
+class WorkerResult:
+    
+    """
+    What one load worker observed: a latency histogram and status counts per operation.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes empty results.
+        """
+        
+        self.histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+    
+    def record (
+        self,
+        operation: str,
+        code: str,
+        latency: float,
+    ) -> None:
+        
+        """
+        Records one finished call; only successful ones enter the histogram.
+
+        Args:
+            operation (str): The operation called.
+            code (str): The gRPC status code name it ended with.
+            latency (float): Seconds from the call's intended start to its end.
+        """
+        
+        self.statuses[operation][code] += 1
+        
+        if code in SUCCESS_CODES:
+            self.histograms[operation].record(latency)
+
+class BenchmarkServer:
+    
+    """
+    A BookService server built by GRPCServerFactory on a free local port.
+
+    The factory applies the same interceptors, admission control and snapshot
+    handler as in production, configured from the same `GRPC_*` variables.
+    Only the storage backend behind the service is chosen here: Postgres,
+    SQLite or the in-memory one.
+    """
+    
+    def __init__ (
+        self,
+        server_mode: str = SYNC_SERVER_MODE,
+        database: str = MEMORY_BACKEND,
+        workers: int = 10,
+        statement_latency: float = 0.0,
+    ) -> None:
+        
+        """
+        Initializes the server; nothing is started yet.
+
+        Args:
+            server_mode (str, optional): `sync` or `async`, as for GRPCServerFactory.
+            database (str, optional): `memory`, `sqlite` or `postgres`.
+            workers (int, optional): Worker threads of the server.
+            statement_latency (float, optional): Seconds each in-memory statement takes.
+
+        Raises:
+            ValueError: If `database` is not a known backend.
+        """
+        
+        if database not in STORAGE_BACKENDS:
+            raise ValueError(f'Unknown database: {database}')
+        
+        self.factory = GRPCServerFactory(max_workers=workers, port=0, server_mode=server_mode)
+        self.database = database
+        self.statement_latency = statement_latency
+        
+        self.server: Any = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.async_database: Optional[AsyncDatabase] = None
+    
+    def start (
+        self,
+    ) -> str:
+        
+        """
+        Starts the server; an async one runs on its own event loop thread.
+
+        Returns:
+            str: The address to connect to.
+        """
+        
+        if self.factory.server_mode == ASYNC_SERVER_MODE:
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+            self.thread.start()
+            
+            port = asyncio.run_coroutine_threadsafe(self.__start_async(), self.loop).result()
+            return f'localhost:{port}'
+        
+        if self.database == MEMORY_BACKEND:
+            database_controller = InMemoryDatabaseController(self.statement_latency)
+        else:
+            database_controller = create_storage_backend(self.database)
+        
+        self.server = self.factory.create_server(BookService(database_controller=database_controller))
+        port = self.server.add_insecure_port('localhost:0')
+        self.server.start()
+        
+        return f'localhost:{port}'
+    
+    def stop (
+        self,
+    ) -> None:
+        
+        """
+        Stops the server, and its event loop and database pool in async mode.
+        """
+        
+        if self.loop is None:
+            self.server.stop(0)
+            return
+        
+        asyncio.run_coroutine_threadsafe(self.__stop_async(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+    
+    async def __start_async (
+        self,
+    ) -> int:
+        
+        """
+        Opens the async pool when needed, then creates and starts the grpc.aio server.
+        """
+        
+        if self.database == POSTGRES_BACKEND:
+            self.async_database = AsyncDatabase()
+            await self.async_database.connect()
+        
+        if self.database == MEMORY_BACKEND:
+            database_controller = AsyncInMemoryDatabaseController(self.statement_latency)
+        else:
+            database_controller = create_async_storage_backend(self.database)
+        
+        self.server = self.factory.create_server(AsyncBookService(database_controller=database_controller))
+        port = self.server.add_insecure_port('localhost:0')
+        await self.server.start()
+        
+        return port
+    
+    async def __stop_async (
+        self,
+    ) -> None:
+        
+        """
+        Stops the grpc.aio server and closes the async pool if one was opened.
+        """
+        
+        await self.server.stop(0)
+        
+        if self.async_database is not None:
+            await self.async_database.close_all()
+
+class LoadGenerator:
+    
+    """
+    Drives a mix of BookService calls and reports throughput and latency.
+
+    Two load models are available:
+
+    - Closed loop (default): `concurrency` workers each send the next call
+      as soon as the previous one returns, measuring the capacity reached at
+      that concurrency.
+    - Open loop (`qps`): calls are scheduled at a fixed rate and shared by
+      the workers. Latency is measured from each call's scheduled start, so
+      time spent waiting behind a slow call is counted instead of hidden
+      (coordinated omission); `concurrency` then only bounds the calls in
+      flight.
+
+    The run seeds `books` books under an author unique to it, which the
+    get, update and delete operations target, and deletes every book it
+    created at the end, so it can run against a database holding other data.
+    """
+    
+    def __init__ (
+        self,
+        channel: grpc.Channel,
+        mix: Dict[str, int],
+        duration: float,
+        concurrency: int = 16,
+        qps: Optional[float] = None,
+        warmup: float = 0.0,
+        books: int = 100,
+        deadline: float = 5.0,
+        seed: int = 0,
+        keep_data: bool = False,
+    ) -> None:
+        
+        """
+        Initializes the load generator.
+
+        Args:
+            channel (grpc.Channel): Channel to the BookService.
+            mix (Dict[str, int]): Operation -> relative weight, from `parse_mix`.
+            duration (float): Seconds of measured load.
+            concurrency (int, optional): Workers sending calls.
+            qps (Optional[float], optional): Target calls per second; closed loop when None.
+            warmup (float, optional): Seconds of unmeasured load before the measurement.
+            books (int, optional): Books created before the run for lookups, updates and deletes.
+            deadline (float, optional): Deadline of every call, in seconds.
+            seed (int, optional): Seed of the operation and id choices.
+            keep_data (bool, optional): Leave the books the run created in place.
+        """
+        
+        self.stub = books_pb2_grpc.BookServiceStub(channel)
+        self.mix = mix
+        self.duration = duration
+        self.concurrency = concurrency
+        self.qps = qps
+        self.warmup = warmup
+        self.books = books
+        self.deadline = deadline
+        self.seed = seed
+        self.keep_data = keep_data
+        
+        self.author = f'loadgen-{uuid4().hex[:8]}'
+        self.book_ids: List[int] = []
+        self.book_ids_lock = threading.Lock()
+        
+        self.calls: Dict[str, Callable[[random.Random], Any]] = {
+            'get': self.__get,
+            'get_all': self.__get_all,
+            'post': self.__post,
+            'update': self.__update,
+            'delete': self.__delete,
+        }
+    
+    def run (
+        self,
+    ) -> Dict[str, Any]:
+        
+        """
+        Seeds the data, runs the warmup and the measurement, and cleans up.
+
+        Returns:
+            Dict[str, Any]: The report of the measured phase.
+        """
+        
+        # PostBook answers with the stored book, so the pool fills without a listing.
+        self.book_ids = [
+            self.stub.PostBook (
+                books_pb2.PostBookRequest(book_name=f'Book {index}', book_author=self.author),
+                timeout=self.deadline,
+            ).id
+            for index in range(self.books)
+        ]
+        
+        try:
+            if self.warmup:
+                self.__drive(self.warmup)
+            elapsed, results = self.__drive(self.duration)
+        
+        finally:
+            if not self.keep_data:
+                for book_id in self.__own_book_ids():
+                    self.stub.DeleteBook(books_pb2.DeleteBookRequest(book_id=book_id), timeout=self.deadline)
+        
+        return self.__report(elapsed, results)
+    
+    def __drive (
+        self,
+        duration: float,
+    ) -> Tuple[float, List[WorkerResult]]:
+        
+        """
+        Runs the workers for `duration` seconds.
+
+        Returns:
+            Tuple[float, List[WorkerResult]]: The elapsed time and each worker's results.
+        """
+        
+        started = time.perf_counter()
+        slots = itertools.count()
+        results = [WorkerResult() for _ in range(self.concurrency)]
+        
+        workers = [
+            threading.Thread (
+                target=self.__work,
+                args=(result, random.Random(self.seed + index), started, started + duration, slots),
+            )
+            for index, result in enumerate(results)
+        ]
+        
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        return time.perf_counter() - started, results
+    
+    def __work (
+        self,
+        result: WorkerResult,
+        rng: random.Random,
+        started: float,
+        ends: float,
+        slots: Iterator,
+    ) -> None:
+        
+        """
+        Sends calls until the phase ends, in the closed or the open loop model.
+        """
+        
+        operations = list(self.mix)
+        weights = list(self.mix.values())
+        
+        while True:
+            if self.qps:
+                intended = started + next(slots) / self.qps
+                if intended >= ends:
+                    return
+                
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                intended = time.perf_counter()
+                if intended >= ends:
+                    return
+            
+            operation = rng.choices(operations, weights)[0]
+            
+            try:
+                self.calls[operation](rng)
+                code = 'OK'
+            except grpc.RpcError as e:
+                code = e.code().name
+            
+            result.record(operation, code, time.perf_counter() - intended)
+    
+    def __report (
+        self,
+        elapsed: float,
+        results: List[WorkerResult],
+    ) -> Dict[str, Any]:
+        
+        """
+        Merges the workers' results into the JSON report.
+        """
+        
+        operations = {}
+        
+        for operation in self.mix:
+            histogram = LatencyHistogram.merged(result.histograms[operation] for result in results)
+            statuses = sum((result.statuses[operation] for result in results), Counter())
+            
+            operations[operation] = {
+                'requests': sum(statuses.values()),
+                'errors': sum(count for code, count in statuses.items() if code not in SUCCESS_CODES),
+                'throughput_rps': round(histogram.total / elapsed, 1),
+                'statuses': dict(statuses),
+                'latency_us': histogram.summary(),
+            }
+        
+        overall = LatencyHistogram.merged (
+            histogram
+            for result in results
+            for histogram in result.histograms.values()
+        )
+        
+        return {
+            'config': {
+                'mix': self.mix,
+                'duration_s': self.duration,
+                'warmup_s': self.warmup,
+                'concurrency': self.concurrency,
+                'qps': self.qps,
+                'books': self.books,
+                'deadline_s': self.deadline,
+                'seed': self.seed,
+            },
+            'elapsed_s': round(elapsed, 3),
+            'requests': sum(operation['requests'] for operation in operations.values()),
+            'errors': sum(operation['errors'] for operation in operations.values()),
+            'throughput_rps': round(overall.total / elapsed, 1),
+            'latency_us': overall.summary(),
+            'operations': operations,
+        }
+    
+    def __own_book_ids (
+        self,
+    ) -> List[int]:
+        
+        """
+        Lists the ids of the books written by this run, projected to `id` and `author`.
+        """
+        
+        books = self.stub.GetAllBooks (
+            books_pb2.EmptyRequest(fields={'paths': ['id', 'author']}),
+            timeout=self.deadline,
+        )
+        return [book.id for book in books.books if book.author == self.author]
+    
+    def __pick_book_id (
+        self,
+        rng: random.Random,
+        remove: bool = False,
+    ) -> int:
+        
+        """
+        Chooses one of the run's books, taking it out of the pool when it is about to be deleted.
+
+        Books posted during the run join the pool as their PostBook returns.
+        Returns 0, which matches no book, if deletes have emptied it.
+        """
+        
+        with self.book_ids_lock:
+            if not self.book_ids:
+                return 0
+            
+            index = rng.randrange(len(self.book_ids))
+            book_id = self.book_ids[index]
+            
+            if remove:
+                self.book_ids[index] = self.book_ids[-1]
+                self.book_ids.pop()
+            
+            return book_id
+    
+    def __get (
+        self,
+        rng: random.Random,
+    ) -> None:
+        
+        """
+        GetBookById on a seeded book.
+        """
+        
+        self.stub.GetBookById(books_pb2.BookRequest(book_id=self.__pick_book_id(rng)), timeout=self.deadline)
+    
+    def __get_all (
+        self,
+        rng: random.Random,
+    ) -> None:
+        
+        """
+        GetAllBooks.
+        """
+        
+        self.stub.GetAllBooks(books_pb2.EmptyRequest(), timeout=self.deadline)
+    
+    def __post (
+        self,
+        rng: random.Random,
+    ) -> None:
+        
+        """
+        PostBook of a new book owned by this run, which joins the pool.
+        """
+        
+        book = self.stub.PostBook (
+            books_pb2.PostBookRequest(book_name=f'Book {rng.randrange(1_000_000)}', book_author=self.author),
+            timeout=self.deadline,
+        )
+        
+        with self.book_ids_lock:
+            self.book_ids.append(book.id)
+    
+    def __update (
+        self,
+        rng: random.Random,
+    ) -> None:
+        
+        """
+        UpdateBook renaming a seeded book.
+        """
+        
+        self.stub.UpdateBook (
+            books_pb2.UpdateBookRequest(book_id=self.__pick_book_id(rng), book_name=f'Book {rng.randrange(1_000_000)}'),
+            timeout=self.deadline,
+        )
+    
+    def __delete (
+        self,
+        rng: random.Random,
+    ) -> None:
+        
+        """
+        DeleteBook of a seeded book, which is no longer picked afterwards.
+        """
+        
+        self.stub.DeleteBook (
+            books_pb2.DeleteBookRequest(book_id=self.__pick_book_id(rng, remove=True)),
+            timeout=self.deadline,
+        )
+
+def main (
+    argv: Optional[List[str]] = None,
+) -> None:
+    
+    """
+    Parses arguments, starts the server, runs the load and prints the JSON report.
+
+    Exits with status 1 when `--baseline` is given and a regression is found.
+    """
+    
+    parser = argparse.ArgumentParser(description='Load generator for BookService.')
+    parser.add_argument('--server-mode', choices=(SYNC_SERVER_MODE, ASYNC_SERVER_MODE), default=os.getenv('GRPC_SERVER_MODE', SYNC_SERVER_MODE))
+    parser.add_argument('--database', choices=STORAGE_BACKENDS, default=MEMORY_BACKEND)
+    parser.add_argument('--statement-latency-ms', type=float, default=0.0, help='Time every in-memory statement takes.')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('GRPC_MAX_WORKERS', '10')))
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--qps', type=float, default=None, help='Target rate; closed loop when omitted.')
+    parser.add_argument('--books', type=int, default=100)
+    parser.add_argument('--deadline', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep-data', action='store_true')
+    parser.add_argument('--baseline', help='Report to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed relative regression.')
+    parser.add_argument('--save-baseline', help='Write this run\'s report here.')
+    args = parser.parse_args(argv)
+    
+    server = BenchmarkServer (
+        server_mode=args.server_mode,
+        database=args.database,
+        workers=args.workers,
+        statement_latency=args.statement_latency_ms / 1000,
+    )
+    target = server.start()
+    
+    try:
+        with grpc.insecure_channel(target) as channel:
+            report = LoadGenerator (
+                channel,
+                parse_mix(args.mix),
+                args.duration,
+                concurrency=args.concurrency,
+                qps=args.qps,
+                warmup=args.warmup,
+                books=args.books,
+                deadline=args.deadline,
+                seed=args.seed,
+                keep_data=args.keep_data,
+            ).run()
+    finally:
+        server.stop()
+    
+    report['config'].update(server_mode=args.server_mode, database=args.database, workers=args.workers)
+    
+    regressions = []
+    if args.baseline:
+        regressions = compare_to_baseline(report, load_report(args.baseline), args.tolerance)
+        report['comparison'] = {
+            'baseline': args.baseline,
+            'tolerance': args.tolerance,
+            'regressions': regressions,
+        }
+    
+    if args.save_baseline:
+        save_report(report, args.save_baseline)
+    
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    
+    if regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
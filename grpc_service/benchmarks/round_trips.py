@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from psycopg2 import extensions
+
+from grpc_service.modules.database.model.database import Database
+from grpc_service.modules.database.controller.database_controller import DatabaseController
+from grpc_service.modules.database.connection_pool.connection_pool import InstrumentedConnectionPool
+
+class RoundTripCountingCursor(extensions.cursor):
+    
+    """
+    psycopg2 cursor that reports every statement it sends to its connection.
+    """
+    
+    def execute (
+        self,
+        query: Any,
+        params: Any = None,
+    ) -> None:
+        
+        """
+        Counts the statement, and the implicit BEGIN psycopg2 sends before it, then runs it.
+        """
+        
+        self.connection.count_statement()
+        return super().execute(query, params)
+    
+    def copy_expert (
+        self,
+        sql: Any,
+        file: Any,
+        size: int = 8192,
+    ) -> None:
+        
+        """
+        Counts a COPY as a single exchange, then runs it.
+        """
+        
+        self.connection.count_statement()
+        return super().copy_expert(sql, file, size)
+
+class RoundTripCountingConnection(extensions.connection):
+    
+    """
+    psycopg2 connection that counts client/server round trips.
+
+    psycopg2 opens transactions lazily: outside autocommit, the first statement
+    after an idle state is preceded by a separate `BEGIN`. `commit` and
+    `rollback` only reach the server while a transaction is open. Counting
+    follows the same rules, so the totals match what Postgres actually sees.
+    """
+    
+    round_trips = 0
+    
+    def cursor (
+        self,
+        *args: Any,
+        **kwargs: Any,
+    ) -> extensions.cursor:
+        
+        """
+        Returns a counting cursor unless another factory was requested.
+        """
+        
+        kwargs.setdefault('cursor_factory', RoundTripCountingCursor)
+        return super().cursor(*args, **kwargs)
+    
+    def count_statement (
+        self,
+    ) -> None:
+        
+        """
+        Records one statement, plus the implicit BEGIN if it opens a transaction.
+        """
+        
+        if not self.autocommit and self.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE:
+            RoundTripCountingConnection.round_trips += 1
+        RoundTripCountingConnection.round_trips += 1
+    
+    def commit (
+        self,
+    ) -> None:
+        
+        """
+        Counts the COMMIT if a transaction is open, then commits.
+        """
+        
+        if self.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            RoundTripCountingConnection.round_trips += 1
+        super().commit()
+    
+    def rollback (
+        self,
+    ) -> None:
+        
+        """
+        Counts the ROLLBACK if a transaction is open, then rolls back.
+        """
+        
+        if self.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            RoundTripCountingConnection.round_trips += 1
+        super().rollback()
+
+class RoundTripBenchmark:
+    
+    """
+    Measures round trips and latency per DatabaseController operation.
+
+    Every operation runs twice: once through the controller as it is, and once
+    the way the controller used to run it, inside a psycopg2 transaction with
+    an explicit `BEGIN;` for writes. Both use a single pooled connection
+    against the Postgres configured by the usual `DB_*` variables.
+
+    Run it with:
+
+        python -m grpc_service.benchmarks.round_trips --iterations 200
+
+    It prints a JSON report with `round_trips_per_op` and `mean_ms` for each
+    operation and mode.
+    """
+    
+    GET_QUERY = 'SELECT id, book_name, author, uploaded_at FROM base_book WHERE id = %s'
+    INSERT_QUERY = 'INSERT INTO base_book (book_name, author, uploaded_at) VALUES (%s, %s, NOW()) RETURNING id'
+    UPDATE_QUERY = 'UPDATE base_book SET book_name = %s WHERE id = %s'
+    DELETE_QUERY = 'DELETE FROM base_book WHERE id = %s'
+    
+    def __init__ (
+        self,
+        iterations: int,
+    ) -> None:
+        
+        """
+        Opens a one-connection counting pool and points the controller at it.
+
+        Args:
+            iterations (int): How many times each operation is run per mode.
+        """
+        
+        self.iterations = iterations
+        
+        database = Database()
+        database.close_all()
+        database.pool = InstrumentedConnectionPool (
+            1,
+            1,
+            name='round_trip_benchmark',
+            health_check_after=3600,
+            connection_factory=RoundTripCountingConnection,
+            host=database.host,
+            user=database.db_user,
+            password=database.password,
+            database=database.database,
+        )
+        
+        self.database = database
+        self.controller = DatabaseController()
+    
+    def run (
+        self,
+    ) -> Dict[str, Dict[str, Dict[str, float]]]:
+        
+        """
+        Runs every operation in both modes.
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, float]]]: operation -> mode -> measurements.
+        """
+        
+        book_id = self.controller.execute_insert_query(self.INSERT_QUERY, ('round trip benchmark', 'benchmark'))
+        
+        try:
+            operations: Dict[str, Tuple[Callable[..., Any], str, Tuple[Any, ...], bool]] = {
+                'get': (self.controller.execute_get_query, self.GET_QUERY, (book_id,), False),
+                'update': (self.controller.execute_edit_query, self.UPDATE_QUERY, ('round trip benchmark', book_id), True),
+                'insert': (self.controller.execute_insert_query, self.INSERT_QUERY, ('round trip benchmark', 'benchmark'), True),
+                'delete': (self.controller.execute_delete_query, self.DELETE_QUERY, (-1,), True),
+            }
+            
+            report = {}
+            for name, (execute, query, params, is_write) in operations.items():
+                report[name] = {
+                    'autocommit': self.__measure(lambda: execute(query, params)),
+                    'transaction': self.__measure(lambda: self.__legacy_execute(query, params, is_write)),
+                }
+            return report
+        
+        finally:
+            self.__delete_benchmark_rows()
+            self.database.close_all()
+    
+    def __measure (
+        self,
+        operation: Callable[[], Any],
+    ) -> Dict[str, float]:
+        
+        """
+        Runs an operation `iterations` times after one warm-up call.
+
+        Args:
+            operation (Callable[[], Any]): The call to measure.
+
+        Returns:
+            Dict[str, float]: Round trips per call and mean latency in milliseconds.
+        """
+        
+        operation()
+        RoundTripCountingConnection.round_trips = 0
+        started = time.perf_counter()
+        
+        for _ in range(self.iterations):
+            operation()
+        
+        elapsed = time.perf_counter() - started
+        return {
+            'round_trips_per_op': RoundTripCountingConnection.round_trips / self.iterations,
+            'mean_ms': round(elapsed * 1000 / self.iterations, 4),
+        }
+    
+    def __legacy_execute (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+        is_write: bool,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Runs a statement the way DatabaseController did before autocommit.
+
+        Args:
+            query (str): The statement to run.
+            params (Tuple[Any, ...]): Its parameters.
+            is_write (bool): Send an explicit `BEGIN;` first, as the write helpers did.
+
+        Returns:
+            List[Tuple[Any, ...]]: Rows returned by the statement, if any.
+        """
+        
+        connection_obj = self.database.get_connection()
+        
+        try:
+            with connection_obj.cursor() as cursor:
+                if is_write:
+                    cursor.execute('BEGIN;')
+                cursor.execute(query, params)
+                rows = cursor.fetchall() if cursor.description else []
+            connection_obj.commit()
+            return rows
+        
+        except Exception as e:
+            connection_obj.rollback()
+            raise e
+        
+        finally:
+            self.database.release_connection(connection_obj)
+    
+    def __delete_benchmark_rows (
+        self,
+    ) -> None:
+        
+        """
+        Removes the rows inserted by the benchmark.
+        """
+        
+        self.controller.execute_delete_query (
+            'DELETE FROM base_book WHERE book_name = %s AND author = %s',
+            ('round trip benchmark', 'benchmark'),
+        )
+
+def main (
+    argv: Optional[List[str]] = None,
+) -> None:
+    
+    """
+    Parses arguments, runs the benchmark and prints the JSON report.
+    """
+    
+    parser = argparse.ArgumentParser(description='Round trips per DatabaseController operation.')
+    parser.add_argument('--iterations', type=int, default=int(os.getenv('BENCHMARK_ITERATIONS', '200')))
+    args = parser.parse_args(argv)
+    
+    report = RoundTripBenchmark(args.iterations).run()
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+if __name__ == '__main__':
+    main()
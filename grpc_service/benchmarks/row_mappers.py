@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.protobuf.timestamp_pb2 import Timestamp
+
+import grpc_service.books_pb.books_pb2 as books_pb2
+from grpc_service.controllers.book_controller.book_controller import BOOK_ROW_MAPPER
+
+class RowMapperBenchmark:
+    
+    """
+    Measures how fast a list of book rows becomes a BooksResponse.
+
+    Three ways of building the response are compared on the same synthetic
+    `(id, book_name, author, uploaded_at, version)` rows, so no database is needed:
+
+    - `legacy`: the former GetAllBooks loop, a BookResponse per row plus a
+      Timestamp from `datetime.utcnow()` copied into it.
+    - `from_datetime`: a BookResponse per row with `Timestamp.FromDatetime`.
+    - `compiled`: the compiled BOOK_ROW_MAPPER the service uses now.
+
+    Run it with:
+
+        python -m grpc_service.benchmarks.row_mappers --rows 100000 --repeat 5
+
+    It prints a JSON report with the best `rows_per_sec` of each mode, with
+    and without serializing the response.
+    """
+    
+    def __init__ (
+        self,
+        rows: int,
+        repeat: int,
+    ) -> None:
+        
+        """
+        Generates the rows to map.
+
+        Args:
+            rows (int): Number of rows per response.
+            repeat (int): Runs per mode; the fastest one is reported.
+        """
+        
+        started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        
+        self.repeat = repeat
+        self.rows: List[Tuple[Any, ...]] = [
+            (book_id, f'Book {book_id}', f'Author {book_id % 100}', started + timedelta(seconds=book_id, microseconds=book_id), 1)
+            for book_id in range(1, rows + 1)
+        ]
+    
+    def run (
+        self,
+    ) -> Dict[str, Dict[str, float]]:
+        
+        """
+        Runs every mode.
+
+        Returns:
+            Dict[str, Dict[str, float]]: mode -> measurements.
+        """
+        
+        modes: Dict[str, Callable[[], books_pb2.BooksResponse]] = {
+            'legacy': self.__legacy,
+            'from_datetime': self.__from_datetime,
+            'compiled': self.__compiled,
+        }
+        
+        return {
+            name: {
+                'rows_per_sec': self.__measure(build),
+                'rows_per_sec_serialized': self.__measure(lambda: build().SerializeToString()),
+            }
+            for name, build in modes.items()
+        }
+    
+    def __measure (
+        self,
+        operation: Callable[[], Any],
+    ) -> float:
+        
+        """
+        Runs an operation `repeat` times and returns the best throughput.
+        """
+        
+        best = float('inf')
+        
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            operation()
+            best = min(best, time.perf_counter() - started)
+        
+        return round(len(self.rows) / best)
+    
+    def __legacy (
+        self,
+    ) -> books_pb2.BooksResponse:
+        
+        """
+        Builds the response the way GetAllBooks used to.
+        """
+        
+        response = books_pb2.BooksResponse()
+        
+        for book in self.rows:
+            book_proto = books_pb2.BookResponse (
+                id=book[0],
+                book_name=book[1],
+                author=book[2],
+                uploaded_at=book[3],
+            )
+            
+            ts = Timestamp()
+            ts.FromDatetime(datetime.utcnow())
+            book_proto.uploaded_at.CopyFrom(ts)
+            
+            response.books.append(book_proto)
+        
+        return response
+    
+    def __from_datetime (
+        self,
+    ) -> books_pb2.BooksResponse:
+        
+        """
+        Builds one message per row and converts the timestamp with `FromDatetime`.
+        """
+        
+        books = []
+        
+        for row in self.rows:
+            book = books_pb2.BookResponse(id=row[0], book_name=row[1], author=row[2], version=row[4])
+            book.uploaded_at.FromDatetime(row[3])
+            books.append(book)
+        
+        return books_pb2.BooksResponse(books=books)
+    
+    def __compiled (
+        self,
+    ) -> books_pb2.BooksResponse:
+        
+        """
+        Builds the response with the compiled row mapper.
+        """
+        
+        return books_pb2.BooksResponse(books=map(BOOK_ROW_MAPPER, self.rows))
+
+def main (
+    argv: Optional[List[str]] = None,
+) -> None:
+    
+    """
+    Parses arguments, runs the benchmark and prints the JSON report.
+    """
+    
+    parser = argparse.ArgumentParser(description='Rows per second mapped into a BooksResponse.')
+    parser.add_argument('--rows', type=int, default=int(os.getenv('BENCHMARK_ROWS', '100000')))
+    parser.add_argument('--repeat', type=int, default=int(os.getenv('BENCHMARK_REPEAT', '5')))
+    args = parser.parse_args(argv)
+    
+    report = RowMapperBenchmark(args.rows, args.repeat).run()
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+if __name__ == '__main__':
+    main()
@@ -11,26 +11,65 @@ _runtime_version.ValidateProtobufRuntimeVersion (
 _sym_db = _symbol_database.Default()
 
 from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
 
 DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\x0b\x62ooks.proto\x12\x04\x62ook\x1a\x1fgoogle/protobuf/timestamp.proto'
-    b'\"\x1e\n\x0b\x42ookRequest\x12\x0f\n\x07\x62ook_id\x18\x01 \x01(\x05'
-    b'\"\x0e\n\x0c\x45mptyRequest'
-    b'\"n\n\x0c\x42ookResponse\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x11\n\tbook_name'
+    b'\n\x0b\x62ooks.proto\x12\x04\x62ook\x1a\x1fgoogle/protobuf/timestamp.proto\x1a google/protobuf/field_mask.proto'
+    b'\"J\n\x0b\x42ookRequest\x12\x0f\n\x07\x62ook_id\x18\x01 \x01(\x05\x12*'
+    b'\n\x06\x66ields\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask'
+    b'\":\n\x0c\x45mptyRequest\x12*\n\x06\x66ields\x18\x01 \x01(\x0b'
+    b'\x32\x1a.google.protobuf.FieldMask'
+    b'\"T\n\x12StreamBooksRequest\x12\x12\n\nchunk_size\x18\x01 \x01(\x05\x12*'
+    b'\n\x06\x66ields\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask'
+    b'\"a\n\x10ListBooksRequest\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x0e'
+    b'\n\x06\x63ursor\x18\x02 \x01(\t\x12*\n\x06\x66ields\x18\x03 \x01(\x0b'
+    b'\x32\x1a.google.protobuf.FieldMask'
+    b'\"T\n\x14\x42\x61tchGetBooksRequest\x12\x10\n\x08\x62ook_ids\x18\x01 \x03(\x05\x12*'
+    b'\n\x06\x66ields\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask'
+    b'\"@\n\rImportBookRow\x12\x0c\n\x04line\x18\x01 \x01(\x03\x12\x11\n\tbook_name'
+    b'\x18\x02 \x01(\t\x12\x0e\n\x06\x61uthor\x18\x03 \x01(\t'
+    b'\"7\n\x12ImportBooksRequest\x12!\n\x04rows\x18\x01 \x03(\x0b'
+    b'\x32\x13.book.ImportBookRow'
+    b'\"@\n\rUpsertBookRow\x12\x0c\n\x04isbn\x18\x01 \x01(\t\x12\x11\n\tbook_name\x18\x02'
+    b' \x01(\t\x12\x0e\n\x06\x61uthor\x18\x03 \x01(\t'
+    b'\"8\n\x12UpsertBooksRequest\x12\"\n\x05\x62ooks\x18\x01 \x03(\x0b'
+    b'\x32\x13.book.UpsertBookRow'
+    b'\"\x7f\n\x0c\x42ookResponse\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x11\n\tbook_name'
     b'\x18\x02 \x01(\t\x12\x0e\n\x06\x61uthor\x18\x03 \x01(\t\x12/\n\x0buploaded_at'
-    b'\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp'
+    b'\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x0f\n\x07version\x18\x05'
+    b' \x01(\x05'
     b'\"2\n\rBooksResponse\x12!\n\x05\x62ooks\x18\x01 \x03(\x0b\x32\x12.book.BookResponse'
-    b'\"9\n\x0fPostBookRequest\x12\x11\n\tbook_name\x18\x01 \x01(\t\x12\x13\n\x0b\x62ook_author'
+    b'\"K\n\x11ListBooksResponse\x12!\n\x05\x62ooks\x18\x01 \x03(\x0b'
+    b'\x32\x12.book.BookResponse\x12\x13\n\x0bnext_cursor\x18\x02 \x01(\t'
+    b'\"W\n\x13\x42\x61tchGetBooksResult\x12\x0f\n\x07\x62ook_id\x18\x01 \x01(\x05\x12\r'
+    b'\n\x05\x66ound\x18\x02 \x01(\x08\x12 \n\x04\x62ook\x18\x03 \x01(\x0b'
+    b'\x32\x12.book.BookResponse'
+    b'\"C\n\x15\x42\x61tchGetBooksResponse\x12*\n\x07results\x18\x01 \x03(\x0b'
+    b'\x32\x19.book.BatchGetBooksResult'
+    b'\"0\n\x0fImportBookError\x12\x0c\n\x04line\x18\x01 \x01(\x03\x12\x0f\n\x07message'
     b'\x18\x02 \x01(\t'
+    b'\"p\n\x13ImportBooksResponse\x12\x10\n\x08received\x18\x01 \x01(\x03\x12\x10'
+    b'\n\x08imported\x18\x02 \x01(\x03\x12\x0e\n\x06\x66\x61iled\x18\x03 \x01(\x03\x12%'
+    b'\n\x06\x65rrors\x18\x04 \x03(\x0b\x32\x15.book.ImportBookError'
+    b'\"K\n\x13UpsertBooksResponse\x12\x10\n\x08inserted\x18\x01 \x01(\x03\x12\x0f'
+    b'\n\x07updated\x18\x02 \x01(\x03\x12\x11\n\tunchanged\x18\x03 \x01(\x03'
+    b'\"9\n\x0fPostBookRequest\x12\x11\n\tbook_name\x18\x01 \x01(\t\x12\x13'
+    b'\n\x0b\x62ook_author\x18\x02 \x01(\t'
     b'\"$\n\x11\x44\x65leteBookRequest\x12\x0f\n\x07\x62ook_id\x18\x01 \x01(\x05'
-    b'\"G\n\x11UpdateBookRequest\x12\x0f\n\x07\x62ook_id\x18\x01 \x01(\x05'
-    b'\x12\x11\n\tbook_name\x18\x02 \x01(\t\x12\x0e\n\x06\x61uthor\x18\x03 \x01(\t'
-    b'2\xa8\x02\n\x0b\x42ookService\x12\x34\n\x0bGetBookById\x12\x11.book.BookRequest'
-    b'\x1a\x12.book.BookResponse'
+    b'\"a\n\x11UpdateBookRequest\x12\x0f\n\x07\x62ook_id\x18\x01 \x01(\x05\x12\x11'
+    b'\n\tbook_name\x18\x02 \x01(\t\x12\x0e\n\x06\x61uthor\x18\x03 \x01(\t\x12\x18'
+    b'\n\x10\x65xpected_version\x18\x04 \x01(\x05'
+    b'\x32\xfa\x04\n\x0b\x42ookService'
+    b'\x12\x34\n\x0bGetBookById\x12\x11.book.BookRequest\x1a\x12.book.BookResponse'
     b'\x12\x36\n\x0bGetAllBooks\x12\x12.book.EmptyRequest\x1a\x13.book.BooksResponse'
     b'\x12\x35\n\x08PostBook\x12\x15.book.PostBookRequest\x1a\x12.book.BookResponse'
     b'\x12\x39\n\nDeleteBook\x12\x17.book.DeleteBookRequest\x1a\x12.book.BookResponse'
     b'\x12\x39\n\nUpdateBook\x12\x17.book.UpdateBookRequest\x1a\x12.book.BookResponse'
+    b'\x12>\n\x0bStreamBooks\x12\x18.book.StreamBooksRequest\x1a\x13.book.BooksResponse0\x01'
+    b'\x12<\n\tListBooks\x12\x16.book.ListBooksRequest\x1a\x17.book.ListBooksResponse'
+    b'\x12H\n\rBatchGetBooks\x12\x1a.book.BatchGetBooksRequest\x1a\x1b.book.BatchGetBooksResponse'
+    b'\x12\x44\n\x0bImportBooks\x12\x18.book.ImportBooksRequest\x1a\x19.book.ImportBooksResponse(\x01'
+    b'\x12\x42\n\x0bUpsertBooks\x12\x18.book.UpsertBooksRequest\x1a\x19.book.UpsertBooksResponse'
     b'b\x06proto3'
 )
 
@@ -40,20 +79,46 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'books_pb2', _globals)
 
 if not _descriptor._USE_C_DESCRIPTORS:
     DESCRIPTOR._loaded_options = None
-    _globals['_BOOKREQUEST']._serialized_start = 54
-    _globals['_BOOKREQUEST']._serialized_end = 84
-    _globals['_EMPTYREQUEST']._serialized_start = 86
-    _globals['_EMPTYREQUEST']._serialized_end = 100
-    _globals['_BOOKRESPONSE']._serialized_start = 102
-    _globals['_BOOKRESPONSE']._serialized_end = 212
-    _globals['_BOOKSRESPONSE']._serialized_start = 214
-    _globals['_BOOKSRESPONSE']._serialized_end = 264
-    _globals['_POSTBOOKREQUEST']._serialized_start = 266
-    _globals['_POSTBOOKREQUEST']._serialized_end = 323
-    _globals['_DELETEBOOKREQUEST']._serialized_start = 325
-    _globals['_DELETEBOOKREQUEST']._serialized_end = 361
-    _globals['_UPDATEBOOKREQUEST']._serialized_start = 363
-    _globals['_UPDATEBOOKREQUEST']._serialized_end = 434
-    _globals['_BOOKSERVICE']._serialized_start = 437
-    _globals['_BOOKSERVICE']._serialized_end = 733
+    _globals['_BOOKREQUEST']._serialized_start = 88
+    _globals['_BOOKREQUEST']._serialized_end = 162
+    _globals['_EMPTYREQUEST']._serialized_start = 164
+    _globals['_EMPTYREQUEST']._serialized_end = 222
+    _globals['_STREAMBOOKSREQUEST']._serialized_start = 224
+    _globals['_STREAMBOOKSREQUEST']._serialized_end = 308
+    _globals['_LISTBOOKSREQUEST']._serialized_start = 310
+    _globals['_LISTBOOKSREQUEST']._serialized_end = 407
+    _globals['_BATCHGETBOOKSREQUEST']._serialized_start = 409
+    _globals['_BATCHGETBOOKSREQUEST']._serialized_end = 493
+    _globals['_IMPORTBOOKROW']._serialized_start = 495
+    _globals['_IMPORTBOOKROW']._serialized_end = 559
+    _globals['_IMPORTBOOKSREQUEST']._serialized_start = 561
+    _globals['_IMPORTBOOKSREQUEST']._serialized_end = 616
+    _globals['_UPSERTBOOKROW']._serialized_start = 618
+    _globals['_UPSERTBOOKROW']._serialized_end = 682
+    _globals['_UPSERTBOOKSREQUEST']._serialized_start = 684
+    _globals['_UPSERTBOOKSREQUEST']._serialized_end = 740
+    _globals['_BOOKRESPONSE']._serialized_start = 742
+    _globals['_BOOKRESPONSE']._serialized_end = 869
+    _globals['_BOOKSRESPONSE']._serialized_start = 871
+    _globals['_BOOKSRESPONSE']._serialized_end = 921
+    _globals['_LISTBOOKSRESPONSE']._serialized_start = 923
+    _globals['_LISTBOOKSRESPONSE']._serialized_end = 998
+    _globals['_BATCHGETBOOKSRESULT']._serialized_start = 1000
+    _globals['_BATCHGETBOOKSRESULT']._serialized_end = 1087
+    _globals['_BATCHGETBOOKSRESPONSE']._serialized_start = 1089
+    _globals['_BATCHGETBOOKSRESPONSE']._serialized_end = 1156
+    _globals['_IMPORTBOOKERROR']._serialized_start = 1158
+    _globals['_IMPORTBOOKERROR']._serialized_end = 1206
+    _globals['_IMPORTBOOKSRESPONSE']._serialized_start = 1208
+    _globals['_IMPORTBOOKSRESPONSE']._serialized_end = 1320
+    _globals['_UPSERTBOOKSRESPONSE']._serialized_start = 1322
+    _globals['_UPSERTBOOKSRESPONSE']._serialized_end = 1397
+    _globals['_POSTBOOKREQUEST']._serialized_start = 1399
+    _globals['_POSTBOOKREQUEST']._serialized_end = 1456
+    _globals['_DELETEBOOKREQUEST']._serialized_start = 1458
+    _globals['_DELETEBOOKREQUEST']._serialized_end = 1494
+    _globals['_UPDATEBOOKREQUEST']._serialized_start = 1496
+    _globals['_UPDATEBOOKREQUEST']._serialized_end = 1593
+    _globals['_BOOKSERVICE']._serialized_start = 1596
+    _globals['_BOOKSERVICE']._serialized_end = 2230
 # @@protoc_insertion_point(module_scope)
@@ -75,6 +75,36 @@ class BookServiceStub:
             response_deserializer=books__pb2.BookResponse.FromString,
             _registered_method=True,
         )
+        self.StreamBooks = channel.unary_stream(
+            "/book.BookService/StreamBooks",
+            request_serializer=books__pb2.StreamBooksRequest.SerializeToString,
+            response_deserializer=books__pb2.BooksResponse.FromString,
+            _registered_method=True,
+        )
+        self.ListBooks = channel.unary_unary(
+            "/book.BookService/ListBooks",
+            request_serializer=books__pb2.ListBooksRequest.SerializeToString,
+            response_deserializer=books__pb2.ListBooksResponse.FromString,
+            _registered_method=True,
+        )
+        self.BatchGetBooks = channel.unary_unary(
+            "/book.BookService/BatchGetBooks",
+            request_serializer=books__pb2.BatchGetBooksRequest.SerializeToString,
+            response_deserializer=books__pb2.BatchGetBooksResponse.FromString,
+            _registered_method=True,
+        )
+        self.ImportBooks = channel.stream_unary(
+            "/book.BookService/ImportBooks",
+            request_serializer=books__pb2.ImportBooksRequest.SerializeToString,
+            response_deserializer=books__pb2.ImportBooksResponse.FromString,
+            _registered_method=True,
+        )
+        self.UpsertBooks = channel.unary_unary(
+            "/book.BookService/UpsertBooks",
+            request_serializer=books__pb2.UpsertBooksRequest.SerializeToString,
+            response_deserializer=books__pb2.UpsertBooksResponse.FromString,
+            _registered_method=True,
+        )
 
 
 
@@ -194,6 +224,111 @@ class BookServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamBooks (
+        self,
+        request,
+        context,
+    ):
+        
+        """
+        Streams all books in chunks read from a server-side cursor.
+
+        Args:
+            request: The StreamBooks request message.
+            context (grpc.ServicerContext): The context for the gRPC call.
+
+        Raises:
+            NotImplementedError: Always raised to indicate that the method is not implemented.
+        """
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListBooks (
+        self,
+        request,
+        context,
+    ):
+        
+        """
+        Retrieves one keyset-paginated page of books.
+
+        Args:
+            request: The ListBooks request message.
+            context (grpc.ServicerContext): The context for the gRPC call.
+
+        Raises:
+            NotImplementedError: Always raised to indicate that the method is not implemented.
+        """
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchGetBooks (
+        self,
+        request,
+        context,
+    ):
+        
+        """
+        Retrieves several books by ID in a single round trip.
+
+        Args:
+            request: The BatchGetBooks request message.
+            context (grpc.ServicerContext): The context for the gRPC call.
+
+        Raises:
+            NotImplementedError: Always raised to indicate that the method is not implemented.
+        """
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ImportBooks (
+        self,
+        request_iterator,
+        context,
+    ):
+        
+        """
+        Bulk-loads a stream of book rows.
+
+        Args:
+            request_iterator: An iterator of ImportBooks request messages.
+            context (grpc.ServicerContext): The context for the gRPC call.
+
+        Raises:
+            NotImplementedError: Always raised to indicate that the method is not implemented.
+        """
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UpsertBooks (
+        self,
+        request,
+        context,
+    ):
+        
+        """
+        Inserts or updates a batch of books keyed by ISBN.
+
+        Args:
+            request: The UpsertBooks request message.
+            context (grpc.ServicerContext): The context for the gRPC call.
+
+        Raises:
+            NotImplementedError: Always raised to indicate that the method is not implemented.
+        """
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_BookServiceServicer_to_server (
     servicer, 
@@ -237,6 +372,31 @@ def add_BookServiceServicer_to_server (
             request_deserializer=books__pb2.UpdateBookRequest.FromString,
             response_serializer=books__pb2.BookResponse.SerializeToString,
         ),
+        "StreamBooks": grpc.unary_stream_rpc_method_handler (
+            servicer.StreamBooks,
+            request_deserializer=books__pb2.StreamBooksRequest.FromString,
+            response_serializer=books__pb2.BooksResponse.SerializeToString,
+        ),
+        "ListBooks": grpc.unary_unary_rpc_method_handler (
+            servicer.ListBooks,
+            request_deserializer=books__pb2.ListBooksRequest.FromString,
+            response_serializer=books__pb2.ListBooksResponse.SerializeToString,
+        ),
+        "BatchGetBooks": grpc.unary_unary_rpc_method_handler (
+            servicer.BatchGetBooks,
+            request_deserializer=books__pb2.BatchGetBooksRequest.FromString,
+            response_serializer=books__pb2.BatchGetBooksResponse.SerializeToString,
+        ),
+        "ImportBooks": grpc.stream_unary_rpc_method_handler (
+            servicer.ImportBooks,
+            request_deserializer=books__pb2.ImportBooksRequest.FromString,
+            response_serializer=books__pb2.ImportBooksResponse.SerializeToString,
+        ),
+        "UpsertBooks": grpc.unary_unary_rpc_method_handler (
+            servicer.UpsertBooks,
+            request_deserializer=books__pb2.UpsertBooksRequest.FromString,
+            response_serializer=books__pb2.UpsertBooksResponse.SerializeToString,
+        ),
     }
     
     generic_handler = grpc.method_handlers_generic_handler (
@@ -509,3 +669,253 @@ class BookService(object):
             metadata,
             _registered_method=True,
         )
+    
+    @staticmethod
+    def StreamBooks(
+        request: Any,
+        target: str,
+        options: Sequence[Any] = (),
+        channel_credentials: Any = None,
+        call_credentials: Any = None,
+        insecure: bool = False,
+        compression: Any = None,
+        wait_for_ready: Any = None,
+        timeout: Any = None,
+        metadata: Any = None,
+    ) -> Any:
+        
+        """
+        Calls the StreamBooks RPC method.
+
+        Args:
+            request: The StreamBooksRequest message.
+            target (str): The target server address.
+            options (Sequence[Any], optional): Additional channel options.
+            channel_credentials (optional): Channel credentials.
+            call_credentials (optional): Call credentials.
+            insecure (bool, optional): If True, use an insecure channel.
+            compression (optional): Compression settings.
+            wait_for_ready (optional): Whether to wait for the channel to be ready.
+            timeout (optional): The RPC timeout.
+            metadata (optional): Additional metadata for the RPC.
+
+        Returns:
+            An iterator of BooksResponse messages.
+        """
+        
+        return grpc.experimental.unary_stream (
+            request,
+            target,
+            '/book.BookService/StreamBooks',
+            books__pb2.StreamBooksRequest.SerializeToString,
+            books__pb2.BooksResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
+    
+    @staticmethod
+    def ListBooks(
+        request: Any,
+        target: str,
+        options: Sequence[Any] = (),
+        channel_credentials: Any = None,
+        call_credentials: Any = None,
+        insecure: bool = False,
+        compression: Any = None,
+        wait_for_ready: Any = None,
+        timeout: Any = None,
+        metadata: Any = None,
+    ) -> Any:
+        
+        """
+        Calls the ListBooks RPC method.
+
+        Args:
+            request: The ListBooksRequest message.
+            target (str): The target server address.
+            options (Sequence[Any], optional): Additional channel options.
+            channel_credentials (optional): Channel credentials.
+            call_credentials (optional): Call credentials.
+            insecure (bool, optional): If True, use an insecure channel.
+            compression (optional): Compression settings.
+            wait_for_ready (optional): Whether to wait for the channel to be ready.
+            timeout (optional): The RPC timeout.
+            metadata (optional): Additional metadata for the RPC.
+
+        Returns:
+            ListBooksResponse: The requested page and the cursor of the next one.
+        """
+        
+        return grpc.experimental.unary_unary (
+            request,
+            target,
+            '/book.BookService/ListBooks',
+            books__pb2.ListBooksRequest.SerializeToString,
+            books__pb2.ListBooksResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
+    
+    @staticmethod
+    def BatchGetBooks(
+        request: Any,
+        target: str,
+        options: Sequence[Any] = (),
+        channel_credentials: Any = None,
+        call_credentials: Any = None,
+        insecure: bool = False,
+        compression: Any = None,
+        wait_for_ready: Any = None,
+        timeout: Any = None,
+        metadata: Any = None,
+    ) -> Any:
+        
+        """
+        Calls the BatchGetBooks RPC method.
+
+        Args:
+            request: The BatchGetBooksRequest message.
+            target (str): The target server address.
+            options (Sequence[Any], optional): Additional channel options.
+            channel_credentials (optional): Channel credentials.
+            call_credentials (optional): Call credentials.
+            insecure (bool, optional): If True, use an insecure channel.
+            compression (optional): Compression settings.
+            wait_for_ready (optional): Whether to wait for the channel to be ready.
+            timeout (optional): The RPC timeout.
+            metadata (optional): Additional metadata for the RPC.
+
+        Returns:
+            BatchGetBooksResponse: One result per requested ID, in request order.
+        """
+        
+        return grpc.experimental.unary_unary (
+            request,
+            target,
+            '/book.BookService/BatchGetBooks',
+            books__pb2.BatchGetBooksRequest.SerializeToString,
+            books__pb2.BatchGetBooksResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
+    
+    @staticmethod
+    def ImportBooks(
+        request_iterator: Any,
+        target: str,
+        options: Sequence[Any] = (),
+        channel_credentials: Any = None,
+        call_credentials: Any = None,
+        insecure: bool = False,
+        compression: Any = None,
+        wait_for_ready: Any = None,
+        timeout: Any = None,
+        metadata: Any = None,
+    ) -> Any:
+        
+        """
+        Calls the ImportBooks RPC method.
+
+        Args:
+            request_iterator: An iterator of ImportBooksRequest messages.
+            target (str): The target server address.
+            options (Sequence[Any], optional): Additional channel options.
+            channel_credentials (optional): Channel credentials.
+            call_credentials (optional): Call credentials.
+            insecure (bool, optional): If True, use an insecure channel.
+            compression (optional): Compression settings.
+            wait_for_ready (optional): Whether to wait for the channel to be ready.
+            timeout (optional): The RPC timeout.
+            metadata (optional): Additional metadata for the RPC.
+
+        Returns:
+            ImportBooksResponse: Counts and per-row errors for the whole import.
+        """
+        
+        return grpc.experimental.stream_unary (
+            request_iterator,
+            target,
+            '/book.BookService/ImportBooks',
+            books__pb2.ImportBooksRequest.SerializeToString,
+            books__pb2.ImportBooksResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
+    
+    @staticmethod
+    def UpsertBooks(
+        request: Any,
+        target: str,
+        options: Sequence[Any] = (),
+        channel_credentials: Any = None,
+        call_credentials: Any = None,
+        insecure: bool = False,
+        compression: Any = None,
+        wait_for_ready: Any = None,
+        timeout: Any = None,
+        metadata: Any = None,
+    ) -> Any:
+        
+        """
+        Calls the UpsertBooks RPC method.
+
+        Args:
+            request: The UpsertBooksRequest message.
+            target (str): The target server address.
+            options (Sequence[Any], optional): Additional channel options.
+            channel_credentials (optional): Channel credentials.
+            call_credentials (optional): Call credentials.
+            insecure (bool, optional): If True, use an insecure channel.
+            compression (optional): Compression settings.
+            wait_for_ready (optional): Whether to wait for the channel to be ready.
+            timeout (optional): The RPC timeout.
+            metadata (optional): Additional metadata for the RPC.
+
+        Returns:
+            UpsertBooksResponse: How many books were inserted, updated and left unchanged.
+        """
+        
+        return grpc.experimental.unary_unary (
+            request,
+            target,
+            '/book.BookService/UpsertBooks',
+            books__pb2.UpsertBooksRequest.SerializeToString,
+            books__pb2.UpsertBooksResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
@@ -0,0 +1,709 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+import grpc
+from grpc.aio import ServicerContext
+
+import grpc_service.books_pb.books_pb2 as books_pb2
+from grpc_service.books_pb.books_pb2 import (
+    BookResponse,
+    BooksResponse,
+    PostBookRequest,
+    DeleteBookRequest,
+    UpdateBookRequest,
+    EmptyRequest,
+    BookRequest,
+    StreamBooksRequest,
+    ListBooksRequest,
+    ListBooksResponse,
+    BatchGetBooksRequest,
+    BatchGetBooksResponse,
+    ImportBookRow,
+    ImportBooksRequest,
+    ImportBooksResponse,
+    UpsertBooksRequest,
+    UpsertBooksResponse,
+)
+
+from grpc_service.modules.cache.striped_lru_cache import CACHE_MISS
+from grpc_service.modules.cache.single_flight import AsyncSingleFlight
+from grpc_service.controllers.book_controller.book_controller import (
+    BookService,
+    IMPORT_COPY_QUERY,
+    BOOKS_QUERY,
+    ALL_BOOKS_QUERY,
+    BOOK_ROW_MAPPER,
+    LIST_KEY_COLUMNS,
+    BATCH_KEY_COLUMNS,
+    RETURNING_BOOK,
+    BOOK_VERSION_QUERY,
+)
+from grpc_service.modules.database.storage_backend.storage_backend import AsyncStorageBackend
+from grpc_service.modules.database.storage_backend.backend_factory import create_async_storage_backend
+from grpc_service.modules.database.write_batcher.write_batcher import AsyncWriteBatcher
+from grpc_service.modules.database.query_deadline.query_deadline import QUERY_DEADLINE_ERRORS
+
+class AsyncBookService(BookService):
+    
+    """
+    Coroutine implementation of BookService for the grpc.aio server.
+
+    Every RPC awaits the AsyncDatabaseController instead of blocking a worker
+    thread on psycopg2, so a single event loop can keep thousands of RPCs in
+    flight while only `DB_ASYNC_POOL_MAX_SIZE` of them hold a connection.
+    Status codes and details mirror the thread-pool BookService so both
+    server modes can be compared under the same load.
+    """
+    
+    def __init__ (
+        self,
+        database_controller: Optional[AsyncStorageBackend] = None,
+    ) -> None:
+        
+        """
+        Initializes the AsyncBookService instance.
+
+        Args:
+            database_controller (Optional[AsyncStorageBackend], optional): The backend used to
+                execute database operations; defaults to the one `DB_BACKEND` selects.
+        """
+        
+        # Skips BookService.__init__, which would build the blocking helpers.
+        super(BookService, self).__init__()
+        
+        self._configure (
+            database_controller,
+            backend_factory=create_async_storage_backend,
+            flight_factory=AsyncSingleFlight,
+            batcher_factory=AsyncWriteBatcher,
+        )
+        
+        # The server's event loop; the books snapshot is rebuilt in a thread that submits its query here.
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def GetBookById (
+        self,
+        request: BookRequest,
+        context: ServicerContext,
+    ) -> BookResponse:
+        
+        """
+        Retrieve a book by its ID from the database.
+
+        Args:
+            request (BookRequest): The gRPC request containing `book_id` and an optional `fields` mask.
+            context (ServicerContext): The gRPC context used for setting error codes and details.
+
+        Returns:
+            BookResponse: The book details if found, or an empty BookResponse on failure.
+        """
+        
+        try:
+            columns, _ = self._project(request.fields)
+        
+        except ValueError as e:
+            
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return books_pb2.BookResponse()
+        
+        cached = self.book_cache.get(request.book_id)
+        if cached is not CACHE_MISS:
+            if cached is None:
+                return self._book_not_found(request, context)
+            return self._mask_book(cached, columns)
+        
+        response = books_pb2.BookResponse()
+        with self.rpc_errors(context, 'fetching a book'):
+            response = await self.book_flight.do (
+                request.book_id,
+                lambda: self._load_book_async(request.book_id),
+            )
+            
+            if response is None:
+                response = self._book_not_found(request, context)
+            else:
+                response = self._mask_book(response, columns)
+        
+        return response
+    
+    async def GetAllBooks (
+        self,
+        request: EmptyRequest,
+        context: ServicerContext,
+    ) -> BooksResponse:
+        
+        """
+        Retrieves all books from the database.
+
+        Args:
+            request (EmptyRequest): The gRPC request, with an optional `fields` mask.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            BooksResponse: A response containing a list of all books in the database.
+        """
+        
+        try:
+            columns, mapper = self._project(request.fields)
+        
+        except ValueError as e:
+            
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return books_pb2.BooksResponse()
+        
+        response = books_pb2.BooksResponse()
+        with self.rpc_errors(context, 'fetching all books'):
+            books = await self.all_books_flight.do (
+                columns,
+                lambda: self.database_controller.execute_get_query (
+                    BOOKS_QUERY.format(columns=', '.join(columns)),
+                ),
+            )
+            
+            response = books_pb2.BooksResponse(books=map(mapper, books))
+        
+        return response
+    
+    async def GetAllBooksSnapshot (
+        self,
+        request: bytes,
+        context: ServicerContext,
+    ) -> bytes:
+        
+        """
+        Serves GetAllBooks from the pre-serialized books snapshot.
+
+        Only the very first call waits for a build, which runs in a worker
+        thread so the event loop stays free to run the query it submits.
+
+        Args:
+            request (bytes): The serialized EmptyRequest, empty unless it carries a mask.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            bytes: A serialized BooksResponse, or empty bytes on failure.
+        """
+        
+        self.loop = asyncio.get_running_loop()
+        
+        with self.rpc_errors(context, 'serving the books snapshot'):
+            if request:
+                projected = books_pb2.EmptyRequest.FromString(request)
+                if projected.fields.paths:
+                    return (await self.GetAllBooks(projected, context)).SerializeToString()
+            
+            payload = self.books_snapshot.get(block=False)
+            if payload is None:
+                payload = await asyncio.to_thread(self.books_snapshot.get)
+            return payload
+        
+        return b''
+    
+    async def StreamBooks (
+        self,
+        request: StreamBooksRequest,
+        context: ServicerContext,
+    ) -> AsyncIterator[BooksResponse]:
+        
+        """
+        Streams all books from the database in chunks read from a server-side cursor.
+
+        Args:
+            request (StreamBooksRequest): The gRPC request containing an optional `chunk_size` and `fields` mask.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Yields:
+            BooksResponse: Up to `chunk_size` books per message.
+        """
+        
+        if request.chunk_size < 0:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('chunk_size must not be negative.')
+            return
+        
+        try:
+            columns, mapper = self._project(request.fields)
+        
+        except ValueError as e:
+            
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return
+        
+        chunk_size = min (
+            request.chunk_size or self.stream_chunk_size,
+            self.stream_max_chunk_size,
+        )
+        
+        with self.rpc_errors(context, 'streaming books'):
+            query = f"""
+            SELECT {', '.join(columns)}
+            FROM base_book
+            ORDER BY id
+            """
+            
+            chunks = self.database_controller.stream_get_query (
+                query,
+                chunk_size=chunk_size,
+            )
+            
+            async for books in chunks:
+                yield books_pb2.BooksResponse (
+                    books=map(mapper, books),
+                )
+    
+    async def ListBooks (
+        self,
+        request: ListBooksRequest,
+        context: ServicerContext,
+    ) -> ListBooksResponse:
+        
+        """
+        Retrieves one keyset-paginated page of books, newest first.
+
+        Args:
+            request (ListBooksRequest): The gRPC request containing `page_size`, `cursor` and an optional `fields` mask.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            ListBooksResponse: The page of books and the cursor of the next page.
+        """
+        
+        try:
+            columns, mapper = self._project(request.fields, LIST_KEY_COLUMNS)
+            query, params, page_size = self._build_list_books_query(request, columns)
+        
+        except ValueError as e:
+            
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return books_pb2.ListBooksResponse()
+        
+        response = books_pb2.ListBooksResponse()
+        with self.rpc_errors(context, 'listing books'):
+            books = await self.database_controller.execute_get_query (
+                query,
+                params,
+            )
+            response = self._to_list_books_response(books, page_size, columns, mapper)
+        
+        return response
+    
+    async def BatchGetBooks (
+        self,
+        request: BatchGetBooksRequest,
+        context: ServicerContext,
+    ) -> BatchGetBooksResponse:
+        
+        """
+        Retrieves several books by ID with a single `WHERE id = ANY(%s)` query.
+
+        Args:
+            request (BatchGetBooksRequest): The gRPC request containing `book_ids` and an optional `fields` mask.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            BatchGetBooksResponse: One result per requested ID, in request order.
+        """
+        
+        if len(request.book_ids) > self.batch_max_ids:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f'At most {self.batch_max_ids} book_ids may be requested at once.')
+            return books_pb2.BatchGetBooksResponse()
+        
+        try:
+            columns, mapper = self._project(request.fields, BATCH_KEY_COLUMNS)
+        
+        except ValueError as e:
+            
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return books_pb2.BatchGetBooksResponse()
+        
+        if not request.book_ids:
+            return books_pb2.BatchGetBooksResponse()
+        
+        response = books_pb2.BatchGetBooksResponse()
+        with self.rpc_errors(context, 'batch fetching books'):
+            query = f"""
+                SELECT {', '.join(columns)}
+                FROM base_book
+                WHERE id = ANY(%s)
+            """
+            
+            books = await self.database_controller.execute_get_query (
+                query,
+                (list(set(request.book_ids)),),
+            )
+            response = self._to_batch_get_books_response(request.book_ids, books, mapper)
+        
+        return response
+    
+    async def ImportBooks (
+        self,
+        request_iterator: AsyncIterator[ImportBooksRequest],
+        context: ServicerContext,
+    ) -> ImportBooksResponse:
+        
+        """
+        Bulk-loads a client stream of book rows into `base_book` with chunked COPY.
+
+        Each chunk is committed in its own unit of work, and an interrupted
+        import reports what it kept, as in BookService.ImportBooks.
+
+        Args:
+            request_iterator (AsyncIterator[ImportBooksRequest]): The client stream of row batches.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            ImportBooksResponse: Received, imported and failed counts, plus per-row errors.
+        """
+        
+        response = books_pb2.ImportBooksResponse()
+        chunk: List[ImportBookRow] = []
+        
+        with self.rpc_errors(context, 'importing books'):
+            async for request in request_iterator:
+                for row in request.rows:
+                    if self._accept_import_row(row, response):
+                        chunk.append(row)
+                    
+                    if len(chunk) >= self.import_chunk_size:
+                        await self._copy_import_chunk_async(chunk, response)
+                        chunk = []
+            
+            if chunk:
+                await self._copy_import_chunk_async(chunk, response)
+        
+        self._report_import_progress(context, response)
+        
+        if response.imported:
+            # The new ids may have been cached as not found.
+            self.book_cache.clear()
+            self.book_flight.clear()
+            self.recent_writes.record_all()
+            self.books_snapshot.bump()
+            self.all_books_flight.clear()
+        
+        return response
+    
+    async def UpsertBooks (
+        self,
+        request: UpsertBooksRequest,
+        context: ServicerContext,
+    ) -> UpsertBooksResponse:
+        
+        """
+        Inserts or updates a batch of books keyed by ISBN.
+
+        One `INSERT ... ON CONFLICT (isbn) DO UPDATE` per chunk, all in one
+        unit of work, as in BookService.UpsertBooks.
+
+        Args:
+            request (UpsertBooksRequest): The gRPC request containing the `books` to write.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            UpsertBooksResponse: How many distinct ISBNs were inserted, updated and left unchanged.
+        """
+        
+        error = self._check_upsert_rows(request.books)
+        
+        if error:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return books_pb2.UpsertBooksResponse()
+        
+        books = self._latest_upsert_rows(request.books)
+        written = []
+        
+        with self.rpc_errors(context, 'upserting books'):
+            async with self.database_controller.unit_of_work():
+                for start in range(0, len(books), self.upsert_chunk_size):
+                    chunk = books[start:start + self.upsert_chunk_size]
+                    query, params = self._build_upsert_query(chunk)
+                    
+                    written.extend (
+                        await self.database_controller.execute_returning_query (
+                            query,
+                            params,
+                            prepare=len(chunk) == self.upsert_chunk_size,
+                        ),
+                    )
+            
+            return self._record_upserted_books(len(books), written)
+        
+        return books_pb2.UpsertBooksResponse()
+    
+    async def PostBook (
+        self,
+        request: PostBookRequest,
+        context: ServicerContext,
+    ) -> BookResponse:
+        
+        """
+        Handles the creation of a new book record in the database.
+
+        Args:
+            request (PostBookRequest): The gRPC request containing `book_name` and `book_author`.
+            context (ServicerContext): The gRPC context for setting status codes and messages.
+
+        Returns:
+            BookResponse: The new book, read back by the INSERT, or an empty BookResponse on failure.
+        """
+        
+        with self.rpc_errors(context, 'creating a book'):
+            query = f"""
+            INSERT INTO base_book
+            (book_name, author, uploaded_at)
+            VALUES (%s, %s, NOW())
+            {RETURNING_BOOK}
+            """
+            
+            books = await self._write_async (
+                lambda: self.database_controller.execute_returning_query (
+                    query,
+                    (request.book_name, request.book_author),
+                    prepare=True,
+                ),
+            )
+            response = self._to_book_response(books[0])
+            
+            self.book_cache.invalidate(response.id)
+            self.book_flight.forget(response.id)
+            self.recent_writes.record(response.id)
+            self.books_snapshot.bump()
+            self.all_books_flight.clear()
+            
+            context.set_details('Inserted Successfully')
+            return response
+        
+        return books_pb2.BookResponse()
+    
+    async def DeleteBook (
+        self,
+        request: DeleteBookRequest,
+        context: ServicerContext,
+    ) -> BookResponse:
+        
+        """
+        Handles the deletion of a book record from the database.
+
+        Args:
+            request (DeleteBookRequest): The gRPC request containing `book_id` of the book to delete.
+            context (ServicerContext): The gRPC context for setting status codes and messages.
+
+        Returns:
+            BookResponse: The deleted book, read back by the DELETE, or an empty BookResponse on failure.
+        """
+        
+        with self.rpc_errors(context, 'deleting a book'):
+            query = f"""
+            DELETE FROM base_book
+            WHERE id = %s
+            {RETURNING_BOOK}
+            """
+            
+            books = await self._write_async (
+                lambda: self.database_controller.execute_returning_query (
+                    query,
+                    (request.book_id,),
+                    prepare=True,
+                ),
+            )
+            
+            self.book_cache.invalidate(request.book_id)
+            self.book_flight.forget(request.book_id)
+            self.recent_writes.record(request.book_id)
+            
+            if not books:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details('Book not found.')
+                return books_pb2.BookResponse()
+            
+            self.books_snapshot.bump()
+            self.all_books_flight.clear()
+            
+            context.set_details('Deleted Successfully')
+            return self._to_book_response(books[0])
+        
+        return books_pb2.BookResponse()
+    
+    async def UpdateBook (
+        self,
+        request: UpdateBookRequest,
+        context: ServicerContext,
+    ) -> BookResponse:
+        
+        """
+        Handles updating a book record in the database.
+
+        As in BookService, the update is refused with ABORTED when the book
+        is no longer at `expected_version`.
+
+        Args:
+            request (UpdateBookRequest): The gRPC request containing book ID and fields to update.
+            context (ServicerContext): The gRPC context for handling errors and setting status codes.
+
+        Returns:
+            BookResponse: The updated book, read back by the UPDATE, if successful.
+        """
+        
+        if not request.book_id:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('Book ID is required for updating.')
+            return books_pb2.BookResponse()
+        
+        query, params = self._build_update_query(request)
+        
+        if not query:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('No fields provided for update.')
+            return books_pb2.BookResponse()
+        
+        with self.rpc_errors(context, 'updating a book'):
+            updated_books, current_version = await self._write_async (
+                lambda: self._update_book_async(query, tuple(params), request),
+            )
+            
+            self.book_cache.invalidate(request.book_id)
+            self.book_flight.forget(request.book_id)
+            self.recent_writes.record(request.book_id)
+            
+            if not updated_books and current_version is not None:
+                context.set_code(grpc.StatusCode.ABORTED)
+                context.set_details(f'Book is at version {current_version}, not {request.expected_version}.')
+                return books_pb2.BookResponse()
+            
+            if not updated_books:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details('Book not found.')
+                return books_pb2.BookResponse()
+            
+            self.books_snapshot.bump()
+            self.all_books_flight.clear()
+            
+            return self._to_book_response(updated_books[0])
+        
+        return books_pb2.BookResponse()
+    
+    async def _update_book_async (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+        request: UpdateBookRequest,
+    ) -> Tuple[List[Tuple[Any, ...]], Optional[int]]:
+        
+        """
+        Coroutine counterpart of `_update_book`.
+        """
+        
+        updated_books = await self.database_controller.execute_returning_query(query, params, prepare=True)
+        
+        if updated_books or not request.expected_version:
+            return updated_books, None
+        
+        versions = await self.database_controller.execute_get_query(BOOK_VERSION_QUERY, (request.book_id,), prepare=True, primary=True)
+        
+        return updated_books, versions[0][0] if versions else None
+    
+    async def _write_async (
+        self,
+        fn: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        
+        """
+        Awaits a write RPC's statements, through the write batcher when `GRPC_WRITE_BATCH` is on.
+
+        Args:
+            fn (Callable[[], Awaitable[Any]]): Returns the coroutine running the statements.
+
+        Returns:
+            Any: What `fn()` returned.
+        """
+        
+        if self.write_batcher is None:
+            return await fn()
+        return await self.write_batcher.submit(fn)
+    
+    async def _load_book_async (
+        self,
+        book_id: int,
+    ) -> Optional[BookResponse]:
+        
+        """
+        Coroutine counterpart of `_load_book`.
+        """
+        
+        token = self.book_cache.token(book_id)
+        
+        query = """
+            SELECT id, book_name, author, uploaded_at, version
+            FROM base_book
+            WHERE id = %s
+        """
+        
+        books = await self.database_controller.execute_get_query (
+            query,
+            (book_id,),
+            prepare=True,
+            primary=book_id in self.recent_writes,
+        )
+        
+        response = self._to_book_response(books[0]) if books else None
+        self.book_cache.put(book_id, response, token)
+        
+        return response
+    
+    def _build_books_snapshot (
+        self,
+    ) -> bytes:
+        
+        """
+        Loads every book on the server's event loop and serializes them for the books snapshot.
+
+        Runs in the snapshot's rebuild thread, or in the worker thread of the
+        first GetAllBooksSnapshot call, never on the event loop itself.
+
+        Returns:
+            bytes: The serialized BooksResponse.
+        """
+        
+        books = asyncio.run_coroutine_threadsafe (
+            self.database_controller.execute_get_query(ALL_BOOKS_QUERY),
+            self.loop,
+        ).result()
+        
+        return books_pb2.BooksResponse (
+            books=map(BOOK_ROW_MAPPER, books),
+        ).SerializeToString()
+    
+    async def _copy_import_chunk_async (
+        self,
+        chunk: List[ImportBookRow],
+        response: ImportBooksResponse,
+    ) -> None:
+        
+        """
+        Writes and commits one chunk of an import with COPY and records the outcome.
+
+        Args:
+            chunk (List[ImportBookRow]): Validated rows to load.
+            response (ImportBooksResponse): The import summary to update.
+        """
+        
+        try:
+            async with self.database_controller.unit_of_work():
+                imported = await self.database_controller.execute_copy_query (
+                    IMPORT_COPY_QUERY,
+                    self._to_import_copy_rows(chunk),
+                )
+            response.imported += imported
+        
+        except QUERY_DEADLINE_ERRORS:
+            raise
+        
+        except Exception as e:
+            self._reject_import_chunk(chunk, e, response)
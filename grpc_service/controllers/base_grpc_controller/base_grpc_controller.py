@@ -1,4 +1,9 @@
+import grpc
+from contextlib import contextmanager
+from typing import Iterator
+
 from grpc_service.modules.logger.logger import LoggerModule
+from grpc_service.modules.database.query_deadline.query_deadline import QUERY_DEADLINE_ERRORS
 
 class BaseGRPCController:
     
@@ -57,3 +62,63 @@ class BaseGRPCController:
         context.set_code(code)
         context.set_details(message)
         return None  # Return empty response
+    
+    def deadline_exceeded_response (
+        self, 
+        context, 
+        error: Exception,
+    ) -> None:
+        
+        """
+        Reports a statement cut short by the RPC deadline as DEADLINE_EXCEEDED.
+
+        A deadline running out is expected under load rather than a fault of
+        the service, so it is logged as a warning, without a traceback.
+
+        Args:
+            context: gRPC context object.
+            error (Exception): One of `QUERY_DEADLINE_ERRORS`.
+        """
+        
+        self.logger.warning('Query deadline exceeded: %s', error)
+        context.set_code(grpc.StatusCode.DEADLINE_EXCEEDED)
+        context.set_details(f'Deadline exceeded: {error}')
+    
+    @contextmanager
+    def rpc_errors (
+        self, 
+        context, 
+        action: str,
+    ) -> Iterator[None]:
+        
+        """
+        Maps an error raised in the block to the RPC's status and suppresses it.
+
+        A statement cut short by the RPC deadline goes through
+        `deadline_exceeded_response`; anything else is logged with its
+        traceback and reported as INTERNAL. Handlers return their empty
+        response after the block. Being a plain context manager, it serves
+        blocking, coroutine and streaming handlers alike.
+
+        Args:
+            context: gRPC context object.
+            action (str): What the handler was doing, for the log, e.g. 'listing books'.
+        """
+        
+        try:
+            yield
+        
+        except QUERY_DEADLINE_ERRORS as e:
+            self.deadline_exceeded_response(context, e)
+        
+        except Exception as e:
+            
+            self.logger.error (
+                'An unexpected error occurred while %s: %s', 
+                action, 
+                str(e), 
+                exc_info=True,
+            )
+            
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f'Unexpected error: {e}')
@@ -1,26 +1,78 @@
+import os
+
 import grpc
 from grpc import ServicerContext
 
-from typing import Tuple, Optional, List
-from datetime import datetime
+from typing import Any, Callable, Iterator, Tuple, Optional, List, Sequence
+from datetime import datetime, timezone
 
-from google.protobuf.timestamp_pb2 import Timestamp
+from google.protobuf.field_mask_pb2 import FieldMask
 
 import grpc_service.books_pb.books_pb2 as books_pb2
 import grpc_service.books_pb.books_pb2_grpc as books_pb2_grpc
 from grpc_service.books_pb.books_pb2 import (
     BookResponse,
+    BooksResponse,
     PostBookRequest,
     DeleteBookRequest,
     UpdateBookRequest,
     EmptyRequest,
     BookRequest,
+    StreamBooksRequest,
+    ListBooksRequest,
+    ListBooksResponse,
+    BatchGetBooksRequest,
+    BatchGetBooksResponse,
+    ImportBookRow,
+    ImportBooksRequest,
+    ImportBooksResponse,
+    UpsertBookRow,
+    UpsertBooksRequest,
+    UpsertBooksResponse,
 )
 
 from grpc_service.modules.logger.logger import LoggerModule
-from grpc_service.modules.database.controller.database_controller import DatabaseController
+from grpc_service.modules.cache.striped_lru_cache import CACHE_MISS, StripedLRUCache
+from grpc_service.modules.cache.serialized_snapshot import SerializedSnapshot
+from grpc_service.modules.cache.single_flight import SingleFlight
+from grpc_service.modules.cache.recent_writes import RecentWrites
+from grpc_service.modules.pagination.keyset_cursor import KeysetCursor
+from grpc_service.modules.mapping.row_mapper import RowMapper, compile_row_mapper, project_columns
+from grpc_service.modules.database.storage_backend.storage_backend import StorageBackend
+from grpc_service.modules.database.storage_backend.backend_factory import create_storage_backend
+from grpc_service.modules.database.write_batcher.write_batcher import WriteBatcher
+from grpc_service.modules.database.query_deadline.query_deadline import QUERY_DEADLINE_ERRORS
 from grpc_service.controllers.base_grpc_controller.base_grpc_controller import BaseGRPCController
 
+IMPORT_COPY_QUERY = 'COPY base_book (book_name, author, uploaded_at) FROM STDIN'
+IMPORT_MAX_FIELD_LENGTH = 100
+# Trailing metadata key carrying the rows ImportBooks committed, even when the call fails.
+IMPORTED_ROWS_KEY = 'imported-rows'
+BOOK_COLUMNS = ('id', 'book_name', 'author', 'uploaded_at', 'version')
+BOOKS_QUERY = 'SELECT {columns} FROM base_book'
+ALL_BOOKS_QUERY = BOOKS_QUERY.format(columns=', '.join(BOOK_COLUMNS))
+BOOK_ROW_MAPPER = compile_row_mapper(BookResponse, BOOK_COLUMNS)
+# Write RPCs read the written row back from the write itself, mapped like a SELECT row.
+RETURNING_BOOK = 'RETURNING ' + ', '.join(BOOK_COLUMNS)
+# Columns a projection still selects because the service reads them back from each row.
+LIST_KEY_COLUMNS = ('id', 'uploaded_at')
+BATCH_KEY_COLUMNS = ('id',)
+# Tells a conditional UpdateBook that matched no row whether the book is gone or has moved on.
+BOOK_VERSION_QUERY = 'SELECT version FROM base_book WHERE id = %s'
+ISBN_MAX_LENGTH = 13
+# UpsertBooks writes a chunk of rows per statement. A book whose ISBN exists is only updated,
+# and its version bumped, if it changed; unchanged books are not returned, and a returned
+# row still at version 1 was inserted by this statement.
+UPSERT_QUERY = """
+    INSERT INTO base_book (isbn, book_name, author, uploaded_at)
+    VALUES {values}
+    ON CONFLICT (isbn) DO UPDATE
+    SET book_name = EXCLUDED.book_name, author = EXCLUDED.author, version = base_book.version + 1
+    WHERE base_book.book_name <> EXCLUDED.book_name OR base_book.author <> EXCLUDED.author
+    RETURNING id, version
+"""
+UPSERT_ROW_VALUES = '(%s, %s, %s, NOW())'
+
 class BookService (
     books_pb2_grpc.BookServiceServicer, 
     BaseGRPCController,
@@ -31,27 +83,101 @@ class BookService (
 
     This service implements the methods defined in the books.proto file for operations such as 
     retrieving a single book by ID, retrieving all books, creating, updating, and deleting book records.
-    It leverages a DatabaseController for executing database queries and inherits common gRPC response 
-    handling behavior from BaseGRPCController.
+    It leverages a storage backend (DatabaseController unless `DB_BACKEND` says otherwise) for
+    executing database queries and inherits common gRPC response handling behavior from BaseGRPCController.
     """
     
     def __init__ (
         self,
-        database_controller: DatabaseController = DatabaseController(),
+        database_controller: Optional[StorageBackend] = None,
     ) -> None:
         
         """
         Initializes the BookService instance.
 
         Args:
-            database_controller (DatabaseController, optional): An instance of DatabaseController 
-                used to execute database operations. If not provided, a new instance is created.
+            database_controller (Optional[StorageBackend], optional): The backend used to execute
+                database operations. If not provided, the one `DB_BACKEND` selects is created.
         """
         
         super().__init__()
         
-        self.database_controller = database_controller
+        self._configure (
+            database_controller,
+            backend_factory=create_storage_backend,
+            flight_factory=SingleFlight,
+            batcher_factory=WriteBatcher,
+        )
+    
+    def _configure (
+        self,
+        database_controller: Any,
+        backend_factory: Callable[[], Any],
+        flight_factory: Callable[[str], Any],
+        batcher_factory: Callable[..., Any],
+    ) -> None:
+        
+        """
+        Sets up the settings, caches and helpers BookService and AsyncBookService share.
+
+        The backend, single flights and write batcher come from the factories,
+        so each servicer builds only the blocking or only the asyncio kind.
+
+        Args:
+            database_controller (Any): The backend to use, or None to create one.
+            backend_factory (Callable[[], Any]): Creates the backend when none is given.
+            flight_factory (Callable[[str], Any]): Builds a single flight from its name.
+            batcher_factory (Callable[..., Any]): Builds the write batcher, called like WriteBatcher.
+        """
+        
+        self.database_controller = database_controller or backend_factory()
+        self.stream_chunk_size = int(os.getenv('GRPC_STREAM_CHUNK_SIZE', '500'))
+        self.stream_max_chunk_size = int(os.getenv('GRPC_STREAM_MAX_CHUNK_SIZE', '5000'))
+        self.list_page_size = int(os.getenv('GRPC_LIST_PAGE_SIZE', '50'))
+        self.list_max_page_size = int(os.getenv('GRPC_LIST_MAX_PAGE_SIZE', '1000'))
+        self.batch_max_ids = int(os.getenv('GRPC_BATCH_MAX_IDS', '1000'))
+        self.import_chunk_size = int(os.getenv('GRPC_IMPORT_CHUNK_SIZE', '5000'))
+        self.import_max_errors = int(os.getenv('GRPC_IMPORT_MAX_ERRORS', '1000'))
+        self.upsert_max_books = int(os.getenv('GRPC_UPSERT_MAX_BOOKS', '10000'))
+        self.upsert_chunk_size = int(os.getenv('GRPC_UPSERT_CHUNK_SIZE', '500'))
+        
+        # Finished GetBookById responses by id; None marks an id known not to exist.
+        self.book_cache = StripedLRUCache (
+            'book',
+            max_size=int(os.getenv('GRPC_BOOK_CACHE_SIZE', '10000')),
+            ttl=float(os.getenv('GRPC_BOOK_CACHE_TTL', '30')),
+            stripes=int(os.getenv('GRPC_BOOK_CACHE_STRIPES', '16')),
+        )
+        
+        # Ids written here so recently that a replica may still lack the write;
+        # GetBookById reads those from the primary and everything else from a replica.
+        self.recent_writes = RecentWrites (
+            float(os.getenv('DB_REPLICA_MAX_LAG', '5')) + float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5')),
+        )
+        
+        # Serialized GetAllBooks answer; every write that changes the catalog bumps it.
+        self.books_snapshot_enabled = os.getenv('GRPC_BOOKS_SNAPSHOT', 'true').lower() == 'true'
+        self.books_snapshot = SerializedSnapshot (
+            'books',
+            self._build_books_snapshot,
+            max_age=float(os.getenv('GRPC_BOOKS_SNAPSHOT_MAX_AGE', '60')),
+        )
 
+        # Concurrent identical reads share one query: GetBookById by id, GetAllBooks by column list.
+        self.book_flight = flight_factory('book')
+        self.all_books_flight = flight_factory('all_books')
+        
+        # Concurrent PostBook, UpdateBook and DeleteBook calls share one commit (group commit).
+        self.write_batch_enabled = os.getenv('GRPC_WRITE_BATCH', 'false').lower() == 'true'
+        self.write_batch_window = float(os.getenv('GRPC_WRITE_BATCH_WINDOW_MS', '2')) / 1000
+        self.write_batch_max_size = int(os.getenv('GRPC_WRITE_BATCH_MAX_SIZE', '64'))
+        self.write_batcher = batcher_factory (
+            'books',
+            self.database_controller,
+            window=self.write_batch_window,
+            max_batch_size=self.write_batch_max_size,
+        ) if self.write_batch_enabled else None
+    
     def GetBookById (
         self, 
         request: BookRequest, 
@@ -66,62 +192,53 @@ class BookService (
         NOT_FOUND status. In the event of database or unexpected errors, it rolls back the
         transaction, logs the error, and sets the gRPC context to INTERNAL.
 
+        Found and not-found answers are cached for `GRPC_BOOK_CACHE_TTL` seconds;
+        PostBook, UpdateBook and DeleteBook invalidate the affected id. On a miss,
+        concurrent calls for the same id share a single query. The cache holds
+        whole books, so a `fields` mask is applied to the cached response.
+
         Args:
-            request: A gRPC request object containing a 'book_id' attribute.
+            request: A gRPC request object containing a 'book_id' attribute and an optional `fields` mask.
             context: The gRPC context used for setting error codes and details.
 
         Returns:
             books_pb2.BookResponse: A response message containing the book details if found,
                                     or an empty BookResponse on failure.
+
+        Raises:
+            StatusCode.INVALID_ARGUMENT: If `fields` names an unknown field.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
         """
         
         try:
-            query = """
-                SELECT *
-                FROM base_book
-                WHERE id = %s
-            """
+            columns, _ = self._project(request.fields)
+        
+        except ValueError as e:
             
-            book = self.database_controller.execute_get_query (
-                query,
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return books_pb2.BookResponse()
+        
+        cached = self.book_cache.get(request.book_id)
+        if cached is not CACHE_MISS:
+            if cached is None:
+                return self._book_not_found(request, context)
+            return self._mask_book(cached, columns)
+        
+        response = books_pb2.BookResponse()
+        with self.rpc_errors(context, 'fetching a book'):
+            response = self.book_flight.do (
+                request.book_id,
+                lambda: self._load_book(request.book_id),
             )
-
-            if book:
-                
-                response = books_pb2.BookResponse (
-                    id=book[0],
-                    book_name=book[1],
-                    author=book[2],
-                    uploaded_at=book[3],
-                )
-                
-                ts = Timestamp()
-                ts.FromDatetime(datetime.utcnow())
-                response.uploaded_at.CopyFrom(ts)
             
+            if response is None:
+                response = self._book_not_found(request, context)
             else:
-                
-                context.set_code(grpc.StatusCode.NOT_FOUND)
-                context.set_details('Book not found')
-                
-                self.logger.info('Book not found for ID: %s', request.book_id)
-                
-                response = books_pb2.BookResponse()
-
-        except Exception as e:
-            
-            self.logger.error (
-                'An unexpected error occurred: %s', 
-                str(e), 
-                exc_info=True,
-            )
-                
-            context.set_code(grpc.StatusCode.INTERNAL)
-            context.set_details(f"Internal server error: {str(e)}")
-            response = books_pb2.BookResponse()
+                response = self._mask_book(response, columns)
 
         return response
-        
+    
     def GetAllBooks (
         self, 
         request: EmptyRequest, 
@@ -131,59 +248,379 @@ class BookService (
         """
         Retrieves all books from the database.
 
+        Only the columns named by the request's `fields` mask are selected.
+        Concurrent calls for the same columns share a single query.
+
         Args:
-            request (EmptyRequest): The gRPC request (unused in this case).
+            request (EmptyRequest): The gRPC request, with an optional `fields` mask.
             context (ServicerContext): The gRPC context for handling errors and status codes.
 
         Returns:
             BooksResponse: A response containing a list of all books in the database.
 
         Raises:
+            StatusCode.INVALID_ARGUMENT: If `fields` names an unknown field.
             StatusCode.INTERNAL: If an unexpected database error occurs.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
         """
         
         try:
+            columns, mapper = self._project(request.fields)
+        
+        except ValueError as e:
             
-            query = """
-            SELECT *
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return books_pb2.BooksResponse()
+        
+        response = books_pb2.BooksResponse()
+        with self.rpc_errors(context, 'fetching all books'):
+            books = self.all_books_flight.do (
+                columns,
+                lambda: self.database_controller.execute_get_query (
+                    BOOKS_QUERY.format(columns=', '.join(columns)),
+                ),
+            )
+
+            response = books_pb2.BooksResponse(books=map(mapper, books))
+
+        return response
+    
+    def GetAllBooksSnapshot (
+        self,
+        request: bytes,
+        context: ServicerContext,
+    ) -> bytes:
+        
+        """
+        Serves GetAllBooks from the pre-serialized books snapshot.
+
+        The server registers this method for GetAllBooks through a raw-bytes
+        handler, so the request is not parsed and the snapshot bytes go out as
+        they are: no BooksResponse is built or serialized per call. The snapshot
+        is rebuilt in the background after PostBook, UpdateBook, DeleteBook and
+        ImportBooks, and at least every `GRPC_BOOKS_SNAPSHOT_MAX_AGE` seconds.
+
+        The snapshot holds whole books; a request carrying a `fields` mask is
+        parsed and answered by GetAllBooks instead.
+
+        Args:
+            request (bytes): The serialized EmptyRequest, empty unless it carries a mask.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            bytes: A serialized BooksResponse, or empty bytes on failure.
+
+        Raises:
+            StatusCode.INTERNAL: If the first snapshot cannot be built.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
+        """
+        
+        with self.rpc_errors(context, 'serving the books snapshot'):
+            if request:
+                projected = books_pb2.EmptyRequest.FromString(request)
+                if projected.fields.paths:
+                    return self.GetAllBooks(projected, context).SerializeToString()
+            
+            return self.books_snapshot.get()
+        
+        return b''
+    
+    def StreamBooks (
+        self, 
+        request: StreamBooksRequest, 
+        context: ServicerContext,
+    ) -> Iterator[BooksResponse]:
+        
+        """
+        Streams all books from the database in chunks.
+
+        Rows are read from a server-side cursor `chunk_size` at a time and each
+        chunk is yielded as its own BooksResponse, so memory stays flat however
+        large the catalog is and the client receives the first books before the
+        query has finished.
+
+        Args:
+            request (StreamBooksRequest): The gRPC request containing an optional `chunk_size` and `fields` mask.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Yields:
+            BooksResponse: Up to `chunk_size` books per message.
+
+        Raises:
+            StatusCode.INVALID_ARGUMENT: If `chunk_size` is negative or `fields` names an unknown field.
+            StatusCode.INTERNAL: If an unexpected database error occurs.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
+        """
+        
+        if request.chunk_size < 0:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('chunk_size must not be negative.')
+            return
+        
+        try:
+            columns, mapper = self._project(request.fields)
+        
+        except ValueError as e:
+            
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return
+        
+        chunk_size = min (
+            request.chunk_size or self.stream_chunk_size,
+            self.stream_max_chunk_size,
+        )
+        
+        with self.rpc_errors(context, 'streaming books'):
+            query = f"""
+            SELECT {', '.join(columns)}
             FROM base_book
+            ORDER BY id
             """
             
-            books = self.database_controller.execute_get_query (
-                query
+            chunks = self.database_controller.stream_get_query (
+                query,
+                chunk_size=chunk_size,
             )
             
-            response = books_pb2.BooksResponse()
-            
-            for book in books:
-                book_proto = books_pb2.BookResponse(
-                    id=book[0],
-                    book_name=book[1],
-                    author=book[2],
-                    uploaded_at=book[3]
+            for books in chunks:
+                yield books_pb2.BooksResponse (
+                    books=map(mapper, books),
                 )
-                
-                ts = Timestamp()
-                ts.FromDatetime(datetime.utcnow())
-                book_proto.uploaded_at.CopyFrom(ts)
+    
+    def ListBooks (
+        self, 
+        request: ListBooksRequest, 
+        context: ServicerContext,
+    ) -> ListBooksResponse:
+        
+        """
+        Retrieves one page of books, newest first.
 
-                response.books.append(book_proto)
+        Pages are addressed by keyset rather than OFFSET: the cursor carries the
+        `(uploaded_at, id)` of the last book already returned and the next page
+        starts strictly after it, so every page is an index range scan of
+        `page_size` rows no matter how deep the client has paged.
 
-        except Exception as e:
-                
-            self.logger.error (
-                'An unexpected error occurred: %s', 
-                str(e), 
-                exc_info=True,
+        Args:
+            request (ListBooksRequest): The gRPC request containing `page_size`, `cursor` and an optional `fields` mask.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            ListBooksResponse: The page of books and the cursor of the next page.
+
+        Raises:
+            StatusCode.INVALID_ARGUMENT: If `page_size` is negative, `cursor` is malformed
+                                         or `fields` names an unknown field.
+            StatusCode.INTERNAL: If an unexpected database error occurs.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
+        """
+        
+        try:
+            columns, mapper = self._project(request.fields, LIST_KEY_COLUMNS)
+            query, params, page_size = self._build_list_books_query(request, columns)
+        
+        except ValueError as e:
+            
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return books_pb2.ListBooksResponse()
+        
+        response = books_pb2.ListBooksResponse()
+        with self.rpc_errors(context, 'listing books'):
+            books = self.database_controller.execute_get_query (
+                query,
+                params,
             )
+            response = self._to_list_books_response(books, page_size, columns, mapper)
+        
+        return response
+    
+    def BatchGetBooks (
+        self, 
+        request: BatchGetBooksRequest, 
+        context: ServicerContext,
+    ) -> BatchGetBooksResponse:
+        
+        """
+        Retrieves several books by ID with a single query.
+
+        All distinct IDs are fetched with one `WHERE id = ANY(%s)` statement on
+        one pooled connection, replacing a GetBookById round trip per book. The
+        response holds one result per requested ID, in request order and with
+        duplicates preserved; IDs with no matching book have `found` unset.
+
+        Args:
+            request (BatchGetBooksRequest): The gRPC request containing `book_ids` and an optional `fields` mask.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            BatchGetBooksResponse: One BatchGetBooksResult per requested ID.
+
+        Raises:
+            StatusCode.INVALID_ARGUMENT: If more than `GRPC_BATCH_MAX_IDS` IDs are requested
+                                         or `fields` names an unknown field.
+            StatusCode.INTERNAL: If an unexpected database error occurs.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
+        """
+        
+        if len(request.book_ids) > self.batch_max_ids:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f'At most {self.batch_max_ids} book_ids may be requested at once.')
+            return books_pb2.BatchGetBooksResponse()
+        
+        try:
+            columns, mapper = self._project(request.fields, BATCH_KEY_COLUMNS)
+        
+        except ValueError as e:
             
-            context.set_code(grpc.StatusCode.INTERNAL)
-            context.set_details(f'Unexpected error: {e}')
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return books_pb2.BatchGetBooksResponse()
+        
+        if not request.book_ids:
+            return books_pb2.BatchGetBooksResponse()
+        
+        response = books_pb2.BatchGetBooksResponse()
+        with self.rpc_errors(context, 'batch fetching books'):
+            query = f"""
+                SELECT {', '.join(columns)}
+                FROM base_book
+                WHERE id = ANY(%s)
+            """
             
-            response = books_pb2.BookResponse()
+            books = self.database_controller.execute_get_query (
+                query,
+                (list(set(request.book_ids)),),
+            )
+            response = self._to_batch_get_books_response(request.book_ids, books, mapper)
+        
+        return response
+    
+    def ImportBooks (
+        self, 
+        request_iterator: Iterator[ImportBooksRequest], 
+        context: ServicerContext,
+    ) -> ImportBooksResponse:
+        
+        """
+        Bulk-loads a client stream of book rows into `base_book`.
+
+        Rows are validated as they arrive and valid ones are buffered until
+        `GRPC_IMPORT_CHUNK_SIZE` of them are ready, then written with a single
+        `COPY FROM STDIN`. At most one chunk is held in memory, so the import
+        runs in constant memory whatever the size of the stream.
+
+        Each chunk is committed in its own unit of work, so no transaction
+        stays open while the client streams. A chunk rejected by the database
+        is rolled back alone, reported row by row, and the import carries on
+        with the next one. If the stream breaks or the deadline passes, the
+        chunks committed before stay imported. Every call sends the imported
+        row count in the `imported-rows` trailing metadata, because a failed
+        call has no response message to carry it.
+
+        Args:
+            request_iterator (Iterator[ImportBooksRequest]): The client stream of row batches.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            ImportBooksResponse: Received, imported and failed counts, plus up to
+                                 `GRPC_IMPORT_MAX_ERRORS` per-row errors.
+
+        Raises:
+            StatusCode.INTERNAL: If the stream breaks or an unexpected error occurs.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
+        """
+        
+        response = books_pb2.ImportBooksResponse()
+        chunk: List[ImportBookRow] = []
+        
+        with self.rpc_errors(context, 'importing books'):
+            for request in request_iterator:
+                for row in request.rows:
+                    if self._accept_import_row(row, response):
+                        chunk.append(row)
+                    
+                    if len(chunk) >= self.import_chunk_size:
+                        self._copy_import_chunk(chunk, response)
+                        chunk = []
             
+            if chunk:
+                self._copy_import_chunk(chunk, response)
+        
+        self._report_import_progress(context, response)
+        
+        if response.imported:
+            # The new ids may have been cached as not found.
+            self.book_cache.clear()
+            self.book_flight.clear()
+            self.recent_writes.record_all()
+            self.books_snapshot.bump()
+            self.all_books_flight.clear()
+        
         return response
+    
+    def UpsertBooks (
+        self, 
+        request: UpsertBooksRequest, 
+        context: ServicerContext,
+    ) -> UpsertBooksResponse:
         
+        """
+        Inserts or updates a batch of books keyed by ISBN.
+
+        Instead of a Get and a Post or Update per book, the batch is written
+        with one `INSERT ... ON CONFLICT (isbn) DO UPDATE` per
+        `GRPC_UPSERT_CHUNK_SIZE` books, all in one unit of work, so the batch
+        is applied entirely or not at all. Books are written in ISBN order,
+        so concurrent upserts lock shared rows in the same order and cannot
+        deadlock. A book is only updated, and its version bumped, if its name
+        or author changed, which makes replaying a feed cheap and harmless.
+
+        Args:
+            request (UpsertBooksRequest): The gRPC request containing the `books` to write.
+            context (ServicerContext): The gRPC context for handling errors and status codes.
+
+        Returns:
+            UpsertBooksResponse: How many distinct ISBNs were inserted, updated and left unchanged.
+
+        Raises:
+            StatusCode.INVALID_ARGUMENT: If more than `GRPC_UPSERT_MAX_BOOKS` books are sent
+                                         or a book is missing a field or has one too long.
+            StatusCode.INTERNAL: If an unexpected database error occurs.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
+        """
+        
+        error = self._check_upsert_rows(request.books)
+        
+        if error:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return books_pb2.UpsertBooksResponse()
+        
+        books = self._latest_upsert_rows(request.books)
+        written = []
+        
+        with self.rpc_errors(context, 'upserting books'):
+            with self.database_controller.unit_of_work():
+                for start in range(0, len(books), self.upsert_chunk_size):
+                    chunk = books[start:start + self.upsert_chunk_size]
+                    query, params = self._build_upsert_query(chunk)
+                    
+                    # Full chunks share one statement shape, worth preparing.
+                    written.extend (
+                        self.database_controller.execute_returning_query (
+                            query,
+                            params,
+                            prepare=len(chunk) == self.upsert_chunk_size,
+                        ),
+                    )
+            
+            return self._record_upserted_books(len(books), written)
+        
+        return books_pb2.UpsertBooksResponse()
+    
     def PostBook (
         self, 
         request: PostBookRequest, 
@@ -195,50 +632,51 @@ class BookService (
 
         This method inserts a new book into the `base_book` table with the provided
         book name and author. The `uploaded_at` field is automatically set to the
-        current timestamp.
+        current timestamp. The INSERT returns the new row, so the response carries
+        the whole book, id included, without a follow-up read.
 
         Args:
             request (PostBookRequest): The gRPC request containing `book_name` and `book_author`.
             context (grpc.ServicerContext): The gRPC context for setting status codes and messages.
 
         Returns:
-            BookResponse: A gRPC response object indicating success or failure.
+            BookResponse: The new book, or an empty BookResponse on failure.
 
         Raises:
             grpc.StatusCode.INVALID_ARGUMENT: If the request does not contain required fields.
             grpc.StatusCode.INTERNAL: If an unexpected error occurs during the database operation.
+            grpc.StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
         """
         
-        try:
-            query = """
+        response = books_pb2.BookResponse()
+        with self.rpc_errors(context, 'creating a book'):
+            query = f"""
             INSERT INTO base_book
             (book_name, author, uploaded_at)
-            VALUES (%s, %s, NOW());
+            VALUES (%s, %s, NOW())
+            {RETURNING_BOOK}
             """
             
-            book_id = self.database_controller.execute_insert_query (
-                query=query,
-                params=(request.book_name, request.book_author)
-            )
-            
-            if book_id:
-                context.set_details('Inserted Successfully')
-                response = books_pb2.BookResponse()
-
-        except Exception as e:
-            
-            self.logger.error (
-                "An unexpected error occurred: %s", 
-                str(e), 
-                exc_info=True,
+            books = self._write (
+                lambda: self.database_controller.execute_returning_query (
+                    query,
+                    (request.book_name, request.book_author),
+                    prepare=True,
+                ),
             )
+            response = self._to_book_response(books[0])
             
-            context.set_code(grpc.StatusCode.INTERNAL)
-            context.set_details(f'Unexpected error: {e}')
-            response = books_pb2.BookResponse()
+            # Drops a cached "not found" for the new id.
+            self.book_cache.invalidate(response.id)
+            self.book_flight.forget(response.id)
+            self.recent_writes.record(response.id)
+            self.books_snapshot.bump()
+            self.all_books_flight.clear()
             
+            context.set_details('Inserted Successfully')
+
         return response
-        
+    
     def DeleteBook (
         self, 
         request: DeleteBookRequest, 
@@ -248,48 +686,55 @@ class BookService (
         """
         Handles the deletion of a book record from the database.
 
-        This method deletes a book from the `base_book` table based on the given `book_id`.
+        This method deletes a book from the `base_book` table based on the given `book_id`
+        and returns the deleted book, read back by the DELETE itself.
 
         Args:
             request (DeleteBookRequest): The gRPC request containing `book_id` of the book to delete.
             context (ServicerContext): The gRPC context for setting status codes and messages.
 
         Returns:
-            BookResponse: A gRPC response object indicating success or failure.
+            BookResponse: The deleted book, or an empty BookResponse on failure.
 
         Raises:
-            StatusCode.INVALID_ARGUMENT: If `book_id` is missing or invalid.
+            StatusCode.NOT_FOUND: If the specified book does not exist in the database.
             StatusCode.INTERNAL: If an unexpected error occurs during the database operation.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
         """
         
-        try:
-            query = """
+        response = books_pb2.BookResponse()
+        with self.rpc_errors(context, 'deleting a book'):
+            query = f"""
             DELETE FROM base_book
             WHERE id = %s
+            {RETURNING_BOOK}
             """
             
-            self.database_controller.execute_delete_query (
-                query,
-                params=(str(request.book_id),)
+            books = self._write (
+                lambda: self.database_controller.execute_returning_query (
+                    query,
+                    (str(request.book_id),),
+                    prepare=True,
+                ),
             )
             
-            context.set_details('Deleted Successfully')
-            response = books_pb2.BookResponse()
-
-        except Exception as e:
+            self.book_cache.invalidate(request.book_id)
+            self.book_flight.forget(request.book_id)
+            self.recent_writes.record(request.book_id)
             
-            self.logger.error (
-                'An unexpected error occurred: %s', 
-                str(e), 
-                exc_info=True,
-            )
+            if not books:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details('Book not found.')
+                return books_pb2.BookResponse()
             
-            context.set_code(grpc.StatusCode.INTERNAL)
-            context.set_details(f'Unexpected error: {e}')
-            response = books_pb2.BookResponse()
+            self.books_snapshot.bump()
+            self.all_books_flight.clear()
             
+            context.set_details('Deleted Successfully')
+            response = self._to_book_response(books[0])
+
         return response
-        
+    
     def UpdateBook (
         self, 
         request: UpdateBookRequest, 
@@ -299,6 +744,12 @@ class BookService (
         """
         Handles updating a book record in the database.
 
+        The UPDATE returns the updated row, so the response carries the whole
+        book without a follow-up read. Every update bumps the book's version;
+        with `expected_version` set, the UPDATE only matches a book still at
+        that version, so of two clients editing the same version only the
+        first one wins and the other learns it worked on a stale copy.
+
         Args:
             request (UpdateBookRequest): The gRPC request containing book ID and fields to update.
             context (ServicerContext): The gRPC context for handling errors and setting status codes.
@@ -309,7 +760,9 @@ class BookService (
         Raises:
             StatusCode.INVALID_ARGUMENT: If `book_id` is missing or no fields are provided for update.
             StatusCode.NOT_FOUND: If the specified book does not exist in the database.
+            StatusCode.ABORTED: If the book is no longer at `expected_version`.
             StatusCode.INTERNAL: If an unexpected error occurs.
+            StatusCode.DEADLINE_EXCEEDED: If the RPC deadline passes before its queries finish.
         """
 
         if not request.book_id:
@@ -317,59 +770,104 @@ class BookService (
             context.set_details('Book ID is required for updating.')
             return books_pb2.BookResponse()
 
-        query, params = self.__build_update_query(request)
+        query, params = self._build_update_query(request)
 
         if not query:
             context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
             context.set_details('No fields provided for update.')
             return books_pb2.BookResponse()
 
-        params.append(request.book_id)
-            
-        try:
-            updated_book = self.database_controller.execute_edit_query (
-                query, 
-                tuple(params),
+        with self.rpc_errors(context, 'updating a book'):
+            # One of six statement shapes, each prepared once per connection.
+            updated_books, current_version = self._write (
+                lambda: self._update_book(query, tuple(params), request),
             )
+            
+            self.book_cache.invalidate(request.book_id)
+            self.book_flight.forget(request.book_id)
+            self.recent_writes.record(request.book_id)
 
-            if not updated_book:
+            if not updated_books and current_version is not None:
+                context.set_code(grpc.StatusCode.ABORTED)
+                context.set_details(f'Book is at version {current_version}, not {request.expected_version}.')
+                return books_pb2.BookResponse()
+            
+            if not updated_books:
                 context.set_code(grpc.StatusCode.NOT_FOUND)
                 context.set_details('Book not found.')
                 return books_pb2.BookResponse()
+            
+            self.books_snapshot.bump()
+            self.all_books_flight.clear()
 
-            response = books_pb2.BookResponse (
-                id=updated_book[0],
-                book_name=updated_book[1],
-                author=updated_book[2],
-            )
+            return self._to_book_response(updated_books[0])
 
-            # Convert timestamp
-            ts = Timestamp()
-            ts.FromDatetime(updated_book[3])
-            response.uploaded_at.CopyFrom(ts)
+        return books_pb2.BookResponse()
+    
+    def _update_book (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+        request: UpdateBookRequest,
+    ) -> Tuple[List[Tuple[Any, ...]], Optional[int]]:
+        
+        """
+        Runs UpdateBook's UPDATE and, when a conditional one matched nothing, reads the book's version.
 
-            return response
+        The version is read from the primary rather than from a replica that
+        may not have the book yet.
 
-        except Exception as e:
-            
-            self.logger.error (
-                'Database update failed: %s', 
-                str(e), 
-                exc_info=True,
-            )
-            
-            context.set_code(grpc.StatusCode.INTERNAL)
-            context.set_details('Internal server error while updating book.')
-            return books_pb2.BookResponse()
+        Args:
+            query (str): The UPDATE from `_build_update_query`.
+            params (Tuple[Any, ...]): Its parameters.
+            request (UpdateBookRequest): The request being served.
+
+        Returns:
+            Tuple[List[Tuple[Any, ...]], Optional[int]]: The updated rows, and the book's current
+                version if the update was refused because of it.
+        """
+        
+        updated_books = self.database_controller.execute_returning_query(query, params, prepare=True)
+        
+        if updated_books or not request.expected_version:
+            return updated_books, None
+        
+        versions = self.database_controller.execute_get_query(BOOK_VERSION_QUERY, (request.book_id,), prepare=True, primary=True)
+        
+        return updated_books, versions[0][0] if versions else None
+    
+    def _write (
+        self,
+        fn: Callable[[], Any],
+    ) -> Any:
+        
+        """
+        Runs a write RPC's statements, through the write batcher when `GRPC_WRITE_BATCH` is on.
+
+        Args:
+            fn (Callable[[], Any]): Runs the statements through the database controller.
+
+        Returns:
+            Any: What `fn` returned.
+        """
         
-    def __build_update_query (
+        if self.write_batcher is None:
+            return fn()
+        return self.write_batcher.submit(fn)
+    
+    def _build_update_query (
         self,
         request: UpdateBookRequest,
     ) -> Tuple[Optional[str], Optional[List[str]]]:
         
         """
         Constructs an UPDATE SQL query and parameters from the request.
-        
+
+        Columns are always listed in the same order, so only three query texts
+        exist, six counting the `expected_version` condition, and each is
+        served from the prepared statement cache. The query bumps the row
+        version and returns the updated row as `BOOK_COLUMNS`.
+
         Args:
             request: The request object containing update fields.
 
@@ -388,5 +886,527 @@ class BookService (
         if not updates:
             return None, None
 
-        query = f'UPDATE base_book SET {', '.join(updates)} WHERE id = %s'
+        updates.append('version = version + 1')
+        params.append(request.book_id)
+        condition = 'id = %s'
+        
+        if request.expected_version:
+            condition += ' AND version = %s'
+            params.append(request.expected_version)
+        
+        query = f'UPDATE base_book SET {', '.join(updates)} WHERE {condition} {RETURNING_BOOK}'
+        return query, params
+    
+    def _load_book (
+        self,
+        book_id: int,
+    ) -> Optional[BookResponse]:
+        
+        """
+        Loads one book for GetBookById and caches the answer.
+
+        Runs once per flight: calls joining it share the response, and only
+        this call fills the cache, under a token taken before its query.
+
+        Books written here within the replica lag limit are read from the
+        primary: a lagging replica could hand back the row as it was before
+        the write, or no row for a book just created, and the cache would then
+        serve that until it expires. Every other book is read from a replica.
+
+        Args:
+            book_id (int): The ID of the book to load.
+
+        Returns:
+            Optional[BookResponse]: The book, or None if it does not exist.
+        """
+        
+        token = self.book_cache.token(book_id)
+        
+        query = """
+            SELECT id, book_name, author, uploaded_at, version
+            FROM base_book
+            WHERE id = %s
+        """
+        
+        books = self.database_controller.execute_get_query (
+            query,
+            (book_id,),
+            prepare=True,
+            primary=book_id in self.recent_writes,
+        )
+        
+        response = self._to_book_response(books[0]) if books else None
+        self.book_cache.put(book_id, response, token)
+        
+        return response
+    
+    def _project (
+        self,
+        mask: FieldMask,
+        required: Tuple[str, ...] = (),
+    ) -> Tuple[Tuple[str, ...], RowMapper]:
+        
+        """
+        Resolves a request's `fields` mask into the columns to select and their row mapper.
+
+        Args:
+            mask (FieldMask): The request's mask; empty selects every column.
+            required (Tuple[str, ...], optional): Columns the caller reads back from each row.
+
+        Returns:
+            Tuple[Tuple[str, ...], RowMapper]: The columns, in `BOOK_COLUMNS` order, and
+                a mapper populating only the requested fields.
+
+        Raises:
+            ValueError: If the mask names a field that is not a book column.
+        """
+        
+        columns, fields = project_columns(mask.paths, BOOK_COLUMNS, required)
+        
+        if fields == BOOK_COLUMNS:
+            return columns, BOOK_ROW_MAPPER
+        return columns, compile_row_mapper(BookResponse, columns, fields)
+    
+    def _mask_book (
+        self,
+        book: BookResponse,
+        columns: Tuple[str, ...],
+    ) -> BookResponse:
+        
+        """
+        Copies the projected fields out of a whole book.
+
+        The book may be shared through the cache or a flight, so it is never modified.
+
+        Args:
+            book (BookResponse): The whole book.
+            columns (Tuple[str, ...]): The fields to keep, as resolved by `_project`.
+
+        Returns:
+            BookResponse: The book itself when every field is kept, otherwise a new
+                message holding only `columns`.
+        """
+        
+        if columns == BOOK_COLUMNS:
+            return book
+        
+        projected = books_pb2.BookResponse()
+        FieldMask(paths=columns).MergeMessage(book, projected)
+        
+        return projected
+    
+    def _book_not_found (
+        self,
+        request: BookRequest,
+        context: ServicerContext,
+    ) -> BookResponse:
+        
+        """
+        Marks the call NOT_FOUND for a GetBookById miss.
+
+        Args:
+            request (BookRequest): The request whose book does not exist.
+            context (ServicerContext): The gRPC context to set the status on.
+
+        Returns:
+            BookResponse: An empty response.
+        """
+        
+        context.set_code(grpc.StatusCode.NOT_FOUND)
+        context.set_details('Book not found')
+        
+        self.logger.info('Book not found for ID: %s', request.book_id)
+        
+        return books_pb2.BookResponse()
+    
+    def _build_books_snapshot (
+        self,
+    ) -> bytes:
+        
+        """
+        Loads every book and serializes them as a BooksResponse for the books snapshot.
+
+        Returns:
+            bytes: The serialized BooksResponse.
+        """
+        
+        books = self.database_controller.execute_get_query(ALL_BOOKS_QUERY)
+        
+        return books_pb2.BooksResponse(books=map(BOOK_ROW_MAPPER, books)).SerializeToString()
+    
+    def _to_book_response (
+        self,
+        row: Tuple[Any, ...],
+    ) -> BookResponse:
+        
+        """
+        Builds a BookResponse from a row selected as `BOOK_COLUMNS`.
+
+        Args:
+            row (Tuple[Any, ...]): A row returned by the database.
+
+        Returns:
+            BookResponse: The populated protobuf message.
+        """
+        
+        return BOOK_ROW_MAPPER(row)
+    
+    def _build_list_books_query (
+        self,
+        request: ListBooksRequest,
+        columns: Tuple[str, ...] = BOOK_COLUMNS,
+    ) -> Tuple[str, Tuple[Any, ...], int]:
+        
+        """
+        Builds the keyset query for a ListBooks request.
+
+        One row more than the page size is requested so that the presence of a
+        next page is known without a separate COUNT.
+
+        Args:
+            request (ListBooksRequest): The gRPC request containing `page_size` and `cursor`.
+            columns (Tuple[str, ...], optional): The columns to select; must include `LIST_KEY_COLUMNS`.
+
+        Returns:
+            Tuple[str, Tuple[Any, ...], int]: The SQL query, its parameters and the effective page size.
+
+        Raises:
+            ValueError: If `page_size` is negative or `cursor` cannot be decoded.
+        """
+        
+        if request.page_size < 0:
+            raise ValueError('page_size must not be negative.')
+        
+        page_size = min (
+            request.page_size or self.list_page_size,
+            self.list_max_page_size,
+        )
+        
+        where = ''
+        params: Tuple[Any, ...] = ()
+        
+        if request.cursor:
+            uploaded_at, book_id = KeysetCursor.decode(request.cursor)
+            where = 'WHERE (uploaded_at, id) < (%s, %s)'
+            params = (uploaded_at, book_id)
+        
+        query = f"""
+            SELECT {', '.join(columns)}
+            FROM base_book
+            {where}
+            ORDER BY uploaded_at DESC, id DESC
+            LIMIT %s
+        """
+        return query, params + (page_size + 1,), page_size
+    
+    def _to_list_books_response (
+        self,
+        rows: List[Tuple[Any, ...]],
+        page_size: int,
+        columns: Tuple[str, ...] = BOOK_COLUMNS,
+        mapper: RowMapper = BOOK_ROW_MAPPER,
+    ) -> ListBooksResponse:
+        
+        """
+        Builds a ListBooksResponse from up to `page_size + 1` keyset rows.
+
+        Args:
+            rows (List[Tuple[Any, ...]]): Rows returned by the query from `_build_list_books_query`.
+            page_size (int): The effective page size.
+            columns (Tuple[str, ...], optional): The columns the rows were selected as.
+            mapper (RowMapper, optional): Builds each book from its row.
+
+        Returns:
+            ListBooksResponse: The page, with `next_cursor` set only when more rows exist.
+        """
+        
+        page = rows[:page_size]
+        response = books_pb2.ListBooksResponse (
+            books=map(mapper, page),
+        )
+        
+        if len(rows) > page_size:
+            last = page[-1]
+            response.next_cursor = KeysetCursor.encode(last[columns.index('uploaded_at')], last[0])
+        
+        return response
+    
+    def _to_batch_get_books_response (
+        self,
+        book_ids: List[int],
+        rows: List[Tuple[Any, ...]],
+        mapper: RowMapper = BOOK_ROW_MAPPER,
+    ) -> BatchGetBooksResponse:
+        
+        """
+        Orders the rows of a batch query by the requested IDs.
+
+        Args:
+            book_ids (List[int]): The IDs in the order they were requested.
+            rows (List[Tuple[Any, ...]]): Rows returned by the `ANY(%s)` query, in any order, `id` first.
+            mapper (RowMapper, optional): Builds each book from its row.
+
+        Returns:
+            BatchGetBooksResponse: One result per requested ID, with `found` False for missing books.
+        """
+        
+        books_by_id = {row[0]: mapper(row) for row in rows}
+        response = books_pb2.BatchGetBooksResponse()
+        
+        for book_id in book_ids:
+            result = response.results.add(book_id=book_id)
+            book = books_by_id.get(book_id)
+            
+            if book is not None:
+                result.found = True
+                result.book.CopyFrom(book)
+        
+        return response
+    
+    def _copy_import_chunk (
+        self,
+        chunk: List[ImportBookRow],
+        response: ImportBooksResponse,
+    ) -> None:
+        
+        """
+        Writes and commits one chunk of an import with COPY and records the outcome.
+
+        Args:
+            chunk (List[ImportBookRow]): Validated rows to load.
+            response (ImportBooksResponse): The import summary to update.
+        """
+        
+        try:
+            with self.database_controller.unit_of_work():
+                imported = self.database_controller.execute_copy_query (
+                    IMPORT_COPY_QUERY,
+                    self._to_import_copy_rows(chunk),
+                )
+            response.imported += imported
+        
+        except QUERY_DEADLINE_ERRORS:
+            raise
+        
+        except Exception as e:
+            self._reject_import_chunk(chunk, e, response)
+    
+    def _accept_import_row (
+        self,
+        row: ImportBookRow,
+        response: ImportBooksResponse,
+    ) -> bool:
+        
+        """
+        Counts an incoming import row and checks it against the `base_book` constraints.
+
+        Args:
+            row (ImportBookRow): The row to check.
+            response (ImportBooksResponse): The import summary to update.
+
+        Returns:
+            bool: True if the row can be loaded, False if it was recorded as an error.
+        """
+        
+        response.received += 1
+        
+        for field, value in (('book_name', row.book_name), ('author', row.author)):
+            if not value.strip():
+                self._record_import_error(response, row.line, f'{field} is required.')
+                return False
+            
+            if len(value) > IMPORT_MAX_FIELD_LENGTH:
+                self._record_import_error (
+                    response, 
+                    row.line, 
+                    f'{field} is longer than {IMPORT_MAX_FIELD_LENGTH} characters.',
+                )
+                return False
+        
+        return True
+    
+    def _report_import_progress (
+        self,
+        context: ServicerContext,
+        response: ImportBooksResponse,
+    ) -> None:
+        
+        """
+        Sends the rows an import committed in the trailing metadata, which a failed call still carries.
+
+        Args:
+            context (ServicerContext): The gRPC context of the call.
+            response (ImportBooksResponse): The import summary so far.
+        """
+        
+        context.set_trailing_metadata(((IMPORTED_ROWS_KEY, str(response.imported)),))
+    
+    def _reject_import_chunk (
+        self,
+        chunk: List[ImportBookRow],
+        error: Exception,
+        response: ImportBooksResponse,
+    ) -> None:
+        
+        """
+        Records every row of a chunk the database refused as failed.
+
+        Args:
+            chunk (List[ImportBookRow]): The rows of the rejected COPY.
+            error (Exception): The database error.
+            response (ImportBooksResponse): The import summary to update.
+        """
+        
+        self.logger.error (
+            'COPY of %s imported books failed: %s', 
+            len(chunk), 
+            str(error),
+        )
+        
+        for row in chunk:
+            self._record_import_error(response, row.line, f'Chunk rejected by the database: {error}')
+    
+    def _record_import_error (
+        self,
+        response: ImportBooksResponse,
+        line: int,
+        message: str,
+    ) -> None:
+        
+        """
+        Counts a failed import row, keeping its error only while under `GRPC_IMPORT_MAX_ERRORS`.
+
+        Args:
+            response (ImportBooksResponse): The import summary to update.
+            line (int): The row's position in the source file.
+            message (str): Why the row failed.
+        """
+        
+        response.failed += 1
+        if len(response.errors) < self.import_max_errors:
+            response.errors.add(line=line, message=message)
+    
+    def _check_upsert_rows (
+        self,
+        books: Sequence[UpsertBookRow],
+    ) -> Optional[str]:
+        
+        """
+        Checks an UpsertBooks batch against its size limit and the `base_book` constraints.
+
+        Args:
+            books (Sequence[UpsertBookRow]): The books of the request.
+
+        Returns:
+            Optional[str]: Why the batch is rejected, or None if it can be written.
+        """
+        
+        if len(books) > self.upsert_max_books:
+            return f'At most {self.upsert_max_books} books may be upserted at once.'
+        
+        for index, book in enumerate(books):
+            for field, value, max_length in (
+                ('isbn', book.isbn, ISBN_MAX_LENGTH),
+                ('book_name', book.book_name, IMPORT_MAX_FIELD_LENGTH),
+                ('author', book.author, IMPORT_MAX_FIELD_LENGTH),
+            ):
+                if not value.strip():
+                    return f'books[{index}]: {field} is required.'
+                
+                if len(value) > max_length:
+                    return f'books[{index}]: {field} is longer than {max_length} characters.'
+        
+        return None
+    
+    @staticmethod
+    def _latest_upsert_rows (
+        books: Sequence[UpsertBookRow],
+    ) -> List[UpsertBookRow]:
+        
+        """
+        Keeps the last row of every ISBN, in ISBN order.
+
+        One statement may not update a row twice, and a fixed order keeps
+        concurrent upserts from locking the same rows in opposite orders.
+
+        Args:
+            books (Sequence[UpsertBookRow]): The books of the request.
+
+        Returns:
+            List[UpsertBookRow]: One row per distinct ISBN, sorted by ISBN.
+        """
+        
+        latest = {book.isbn: book for book in books}
+        return [latest[isbn] for isbn in sorted(latest)]
+    
+    @staticmethod
+    def _build_upsert_query (
+        books: Sequence[UpsertBookRow],
+    ) -> Tuple[str, Tuple[str, ...]]:
+        
+        """
+        Builds the `UPSERT_QUERY` statement and parameters for one chunk of books.
+
+        Args:
+            books (Sequence[UpsertBookRow]): The chunk, with distinct ISBNs.
+
+        Returns:
+            Tuple[str, Tuple[str, ...]]: The SQL query string and its `(isbn, book_name, author)` parameters.
+        """
+        
+        query = UPSERT_QUERY.format(values=', '.join([UPSERT_ROW_VALUES] * len(books)))
+        params = tuple(value for book in books for value in (book.isbn, book.book_name, book.author))
+        
         return query, params
+    
+    def _record_upserted_books (
+        self,
+        received: int,
+        written: List[Tuple[Any, ...]],
+    ) -> UpsertBooksResponse:
+        
+        """
+        Counts the outcome of an UpsertBooks call and drops cached answers about the books it wrote.
+
+        Args:
+            received (int): Distinct ISBNs in the request.
+            written (List[Tuple[Any, ...]]): The `(id, version)` rows returned by `UPSERT_QUERY`.
+
+        Returns:
+            UpsertBooksResponse: The inserted, updated and unchanged counts.
+        """
+        
+        inserted = sum(1 for _, version in written if version == 1)
+        
+        for book_id, _ in written:
+            self.book_cache.invalidate(book_id)
+            self.book_flight.forget(book_id)
+            self.recent_writes.record(book_id)
+        
+        if written:
+            self.books_snapshot.bump()
+            self.all_books_flight.clear()
+        
+        return books_pb2.UpsertBooksResponse (
+            inserted=inserted,
+            updated=len(written) - inserted,
+            unchanged=received - len(written),
+        )
+    
+    def _to_import_copy_rows (
+        self,
+        chunk: List[ImportBookRow],
+    ) -> List[Tuple[str, str, datetime]]:
+        
+        """
+        Converts validated import rows into COPY rows for `IMPORT_COPY_QUERY`.
+
+        Args:
+            chunk (List[ImportBookRow]): The rows to convert.
+
+        Returns:
+            List[Tuple[str, str, datetime]]: `(book_name, author, uploaded_at)` tuples.
+        """
+        
+        uploaded_at = datetime.now(timezone.utc)
+        return [(row.book_name, row.author, uploaded_at) for row in chunk]
@@ -0,0 +1,334 @@
+import time
+import inspect
+import threading
+from concurrent import futures
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+import grpc
+from prometheus_client import Counter, Gauge, Histogram
+
+from grpc_service.modules.metrics.rpc_metrics_interceptor import behavior_name
+
+SERVER_WORKERS = Gauge (
+    'grpc_server_workers',
+    'Worker threads available to run RPCs.',
+)
+SERVER_BUSY_WORKERS = Gauge (
+    'grpc_server_busy_workers',
+    'Worker threads currently running an RPC.',
+)
+SERVER_QUEUED = Gauge (
+    'grpc_server_queued',
+    'Admitted RPCs waiting for a worker thread.',
+)
+SERVER_QUEUE_WAIT_SECONDS = Histogram (
+    'grpc_server_queue_wait_seconds',
+    'Time an admitted RPC waited for a worker thread.',
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+SERVER_ASYNC_IN_FLIGHT = Gauge (
+    'grpc_server_async_in_flight',
+    'RPCs being handled by the grpc.aio server.',
+)
+SERVER_SHED = Counter (
+    'grpc_server_shed',
+    'RPCs rejected with RESOURCE_EXHAUSTED by admission control.',
+    ['grpc_method'],
+)
+
+# Trailing metadata key grpc clients with a retry policy honour as a retry delay.
+RETRY_PUSHBACK_KEY = 'grpc-retry-pushback-ms'
+SHED_DETAILS = 'Server is overloaded, retry later.'
+
+class AdmissionThreadPoolExecutor(futures.ThreadPoolExecutor):
+    
+    """
+    ThreadPoolExecutor that keeps count of queued and running work.
+
+    grpc.server hands every admitted RPC to its executor; this one records how
+    many are waiting for a thread and how many hold one, which is what the
+    AdmissionInterceptor sheds on and what the saturation gauges report.
+    """
+    
+    def __init__ (
+        self,
+        max_workers: int,
+        **kwargs: Any,
+    ) -> None:
+        
+        """
+        Initializes the executor.
+
+        Args:
+            max_workers (int): Number of worker threads.
+            **kwargs (Any): Passed on to ThreadPoolExecutor.
+        """
+        
+        super().__init__(max_workers=max_workers, **kwargs)
+        
+        self.max_workers = max_workers
+        self.queued = 0
+        self.running = 0
+        self._counts_lock = threading.Lock()
+        
+        SERVER_WORKERS.set(max_workers)
+        SERVER_QUEUED.set_function(lambda: self.queued)
+        SERVER_BUSY_WORKERS.set_function(lambda: self.running)
+    
+    def submit (
+        self,
+        fn: Callable[..., Any],
+        /,
+        *args: Any,
+        **kwargs: Any,
+    ) -> futures.Future:
+        
+        """
+        Queues a call, counting it until a worker picks it up.
+        """
+        
+        with self._counts_lock:
+            self.queued += 1
+        
+        return super().submit(self._run, time.perf_counter(), fn, *args, **kwargs)
+    
+    def _run (
+        self,
+        enqueued: float,
+        fn: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        
+        """
+        Runs a queued call on a worker, moving it from queued to running.
+        """
+        
+        SERVER_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - enqueued)
+        
+        with self._counts_lock:
+            self.queued -= 1
+            self.running += 1
+        
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._counts_lock:
+                self.running -= 1
+
+class AdmissionInterceptor(grpc.ServerInterceptor):
+    
+    """
+    Sheds RPCs with RESOURCE_EXHAUSTED once the worker queue is full.
+
+    grpc.server resolves handlers on its polling thread, before the RPC is
+    queued for a worker, so the decision is made on arrival. Once every
+    worker is busy and `max_queue` RPCs are already waiting, new ones are
+    answered with RESOURCE_EXHAUSTED and a `grpc-retry-pushback-ms` trailer
+    instead of joining an unbounded queue. Rejections run on a dedicated
+    single-thread pool, so they do not wait behind the work they shed.
+
+    Queueing delay is therefore bounded by roughly `max_queue / max_workers`
+    RPC durations, and the database sees at most `max_workers` concurrent
+    requests from this process.
+    """
+    
+    def __init__ (
+        self,
+        executor: AdmissionThreadPoolExecutor,
+        max_queue: int,
+        retry_after_ms: int,
+    ) -> None:
+        
+        """
+        Initializes the AdmissionInterceptor.
+
+        Args:
+            executor (AdmissionThreadPoolExecutor): The server's executor.
+            max_queue (int): RPCs allowed to wait for a worker; 0 sheds as soon as all workers are busy.
+            retry_after_ms (int): Delay suggested to shed clients, in milliseconds.
+        """
+        
+        self.executor = executor
+        self.max_queue = max_queue
+        self.retry_after_ms = retry_after_ms
+        self.capacity = executor.max_workers + max_queue
+        self.reject_pool = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='grpc-shed')
+    
+    def intercept_service (
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Optional[grpc.RpcMethodHandler]],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> Optional[grpc.RpcMethodHandler]:
+        
+        """
+        Passes the RPC through, or swaps its behavior for a rejection when the queue is full.
+
+        Args:
+            continuation (Callable): Resolves the handler for the call.
+            handler_call_details (grpc.HandlerCallDetails): Method name and metadata of the call.
+
+        Returns:
+            Optional[grpc.RpcMethodHandler]: The handler to run, or None for unknown methods.
+        """
+        
+        handler = continuation(handler_call_details)
+        
+        if handler is None or self.executor.queued + self.executor.running < self.capacity:
+            return handler
+        
+        SERVER_SHED.labels(grpc_method=handler_call_details.method).inc()
+        
+        def reject(request: Any, context: grpc.ServicerContext) -> None:
+            context.set_trailing_metadata(((RETRY_PUSHBACK_KEY, str(self.retry_after_ms)),))
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, SHED_DETAILS)
+        
+        # Read by grpc.server to run this behavior outside the saturated default pool.
+        reject.experimental_thread_pool = self.reject_pool
+        
+        return handler._replace(**{behavior_name(handler): reject})
+
+class AsyncAdmissionInterceptor(grpc.aio.ServerInterceptor):
+    
+    """
+    grpc.aio counterpart of AdmissionInterceptor, bounding RPCs in flight.
+
+    Coroutine handlers do not queue for threads, so the limit applies to
+    RPCs being handled at once: past `max_in_flight` new ones are rejected
+    with the same RESOURCE_EXHAUSTED status and retry pushback trailer.
+    """
+    
+    def __init__ (
+        self,
+        max_in_flight: int,
+        retry_after_ms: int,
+    ) -> None:
+        
+        """
+        Initializes the AsyncAdmissionInterceptor.
+
+        Args:
+            max_in_flight (int): RPCs allowed to be handled at once.
+            retry_after_ms (int): Delay suggested to shed clients, in milliseconds.
+        """
+        
+        self.max_in_flight = max_in_flight
+        self.retry_after_ms = retry_after_ms
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        
+        SERVER_ASYNC_IN_FLIGHT.set_function(lambda: self.in_flight)
+    
+    async def intercept_service (
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Awaitable[Optional[grpc.RpcMethodHandler]]],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> Optional[grpc.RpcMethodHandler]:
+        
+        """
+        Passes the RPC through with in-flight tracking, or rejects it over the limit.
+
+        Args:
+            continuation (Callable): Resolves the handler for the call.
+            handler_call_details (grpc.HandlerCallDetails): Method name and metadata of the call.
+
+        Returns:
+            Optional[grpc.RpcMethodHandler]: The handler to run, or None for unknown methods.
+        """
+        
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        
+        name = behavior_name(handler)
+        
+        if self.in_flight >= self.max_in_flight:
+            SERVER_SHED.labels(grpc_method=handler_call_details.method).inc()
+            return handler._replace(**{name: self._reject})
+        
+        return handler._replace(**{name: self._track(getattr(handler, name), handler.response_streaming)})
+    
+    async def _reject (
+        self,
+        request: Any,
+        context: grpc.aio.ServicerContext,
+    ) -> None:
+        
+        """
+        Answers a shed RPC with RESOURCE_EXHAUSTED and a retry pushback trailer.
+        """
+        
+        context.set_trailing_metadata(((RETRY_PUSHBACK_KEY, str(self.retry_after_ms)),))
+        await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, SHED_DETAILS)
+    
+    def _acquire (
+        self,
+    ) -> None:
+        
+        """
+        Counts an RPC whose behavior has started.
+        """
+        
+        with self._lock:
+            self.in_flight += 1
+    
+    def _release (
+        self,
+    ) -> None:
+        
+        """
+        Uncounts an RPC whose behavior has finished.
+        """
+        
+        with self._lock:
+            self.in_flight -= 1
+    
+    def _track (
+        self,
+        behavior: Callable[..., Any],
+        response_streaming: bool,
+    ) -> Callable[..., Any]:
+        
+        """
+        Wraps a behavior, in kind, so it is counted in flight while it runs.
+
+        Counting starts when the behavior does rather than on admission, so an
+        RPC cancelled in between cannot leak a slot. Plain functions keep
+        running on the migration thread pool, hence the lock.
+        """
+        
+        if inspect.isasyncgenfunction(behavior):
+            async def wrapped_async_stream(request: Any, context: Any) -> Any:
+                self._acquire()
+                try:
+                    async for response in behavior(request, context):
+                        yield response
+                finally:
+                    self._release()
+            return wrapped_async_stream
+        
+        if inspect.iscoroutinefunction(behavior):
+            async def wrapped_coroutine(request: Any, context: Any) -> Any:
+                self._acquire()
+                try:
+                    return await behavior(request, context)
+                finally:
+                    self._release()
+            return wrapped_coroutine
+        
+        if response_streaming:
+            def wrapped_stream(request: Any, context: Any) -> Iterator[Any]:
+                self._acquire()
+                try:
+                    yield from behavior(request, context)
+                finally:
+                    self._release()
+            return wrapped_stream
+        
+        def wrapped(request: Any, context: Any) -> Any:
+            self._acquire()
+            try:
+                return behavior(request, context)
+            finally:
+                self._release()
+        return wrapped
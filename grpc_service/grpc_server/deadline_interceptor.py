@@ -0,0 +1,185 @@
+import inspect
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+import grpc
+
+from grpc_service.modules.metrics.rpc_metrics_interceptor import behavior_name
+from grpc_service.modules.database.query_deadline.query_deadline import set_query_deadline, reset_query_deadline
+
+EXPIRED_DETAILS = 'Deadline exceeded before the RPC was handled.'
+
+class DeadlineInterceptor(grpc.ServerInterceptor):
+    
+    """
+    Hands each RPC's deadline down to the database layer.
+
+    Before a behavior runs, the time the client has left is read from
+    `context.time_remaining()`. An RPC whose deadline already passed while
+    it was queued is failed with DEADLINE_EXCEEDED without being handled.
+    Otherwise the deadline is stored in a context variable for the length of
+    the call, where the database controllers turn it into a per-statement
+    timeout and skip statements once it has passed, so work the client has
+    abandoned stops consuming database time.
+    """
+    
+    def intercept_service (
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Optional[grpc.RpcMethodHandler]],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> Optional[grpc.RpcMethodHandler]:
+        
+        """
+        Wraps the method's behavior with deadline propagation.
+
+        Args:
+            continuation (Callable): Resolves the handler for the call.
+            handler_call_details (grpc.HandlerCallDetails): Method name and metadata of the call.
+
+        Returns:
+            Optional[grpc.RpcMethodHandler]: The wrapped handler, or None for unknown methods.
+        """
+        
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        
+        name = behavior_name(handler)
+        behavior = getattr(handler, name)
+        
+        if handler.response_streaming:
+            return handler._replace(**{name: self._wrap_stream(behavior)})
+        return handler._replace(**{name: self._wrap_unary(behavior)})
+    
+    @staticmethod
+    def _wrap_unary (
+        behavior: Callable[[Any, Any], Any],
+    ) -> Callable[[Any, Any], Any]:
+        
+        """
+        Wraps a behavior returning a single response.
+        """
+        
+        def wrapped(request: Any, context: Any) -> Any:
+            remaining = context.time_remaining()
+            if remaining is not None and remaining <= 0:
+                context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, EXPIRED_DETAILS)
+            
+            token = set_query_deadline(remaining)
+            try:
+                return behavior(request, context)
+            finally:
+                reset_query_deadline(token)
+        
+        return wrapped
+    
+    @staticmethod
+    def _wrap_stream (
+        behavior: Callable[[Any, Any], Iterator[Any]],
+    ) -> Callable[[Any, Any], Iterator[Any]]:
+        
+        """
+        Wraps a behavior yielding a stream of responses.
+        """
+        
+        def wrapped(request: Any, context: Any) -> Iterator[Any]:
+            remaining = context.time_remaining()
+            if remaining is not None and remaining <= 0:
+                context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, EXPIRED_DETAILS)
+            
+            token = set_query_deadline(remaining)
+            try:
+                yield from behavior(request, context)
+            finally:
+                reset_query_deadline(token)
+        
+        return wrapped
+
+class AsyncDeadlineInterceptor(grpc.aio.ServerInterceptor):
+    
+    """
+    grpc.aio counterpart of DeadlineInterceptor.
+
+    Coroutines and async generators are wrapped in kind so grpc.aio keeps
+    running them on the event loop; plain functions are wrapped by the
+    thread-pool variants and keep going to the migration thread pool.
+    """
+    
+    async def intercept_service (
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Awaitable[Optional[grpc.RpcMethodHandler]]],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> Optional[grpc.RpcMethodHandler]:
+        
+        """
+        Wraps the method's behavior with deadline propagation.
+
+        Args:
+            continuation (Callable): Resolves the handler for the call.
+            handler_call_details (grpc.HandlerCallDetails): Method name and metadata of the call.
+
+        Returns:
+            Optional[grpc.RpcMethodHandler]: The wrapped handler, or None for unknown methods.
+        """
+        
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        
+        name = behavior_name(handler)
+        behavior = getattr(handler, name)
+        
+        if inspect.isasyncgenfunction(behavior):
+            wrapped = self._wrap_async_stream(behavior)
+        elif inspect.iscoroutinefunction(behavior):
+            wrapped = self._wrap_coroutine(behavior)
+        elif handler.response_streaming:
+            wrapped = DeadlineInterceptor._wrap_stream(behavior)
+        else:
+            wrapped = DeadlineInterceptor._wrap_unary(behavior)
+        
+        return handler._replace(**{name: wrapped})
+    
+    @staticmethod
+    def _wrap_coroutine (
+        behavior: Callable[[Any, grpc.aio.ServicerContext], Awaitable[Any]],
+    ) -> Callable[[Any, grpc.aio.ServicerContext], Awaitable[Any]]:
+        
+        """
+        Wraps a coroutine behavior.
+        """
+        
+        async def wrapped(request: Any, context: grpc.aio.ServicerContext) -> Any:
+            remaining = context.time_remaining()
+            if remaining is not None and remaining <= 0:
+                await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, EXPIRED_DETAILS)
+            
+            token = set_query_deadline(remaining)
+            try:
+                return await behavior(request, context)
+            finally:
+                reset_query_deadline(token)
+        
+        return wrapped
+    
+    @staticmethod
+    def _wrap_async_stream (
+        behavior: Callable[[Any, grpc.aio.ServicerContext], Any],
+    ) -> Callable[[Any, grpc.aio.ServicerContext], Any]:
+        
+        """
+        Wraps an async generator behavior.
+        """
+        
+        async def wrapped(request: Any, context: grpc.aio.ServicerContext) -> Any:
+            remaining = context.time_remaining()
+            if remaining is not None and remaining <= 0:
+                await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, EXPIRED_DETAILS)
+            
+            token = set_query_deadline(remaining)
+            try:
+                async for response in behavior(request, context):
+                    yield response
+            finally:
+                reset_query_deadline(token)
+        
+        return wrapped
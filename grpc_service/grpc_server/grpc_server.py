@@ -1,24 +1,62 @@
 import os
+import asyncio
 from concurrent import futures
+from typing import List, Optional, Union
 
 import grpc
 from grpc_service.controllers.book_controller.book_controller import BookService
+from grpc_service.controllers.async_book_controller.async_book_controller import AsyncBookService
+from grpc_service.modules.database.async_model.async_database import AsyncDatabase
+from grpc_service.modules.database.storage_backend.storage_backend import POSTGRES_BACKEND
+from grpc_service.modules.database.storage_backend.backend_factory import storage_backend_name
+from grpc_service.modules.metrics.metrics_server import MetricsServer
+from grpc_service.modules.metrics.rpc_metrics_interceptor import RpcMetricsInterceptor, AsyncRpcMetricsInterceptor
+from grpc_service.grpc_server.raw_bytes_handler import RawBytesRpcHandler
+from grpc_service.grpc_server.deadline_interceptor import DeadlineInterceptor, AsyncDeadlineInterceptor
+from grpc_service.grpc_server.admission_control import (
+    AdmissionThreadPoolExecutor,
+    AdmissionInterceptor,
+    AsyncAdmissionInterceptor,
+)
 import grpc_service.books_pb.books_pb2_grpc as books_pb2_grpc
 
+SYNC_SERVER_MODE = 'sync'
+ASYNC_SERVER_MODE = 'async'
+
 class GRPCServerFactory:
     
     """
     Factory for creating a gRPC server instance with the BookService.
-    
+
+    Two server modes are available so they can be A/B tested under the same load:
+
+    - `sync`: a `grpc.server` on a ThreadPoolExecutor backed by psycopg2 (default).
+    - `async`: a `grpc.aio` server whose BookService methods are coroutines
+      backed by an async connection pool.
+
+    Both modes run admission control unless `GRPC_ADMISSION_CONTROL` is off:
+    under overload new RPCs are shed with RESOURCE_EXHAUSTED and a retry
+    pushback hint instead of queueing without limit.
+
     Attributes:
         max_workers (int): The maximum number of worker threads for the gRPC server.
         port (int): The port on which the gRPC server will listen.
+        server_mode (str): Either `sync` or `async`.
+        admission_control (bool): Whether overload shedding is enabled.
+        max_queue (int): RPCs allowed to wait for a worker thread (sync mode).
+        max_in_flight (int): RPCs allowed to be handled at once (async mode).
+        retry_after_ms (int): Retry delay suggested to shed clients.
     """
 
     def __init__ (
-        self, 
-        max_workers: int = int(os.getenv('GRPC_SERVER_PORT')), 
-        port: int = int(os.getenv('GRPC_MAX_WORKERS')),
+        self,
+        max_workers: int = int(os.getenv('GRPC_MAX_WORKERS')),
+        port: int = int(os.getenv('GRPC_SERVER_PORT')),
+        server_mode: str = os.getenv('GRPC_SERVER_MODE', SYNC_SERVER_MODE),
+        admission_control: bool = os.getenv('GRPC_ADMISSION_CONTROL', 'true').lower() == 'true',
+        max_queue: Optional[int] = int(os.environ['GRPC_ADMISSION_MAX_QUEUE']) if os.getenv('GRPC_ADMISSION_MAX_QUEUE') else None,
+        max_in_flight: int = int(os.getenv('GRPC_ADMISSION_MAX_IN_FLIGHT', '1000')),
+        retry_after_ms: int = int(os.getenv('GRPC_ADMISSION_RETRY_AFTER_MS', '250')),
     ) -> None:
         
         """
@@ -27,38 +65,197 @@ class GRPCServerFactory:
         Args:
             max_workers (int): Maximum number of threads in the thread pool.
             port (int): Port number for the gRPC server.
+            server_mode (str): `sync` for the thread-pool server, `async` for grpc.aio.
+            admission_control (bool): Whether to shed RPCs under overload.
+            max_queue (Optional[int]): RPCs allowed to wait for a worker thread;
+                                       defaults to `max_workers`.
+            max_in_flight (int): RPCs allowed to be handled at once in async mode.
+            retry_after_ms (int): Retry delay suggested to shed clients, in milliseconds.
+
+        Raises:
+            ValueError: If `server_mode` is not a known mode.
         """
         
+        if server_mode not in (SYNC_SERVER_MODE, ASYNC_SERVER_MODE):
+            raise ValueError(f'Unknown gRPC server mode: {server_mode}')
+        
         self.max_workers = max_workers
         self.port = port
+        self.server_mode = server_mode
+        self.admission_control = admission_control
+        self.max_queue = max_queue if max_queue is not None else max_workers
+        self.max_in_flight = max_in_flight
+        self.retry_after_ms = retry_after_ms
 
     def create_server (
         self,
+        book_service: Optional[BookService] = None,
+    ) -> Union[grpc.Server, grpc.aio.Server]:
+        
+        """
+        Creates and configures the gRPC server for the selected server mode.
+
+        The async server must be created from inside a running event loop.
+
+        Args:
+            book_service (Optional[BookService]): The servicer to serve, an
+                AsyncBookService in async mode; one backed by the default
+                database controller is created when omitted.
+
+        Returns:
+            Union[grpc.Server, grpc.aio.Server]: A fully configured gRPC server instance.
+        """
+        
+        if self.server_mode == ASYNC_SERVER_MODE:
+            return self.create_async_server(book_service)
+        return self.create_sync_server(book_service)
+    
+    def create_sync_server (
+        self,
+        book_service: Optional[BookService] = None,
     ) -> grpc.Server:
         
         """
-        Creates and configures the gRPC server with the BookService.
+        Creates and configures the thread-pool gRPC server with the BookService.
+
+        Every RPC goes through RpcMetricsInterceptor, whose `grpc_server_*`
+        metrics are served by the MetricsServer side listener. With admission
+        control on, AdmissionInterceptor runs first and sheds RPCs once
+        `max_queue` of them are waiting for a worker. DeadlineInterceptor runs
+        last, handing each RPC's deadline down to the database queries.
+
+        Args:
+            book_service (Optional[BookService]): The servicer to serve; a new BookService when omitted.
 
         Returns:
             grpc.Server: A fully configured gRPC server instance.
         """
         
-        book_service = BookService()
-        server = grpc.server(futures.ThreadPoolExecutor(max_workers=self.max_workers))
-        books_pb2_grpc.add_BookServiceServicer_to_server(book_service, server)
+        book_service = book_service or BookService()
+        executor = AdmissionThreadPoolExecutor(max_workers=self.max_workers)
+        interceptors: List[grpc.ServerInterceptor] = [RpcMetricsInterceptor(), DeadlineInterceptor()]
+        
+        if self.admission_control:
+            interceptors.insert(0, AdmissionInterceptor(executor, self.max_queue, self.retry_after_ms))
+        
+        server = grpc.server(executor, interceptors=interceptors)
+        self.add_book_service(book_service, server)
+        server.add_insecure_port(f'[::]:{self.port}')
+        return server
+
+    def create_async_server (
+        self,
+        book_service: Optional[AsyncBookService] = None,
+    ) -> grpc.aio.Server:
+        
+        """
+        Creates and configures the grpc.aio server with the AsyncBookService.
+
+        The migration thread pool only serves handlers that are not coroutines,
+        so RPCs without an async implementation keep working in this mode.
+
+        Args:
+            book_service (Optional[AsyncBookService]): The servicer to serve; a new AsyncBookService when omitted.
+
+        Returns:
+            grpc.aio.Server: A fully configured asyncio gRPC server instance.
+        """
+        
+        book_service = book_service or AsyncBookService()
+        interceptors: List[grpc.aio.ServerInterceptor] = [AsyncRpcMetricsInterceptor(), AsyncDeadlineInterceptor()]
+        
+        if self.admission_control:
+            interceptors.insert(0, AsyncAdmissionInterceptor(self.max_in_flight, self.retry_after_ms))
+        
+        server = grpc.aio.server (
+            migration_thread_pool=futures.ThreadPoolExecutor(max_workers=self.max_workers),
+            interceptors=interceptors,
+        )
+        self.add_book_service(book_service, server)
         server.add_insecure_port(f'[::]:{self.port}')
         return server
 
+    
+    def add_book_service (
+        self,
+        book_service: BookService,
+        server: Union[grpc.Server, grpc.aio.Server],
+    ) -> None:
+        
+        """
+        Registers the BookService, serving GetAllBooks from its snapshot when enabled.
+
+        With `GRPC_BOOKS_SNAPSHOT` on, GetAllBooks is answered by a raw-bytes
+        handler around `GetAllBooksSnapshot`. Generic handlers are tried in the
+        order they were added, so it goes in before the generated servicer;
+        registered method handlers are a per-method mapping, so it is registered
+        again afterwards to replace the generated GetAllBooks entry.
+
+        Args:
+            book_service (BookService): The servicer to register.
+            server (Union[grpc.Server, grpc.aio.Server]): The server to register it on.
+        """
+        
+        if not book_service.books_snapshot_enabled:
+            books_pb2_grpc.add_BookServiceServicer_to_server(book_service, server)
+            return
+        
+        snapshot_handler = RawBytesRpcHandler (
+            'book.BookService',
+            'GetAllBooks',
+            book_service.GetAllBooksSnapshot,
+        )
+        
+        server.add_generic_rpc_handlers((snapshot_handler,))
+        books_pb2_grpc.add_BookServiceServicer_to_server(book_service, server)
+        server.add_registered_method_handlers('book.BookService', snapshot_handler.method_handlers())
+
+
+async def serve_async (
+    factory: GRPCServerFactory,
+) -> None:
+    
+    """
+    Opens the async database pool, then starts the grpc.aio server.
+
+    The server runs until terminated, after which the pool is closed. No pool
+    is opened when `DB_BACKEND` selects a backend other than Postgres.
+
+    Args:
+        factory (GRPCServerFactory): A factory configured for the async server mode.
+    """
+    
+    database = AsyncDatabase() if storage_backend_name() == POSTGRES_BACKEND else None
+    if database is not None:
+        await database.connect()
+    
+    server = factory.create_server()
+    print(f'gRPC aio server running on port {factory.port}...')
+    await server.start()
+    
+    try:
+        await server.wait_for_termination()
+    finally:
+        if database is not None:
+            await database.close_all()
+
 
 def serve() -> None:
     
     """
     Initializes the gRPC server using GRPCServerFactory and starts it.
-    
+
+    The metrics listener is started first when `GRPC_METRICS_PORT` is set.
     The server runs indefinitely until terminated.
     """
     
+    MetricsServer().start()
     factory = GRPCServerFactory()
+    
+    if factory.server_mode == ASYNC_SERVER_MODE:
+        asyncio.run(serve_async(factory))
+        return
+    
     server = factory.create_server()
     print(f'gRPC server running on port {factory.port}...')
     server.start()
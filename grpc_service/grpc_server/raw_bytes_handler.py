@@ -0,0 +1,66 @@
+from typing import Any, Callable, Dict, Optional
+
+import grpc
+
+class RawBytesRpcHandler(grpc.GenericRpcHandler):
+    
+    """
+    Serves one unary method with raw bytes on both sides.
+
+    The handler has no request deserializer and no response serializer, so
+    the behavior receives the request bytes as they came off the wire and
+    its return value is written back untouched. This lets a method answer
+    with a payload that was serialized once, ahead of time, instead of
+    building and serializing a message per call.
+
+    The handler must be registered ahead of the generated servicer so it
+    wins for its method: through `add_generic_rpc_handlers` before the
+    servicer is added, and through `add_registered_method_handlers` after
+    it, since that call replaces the servicer's entry for the method.
+    """
+    
+    def __init__ (
+        self,
+        service_name: str,
+        method_name: str,
+        behavior: Callable[[bytes, Any], Any],
+    ) -> None:
+        
+        """
+        Initializes the RawBytesRpcHandler.
+
+        Args:
+            service_name (str): Fully qualified service name, e.g. `book.BookService`.
+            method_name (str): The method to serve, e.g. `GetAllBooks`.
+            behavior (Callable[[bytes, Any], Any]): Takes the request bytes and the
+                servicer context and returns the response bytes. May be a coroutine
+                function on grpc.aio servers.
+        """
+        
+        self.service_name = service_name
+        self.method_name = method_name
+        self.method = f'/{service_name}/{method_name}'
+        self.handler = grpc.unary_unary_rpc_method_handler(behavior)
+    
+    def service (
+        self,
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> Optional[grpc.RpcMethodHandler]:
+        
+        """
+        Returns the raw handler for its own method and None for any other.
+        """
+        
+        if handler_call_details.method == self.method:
+            return self.handler
+        return None
+    
+    def method_handlers (
+        self,
+    ) -> Dict[str, grpc.RpcMethodHandler]:
+        
+        """
+        Returns the handler keyed by method name, for `add_registered_method_handlers`.
+        """
+        
+        return {self.method_name: self.handler}
@@ -0,0 +1,86 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+class RecentWrites:
+    
+    """
+    Remembers which keys this process wrote in the last `window` seconds.
+
+    Reads that must see their own writes ask it whether a key is still young
+    enough for a lagging replica to miss the write, and go to the primary only
+    for those. `record_all` covers bulk writes whose keys are not listed.
+
+    Keys expire in the order they were recorded, so the bookkeeping stays
+    bounded by the write rate over one window.
+    """
+    
+    def __init__ (
+        self,
+        window: float,
+    ) -> None:
+        
+        """
+        Initializes an empty RecentWrites.
+
+        Args:
+            window (float): Seconds a write is considered recent.
+        """
+        
+        self.window = window
+        self.lock = threading.Lock()
+        self.expiries: 'OrderedDict[Hashable, float]' = OrderedDict()
+        self.all_until = 0.0
+    
+    def record (
+        self,
+        key: Hashable,
+    ) -> None:
+        
+        """
+        Marks a key as just written.
+
+        Args:
+            key (Hashable): The written key.
+        """
+        
+        now = time.monotonic()
+        
+        with self.lock:
+            self.expiries[key] = now + self.window
+            self.expiries.move_to_end(key)
+            
+            while self.expiries:
+                oldest, expiry = next(iter(self.expiries.items()))
+                if expiry > now:
+                    break
+                del self.expiries[oldest]
+    
+    def record_all (
+        self,
+    ) -> None:
+        
+        """
+        Marks every key as just written.
+        """
+        
+        with self.lock:
+            self.all_until = time.monotonic() + self.window
+    
+    def __contains__ (
+        self,
+        key: Hashable,
+    ) -> bool:
+        
+        """
+        Returns True if the key was written within the window.
+        """
+        
+        now = time.monotonic()
+        
+        with self.lock:
+            if now < self.all_until:
+                return True
+            expiry = self.expiries.get(key)
+            return expiry is not None and expiry > now
@@ -0,0 +1,221 @@
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+SNAPSHOT_REBUILDS = Counter (
+    'snapshot_rebuilds',
+    'Snapshot rebuilds, by outcome: ok or failed.',
+    ['snapshot', 'outcome'],
+)
+SNAPSHOT_REBUILD_SECONDS = Histogram (
+    'snapshot_rebuild_seconds',
+    'Time taken to load and serialize a snapshot.',
+    ['snapshot'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+SNAPSHOT_BYTES = Gauge (
+    'snapshot_bytes',
+    'Size of the snapshot currently being served.',
+    ['snapshot'],
+)
+
+class SerializedSnapshot:
+    
+    """
+    A versioned, already-serialized response shared by every caller.
+
+    `get` hands out the same immutable bytes until the data behind them
+    changes. Writers call `bump` after they commit, which moves the version
+    forward and wakes a background thread that loads and serializes a fresh
+    payload. Bumps that arrive while a rebuild is running are folded into a
+    single follow-up rebuild, so a burst of writes costs at most two.
+
+    Until the new payload is ready callers keep getting the previous one:
+    reads issued right after a write may briefly miss it. A payload older
+    than `max_age` seconds is refreshed the same way, which bounds staleness
+    when the data is changed by something that does not call `bump`.
+
+    Only the very first `get` waits for a build. A failed background rebuild
+    is logged and the last good payload stays in place.
+    """
+    
+    def __init__ (
+        self,
+        name: str,
+        build: Callable[[], bytes],
+        max_age: float = 60.0,
+        logger: logging.Logger = logging.getLogger('fastapi-logger'),
+    ) -> None:
+        
+        """
+        Initializes an empty snapshot; nothing is built until the first `get`.
+
+        Args:
+            name (str): Label used in the snapshot metrics and the rebuild thread name.
+            build (Callable[[], bytes]): Loads the data and returns it serialized.
+            max_age (float): Seconds after which a payload is rebuilt even without a bump;
+                             0 or less disables the age check.
+            logger (logging.Logger): Where failed rebuilds are reported.
+        """
+        
+        self.name = name
+        self.build = build
+        self.max_age = max_age
+        self.logger = logger
+        self.version = 0
+        self.retry_delay = 1.0
+        
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._payload: Optional[bytes] = None
+        self._built_version = -1
+        self._built_at = 0.0
+    
+    def get (
+        self,
+        block: bool = True,
+    ) -> Optional[bytes]:
+        
+        """
+        Returns the current payload, scheduling a rebuild if it is out of date.
+
+        Args:
+            block (bool): Whether to build the first payload in the calling thread
+                          when there is none yet.
+
+        Returns:
+            Optional[bytes]: The serialized payload, or None if there is none yet
+                             and `block` is False.
+
+        Raises:
+            Exception: Whatever `build` raises while building the first payload.
+        """
+        
+        payload = self._payload
+        
+        if payload is None:
+            if not block:
+                return None
+            
+            with self._build_lock:
+                if self._payload is None:
+                    self._rebuild()
+            return self._payload
+        
+        if self._is_stale():
+            self._schedule()
+        
+        return payload
+    
+    def bump (
+        self,
+    ) -> None:
+        
+        """
+        Marks the current payload as out of date and schedules a rebuild.
+        """
+        
+        with self._lock:
+            self.version += 1
+        
+        if self._payload is not None:
+            self._schedule()
+    
+    def _is_stale (
+        self,
+    ) -> bool:
+        
+        """
+        Tells whether the payload lags behind the version or is past `max_age`.
+        """
+        
+        if self._built_version != self.version:
+            return True
+        
+        return self.max_age > 0 and time.monotonic() - self._built_at > self.max_age
+    
+    def _schedule (
+        self,
+    ) -> None:
+        
+        """
+        Wakes the rebuild thread, starting it on first use.
+        """
+        
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread (
+                    target=self._run,
+                    name=f'{self.name}-snapshot',
+                    daemon=True,
+                )
+                self._thread.start()
+        
+        self._wake.set()
+    
+    def _run (
+        self,
+    ) -> None:
+        
+        """
+        Rebuilds the payload whenever the thread is woken and it is still stale.
+
+        Wake-ups from readers that saw the payload while a rebuild was running
+        are dropped once that rebuild has caught up. After a failure the thread
+        waits `retry_delay` seconds so a database outage is not hammered.
+        """
+        
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            
+            if not self._is_stale():
+                continue
+            
+            with self._build_lock:
+                try:
+                    self._rebuild()
+                    continue
+                except Exception as e:
+                    self.logger.error (
+                        'Rebuilding the %s snapshot failed, serving the previous one: %s',
+                        self.name,
+                        str(e),
+                        exc_info=True,
+                    )
+            
+            time.sleep(self.retry_delay)
+    
+    def _rebuild (
+        self,
+    ) -> None:
+        
+        """
+        Builds a payload for the current version and publishes it.
+
+        The version is read before building, so a bump that lands mid-build
+        leaves the result marked out of date and triggers another rebuild.
+        """
+        
+        version = self.version
+        started = time.perf_counter()
+        
+        try:
+            payload = self.build()
+        except Exception:
+            SNAPSHOT_REBUILDS.labels(snapshot=self.name, outcome='failed').inc()
+            raise
+        
+        SNAPSHOT_REBUILD_SECONDS.labels(snapshot=self.name).observe(time.perf_counter() - started)
+        SNAPSHOT_REBUILDS.labels(snapshot=self.name, outcome='ok').inc()
+        SNAPSHOT_BYTES.labels(snapshot=self.name).set(len(payload))
+        
+        with self._lock:
+            self._payload = payload
+            self._built_version = version
+            self._built_at = time.monotonic()
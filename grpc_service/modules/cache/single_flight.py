@@ -0,0 +1,304 @@
+import time
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from prometheus_client import Counter
+
+from grpc_service.modules.database.query_deadline.query_deadline import (
+    DEADLINE_EXCEEDED_QUERIES,
+    QUERY_DEADLINE,
+    QUERY_DEADLINE_ERRORS,
+    QueryDeadlineExceeded,
+    query_time_remaining,
+)
+
+SINGLE_FLIGHT_EXECUTIONS = Counter (
+    'single_flight_executions',
+    'Calls that ran the underlying work as the leader of a flight.',
+    ['flight'],
+)
+SINGLE_FLIGHT_COLLAPSED = Counter (
+    'single_flight_collapsed',
+    'Calls that joined a flight already in progress instead of running the work.',
+    ['flight'],
+)
+
+class FlightCall:
+    
+    """
+    One in-progress call of a SingleFlight and the outcome its followers wait for.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes a call that has not finished yet.
+        """
+        
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+def _deadline_left() -> bool:
+    
+    """
+    Returns True unless the calling RPC's deadline has passed.
+    """
+    
+    deadline = QUERY_DEADLINE.get()
+    return deadline is None or deadline > time.monotonic()
+
+def _follower_timed_out() -> QueryDeadlineExceeded:
+    
+    """
+    Counts and builds the error for a follower whose deadline passed before the flight finished.
+    """
+    
+    DEADLINE_EXCEEDED_QUERIES.inc()
+    return QueryDeadlineExceeded('The RPC deadline passed while waiting for a shared query.')
+
+class SingleFlight:
+    
+    """
+    Collapses concurrent identical calls into one.
+
+    The first caller for a key becomes the leader and runs the work; callers
+    arriving with the same key while it runs wait for it and receive the
+    same result, or the same exception. Once the leader finishes the key is
+    released, so the next call runs the work again: nothing is cached.
+
+    Each follower waits only until its own RPC deadline (`QUERY_DEADLINE`).
+    A run cut short by the leader's deadline is not passed on to followers
+    that still have time: they start a new flight, one of them leading it.
+
+    Writers call `forget` after they change the data behind a key, so calls
+    arriving afterwards start a fresh flight instead of joining one that may
+    have read the old data.
+    """
+    
+    def __init__ (
+        self,
+        name: str,
+    ) -> None:
+        
+        """
+        Initializes the SingleFlight.
+
+        Args:
+            name (str): Label used in the single-flight metrics.
+        """
+        
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, FlightCall] = {}
+        
+        self._executions = SINGLE_FLIGHT_EXECUTIONS.labels(flight=name)
+        self._collapsed = SINGLE_FLIGHT_COLLAPSED.labels(flight=name)
+    
+    def do (
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+    ) -> Any:
+        
+        """
+        Runs `fn` unless a call for the same key is already running, then waits for that one.
+
+        Args:
+            key (Hashable): Identifies calls that may share a result.
+            fn (Callable[[], Any]): The work to run when leading.
+
+        Returns:
+            Any: The result of the flight's single run of `fn`.
+
+        Raises:
+            QueryDeadlineExceeded: If the caller's deadline passes while it waits.
+            Exception: Whatever `fn` raised in the flight's run.
+        """
+        
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                
+                if leader:
+                    call = self._calls[key] = FlightCall()
+            
+            if leader:
+                break
+            
+            self._collapsed.inc()
+            if not call.done.wait(query_time_remaining()):
+                raise _follower_timed_out()
+            
+            # The leader's deadline ended its run; this caller's has not.
+            if isinstance(call.error, QUERY_DEADLINE_ERRORS) and _deadline_left():
+                continue
+            
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        self._executions.inc()
+        
+        try:
+            call.result = fn()
+            return call.result
+        
+        except BaseException as e:
+            call.error = e
+            raise
+        
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+    
+    def forget (
+        self,
+        key: Hashable,
+    ) -> None:
+        
+        """
+        Stops new calls from joining the flight in progress for a key, if any.
+
+        Callers already waiting on it still get its result.
+        """
+        
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def clear (
+        self,
+    ) -> None:
+        
+        """
+        Stops new calls from joining any flight in progress.
+
+        Used when a write changes the data behind every key of a flight.
+        """
+        
+        with self._lock:
+            self._calls.clear()
+
+class AsyncSingleFlight:
+    
+    """
+    asyncio counterpart of SingleFlight.
+
+    The leader's work runs as its own task that every caller awaits through
+    `asyncio.shield`, so a caller that is cancelled, including the one that
+    started the flight, leaves the others waiting on the same run. The task
+    starts with a copy of the leader's context, so the leader's RPC deadline
+    bounds the shared query; each caller stops waiting at its own deadline,
+    and followers with time left run the work again when the leader's
+    deadline cut it short.
+    """
+    
+    def __init__ (
+        self,
+        name: str,
+    ) -> None:
+        
+        """
+        Initializes the AsyncSingleFlight.
+
+        Args:
+            name (str): Label used in the single-flight metrics.
+        """
+        
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        
+        self._executions = SINGLE_FLIGHT_EXECUTIONS.labels(flight=name)
+        self._collapsed = SINGLE_FLIGHT_COLLAPSED.labels(flight=name)
+    
+    async def do (
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        
+        """
+        Awaits `fn()` unless a call for the same key is already running, then awaits that one.
+
+        Args:
+            key (Hashable): Identifies calls that may share a result.
+            fn (Callable[[], Awaitable[Any]]): Returns the coroutine to run when leading.
+
+        Returns:
+            Any: The result of the flight's single run of `fn`.
+
+        Raises:
+            QueryDeadlineExceeded: If the caller's deadline passes while it waits.
+            Exception: Whatever `fn` raised in the flight's run.
+        """
+        
+        while True:
+            task = self._tasks.get(key)
+            leader = task is None
+            
+            if leader:
+                self._executions.inc()
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda done: self._finish(key, done))
+            else:
+                self._collapsed.inc()
+            
+            try:
+                async with asyncio.timeout(query_time_remaining()) as wait:
+                    return await asyncio.shield(task)
+            
+            except TimeoutError:
+                if not wait.expired():
+                    raise
+                raise _follower_timed_out() from None
+            
+            except QUERY_DEADLINE_ERRORS:
+                # The leader's deadline ended its run; this caller's has not.
+                if leader or not _deadline_left():
+                    raise
+    
+    def forget (
+        self,
+        key: Hashable,
+    ) -> None:
+        
+        """
+        Stops new calls from joining the flight in progress for a key, if any.
+
+        Callers already waiting on it still get its result.
+        """
+        
+        self._tasks.pop(key, None)
+    
+    def clear (
+        self,
+    ) -> None:
+        
+        """
+        Stops new calls from joining any flight in progress.
+        """
+        
+        self._tasks.clear()
+    
+    def _finish (
+        self,
+        key: Hashable,
+        task: asyncio.Task,
+    ) -> None:
+        
+        """
+        Releases the key once its task is done.
+        """
+        
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        
+        # Marks the exception as retrieved when every caller was cancelled before it was raised.
+        if not task.cancelled():
+            task.exception()
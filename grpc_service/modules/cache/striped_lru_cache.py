@@ -0,0 +1,249 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, List, Tuple
+
+from prometheus_client import Counter
+
+CACHE_HITS = Counter (
+    'cache_hits',
+    'Lookups answered from the cache.',
+    ['cache'],
+)
+CACHE_MISSES = Counter (
+    'cache_misses',
+    'Lookups that found no live entry.',
+    ['cache'],
+)
+CACHE_EVICTIONS = Counter (
+    'cache_evictions',
+    'Entries dropped, by reason: size, ttl or invalidated.',
+    ['cache', 'reason'],
+)
+
+# Returned by `get` when there is no live entry; None is a valid cached value.
+CACHE_MISS = object()
+
+class CacheStripe:
+    
+    """
+    One independently locked shard of a StripedLRUCache.
+    """
+    
+    def __init__ (
+        self,
+        capacity: int,
+    ) -> None:
+        
+        """
+        Initializes an empty stripe.
+
+        Args:
+            capacity (int): Maximum number of entries kept in this stripe.
+        """
+        
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self.generation = 0
+
+class StripedLRUCache:
+    
+    """
+    Thread-safe in-process LRU cache with a per-entry time to live.
+
+    Keys are spread over `stripes` shards, each with its own lock and LRU
+    order, so concurrent lookups for different keys rarely wait on each
+    other. Each shard holds at most `max_size / stripes` entries and evicts
+    its least recently used one when full. Entries older than `ttl` seconds
+    are treated as missing.
+
+    Fills are guarded against racing writes: a reader takes a `token` before
+    it queries the database and `put` drops the value if the key's stripe was
+    invalidated in the meantime, so a read that started before an update can
+    never cache the old row after the update invalidated it.
+
+    A `max_size` of 0 disables the cache: every lookup misses and nothing is
+    stored.
+    """
+    
+    def __init__ (
+        self,
+        name: str,
+        max_size: int,
+        ttl: float,
+        stripes: int = 16,
+    ) -> None:
+        
+        """
+        Initializes the StripedLRUCache.
+
+        Args:
+            name (str): Label used in the cache metrics.
+            max_size (int): Maximum number of entries across all stripes.
+            ttl (float): Seconds an entry stays valid.
+            stripes (int): Number of independently locked shards.
+        """
+        
+        stripes = max(1, min(stripes, max_size)) if max_size > 0 else 1
+        capacity = -(-max_size // stripes) if max_size > 0 else 0
+        
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stripes: List[CacheStripe] = [CacheStripe(capacity) for _ in range(stripes)]
+        
+        self._hits = CACHE_HITS.labels(cache=name)
+        self._misses = CACHE_MISSES.labels(cache=name)
+        self._size_evictions = CACHE_EVICTIONS.labels(cache=name, reason='size')
+        self._ttl_evictions = CACHE_EVICTIONS.labels(cache=name, reason='ttl')
+        self._invalidations = CACHE_EVICTIONS.labels(cache=name, reason='invalidated')
+    
+    def get (
+        self,
+        key: Hashable,
+    ) -> Any:
+        
+        """
+        Looks up a live entry and marks it most recently used.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Any: The cached value, or `CACHE_MISS`.
+        """
+        
+        stripe = self._stripe(key)
+        now = time.monotonic()
+        
+        with stripe.lock:
+            entry = stripe.entries.get(key)
+            
+            if entry is not None and entry[0] <= now:
+                del stripe.entries[key]
+                self._ttl_evictions.inc()
+                entry = None
+            
+            if entry is None:
+                self._misses.inc()
+                return CACHE_MISS
+            
+            stripe.entries.move_to_end(key)
+        
+        self._hits.inc()
+        return entry[1]
+    
+    def token (
+        self,
+        key: Hashable,
+    ) -> int:
+        
+        """
+        Returns the fill token to pass to `put` after loading `key`.
+
+        Args:
+            key (Hashable): The cache key about to be loaded.
+
+        Returns:
+            int: The current generation of the key's stripe.
+        """
+        
+        stripe = self._stripe(key)
+        
+        with stripe.lock:
+            return stripe.generation
+    
+    def put (
+        self,
+        key: Hashable,
+        value: Any,
+        token: int,
+    ) -> bool:
+        
+        """
+        Stores a value unless the key was invalidated since `token` was taken.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store. It is shared with every later reader
+                         and must not be modified.
+            token (int): The token returned by `token` before the value was loaded.
+
+        Returns:
+            bool: True if the value was stored.
+        """
+        
+        stripe = self._stripe(key)
+        
+        with stripe.lock:
+            if stripe.capacity == 0 or stripe.generation != token:
+                return False
+            
+            stripe.entries[key] = (time.monotonic() + self.ttl, value)
+            stripe.entries.move_to_end(key)
+            
+            while len(stripe.entries) > stripe.capacity:
+                stripe.entries.popitem(last=False)
+                self._size_evictions.inc()
+        
+        return True
+    
+    def invalidate (
+        self,
+        key: Hashable,
+    ) -> None:
+        
+        """
+        Drops an entry and fences off fills that were already in flight.
+
+        Args:
+            key (Hashable): The cache key.
+        """
+        
+        stripe = self._stripe(key)
+        
+        with stripe.lock:
+            stripe.generation += 1
+            if stripe.entries.pop(key, None) is not None:
+                self._invalidations.inc()
+    
+    def clear (
+        self,
+    ) -> None:
+        
+        """
+        Drops every entry.
+        """
+        
+        for stripe in self.stripes:
+            with stripe.lock:
+                stripe.generation += 1
+                stripe.entries.clear()
+    
+    def __len__ (
+        self,
+    ) -> int:
+        
+        """
+        Returns the number of stored entries, expired ones included.
+        """
+        
+        return sum(len(stripe.entries) for stripe in self.stripes)
+    
+    def _stripe (
+        self,
+        key: Hashable,
+    ) -> CacheStripe:
+        
+        """
+        Picks the stripe responsible for a key.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            CacheStripe: The stripe holding the key.
+        """
+        
+        return self.stripes[hash(key) % len(self.stripes)]
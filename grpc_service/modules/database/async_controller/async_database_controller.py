@@ -0,0 +1,548 @@
+import os
+import time
+from uuid import uuid4
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+
+import psycopg
+from psycopg import AsyncConnection
+
+from grpc_service.modules.database.async_model.async_database import AsyncDatabase
+from grpc_service.modules.database.storage_backend.storage_backend import RETURNING_QUERY_KINDS, AsyncStorageBackend
+from grpc_service.modules.database.unit_of_work.unit_of_work import UnitOfWork
+from grpc_service.modules.database.query_metrics.query_metrics import EXPLAIN_PREFIX, QueryObserver
+from grpc_service.modules.database.query_deadline.query_deadline import query_timeout
+
+class AsyncDatabaseController(AsyncStorageBackend):
+    
+    """
+    Asyncio counterpart of DatabaseController.
+
+    Exposes the same SELECT, INSERT, DELETE and UPDATE helpers as coroutines,
+    backed by the AsyncDatabase pool. Queries keep the `%s` placeholder style,
+    so SQL text can be shared with the thread-pool BookService unchanged.
+
+    `prepare=True` is handed to psycopg 3, which keeps its own per-connection
+    cache of server-side prepared statements keyed by query text.
+
+    Single-statement helpers run in autocommit mode, so each costs one round
+    trip instead of `BEGIN`, the statement and `COMMIT`. Statements awaited
+    inside `unit_of_work()` share one connection and transaction instead.
+
+    Timings, row counts and slow-statement plans are recorded through the
+    same QueryObserver as the thread-pool controller.
+
+    Statements are awaited under the calling RPC's deadline: one still running
+    when it passes is cancelled, which psycopg forwards to the server, and
+    QueryDeadlineExceeded is raised.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes the AsyncDatabaseController.
+        """
+        
+        self.db = AsyncDatabase()
+        self.query_observer = QueryObserver()
+        self.stream_chunk_size = int(os.getenv('DB_STREAM_CHUNK_SIZE', '500'))
+        
+        # The unit of work open in the current task, which statements join.
+        self.active_unit: ContextVar[Optional[UnitOfWork]] = ContextVar(f'async_database_controller_unit_{id(self)}', default=None)
+    
+    async def execute_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+        primary: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Executes a SELECT query and returns the result as a list of rows.
+
+        Args:
+            query (str): The SELECT query to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the SELECT query.
+            prepare (bool): Run the query as a per-connection prepared statement.
+            primary (bool): Accepted for interface compatibility; the async pool
+                            only connects to the primary.
+
+        Raises:
+            ValueError: If the provided query does not start with 'SELECT'.
+
+        Returns:
+            List[Tuple[Any, ...]]: A list of tuples representing the rows returned by the query.
+        """
+        
+        if not query.strip().lower().startswith('select'):
+            raise ValueError('Provided query is not a SELECT query.')
+        
+        started = time.perf_counter()
+        connection_obj: AsyncConnection = await self.__get_autocommit_connection()
+        acquired = time.perf_counter()
+        
+        try:
+            async with connection_obj.cursor() as cursor, query_timeout():
+                await cursor.execute(query, params, prepare=prepare or None)
+                executed = time.perf_counter()
+                result = await cursor.fetchall()
+            
+            await self.__observe(connection_obj, query, params, acquired - started, executed - acquired, time.perf_counter() - executed, len(result))
+            return result
+        
+        finally:
+            await self.__release_autocommit_connection(connection_obj)
+    
+    async def stream_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        
+        """
+        Executes a SELECT query through a named server-side cursor and yields
+        the result in chunks of at most `chunk_size` rows.
+
+        Args:
+            query (str): The SELECT query to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the SELECT query.
+            chunk_size (Optional[int]): Rows fetched per round trip. Defaults to `DB_STREAM_CHUNK_SIZE`.
+
+        Raises:
+            ValueError: If the provided query does not start with 'SELECT'.
+
+        Yields:
+            List[Tuple[Any, ...]]: Up to `chunk_size` rows per iteration.
+        """
+        
+        if not query.strip().lower().startswith('select'):
+            raise ValueError('Provided query is not a SELECT query.')
+        
+        chunk_size = chunk_size or self.stream_chunk_size
+        unit_connection = self.__unit_connection()
+        started = time.perf_counter()
+        connection_obj: AsyncConnection = unit_connection or await self.db.get_connection()
+        acquired = time.perf_counter()
+        fetch_seconds, row_count = 0.0, 0
+        
+        try:
+            async with connection_obj.cursor(name=f'stream_{uuid4().hex}') as cursor:
+                cursor.itersize = chunk_size
+                async with query_timeout():
+                    await cursor.execute(query, params)
+                executed = time.perf_counter()
+                
+                while True:
+                    fetch_started = time.perf_counter()
+                    # Bounded per fetch: a timeout scope must not stay open across a yield.
+                    async with query_timeout():
+                        rows = await cursor.fetchmany(chunk_size)
+                    fetch_seconds += time.perf_counter() - fetch_started
+                    
+                    if not rows:
+                        break
+                    row_count += len(rows)
+                    yield rows
+            
+            if unit_connection is None:
+                await connection_obj.commit()
+            await self.__observe(None, query, params, acquired - started, executed - acquired, fetch_seconds, row_count)
+        
+        # BaseException so that a cancelled stream does not leave the transaction open.
+        except BaseException:
+            if unit_connection is None:
+                await connection_obj.rollback()
+            raise
+        
+        finally:
+            if unit_connection is None:
+                await self.db.release_connection(connection_obj)
+    
+    async def execute_insert_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Executes an INSERT query and returns the ID of the inserted row if available.
+
+        Args:
+            query (str): The INSERT query to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the INSERT query.
+            prepare (bool): Run the query as a per-connection prepared statement.
+
+        Raises:
+            ValueError: If the provided query does not start with 'INSERT'.
+
+        Returns:
+            int: The ID of the inserted row if available; otherwise, -1.
+        """
+        
+        if not query.strip().lower().startswith('insert'):
+            raise ValueError('Provided query is not an INSERT query.')
+        
+        started = time.perf_counter()
+        connection_obj: AsyncConnection = await self.__get_autocommit_connection()
+        acquired = time.perf_counter()
+        
+        try:
+            async with connection_obj.cursor() as cursor, query_timeout():
+                await cursor.execute(query, params, prepare=prepare or None)
+                executed = time.perf_counter()
+                inserted_id = (await cursor.fetchone())[0] if cursor.description else -1
+            
+            await self.__observe(connection_obj, query, params, acquired - started, executed - acquired, time.perf_counter() - executed, 1)
+            return inserted_id
+        
+        finally:
+            await self.__release_autocommit_connection(connection_obj)
+    
+    async def execute_delete_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Executes a DELETE query and returns the number of rows affected.
+
+        Args:
+            query (str): The DELETE query to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the DELETE query.
+            prepare (bool): Run the query as a per-connection prepared statement.
+
+        Raises:
+            ValueError: If the provided query does not start with 'DELETE'.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        
+        if not query.strip().lower().startswith('delete'):
+            raise ValueError('Provided query is not a DELETE query.')
+        
+        return await self.__execute_rowcount_query(query, params, prepare)
+    
+    async def execute_edit_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Executes an UPDATE query and returns the number of rows affected.
+
+        Args:
+            query (str): The UPDATE query to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the UPDATE query.
+            prepare (bool): Run the query as a per-connection prepared statement.
+
+        Raises:
+            ValueError: If the provided query does not start with 'UPDATE'.
+
+        Returns:
+            int: The number of rows updated.
+        """
+        
+        if not query.strip().lower().startswith('update'):
+            raise ValueError('Provided query is not an UPDATE query.')
+        
+        return await self.__execute_rowcount_query(query, params, prepare)
+    
+    async def execute_returning_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Executes an INSERT, UPDATE or DELETE with a `RETURNING` list and returns its rows.
+
+        Args:
+            query (str): The statement to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the statement.
+            prepare (bool): Run the query as a per-connection prepared statement.
+
+        Raises:
+            ValueError: If the provided query is not an INSERT, UPDATE or DELETE.
+
+        Returns:
+            List[Tuple[Any, ...]]: One row per row written, with the `RETURNING` columns.
+        """
+        
+        if not query.strip().lower().startswith(RETURNING_QUERY_KINDS):
+            raise ValueError('Provided query is not an INSERT, UPDATE or DELETE query.')
+        
+        started = time.perf_counter()
+        connection_obj: AsyncConnection = await self.__get_autocommit_connection()
+        acquired = time.perf_counter()
+        
+        try:
+            async with connection_obj.cursor() as cursor, query_timeout():
+                await cursor.execute(query, params, prepare=prepare or None)
+                executed = time.perf_counter()
+                result = await cursor.fetchall()
+            
+            await self.__observe(connection_obj, query, params, acquired - started, executed - acquired, time.perf_counter() - executed, len(result))
+            return result
+        
+        finally:
+            await self.__release_autocommit_connection(connection_obj)
+    
+    async def execute_copy_query (
+        self,
+        query: str,
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> int:
+        
+        """
+        Loads rows with a `COPY ... FROM STDIN` statement in its own transaction,
+        or in the open unit of work's.
+
+        Args:
+            query (str): The COPY statement, in text format (the default).
+            rows (Sequence[Tuple[Any, ...]]): The rows to load, in the statement's column order.
+
+        Raises:
+            ValueError: If the provided query is not a `COPY ... FROM STDIN` statement.
+
+        Returns:
+            int: The number of rows loaded.
+        """
+        
+        normalized = ' '.join(query.split()).lower()
+        if not (normalized.startswith('copy') and 'from stdin' in normalized):
+            raise ValueError('Provided query is not a COPY FROM STDIN query.')
+        
+        unit_connection = self.__unit_connection()
+        started = time.perf_counter()
+        connection_obj: AsyncConnection = unit_connection or await self.db.get_connection()
+        acquired = time.perf_counter()
+        
+        try:
+            async with connection_obj.cursor() as cursor, query_timeout():
+                async with cursor.copy(query) as copy:
+                    for row in rows:
+                        await copy.write_row(row)
+                rowcount = cursor.rowcount
+            if unit_connection is None:
+                await connection_obj.commit()
+            
+            await self.__observe(None, query, None, acquired - started, time.perf_counter() - acquired, 0.0, rowcount)
+            return rowcount
+        
+        except Exception as e:
+            if unit_connection is None:
+                await connection_obj.rollback()
+            raise e
+        
+        finally:
+            if unit_connection is None:
+                await self.db.release_connection(connection_obj)
+    
+    @asynccontextmanager
+    async def unit_of_work (
+        self,
+    ) -> AsyncIterator[None]:
+        
+        """
+        Runs the statements awaited inside the block in one transaction on one connection.
+
+        The outermost unit checks a connection out of the pool and holds it
+        until the block exits, then commits, or rolls back if the block
+        raised. Statements awaited in the block by the same task join that
+        transaction. A nested unit is a psycopg transaction block on the same
+        connection, which psycopg runs as a `SAVEPOINT`.
+
+        Yields:
+            None: Control to the block.
+        """
+        
+        unit = self.active_unit.get()
+        
+        if unit is not None:
+            async with unit.connection.transaction():
+                yield
+            return
+        
+        connection_obj: AsyncConnection = await self.db.get_connection()
+        token = self.active_unit.set(UnitOfWork(connection_obj))
+        
+        try:
+            async with connection_obj.transaction():
+                yield
+        
+        finally:
+            self.active_unit.reset(token)
+            await self.db.release_connection(connection_obj)
+    
+    async def __execute_rowcount_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Runs a data-modifying statement as a single autocommitted statement.
+
+        Args:
+            query (str): The statement to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the statement.
+            prepare (bool): Run the statement as a per-connection prepared statement.
+
+        Returns:
+            int: The number of rows affected.
+        """
+        
+        started = time.perf_counter()
+        connection_obj: AsyncConnection = await self.__get_autocommit_connection()
+        acquired = time.perf_counter()
+        
+        try:
+            async with connection_obj.cursor() as cursor, query_timeout():
+                await cursor.execute(query, params, prepare=prepare or None)
+                rowcount = cursor.rowcount
+            
+            await self.__observe(connection_obj, query, params, acquired - started, time.perf_counter() - acquired, 0.0, rowcount)
+            return rowcount
+        
+        finally:
+            await self.__release_autocommit_connection(connection_obj)
+    
+    async def __observe (
+        self,
+        connection_obj: Optional[AsyncConnection],
+        query: str,
+        params: Optional[Tuple[Any, ...]],
+        pool_wait: float,
+        execute: float,
+        fetch: float,
+        rows: int,
+    ) -> None:
+        
+        """
+        Records a statement's timings and reports it if it was slow.
+
+        Args:
+            connection_obj (Optional[AsyncConnection]): The connection the statement ran on,
+                                                        used to capture its plan; None to skip it.
+            query (str): The statement.
+            params (Optional[Tuple[Any, ...]]): Its parameters.
+            pool_wait (float): Seconds spent waiting for the connection.
+            execute (float): Seconds spent executing.
+            fetch (float): Seconds spent fetching rows.
+            rows (int): Rows returned or affected.
+        """
+        
+        if not self.query_observer.record(query, pool_wait, execute, fetch, rows):
+            return
+        
+        # EXPLAIN ends with a rollback, which would discard an open unit of work.
+        plan = None
+        if connection_obj is not None and self.__unit_connection() is None and self.query_observer.should_explain(query):
+            plan = await self.__explain(connection_obj, query, params)
+        
+        self.query_observer.log_slow(query, pool_wait, execute, fetch, rows, plan)
+    
+    async def __explain (
+        self,
+        connection_obj: AsyncConnection,
+        query: str,
+        params: Optional[Tuple[Any, ...]],
+    ) -> Optional[str]:
+        
+        """
+        Captures `EXPLAIN (ANALYZE, BUFFERS)` inside a transaction that is always rolled back.
+
+        Args:
+            connection_obj (AsyncConnection): The connection the statement ran on.
+            query (str): The statement.
+            params (Optional[Tuple[Any, ...]]): Its parameters.
+
+        Returns:
+            Optional[str]: The plan, one line per row, or a note if EXPLAIN failed.
+        """
+        
+        autocommit = connection_obj.autocommit
+        
+        try:
+            await connection_obj.set_autocommit(False)
+            async with connection_obj.cursor() as cursor:
+                await cursor.execute(EXPLAIN_PREFIX + query, params)
+                return '\n'.join(row[0] for row in await cursor.fetchall())
+        
+        except psycopg.Error as e:
+            return f'EXPLAIN failed: {e}'
+        
+        finally:
+            try:
+                await connection_obj.rollback()
+                await connection_obj.set_autocommit(autocommit)
+            except psycopg.Error:
+                pass
+    
+    async def __get_autocommit_connection (
+        self,
+    ) -> AsyncConnection:
+        
+        """
+        Checks out a pooled connection and switches it to autocommit.
+
+        Inside a unit of work the unit's connection is returned as it is.
+
+        Returns:
+            AsyncConnection: A connection on which every statement commits on its own,
+                             or the unit of work's.
+        """
+        
+        unit_connection = self.__unit_connection()
+        if unit_connection is not None:
+            return unit_connection
+        
+        connection_obj: AsyncConnection = await self.db.get_connection()
+        await connection_obj.set_autocommit(True)
+        return connection_obj
+    
+    async def __release_autocommit_connection (
+        self,
+        connection_obj: AsyncConnection,
+    ) -> None:
+        
+        """
+        Restores transactional mode and returns the connection to the pool.
+
+        Args:
+            connection_obj (AsyncConnection): A connection from `__get_autocommit_connection`.
+        """
+        
+        # The unit of work's connection stays checked out until the unit ends.
+        if connection_obj is self.__unit_connection():
+            return
+        
+        try:
+            if not connection_obj.closed:
+                await connection_obj.set_autocommit(False)
+        finally:
+            await self.db.release_connection(connection_obj)
+    
+    def __unit_connection (
+        self,
+    ) -> Optional[AsyncConnection]:
+        
+        """
+        Returns the connection of the unit of work open in the current task, if any.
+        """
+        
+        unit = self.active_unit.get()
+        return unit.connection if unit is not None else None
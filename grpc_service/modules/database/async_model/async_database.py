@@ -0,0 +1,119 @@
+import os
+from typing import Optional
+
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
+
+class AsyncDatabase:
+    
+    """
+    Asyncio counterpart of the Database singleton.
+
+    Holds a psycopg 3 AsyncConnectionPool so that coroutines awaiting a query
+    release the event loop instead of blocking a worker thread. The pool has
+    to be opened from inside the running event loop, which is why `connect`
+    is a coroutine.
+    """
+    
+    instance: Optional['AsyncDatabase'] = None
+    pool: Optional[AsyncConnectionPool] = None
+    
+    def __new__ (
+        cls,
+    ) -> 'AsyncDatabase':
+        
+        """
+        Ensures only a single instance of the AsyncDatabase class is created.
+
+        Returns:
+            AsyncDatabase: The singleton instance of the AsyncDatabase class.
+        """
+        
+        if cls.instance is None:
+            cls.instance = super().__new__(cls)
+            cls.instance.pool = None
+        return cls.instance
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes database connection details from environment variables.
+        """
+        
+        self.host = os.getenv('DB_HOST')
+        self.db_user = os.getenv('DB_USER')
+        self.password = os.getenv('DB_PASSWORD')
+        self.database = os.getenv('DB_NAME')
+        self.min_size = int(os.getenv('DB_ASYNC_POOL_MIN_SIZE', '1'))
+        self.max_size = int(os.getenv('DB_ASYNC_POOL_MAX_SIZE', '20'))
+    
+    async def connect (
+        self,
+    ) -> None:
+        
+        """
+        Opens the async connection pool if it is not already initialized.
+        """
+        
+        if self.pool is None:
+            self.pool = AsyncConnectionPool (
+                min_size=self.min_size,
+                max_size=self.max_size,
+                kwargs={
+                    'host': self.host,
+                    'user': self.db_user,
+                    'password': self.password,
+                    'dbname': self.database,
+                },
+                open=False,
+            )
+            await self.pool.open()
+    
+    async def get_connection (
+        self,
+    ) -> AsyncConnection:
+        
+        """
+        Retrieves a database connection from the async connection pool.
+
+        If the pool is not initialized, it will be opened first. When every
+        connection is checked out the coroutine waits for one to be returned
+        instead of raising.
+
+        Returns:
+            AsyncConnection: A database connection from the pool.
+        """
+        
+        if self.pool is None:
+            await self.connect()
+        return await self.pool.getconn()
+    
+    async def release_connection (
+        self,
+        connection: AsyncConnection,
+    ) -> None:
+        
+        """
+        Releases a database connection back to the async connection pool.
+
+        Args:
+            connection (AsyncConnection): The connection to be returned to the pool.
+        """
+        
+        await self.pool.putconn(connection)
+    
+    async def close_all (
+        self,
+    ) -> None:
+        
+        """
+        Closes all connections in the async connection pool.
+
+        This method should be called during server shutdown to free resources.
+        """
+        
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
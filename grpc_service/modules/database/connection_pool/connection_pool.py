@@ -0,0 +1,471 @@
+import time
+import threading
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+
+POOL_WAIT_SECONDS = Histogram (
+    'db_pool_wait_seconds',
+    'Time spent waiting for a pooled connection to become available.',
+    ['pool'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKOUTS = Counter (
+    'db_pool_checkouts',
+    'Connections handed out by the pool.',
+    ['pool'],
+)
+POOL_TIMEOUTS = Counter (
+    'db_pool_timeouts',
+    'Checkouts that gave up after waiting for the pool timeout.',
+    ['pool'],
+)
+POOL_RECYCLED = Counter (
+    'db_pool_recycled',
+    'Connections closed and replaced on checkout, by reason.',
+    ['pool', 'reason'],
+)
+
+# Live pools, read by ConnectionPoolCollector at scrape time.
+POOLS: 'weakref.WeakSet[InstrumentedConnectionPool]' = weakref.WeakSet()
+
+class PoolTimeout(PoolError):
+    
+    """
+    Raised when no connection becomes available within the checkout timeout.
+    """
+
+class InstrumentedConnectionPool:
+    
+    """
+    Thread-safe psycopg2 connection pool that waits instead of failing.
+
+    psycopg2's SimpleConnectionPool is meant for single-threaded use and its
+    `getconn` raises as soon as `maxconn` connections are out. This pool
+    guards its state with a condition variable, so callers from a
+    ThreadPoolExecutor block, up to `timeout` seconds, until a connection
+    is returned.
+
+    On checkout a connection is replaced if it is older than `max_age`, and
+    pinged with `SELECT 1` if it has sat idle longer than `health_check_after`,
+    so a restarted or failed-over server is noticed before a query fails.
+    `minconn` connections are opened up front. Idle connections are reused
+    most recent first, which keeps the working set small and warm.
+
+    In-use, idle and waiting counts are exported to Prometheus together with
+    a wait-time histogram, labelled with the pool `name`.
+    """
+    
+    def __init__ (
+        self,
+        minconn: int,
+        maxconn: int,
+        name: str = 'primary',
+        timeout: float = 30.0,
+        max_age: float = 1800.0,
+        health_check_after: float = 30.0,
+        **connect_kwargs: Any,
+    ) -> None:
+        
+        """
+        Creates the pool and opens `minconn` connections.
+
+        Args:
+            minconn (int): Connections opened at startup.
+            maxconn (int): Upper bound on open connections.
+            name (str): Pool label used in metrics.
+            timeout (float): Default seconds `getconn` waits for a free connection.
+            max_age (float): Seconds after which a connection is replaced on checkout.
+            health_check_after (float): Idle seconds after which a connection is pinged on checkout.
+            **connect_kwargs: Arguments passed to `psycopg2.connect`.
+
+        Raises:
+            ValueError: If the size limits are inconsistent.
+        """
+        
+        if maxconn < 1 or not 0 <= minconn <= maxconn:
+            raise ValueError('Pool sizes must satisfy 0 <= minconn <= maxconn and maxconn >= 1.')
+        
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.name = name
+        self.timeout = timeout
+        self.max_age = max_age
+        self.health_check_after = health_check_after
+        self.connect_kwargs = connect_kwargs
+        
+        self._condition = threading.Condition()
+        self._idle: Deque[Tuple[extensions.connection, float]] = deque()
+        self._in_use: Dict[int, extensions.connection] = {}
+        self._created_at: Dict[int, float] = {}
+        self._size = 0
+        self._waiters = 0
+        self._closed = False
+        
+        self._wait_seconds = POOL_WAIT_SECONDS.labels(pool=name)
+        self._checkouts = POOL_CHECKOUTS.labels(pool=name)
+        self._timeouts = POOL_TIMEOUTS.labels(pool=name)
+        
+        POOLS.add(self)
+        self._prewarm()
+    
+    def getconn (
+        self,
+        timeout: Optional[float] = None,
+    ) -> extensions.connection:
+        
+        """
+        Checks out a healthy connection, waiting for one if the pool is exhausted.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait, overriding the pool default.
+
+        Returns:
+            extensions.connection: A connection owned by the caller until `putconn`.
+
+        Raises:
+            PoolTimeout: If no connection became available in time.
+            PoolError: If the pool has been closed.
+        """
+        
+        started = time.monotonic()
+        deadline = started + (self.timeout if timeout is None else timeout)
+        
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolError('connection pool is closed')
+                
+                if self._idle:
+                    connection, idle_since = self._idle.pop()
+                    break
+                
+                if self._size < self.maxconn:
+                    # Reserve the slot now, connect outside the lock.
+                    self._size += 1
+                    connection, idle_since = None, None
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts.inc()
+                    raise PoolTimeout (
+                        f'no connection available in pool {self.name!r} '
+                        f'after {time.monotonic() - started:.3f}s'
+                    )
+                
+                self._waiters += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiters -= 1
+        
+        self._wait_seconds.observe(time.monotonic() - started)
+        
+        try:
+            if connection is None:
+                connection = self._connect()
+            else:
+                connection = self._checked(connection, idle_since)
+        
+        except BaseException:
+            self._release_slot()
+            raise
+        
+        with self._condition:
+            self._in_use[id(connection)] = connection
+        
+        self._checkouts.inc()
+        return connection
+    
+    def putconn (
+        self,
+        connection: extensions.connection,
+        close: bool = False,
+    ) -> None:
+        
+        """
+        Returns a connection to the pool and wakes one waiter.
+
+        A connection left inside a transaction is rolled back first; one that is
+        closed, broken, or returned after `closeall` is discarded instead.
+
+        Args:
+            connection (extensions.connection): A connection obtained from `getconn`.
+            close (bool): Discard the connection rather than reuse it.
+
+        Raises:
+            PoolError: If the connection was not checked out from this pool.
+        """
+        
+        with self._condition:
+            closed = self._closed
+            if not closed and self._in_use.pop(id(connection), None) is None:
+                raise PoolError('trying to put unkeyed connection')
+        
+        if closed:
+            # Checked out before closeall; its slot is already gone.
+            if not connection.closed:
+                connection.close()
+            return
+        
+        if not close and not connection.closed:
+            status = connection.info.transaction_status
+            
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    close = True
+        
+        with self._condition:
+            if not (close or connection.closed or self._closed):
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+                return
+        
+        self._discard(connection)
+    
+    def closeall (
+        self,
+    ) -> None:
+        
+        """
+        Closes every connection and rejects further checkouts.
+
+        Waiting callers are woken and fail with PoolError.
+        """
+        
+        with self._condition:
+            self._closed = True
+            connections = [connection for connection, _ in self._idle] + list(self._in_use.values())
+            self._idle.clear()
+            self._in_use.clear()
+            self._created_at.clear()
+            self._size = 0
+            self._condition.notify_all()
+        
+        for connection in connections:
+            if not connection.closed:
+                connection.close()
+    
+    def stats (
+        self,
+    ) -> Dict[str, int]:
+        
+        """
+        Returns a consistent snapshot of the pool occupancy.
+
+        Returns:
+            Dict[str, int]: `size`, `in_use`, `idle`, `waiters` and `max` connection counts.
+        """
+        
+        with self._condition:
+            return {
+                'size': self._size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiters': self._waiters,
+                'max': self.maxconn,
+            }
+    
+    def _prewarm (
+        self,
+    ) -> None:
+        
+        """
+        Opens `minconn` connections so the first requests do not pay for connecting.
+        """
+        
+        for _ in range(self.minconn):
+            with self._condition:
+                self._size += 1
+            
+            try:
+                connection = self._connect()
+            except BaseException:
+                self._release_slot()
+                raise
+            
+            with self._condition:
+                self._idle.append((connection, time.monotonic()))
+    
+    def _connect (
+        self,
+    ) -> extensions.connection:
+        
+        """
+        Opens a new connection and records its creation time.
+
+        Returns:
+            extensions.connection: The new connection.
+        """
+        
+        connection = psycopg2.connect(**self.connect_kwargs)
+        
+        with self._condition:
+            self._created_at[id(connection)] = time.monotonic()
+        
+        return connection
+    
+    def _checked (
+        self,
+        connection: extensions.connection,
+        idle_since: float,
+    ) -> extensions.connection:
+        
+        """
+        Replaces an idle connection that is too old or no longer answers.
+
+        Args:
+            connection (extensions.connection): The connection taken from the idle list.
+            idle_since (float): When the connection was returned to the pool.
+
+        Returns:
+            extensions.connection: The same connection, or a freshly opened replacement.
+        """
+        
+        now = time.monotonic()
+        reason = None
+        
+        if now - self._created_at.get(id(connection), now) > self.max_age:
+            reason = 'max_age'
+        
+        elif connection.closed:
+            reason = 'closed'
+        
+        elif now - idle_since > self.health_check_after and not self._ping(connection):
+            reason = 'health_check'
+        
+        if reason is None:
+            return connection
+        
+        POOL_RECYCLED.labels(pool=self.name, reason=reason).inc()
+        self._forget(connection)
+        return self._connect()
+    
+    def _ping (
+        self,
+        connection: extensions.connection,
+    ) -> bool:
+        
+        """
+        Runs `SELECT 1` on a connection.
+
+        Args:
+            connection (extensions.connection): The connection to test.
+
+        Returns:
+            bool: True if the server answered.
+        """
+        
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+            return True
+        
+        except psycopg2.Error:
+            return False
+    
+    def _forget (
+        self,
+        connection: extensions.connection,
+    ) -> None:
+        
+        """
+        Closes a connection without giving up its slot in the pool.
+
+        Args:
+            connection (extensions.connection): The connection to close.
+        """
+        
+        with self._condition:
+            self._created_at.pop(id(connection), None)
+        
+        if not connection.closed:
+            connection.close()
+    
+    def _discard (
+        self,
+        connection: extensions.connection,
+    ) -> None:
+        
+        """
+        Closes a connection and frees its slot for a new one.
+
+        Args:
+            connection (extensions.connection): The connection to close.
+        """
+        
+        self._forget(connection)
+        self._release_slot()
+    
+    def _release_slot (
+        self,
+    ) -> None:
+        
+        """
+        Frees a connection slot and wakes one waiter to use it.
+        """
+        
+        with self._condition:
+            if not self._closed:
+                self._size -= 1
+            self._condition.notify()
+
+class ConnectionPoolCollector:
+    
+    """
+    Prometheus collector reporting the live occupancy of every open pool.
+    """
+    
+    def collect (
+        self,
+    ) -> Iterator[GaugeMetricFamily]:
+        
+        """
+        Yields connection and waiter gauges for each pool.
+
+        Yields:
+            GaugeMetricFamily: `db_pool_connections` by state, `db_pool_max_connections`
+                               and `db_pool_waiters`.
+        """
+        
+        connections = GaugeMetricFamily (
+            'db_pool_connections',
+            'Open pooled connections by state.',
+            labels=['pool', 'state'],
+        )
+        max_connections = GaugeMetricFamily (
+            'db_pool_max_connections',
+            'Configured maximum number of pooled connections.',
+            labels=['pool'],
+        )
+        waiters = GaugeMetricFamily (
+            'db_pool_waiters',
+            'Callers currently blocked waiting for a connection.',
+            labels=['pool'],
+        )
+        
+        for pool in list(POOLS):
+            stats = pool.stats()
+            connections.add_metric([pool.name, 'in_use'], stats['in_use'])
+            connections.add_metric([pool.name, 'idle'], stats['idle'])
+            max_connections.add_metric([pool.name], stats['max'])
+            waiters.add_metric([pool.name], stats['waiters'])
+        
+        yield connections
+        yield max_connections
+        yield waiters
+
+REGISTRY.register(ConnectionPoolCollector())
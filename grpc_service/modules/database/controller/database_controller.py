@@ -1,10 +1,38 @@
-from typing import Any, List, Optional, Tuple
+import io
+import os
+import re
+import time
+import weakref
+import itertools
+from uuid import uuid4
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
 
-from psycopg2.extensions import connection
+import psycopg2
+from psycopg2 import errors
+from psycopg2.extensions import connection, cursor as Cursor
 
 from grpc_service.modules.database.model.database import Database
+from grpc_service.modules.database.storage_backend.storage_backend import RETURNING_QUERY_KINDS, StorageBackend
+from grpc_service.modules.database.unit_of_work.unit_of_work import UnitOfWork
+from grpc_service.modules.database.query_metrics.query_metrics import EXPLAIN_PREFIX, QueryObserver
+from grpc_service.modules.database.query_deadline.query_deadline import statement_timeout_ms
 
-class DatabaseController:
+# Characters that must be backslash-escaped inside a COPY text-format field.
+COPY_TEXT_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+# `%s` placeholders and `%%` escapes, rewritten to `$n` and `%` for PREPARE.
+PLACEHOLDER_PATTERN = re.compile(r'%([s%])')
+
+class DatabaseController(StorageBackend):
     
     """
     Controller class for executing database queries.
@@ -12,6 +40,34 @@ class DatabaseController:
     This class provides methods to execute SELECT, INSERT, DELETE, and UPDATE queries
     using a singleton Database instance for connection pooling. It ensures proper
     transaction management (commit/rollback) and resource cleanup.
+
+    Queries run with `prepare=True` are parsed and planned once per pooled
+    connection: the first call issues a `PREPARE` for the statement text and
+    later calls on the same connection only send `EXECUTE` with parameters.
+
+    SELECTs are served by a read replica when `DB_REPLICA_HOSTS` is set; all
+    writes go to the primary.
+
+    SELECT, INSERT, DELETE and UPDATE helpers each run a single statement, so
+    they use the connection in autocommit mode. Postgres makes one statement
+    atomic on its own, which saves the implicit `BEGIN` and the `COMMIT` round
+    trips a psycopg2 transaction would add around it.
+
+    Statements that belong together run inside `unit_of_work()`: they share
+    one pooled connection and one transaction, committed once at the end,
+    and nested units become savepoints.
+
+    Every statement's pool wait, execute and fetch times and its row count are
+    recorded per statement shape by a QueryObserver. Slow statements are
+    logged, with an `EXPLAIN (ANALYZE, BUFFERS)` plan captured on the same
+    connection.
+
+    When the calling RPC has a deadline, each statement gets the time left as
+    its `statement_timeout`, and raises QueryDeadlineExceeded instead of
+    running once none is left. Single statements carry a
+    `SET LOCAL statement_timeout` in the same query string: Postgres runs a
+    multi-statement query as one implicit transaction, so the setting is
+    scoped to that statement and costs no extra round trip.
     """
 
     def __init__ (
@@ -23,10 +79,24 @@ class DatabaseController:
         """
         
         self.db = Database()
+        self.query_observer = QueryObserver()
+        self.stream_chunk_size = int(os.getenv('DB_STREAM_CHUNK_SIZE', '500'))
+        self.prepared_cache_size = int(os.getenv('DB_PREPARED_CACHE_SIZE', '64'))
+        
+        # Statement text -> prepared statement name, per connection. Weak keys let
+        # connections closed by the pool take their entries with them.
+        self.prepared_statements: 'weakref.WeakKeyDictionary[connection, OrderedDict[str, str]]' = weakref.WeakKeyDictionary()
+        self.statement_ids = itertools.count(1)
 
+        # The unit of work open in the current thread or task, which statements join.
+        self.active_unit: ContextVar[Optional[UnitOfWork]] = ContextVar(f'database_controller_unit_{id(self)}', default=None)
+    
     def execute_get_query (
         self, 
         query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+        primary: bool = False,
     ) -> List[Tuple[Any, ...]]:
         
         """
@@ -34,6 +104,10 @@ class DatabaseController:
 
         Args:
             query (str): The SELECT query to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the SELECT query.
+            prepare (bool): Run the query as a per-connection prepared statement.
+            primary (bool): Read from the primary instead of a replica, for reads
+                            that must see the latest committed writes.
 
         Raises:
             ValueError: If the provided query does not start with 'SELECT'.
@@ -45,26 +119,102 @@ class DatabaseController:
         if not query.strip().lower().startswith('select'):
             raise ValueError('Provided query is not a SELECT query.')
 
-        connection_obj: connection = self.db.get_connection()
+        started = time.perf_counter()
+        connection_obj: connection = self.__get_autocommit_connection(read_only=not primary)
+        acquired = time.perf_counter()
         
         try:
+            timeout_ms = statement_timeout_ms()
+            
             with connection_obj.cursor() as cursor:
-                cursor.execute(query)
+                self.__execute(cursor, query, params, prepare, timeout_ms)
+                executed = time.perf_counter()
                 result = cursor.fetchall()
-            connection_obj.commit()
+            
+            self.__observe(connection_obj, query, params, acquired - started, executed - acquired, time.perf_counter() - executed, len(result))
             return result
         
-        except Exception as e:
-            connection_obj.rollback()
-            raise e
-        
         finally:
-            self.db.release_connection(connection_obj)
+            self.__release_autocommit_connection(connection_obj)
+
+    def stream_get_query (
+        self, 
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        
+        """
+        Executes a SELECT query through a named server-side cursor and yields
+        the result in chunks.
+
+        Only `chunk_size` rows are held in memory at a time, so memory stays flat
+        regardless of the size of the result set, and the first chunk is yielded
+        before Postgres has produced the last row. The pooled connection is held
+        until the generator is exhausted or closed.
 
+        Args:
+            query (str): The SELECT query to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the SELECT query.
+            chunk_size (Optional[int]): Rows fetched per round trip. Defaults to `DB_STREAM_CHUNK_SIZE`.
+
+        Raises:
+            ValueError: If the provided query does not start with 'SELECT'.
+
+        Yields:
+            List[Tuple[Any, ...]]: Up to `chunk_size` rows per iteration.
+        """
+        
+        if not query.strip().lower().startswith('select'):
+            raise ValueError('Provided query is not a SELECT query.')
+        
+        chunk_size = chunk_size or self.stream_chunk_size
+        unit_connection = self.__unit_connection()
+        started = time.perf_counter()
+        connection_obj: connection = unit_connection or self.db.get_read_connection()
+        acquired = time.perf_counter()
+        fetch_seconds, row_count = 0.0, 0
+        
+        try:
+            self.__set_local_statement_timeout(connection_obj)
+            
+            # Named cursors live inside the transaction, so no commit happens until the end.
+            with connection_obj.cursor(name=f'stream_{uuid4().hex}') as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(query, params)
+                executed = time.perf_counter()
+                
+                while True:
+                    # Only time spent in fetchmany counts, not time the consumer holds a chunk.
+                    fetch_started = time.perf_counter()
+                    rows = cursor.fetchmany(chunk_size)
+                    fetch_seconds += time.perf_counter() - fetch_started
+                    
+                    if not rows:
+                        break
+                    row_count += len(rows)
+                    yield rows
+            
+            if unit_connection is None:
+                connection_obj.commit()
+            self.__observe(None, query, params, acquired - started, executed - acquired, fetch_seconds, row_count)
+        
+        # BaseException so that a stream abandoned by the client (GeneratorExit)
+        # does not return a connection that is still inside the transaction.
+        except BaseException:
+            if unit_connection is None:
+                connection_obj.rollback()
+            raise
+        
+        finally:
+            if unit_connection is None:
+                self.db.release_connection(connection_obj)
+    
     def execute_insert_query (
         self, 
         query: str, 
         params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
     ) -> int:
         
         """
@@ -73,6 +223,7 @@ class DatabaseController:
         Args:
             query (str): The INSERT query to execute.
             params (Optional[Tuple[Any, ...]]): Query parameters for the INSERT query.
+            prepare (bool): Run the query as a per-connection prepared statement.
 
         Raises:
             ValueError: If the provided query does not start with 'INSERT'.
@@ -84,27 +235,29 @@ class DatabaseController:
         if not query.strip().lower().startswith('insert'):
             raise ValueError('Provided query is not an INSERT query.')
 
-        connection_obj: connection = self.db.get_connection()
+        started = time.perf_counter()
+        connection_obj: connection = self.__get_autocommit_connection()
+        acquired = time.perf_counter()
         
         try:
+            timeout_ms = statement_timeout_ms()
+            
             with connection_obj.cursor() as cursor:
-                cursor.execute('BEGIN;')
-                cursor.execute(query, params)
+                self.__execute(cursor, query, params, prepare, timeout_ms)
+                executed = time.perf_counter()
                 inserted_id = cursor.fetchone()[0] if cursor.description else -1
-            connection_obj.commit()
+            
+            self.__observe(connection_obj, query, params, acquired - started, executed - acquired, time.perf_counter() - executed, 1)
             return inserted_id
         
-        except Exception as e:
-            connection_obj.rollback()
-            raise e
-        
         finally:
-            self.db.release_connection(connection_obj)
+            self.__release_autocommit_connection(connection_obj)
 
     def execute_delete_query (
         self, 
         query: str, 
         params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
     ) -> int:
         
         """
@@ -113,6 +266,7 @@ class DatabaseController:
         Args:
             query (str): The DELETE query to execute.
             params (Optional[Tuple[Any, ...]]): Query parameters for the DELETE query.
+            prepare (bool): Run the query as a per-connection prepared statement.
 
         Raises:
             ValueError: If the provided query does not start with 'DELETE'.
@@ -124,27 +278,28 @@ class DatabaseController:
         if not query.strip().lower().startswith('delete'):
             raise ValueError('Provided query is not a DELETE query.')
 
-        connection_obj: connection = self.db.get_connection()
+        started = time.perf_counter()
+        connection_obj: connection = self.__get_autocommit_connection()
+        acquired = time.perf_counter()
         
         try:
+            timeout_ms = statement_timeout_ms()
+            
             with connection_obj.cursor() as cursor:
-                cursor.execute('BEGIN;')
-                cursor.execute(query, params)
+                self.__execute(cursor, query, params, prepare, timeout_ms)
                 rowcount = cursor.rowcount
-            connection_obj.commit()
+            
+            self.__observe(connection_obj, query, params, acquired - started, time.perf_counter() - acquired, 0.0, rowcount)
             return rowcount
         
-        except Exception as e:
-            connection_obj.rollback()
-            raise e
-        
         finally:
-            self.db.release_connection(connection_obj)
+            self.__release_autocommit_connection(connection_obj)
 
     def execute_edit_query(
         self, 
         query: str, 
         params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
     ) -> int:
         
         """
@@ -153,6 +308,7 @@ class DatabaseController:
         Args:
             query (str): The UPDATE query to execute.
             params (Optional[Tuple[Any, ...]]): Query parameters for the UPDATE query.
+            prepare (bool): Run the query as a per-connection prepared statement.
 
         Raises:
             ValueError: If the provided query does not start with 'UPDATE'.
@@ -164,19 +320,515 @@ class DatabaseController:
         if not query.strip().lower().startswith('update'):
             raise ValueError('Provided query is not an UPDATE query.')
 
-        connection_obj: connection = self.db.get_connection()
+        started = time.perf_counter()
+        connection_obj: connection = self.__get_autocommit_connection()
+        acquired = time.perf_counter()
         
         try:
+            timeout_ms = statement_timeout_ms()
+            
             with connection_obj.cursor() as cursor:
-                cursor.execute('BEGIN;')
-                cursor.execute(query, params)
+                self.__execute(cursor, query, params, prepare, timeout_ms)
                 rowcount = cursor.rowcount
-            connection_obj.commit()
+            
+            self.__observe(connection_obj, query, params, acquired - started, time.perf_counter() - acquired, 0.0, rowcount)
+            return rowcount
+        
+        finally:
+            self.__release_autocommit_connection(connection_obj)
+    
+    def execute_returning_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Executes an INSERT, UPDATE or DELETE with a `RETURNING` list and returns its rows.
+
+        The written rows come back with the write, so the caller needs no
+        follow-up SELECT, which could also land on a lagging replica.
+
+        Args:
+            query (str): The statement to execute.
+            params (Optional[Tuple[Any, ...]]): Query parameters for the statement.
+            prepare (bool): Run the query as a per-connection prepared statement.
+
+        Raises:
+            ValueError: If the provided query is not an INSERT, UPDATE or DELETE.
+
+        Returns:
+            List[Tuple[Any, ...]]: One row per row written, with the `RETURNING` columns.
+        """
+        
+        if not query.strip().lower().startswith(RETURNING_QUERY_KINDS):
+            raise ValueError('Provided query is not an INSERT, UPDATE or DELETE query.')
+        
+        started = time.perf_counter()
+        connection_obj: connection = self.__get_autocommit_connection()
+        acquired = time.perf_counter()
+        
+        try:
+            timeout_ms = statement_timeout_ms()
+            
+            with connection_obj.cursor() as cursor:
+                self.__execute(cursor, query, params, prepare, timeout_ms)
+                executed = time.perf_counter()
+                result = cursor.fetchall()
+            
+            self.__observe(connection_obj, query, params, acquired - started, executed - acquired, time.perf_counter() - executed, len(result))
+            return result
+        
+        finally:
+            self.__release_autocommit_connection(connection_obj)
+    
+    def execute_copy_query (
+        self, 
+        query: str, 
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> int:
+        
+        """
+        Loads rows with a `COPY ... FROM STDIN` statement in its own transaction,
+        or in the open unit of work's.
+
+        COPY streams every row over one protocol message sequence instead of
+        parsing and planning an INSERT per row. The caller bounds memory by
+        choosing how many rows to pass per call.
+
+        Args:
+            query (str): The COPY statement, in text format (the default).
+            rows (Sequence[Tuple[Any, ...]]): The rows to load, in the statement's column order.
+
+        Raises:
+            ValueError: If the provided query is not a `COPY ... FROM STDIN` statement.
+
+        Returns:
+            int: The number of rows loaded.
+        """
+        
+        normalized = ' '.join(query.split()).lower()
+        if not (normalized.startswith('copy') and 'from stdin' in normalized):
+            raise ValueError('Provided query is not a COPY FROM STDIN query.')
+        
+        unit_connection = self.__unit_connection()
+        started = time.perf_counter()
+        connection_obj: connection = unit_connection or self.db.get_connection()
+        acquired = time.perf_counter()
+        
+        try:
+            self.__set_local_statement_timeout(connection_obj)
+            
+            with connection_obj.cursor() as cursor:
+                cursor.copy_expert(query, self.__to_copy_text(rows))
+                rowcount = cursor.rowcount
+            if unit_connection is None:
+                connection_obj.commit()
+            
+            self.__observe(None, query, None, acquired - started, time.perf_counter() - acquired, 0.0, rowcount)
             return rowcount
         
         except Exception as e:
-            connection_obj.rollback()
+            if unit_connection is None:
+                connection_obj.rollback()
             raise e
         
+        finally:
+            if unit_connection is None:
+                self.db.release_connection(connection_obj)
+    
+    @contextmanager
+    def unit_of_work (
+        self,
+    ) -> Iterator[None]:
+        
+        """
+        Runs the statements issued inside the block in one transaction on one connection.
+
+        The outermost unit checks a connection out of the primary pool, holds
+        it until the block exits, then commits, or rolls back if the block
+        raised. Every helper called in the block from the same thread or task
+        joins that transaction instead of checking out a connection and
+        committing on its own. SELECTs go to the primary as well, so they see
+        the unit's own writes.
+
+        A unit opened inside another one is a `SAVEPOINT`, rolled back to when
+        its block raises so the outer transaction stays usable. The savepoint
+        is sent in the same query string as the unit's first statement, and
+        not at all if it runs none. It is not released on success: the outer
+        commit does that, so a nested unit costs no round trip of its own.
+
+        Yields:
+            None: Control to the block.
+        """
+        
+        unit = self.active_unit.get()
+        
+        if unit is not None:
+            savepoint = unit.next_savepoint()
+            unit.pending_savepoints.append(savepoint)
+            
+            try:
+                yield
+            except BaseException:
+                # A savepoint still pending was never sent, so there is nothing to roll back.
+                if savepoint in unit.pending_savepoints:
+                    unit.pending_savepoints.remove(savepoint)
+                else:
+                    self.__execute_on(unit.connection, f'ROLLBACK TO SAVEPOINT {savepoint}')
+                raise
+            
+            if savepoint in unit.pending_savepoints:
+                unit.pending_savepoints.remove(savepoint)
+            return
+        
+        connection_obj: connection = self.db.get_connection()
+        token = self.active_unit.set(UnitOfWork(connection_obj))
+        
+        try:
+            yield
+            connection_obj.commit()
+        
+        except BaseException:
+            connection_obj.rollback()
+            raise
+        
+        finally:
+            self.active_unit.reset(token)
+            self.db.release_connection(connection_obj)
+    
+    def __observe (
+        self,
+        connection_obj: Optional[connection],
+        query: str,
+        params: Optional[Tuple[Any, ...]],
+        pool_wait: float,
+        execute: float,
+        fetch: float,
+        rows: int,
+    ) -> None:
+        
+        """
+        Records a statement's timings and reports it if it was slow.
+
+        Args:
+            connection_obj (Optional[connection]): The connection the statement ran on, used
+                                                   to capture its plan; None to skip the plan.
+            query (str): The statement.
+            params (Optional[Tuple[Any, ...]]): Its parameters.
+            pool_wait (float): Seconds spent waiting for the connection.
+            execute (float): Seconds spent executing.
+            fetch (float): Seconds spent fetching rows.
+            rows (int): Rows returned or affected.
+        """
+        
+        if not self.query_observer.record(query, pool_wait, execute, fetch, rows):
+            return
+        
+        # EXPLAIN ends with a rollback, which would discard an open unit of work.
+        plan = None
+        if connection_obj is not None and self.__unit_connection() is None and self.query_observer.should_explain(query):
+            plan = self.__explain(connection_obj, query, params)
+        
+        self.query_observer.log_slow(query, pool_wait, execute, fetch, rows, plan)
+    
+    def __explain (
+        self,
+        connection_obj: connection,
+        query: str,
+        params: Optional[Tuple[Any, ...]],
+    ) -> Optional[str]:
+        
+        """
+        Captures `EXPLAIN (ANALYZE, BUFFERS)` for a statement that just ran.
+
+        ANALYZE executes the statement again, so it runs inside a transaction
+        that is always rolled back; a write's effects are not applied twice.
+
+        Args:
+            connection_obj (connection): The connection the statement ran on.
+            query (str): The statement.
+            params (Optional[Tuple[Any, ...]]): Its parameters.
+
+        Returns:
+            Optional[str]: The plan, one line per row, or a note if EXPLAIN failed.
+        """
+        
+        autocommit = connection_obj.autocommit
+        
+        try:
+            connection_obj.autocommit = False
+            with connection_obj.cursor() as cursor:
+                cursor.execute(EXPLAIN_PREFIX + query, params)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+        
+        except psycopg2.Error as e:
+            return f'EXPLAIN failed: {e}'
+        
+        finally:
+            try:
+                connection_obj.rollback()
+                connection_obj.autocommit = autocommit
+            except psycopg2.Error:
+                pass
+    
+    def __get_autocommit_connection (
+        self,
+        read_only: bool = False,
+    ) -> connection:
+        
+        """
+        Checks out a pooled connection and switches it to autocommit.
+
+        Setting `autocommit` is client-side only, so no round trip is spent on it.
+        Inside a unit of work the unit's connection is returned as it is.
+
+        Args:
+            read_only (bool): Take the connection from a read replica when one is in rotation.
+
+        Returns:
+            connection: A connection on which every statement commits on its own,
+                        or the unit of work's.
+        """
+        
+        unit_connection = self.__unit_connection()
+        if unit_connection is not None:
+            return unit_connection
+        
+        connection_obj: connection = self.db.get_read_connection() if read_only else self.db.get_connection()
+        connection_obj.autocommit = True
+        return connection_obj
+    
+    def __release_autocommit_connection (
+        self,
+        connection_obj: connection,
+    ) -> None:
+        
+        """
+        Restores transactional mode and returns the connection to the pool.
+
+        Streaming and COPY rely on a transaction, so connections go back to the
+        pool in the mode they came out in.
+
+        Args:
+            connection_obj (connection): A connection from `__get_autocommit_connection`.
+        """
+        
+        # The unit of work's connection stays checked out until the unit ends.
+        if connection_obj is self.__unit_connection():
+            return
+        
+        try:
+            if not connection_obj.closed:
+                connection_obj.autocommit = False
         finally:
             self.db.release_connection(connection_obj)
+    
+    def __unit_connection (
+        self,
+    ) -> Optional[connection]:
+        
+        """
+        Returns the connection of the unit of work open in the current context, if any.
+        """
+        
+        unit = self.active_unit.get()
+        return unit.connection if unit is not None else None
+    
+    @staticmethod
+    def __execute_on (
+        connection_obj: connection,
+        statement: str,
+    ) -> None:
+        
+        """
+        Runs a statement that returns no rows, such as a savepoint command.
+        """
+        
+        with connection_obj.cursor() as cursor:
+            cursor.execute(statement)
+    
+    @staticmethod
+    def __to_copy_text (
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> io.StringIO:
+        
+        """
+        Encodes rows in PostgreSQL's COPY text format.
+
+        Args:
+            rows (Sequence[Tuple[Any, ...]]): The rows to encode.
+
+        Returns:
+            io.StringIO: A buffer positioned at the start, ready for `copy_expert`.
+        """
+        
+        def encode (
+            value: Any,
+        ) -> str:
+            
+            if value is None:
+                return '\\N'
+            if isinstance(value, datetime):
+                return value.isoformat()
+            return str(value).translate(COPY_TEXT_ESCAPES)
+        
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(encode(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        return buffer
+    
+    def __set_local_statement_timeout (
+        self,
+        connection_obj: connection,
+    ) -> None:
+        
+        """
+        Bounds the statements of the transaction opening on the connection by the RPC deadline.
+
+        Used ahead of streaming and COPY, which run in an explicit transaction
+        and cannot carry other statements in their query string. Inside a unit
+        of work, its pending savepoints are sent here as well.
+
+        Args:
+            connection_obj (connection): A connection in transactional mode.
+        """
+        
+        statements = self.__leading_statements(statement_timeout_ms())
+        
+        if statements:
+            with connection_obj.cursor() as cursor:
+                cursor.execute('; '.join(statements))
+    
+    def __leading_statements (
+        self,
+        timeout_ms: Optional[int],
+    ) -> List[str]:
+        
+        """
+        Lists the statements to send ahead of the next one.
+
+        Outside a unit of work that is only its `SET LOCAL statement_timeout`.
+        Inside one, `SET LOCAL` lasts until the unit ends, so a timeout left by
+        an earlier statement, possibly another caller's, is reset to the
+        default, and the savepoints opened since the last statement lead.
+
+        Args:
+            timeout_ms (Optional[int]): `statement_timeout` for the next statement, if any.
+
+        Returns:
+            List[str]: The statements, in the order to run them.
+        """
+        
+        statements = []
+        unit = self.active_unit.get()
+        
+        if unit is not None:
+            statements.extend(f'SAVEPOINT {savepoint}' for savepoint in unit.pending_savepoints)
+            unit.pending_savepoints.clear()
+            
+            if timeout_ms is None and unit.statement_timeout_set:
+                statements.append('SET LOCAL statement_timeout TO DEFAULT')
+            unit.statement_timeout_set = timeout_ms is not None
+        
+        if timeout_ms is not None:
+            statements.append(f'SET LOCAL statement_timeout = {timeout_ms}')
+        
+        return statements
+    
+    def __execute (
+        self, 
+        cursor: Cursor, 
+        query: str, 
+        params: Optional[Tuple[Any, ...]], 
+        prepare: bool,
+        timeout_ms: Optional[int] = None,
+    ) -> None:
+        
+        """
+        Runs a statement, through the connection's prepared statement cache if requested.
+
+        If the server has lost a cached statement (for example after `DISCARD ALL`),
+        the transaction is rolled back, the statement is prepared again and the
+        call is retried once. Inside a unit of work the failed statement has
+        already aborted the unit's transaction, so only the cache is dropped and
+        the error propagates to the unit.
+
+        Args:
+            cursor (Cursor): A cursor on the checked-out connection.
+            query (str): The statement, using `%s` placeholders.
+            params (Optional[Tuple[Any, ...]]): The statement parameters.
+            prepare (bool): Whether to use a prepared statement.
+            timeout_ms (Optional[int]): `statement_timeout` for this statement only, if any.
+        """
+        
+        # Sent in the same query string, so it applies to this statement's implicit transaction.
+        prefix = ''.join(f'{statement}; ' for statement in self.__leading_statements(timeout_ms))
+        
+        if not prepare:
+            cursor.execute(prefix + query, params)
+            return
+        
+        try:
+            statement, statement_params = self.__prepared(cursor, query, params)
+            cursor.execute(prefix + statement, statement_params)
+        
+        except errors.InvalidSqlStatementName:
+            self.prepared_statements.pop(cursor.connection, None)
+            if self.__unit_connection() is not None:
+                raise
+            
+            cursor.connection.rollback()
+            statement, statement_params = self.__prepared(cursor, query, params)
+            cursor.execute(prefix + statement, statement_params)
+    
+    def __prepared (
+        self, 
+        cursor: Cursor, 
+        query: str, 
+        params: Optional[Tuple[Any, ...]],
+    ) -> Tuple[str, Optional[Tuple[Any, ...]]]:
+        
+        """
+        Prepares a statement on the cursor's connection if needed and builds its EXECUTE.
+
+        Statements are keyed by their text, so each distinct query shape is
+        prepared once per connection. At most `DB_PREPARED_CACHE_SIZE` are kept;
+        the least recently used one is deallocated to make room.
+
+        Args:
+            cursor (Cursor): A cursor on the checked-out connection.
+            query (str): The statement, using `%s` placeholders.
+            params (Optional[Tuple[Any, ...]]): The statement parameters.
+
+        Returns:
+            Tuple[str, Optional[Tuple[Any, ...]]]: The EXECUTE statement and its parameters.
+        """
+        
+        statements = self.prepared_statements.setdefault(cursor.connection, OrderedDict())
+        name = statements.get(query)
+        
+        if name is None:
+            name = f'book_stmt_{next(self.statement_ids)}'
+            counter = itertools.count(1)
+            body = PLACEHOLDER_PATTERN.sub (
+                lambda match: '%' if match.group(1) == '%' else f'${next(counter)}',
+                query.strip().rstrip(';'),
+            )
+            cursor.execute(f'PREPARE {name} AS {body}')
+            statements[query] = name
+            
+            if len(statements) > self.prepared_cache_size:
+                _, evicted = statements.popitem(last=False)
+                cursor.execute(f'DEALLOCATE {evicted}')
+        
+        else:
+            statements.move_to_end(query)
+        
+        if not params:
+            return f'EXECUTE {name}', None
+        
+        return f'EXECUTE {name} ({", ".join(["%s"] * len(params))})', params
@@ -0,0 +1,740 @@
+import re
+import time
+import asyncio
+import itertools
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from grpc_service.modules.database.storage_backend.storage_backend import StorageBackend, AsyncStorageBackend
+from grpc_service.modules.database.unit_of_work.unit_of_work import UnitOfWork
+
+TABLE_COLUMNS = ('id', 'book_name', 'author', 'uploaded_at', 'version', 'isbn')
+# Column defaults of the Django model, filled in when an INSERT or COPY leaves the column out.
+COLUMN_DEFAULTS = {'version': 1}
+
+SELECT_PATTERN = re.compile(r'^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+base_book\b(?P<rest>.*)$', re.S | re.I)
+# Writes may end in `RETURNING column, ...`.
+RETURNING = r'(?:\s+RETURNING\s+(?P<returning>\w+(?:\s*,\s*\w+)*))?\s*;?\s*$'
+INSERT_PATTERN = re.compile(r'^\s*INSERT\s+INTO\s+base_book\s*\((?P<columns>[^)]*)\)\s*VALUES\s*\((?P<values>.*?)\)' + RETURNING, re.S | re.I)
+UPDATE_PATTERN = re.compile(r'^\s*UPDATE\s+base_book\s+SET\s+(?P<assignments>.+?)\s+WHERE\s+id\s*=\s*%s(?P<version>\s+AND\s+version\s*=\s*%s)?' + RETURNING, re.S | re.I)
+UPSERT_PATTERN = re.compile (
+    r'^\s*INSERT\s+INTO\s+base_book\s*\((?P<columns>[^)]*)\)\s*VALUES\s*(?P<rows>\(.*?\))\s+'
+    r'ON\s+CONFLICT\s*\((?P<key>\w+)\)\s*DO\s+UPDATE\s+SET\s+(?P<assignments>.+?)(?P<condition>\s+WHERE\s+.+?)?' + RETURNING,
+    re.S | re.I,
+)
+# One `(...)` row of a multi-row VALUES list; `NOW()` is the only call inside one.
+VALUES_ROW_PATTERN = re.compile(r'\(((?:[^()]|\(\))*)\)')
+# `column = column + n`, how UPDATE bumps the row version, optionally table-qualified.
+INCREMENT_PATTERN = re.compile(r'^(?:base_book\.)?(?P<column>\w+)\s*\+\s*(?P<step>\d+)$', re.I)
+# `column = EXCLUDED.column`, an upsert taking the proposed row's value.
+EXCLUDED_PATTERN = re.compile(r'^EXCLUDED\.(?P<column>\w+)$', re.I)
+DELETE_PATTERN = re.compile(r'^\s*DELETE\s+FROM\s+base_book\s+WHERE\s+id\s*=\s*%s' + RETURNING, re.S | re.I)
+COPY_PATTERN = re.compile(r'^\s*COPY\s+base_book\s*\((?P<columns>[^)]*)\)\s+FROM\s+STDIN\s*$', re.S | re.I)
+
+def split_names (
+    names: str,
+) -> List[str]:
+    
+    """
+    Splits a comma-separated SQL list into its trimmed items.
+    """
+    
+    return [name.strip() for name in names.split(',')]
+
+def new_row (
+) -> Dict[str, Any]:
+    
+    """
+    Returns a row with every column unset except those with a default.
+    """
+    
+    return {**dict.fromkeys(TABLE_COLUMNS), **COLUMN_DEFAULTS}
+
+class InMemoryUnitOfWork(UnitOfWork):
+    
+    """
+    Unit of work on the in-memory table, undone from a log of the rows it replaced.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes an empty undo log of `(id, previous row or None)` entries.
+        """
+        
+        super().__init__()
+        self.undo: List[Tuple[int, Optional[Tuple[Any, ...]]]] = []
+
+class InMemoryDatabaseController(StorageBackend):
+    
+    """
+    Storage backend that keeps `base_book` in a dict (`DB_BACKEND=memory`).
+
+    It accepts the statements BookService issues, recognised by shape rather
+    than parsed in general, and answers them the way DatabaseController
+    does, return values included. With no database time at all, it shows
+    how long an RPC spends above the database; an optional fixed
+    `statement_latency` stands in for the database's own time.
+
+    Units of work are atomic but not isolated: a failed unit restores the
+    rows it changed, while other callers see its writes as they happen.
+    """
+    
+    def __init__ (
+        self,
+        statement_latency: float = 0.0,
+    ) -> None:
+        
+        """
+        Initializes an empty table.
+
+        Args:
+            statement_latency (float, optional): Seconds every statement waits before answering.
+        """
+        
+        self.statement_latency = statement_latency
+        self.rows: Dict[int, Tuple[Any, ...]] = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.active_unit: ContextVar[Optional[InMemoryUnitOfWork]] = ContextVar(f'in_memory_unit_{id(self)}', default=None)
+    
+    def execute_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+        primary: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Answers a SELECT on `base_book`.
+
+        Raises:
+            ValueError: If the query is not a SELECT this stand-in understands.
+        """
+        
+        self._wait()
+        return self._select(query, params or ())
+    
+    def stream_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        
+        """
+        Answers a SELECT on `base_book` in chunks of `chunk_size` rows.
+        """
+        
+        self._wait()
+        rows = self._select(query, params or ())
+        chunk_size = chunk_size or 500
+        
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+    
+    def execute_insert_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Inserts one book; returns its id with `RETURNING id`, otherwise -1.
+        """
+        
+        self._wait()
+        return self._insert(query, params or ())
+    
+    def execute_delete_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Deletes a book by id and returns the number of rows deleted.
+        """
+        
+        self._wait()
+        return self._delete(query, params or ())
+    
+    def execute_edit_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Updates a book by id and returns the number of rows updated.
+        """
+        
+        self._wait()
+        return self._update(query, params or ())
+    
+    def execute_returning_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Inserts, updates or deletes one book and returns its `RETURNING` columns, if it was there.
+        """
+        
+        self._wait()
+        return self._returning(query, params or ())
+    
+    def execute_copy_query (
+        self,
+        query: str,
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> int:
+        
+        """
+        Loads rows as `COPY base_book (...) FROM STDIN` would and returns how many.
+        """
+        
+        self._wait()
+        return self._copy(query, rows)
+    
+    @contextmanager
+    def unit_of_work (
+        self,
+    ) -> Iterator[None]:
+        
+        """
+        Undoes the writes made inside the block if it raises.
+
+        A nested unit only undoes its own part of the log.
+        """
+        
+        unit = self.active_unit.get() or InMemoryUnitOfWork()
+        mark = len(unit.undo)
+        token = self.active_unit.set(unit)
+        
+        try:
+            yield
+        
+        except BaseException:
+            with self.lock:
+                while len(unit.undo) > mark:
+                    book_id, previous = unit.undo.pop()
+                    if previous is None:
+                        self.rows.pop(book_id, None)
+                    else:
+                        self.rows[book_id] = previous
+            raise
+        
+        finally:
+            self.active_unit.reset(token)
+    
+    def _wait (
+        self,
+    ) -> None:
+        
+        """
+        Spends the configured statement latency.
+        """
+        
+        if self.statement_latency:
+            time.sleep(self.statement_latency)
+    
+    def _select (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Runs the SELECT shapes BookService uses: all rows, by id, by `ANY(ids)`
+        and the keyset page, each with any column list.
+        """
+        
+        match = SELECT_PATTERN.match(query)
+        if match is None:
+            raise ValueError(f'Unsupported SELECT for the in-memory database: {query.strip()}')
+        
+        positions = [TABLE_COLUMNS.index(column) for column in split_names(match['columns'])]
+        rest = ' '.join(match['rest'].split())
+        params = list(params)
+        
+        with self.lock:
+            rows = list(self.rows.values())
+        
+        if 'id = ANY(%s)' in rest:
+            wanted = set(params.pop(0))
+            rows = [row for row in rows if row[0] in wanted]
+        
+        elif 'WHERE id = %s' in rest:
+            book_id = int(params.pop(0))
+            rows = [row for row in rows if row[0] == book_id]
+        
+        elif '(uploaded_at, id) < (%s, %s)' in rest:
+            uploaded_at, book_id = params.pop(0), params.pop(0)
+            rows = [row for row in rows if (row[3], row[0]) < (uploaded_at, book_id)]
+        
+        elif 'WHERE' in rest:
+            raise ValueError(f'Unsupported SELECT for the in-memory database: {query.strip()}')
+        
+        if 'ORDER BY uploaded_at DESC, id DESC' in rest:
+            rows.sort(key=lambda row: (row[3], row[0]), reverse=True)
+        elif 'ORDER BY id' in rest:
+            rows.sort(key=lambda row: row[0])
+        
+        if 'LIMIT %s' in rest:
+            rows = rows[:params.pop(0)]
+        
+        return [tuple(row[position] for position in positions) for row in rows]
+    
+    def _insert (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> int:
+        
+        """
+        Runs an INSERT and returns the first `RETURNING` column, otherwise -1.
+        """
+        
+        row, returning = self._insert_row(query, params)
+        return self._project(row, returning)[0] if returning else -1
+    
+    def _update (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> int:
+        
+        """
+        Runs an UPDATE and returns the number of rows updated.
+        """
+        
+        row, _ = self._update_row(query, params)
+        return 0 if row is None else 1
+    
+    def _delete (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> int:
+        
+        """
+        Runs a DELETE and returns the number of rows deleted.
+        """
+        
+        row, _ = self._delete_row(query, params)
+        return 0 if row is None else 1
+    
+    def _returning (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Runs an INSERT, UPDATE or DELETE and returns its `RETURNING` columns of the row it wrote.
+        """
+        
+        kind = query.split(None, 1)[0].upper() if query.strip() else ''
+        writes = {'INSERT': self._insert_row, 'UPDATE': self._update_row, 'DELETE': self._delete_row}
+        
+        if kind not in writes:
+            raise ValueError('Provided query is not an INSERT, UPDATE or DELETE query.')
+        
+        if kind == 'INSERT' and UPSERT_PATTERN.match(query):
+            return self._upsert(query, params)
+        
+        row, returning = writes[kind](query, params)
+        if row is None or not returning:
+            return []
+        return [self._project(row, returning)]
+    
+    def _insert_row (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> Tuple[Tuple[Any, ...], Optional[str]]:
+        
+        """
+        Runs `INSERT INTO base_book (...) VALUES (...)` with `%s` and `NOW()` values.
+
+        Returns:
+            Tuple[Tuple[Any, ...], Optional[str]]: The new row and the statement's `RETURNING` list.
+        """
+        
+        match = INSERT_PATTERN.match(query)
+        if match is None:
+            raise ValueError(f'Unsupported INSERT for the in-memory database: {query.strip()}')
+        
+        values = iter(params)
+        row = new_row()
+        
+        for column, value in zip(split_names(match['columns']), split_names(match['values'])):
+            row[column] = datetime.now(timezone.utc) if value.upper() == 'NOW()' else next(values)
+        
+        self._store(row)
+        return tuple(row[column] for column in TABLE_COLUMNS), match['returning']
+    
+    def _update_row (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> Tuple[Optional[Tuple[Any, ...]], Optional[str]]:
+        
+        """
+        Runs `UPDATE base_book SET column = %s, column = column + n, ... WHERE id = %s`,
+        optionally followed by `AND version = %s`.
+
+        Returns:
+            Tuple[Optional[Tuple[Any, ...]], Optional[str]]: The updated row, None if there was
+                none or it was at another version, and the statement's `RETURNING` list.
+        """
+        
+        match = UPDATE_PATTERN.match(query)
+        if match is None:
+            raise ValueError(f'Unsupported UPDATE for the in-memory database: {query.strip()}')
+        
+        assignments = [[side.strip() for side in assignment.split('=', 1)] for assignment in split_names(match['assignments'])]
+        values = iter(params)
+        placeholders = iter([next(values) for _, value in assignments if value == '%s'])
+        book_id = int(next(values))
+        expected_version = int(next(values)) if match['version'] else None
+        
+        with self.lock:
+            row = self.rows.get(book_id)
+            if row is None or expected_version not in (None, row[TABLE_COLUMNS.index('version')]):
+                return None, match['returning']
+            
+            updated = list(row)
+            
+            for column, value in assignments:
+                position = TABLE_COLUMNS.index(column)
+                increment = INCREMENT_PATTERN.match(value)
+                
+                if value == '%s':
+                    updated[position] = next(placeholders)
+                elif increment is not None and increment['column'] == column:
+                    updated[position] = row[position] + int(increment['step'])
+                else:
+                    raise ValueError(f'Unsupported UPDATE for the in-memory database: {query.strip()}')
+            
+            self._log(book_id, row)
+            self.rows[book_id] = tuple(updated)
+            return self.rows[book_id], match['returning']
+    
+    def _upsert (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Runs `INSERT ... VALUES (...), ... ON CONFLICT (key) DO UPDATE SET ...`.
+
+        The SET list may take `EXCLUDED.column` values and bump counters. A
+        WHERE clause is taken to be the one BookService issues: a conflicting
+        row is only updated if one of the `EXCLUDED` columns differs.
+
+        Returns:
+            List[Tuple[Any, ...]]: The `RETURNING` columns of every inserted or updated row.
+        """
+        
+        match = UPSERT_PATTERN.match(query)
+        columns = split_names(match['columns'])
+        key = TABLE_COLUMNS.index(match['key'])
+        assignments = [[side.strip() for side in assignment.split('=', 1)] for assignment in split_names(match['assignments'])]
+        values = iter(params)
+        written = []
+        
+        with self.lock:
+            ids = {row[key]: book_id for book_id, row in self.rows.items() if row[key] is not None}
+            
+            for row_values in VALUES_ROW_PATTERN.findall(match['rows']):
+                row = new_row()
+                for column, value in zip(columns, split_names(row_values)):
+                    row[column] = datetime.now(timezone.utc) if value.upper() == 'NOW()' else next(values)
+                
+                book_id = ids.get(row[match['key']])
+                
+                if book_id is None:
+                    ids[row[match['key']]] = self._add(row)
+                    written.append(self.rows[row['id']])
+                    continue
+                
+                stored = self.rows[book_id]
+                updated = list(stored)
+                
+                for column, value in assignments:
+                    position = TABLE_COLUMNS.index(column)
+                    excluded = EXCLUDED_PATTERN.match(value)
+                    increment = INCREMENT_PATTERN.match(value)
+                    
+                    if excluded is not None:
+                        updated[position] = row[excluded['column']]
+                    elif increment is not None and increment['column'] == column:
+                        updated[position] = stored[position] + int(increment['step'])
+                    else:
+                        raise ValueError(f'Unsupported upsert for the in-memory database: {query.strip()}')
+                
+                if match['condition'] and all (
+                    updated[TABLE_COLUMNS.index(column)] == stored[TABLE_COLUMNS.index(column)]
+                    for column, value in assignments if EXCLUDED_PATTERN.match(value)
+                ):
+                    continue
+                
+                self._log(book_id, stored)
+                self.rows[book_id] = tuple(updated)
+                written.append(self.rows[book_id])
+        
+        if not match['returning']:
+            return []
+        return [self._project(row, match['returning']) for row in written]
+    
+    def _delete_row (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> Tuple[Optional[Tuple[Any, ...]], Optional[str]]:
+        
+        """
+        Runs `DELETE FROM base_book WHERE id = %s`.
+
+        Returns:
+            Tuple[Optional[Tuple[Any, ...]], Optional[str]]: The deleted row, None if there was
+                none, and the statement's `RETURNING` list.
+        """
+        
+        match = DELETE_PATTERN.match(query)
+        if match is None:
+            raise ValueError(f'Unsupported DELETE for the in-memory database: {query.strip()}')
+        
+        book_id = int(params[0])
+        
+        with self.lock:
+            row = self.rows.pop(book_id, None)
+            if row is not None:
+                self._log(book_id, row)
+        
+        return row, match['returning']
+    
+    @staticmethod
+    def _project (
+        row: Tuple[Any, ...],
+        columns: str,
+    ) -> Tuple[Any, ...]:
+        
+        """
+        Picks a comma-separated list of columns out of a full row.
+        """
+        
+        return tuple(row[TABLE_COLUMNS.index(column)] for column in split_names(columns))
+    
+    def _copy (
+        self,
+        query: str,
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> int:
+        
+        """
+        Runs `COPY base_book (...) FROM STDIN` with the given rows.
+        """
+        
+        match = COPY_PATTERN.match(query)
+        if match is None:
+            raise ValueError(f'Unsupported COPY for the in-memory database: {query.strip()}')
+        
+        columns = split_names(match['columns'])
+        
+        for values in rows:
+            row = new_row()
+            row.update(zip(columns, values))
+            self._store(row)
+        
+        return len(rows)
+    
+    def _store (
+        self,
+        row: Dict[str, Any],
+    ) -> int:
+        
+        """
+        Assigns the next id to a new row and stores it.
+        """
+        
+        with self.lock:
+            return self._add(row)
+    
+    def _add (
+        self,
+        row: Dict[str, Any],
+    ) -> int:
+        
+        """
+        Assigns the next id to a new row and stores it; the caller holds the lock.
+        """
+        
+        book_id = next(self.ids)
+        row['id'] = book_id
+        self.rows[book_id] = tuple(row[column] for column in TABLE_COLUMNS)
+        self._log(book_id, None)
+        
+        return book_id
+
+    def _log (
+        self,
+        book_id: int,
+        previous: Optional[Tuple[Any, ...]],
+    ) -> None:
+        
+        """
+        Records the row a write replaced (None for a new one) in the open unit of work, if any.
+        """
+        
+        unit = self.active_unit.get()
+        if unit is not None:
+            unit.undo.append((book_id, previous))
+
+class AsyncInMemoryDatabaseController(InMemoryDatabaseController, AsyncStorageBackend):
+    
+    """
+    Coroutine interface of InMemoryDatabaseController, standing in for AsyncDatabaseController.
+
+    The table operations themselves are instantaneous and run on the event
+    loop; only the statement latency is awaited.
+    """
+    
+    async def execute_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+        primary: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Answers a SELECT on `base_book`.
+        """
+        
+        await self._wait_async()
+        return self._select(query, params or ())
+    
+    async def stream_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        
+        """
+        Answers a SELECT on `base_book` in chunks of `chunk_size` rows.
+        """
+        
+        await self._wait_async()
+        rows = self._select(query, params or ())
+        chunk_size = chunk_size or 500
+        
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+    
+    async def execute_insert_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Inserts one book; returns its id with `RETURNING id`, otherwise -1.
+        """
+        
+        await self._wait_async()
+        return self._insert(query, params or ())
+    
+    async def execute_delete_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Deletes a book by id and returns the number of rows deleted.
+        """
+        
+        await self._wait_async()
+        return self._delete(query, params or ())
+    
+    async def execute_edit_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Updates a book by id and returns the number of rows updated.
+        """
+        
+        await self._wait_async()
+        return self._update(query, params or ())
+    
+    async def execute_returning_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Inserts, updates or deletes one book and returns its `RETURNING` columns, if it was there.
+        """
+        
+        await self._wait_async()
+        return self._returning(query, params or ())
+    
+    async def execute_copy_query (
+        self,
+        query: str,
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> int:
+        
+        """
+        Loads rows as `COPY base_book (...) FROM STDIN` would and returns how many.
+        """
+        
+        await self._wait_async()
+        return self._copy(query, rows)
+    
+    @asynccontextmanager
+    async def unit_of_work (
+        self,
+    ) -> AsyncIterator[None]:
+        
+        """
+        Undoes the writes awaited inside the block if it raises.
+        """
+        
+        with super().unit_of_work():
+            yield
+    
+    async def _wait_async (
+        self,
+    ) -> None:
+        
+        """
+        Awaits the configured statement latency.
+        """
+        
+        if self.statement_latency:
+            await asyncio.sleep(self.statement_latency)
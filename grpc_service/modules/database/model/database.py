@@ -1,13 +1,18 @@
 import os
+import threading
 from typing import Optional
 
 import psycopg2
-from psycopg2 import pool
+
+from grpc_service.modules.database.replica_router.replica_router import ReplicaRouter
+from grpc_service.modules.database.connection_pool.connection_pool import InstrumentedConnectionPool
 
 class Database:
     
     instance: Optional['Database'] = None
-    pool: Optional[psycopg2.pool.SimpleConnectionPool] = None
+    pool: Optional[InstrumentedConnectionPool] = None
+    router: Optional[ReplicaRouter] = None
+    lock = threading.Lock()
 
     def __new__ (
         cls,
@@ -23,6 +28,7 @@ class Database:
         if cls.instance is None:
             cls.instance = super().__new__(cls)
             cls.instance.pool = None
+            cls.instance.router = None
         return cls.instance
     
     def __init__ (
@@ -37,6 +43,14 @@ class Database:
         self.db_user = os.getenv('DB_USER')
         self.password = os.getenv('DB_PASSWORD')
         self.database = os.getenv('DB_NAME')
+        self.pool_min_size = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+        self.pool_max_size = int(os.getenv('DB_POOL_MAX_SIZE', '20'))
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+        self.pool_max_age = float(os.getenv('DB_POOL_MAX_AGE', '1800'))
+        self.pool_health_check_after = float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30'))
+        self.replica_hosts = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+        self.replica_max_lag = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+        self.replica_check_interval = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5'))
     
     def connect (
         self,
@@ -45,18 +59,69 @@ class Database:
         """
         Establishes a connection pool to the PostgreSQL database if not already initialized.
 
-        The connection pool allows multiple connections to be managed efficiently.
+        The pool is thread-safe and opens `DB_POOL_MIN_SIZE` connections up front.
+        The lock keeps concurrent first callers from creating two pools.
+
+        When `DB_REPLICA_HOSTS` lists read replicas (`host` or `host:port`,
+        comma-separated), a pool is created for each and a ReplicaRouter starts
+        tracking their lag.
         """
         
-        if self.pool is None:
-            self.pool = pool.SimpleConnectionPool (
-                1, 20,  # minconn, maxconn
-                host=self.host,
-                user=self.db_user,
-                password=self.password,
-                database=self.database
-            )
+        with self.lock:
+            if self.pool is None:
+                self.pool = InstrumentedConnectionPool (
+                    self.pool_min_size,
+                    self.pool_max_size,
+                    timeout=self.pool_timeout,
+                    max_age=self.pool_max_age,
+                    health_check_after=self.pool_health_check_after,
+                    host=self.host,
+                    user=self.db_user,
+                    password=self.password,
+                    database=self.database,
+                )
             
+            if self.router is None and self.replica_hosts:
+                self.router = ReplicaRouter (
+                    {host: self.__replica_pool(host) for host in self.replica_hosts},
+                    max_lag=self.replica_max_lag,
+                    check_interval=self.replica_check_interval,
+                )
+                self.router.start()
+    
+    def __replica_pool (
+        self,
+        replica: str,
+    ) -> InstrumentedConnectionPool:
+        
+        """
+        Builds the pool for one read replica.
+
+        Replica pools open no connections up front, so an unreachable replica
+        only keeps itself out of rotation instead of failing startup.
+
+        Args:
+            replica (str): The replica address, `host` or `host:port`.
+
+        Returns:
+            InstrumentedConnectionPool: A pool labelled with the replica address.
+        """
+        
+        host, _, port = replica.partition(':')
+        return InstrumentedConnectionPool (
+            0,
+            self.pool_max_size,
+            name=replica,
+            timeout=self.pool_timeout,
+            max_age=self.pool_max_age,
+            health_check_after=self.pool_health_check_after,
+            host=host,
+            port=port or None,
+            user=self.db_user,
+            password=self.password,
+            database=self.database,
+        )
+    
     def get_connection (
         self,
     ) -> psycopg2.extensions.connection:
@@ -65,27 +130,61 @@ class Database:
         Retrieves a database connection from the connection pool.
 
         If the pool is not initialized, it will establish a connection first.
+        When every connection is checked out the call waits up to
+        `DB_POOL_TIMEOUT` seconds for one to be returned.
 
         Returns:
             psycopg2.extensions.connection: A database connection from the pool.
+
+        Raises:
+            PoolTimeout: If no connection became available within the timeout.
         """
         
         if self.pool is None:
             self.connect()
         return self.pool.getconn()
     
+    def get_read_connection (
+        self,
+    ) -> psycopg2.extensions.connection:
+        
+        """
+        Retrieves a connection for read-only queries.
+
+        Reads go to a read replica in rotation when replicas are configured, and
+        to the primary otherwise.
+
+        Returns:
+            psycopg2.extensions.connection: A replica or primary connection.
+
+        Raises:
+            PoolTimeout: If no primary connection became available within the timeout.
+        """
+        
+        if self.pool is None:
+            self.connect()
+        
+        if self.router is not None:
+            connection = self.router.getconn()
+            if connection is not None:
+                return connection
+        
+        return self.pool.getconn()
+    
     def release_connection (
         self, 
         connection: psycopg2.extensions.connection,
     ) -> None:
         
         """
-        Releases a database connection back to the connection pool.
+        Releases a database connection back to the pool it came from.
 
         Args:
             connection (psycopg2.extensions.connection): The connection to be returned to the pool.
         """
         
+        if self.router is not None and self.router.putconn(connection):
+            return
         self.pool.putconn(connection)
 
     def close_all (
@@ -99,4 +198,8 @@ class Database:
         """
         
         if self.pool:
-            self.pool.closeall()
\ No newline at end of file
+            self.pool.closeall()
+        
+        if self.router:
+            self.router.close()
+            self.router = None
\ No newline at end of file
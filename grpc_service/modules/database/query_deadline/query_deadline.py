@@ -0,0 +1,127 @@
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, Token
+from typing import AsyncIterator, Optional, Tuple, Type
+
+from prometheus_client import Counter
+from psycopg import errors as psycopg_errors
+from psycopg2 import errors as psycopg2_errors
+
+DEADLINE_EXCEEDED_QUERIES = Counter (
+    'db_deadline_exceeded_queries',
+    'Statements skipped or cancelled because the calling RPC\'s deadline passed.',
+)
+
+# Largest value Postgres accepts for statement_timeout (INT_MAX milliseconds).
+MAX_STATEMENT_TIMEOUT_MS = 2147483647
+
+# Monotonic time by which the RPC being handled must finish, if it has a deadline.
+QUERY_DEADLINE: ContextVar[Optional[float]] = ContextVar('query_deadline', default=None)
+
+class QueryDeadlineExceeded(Exception):
+    
+    """
+    Raised instead of running a statement once the calling RPC's deadline has passed.
+    """
+
+# What a statement cut short by the RPC deadline raises: QueryDeadlineExceeded
+# from the checks above, or QueryCanceled once Postgres' statement_timeout fires.
+QUERY_DEADLINE_ERRORS: Tuple[Type[Exception], ...] = (
+    QueryDeadlineExceeded,
+    psycopg2_errors.QueryCanceled,
+    psycopg_errors.QueryCanceled,
+)
+
+def set_query_deadline (
+    time_remaining: Optional[float],
+) -> Token:
+    
+    """
+    Sets the deadline of the RPC being handled in the current context.
+
+    Args:
+        time_remaining (Optional[float]): Seconds left before the client gives up,
+                                          or None if it set no deadline.
+
+    Returns:
+        Token: Pass to `reset_query_deadline` when the RPC is done.
+    """
+    
+    deadline = None if time_remaining is None else time.monotonic() + time_remaining
+    return QUERY_DEADLINE.set(deadline)
+
+def reset_query_deadline (
+    token: Token,
+) -> None:
+    
+    """
+    Restores the deadline that was in place before `set_query_deadline`.
+    """
+    
+    QUERY_DEADLINE.reset(token)
+
+def query_time_remaining() -> Optional[float]:
+    
+    """
+    Returns the seconds left for the next statement.
+
+    Raises:
+        QueryDeadlineExceeded: If the deadline has already passed.
+
+    Returns:
+        Optional[float]: Seconds left, or None when the RPC has no deadline.
+    """
+    
+    deadline = QUERY_DEADLINE.get()
+    if deadline is None:
+        return None
+    
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        DEADLINE_EXCEEDED_QUERIES.inc()
+        raise QueryDeadlineExceeded('The RPC deadline passed before the query could run.')
+    
+    return remaining
+
+def statement_timeout_ms() -> Optional[int]:
+    
+    """
+    Converts the remaining time into a Postgres `statement_timeout`.
+
+    Raises:
+        QueryDeadlineExceeded: If the deadline has already passed.
+
+    Returns:
+        Optional[int]: Whole milliseconds, at least 1, or None when the RPC has no
+                       deadline or one too far away for `statement_timeout`.
+    """
+    
+    remaining = query_time_remaining()
+    if remaining is None:
+        return None
+    
+    timeout_ms = max(1, math.ceil(remaining * 1000))
+    return timeout_ms if timeout_ms <= MAX_STATEMENT_TIMEOUT_MS else None
+
+@asynccontextmanager
+async def query_timeout() -> AsyncIterator[None]:
+    
+    """
+    Cancels the awaited statement when the RPC deadline passes.
+
+    psycopg cancels the statement on the server when the awaiting task is
+    cancelled, so this bounds database time the way `statement_timeout`
+    does, without an extra statement.
+
+    Raises:
+        QueryDeadlineExceeded: If the deadline has passed, before or during the statement.
+    """
+    
+    try:
+        async with asyncio.timeout(query_time_remaining()):
+            yield
+    except TimeoutError:
+        DEADLINE_EXCEEDED_QUERIES.inc()
+        raise QueryDeadlineExceeded('The RPC deadline passed while the query was running.')
@@ -0,0 +1,206 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+from prometheus_client import Counter, Histogram
+
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+QUERY_POOL_WAIT_SECONDS = Histogram (
+    'db_query_pool_wait_seconds',
+    'Time a statement waited for a pooled connection.',
+    ['statement'],
+    buckets=TIME_BUCKETS,
+)
+QUERY_EXECUTE_SECONDS = Histogram (
+    'db_query_execute_seconds',
+    'Time from sending a statement until the server answered.',
+    ['statement'],
+    buckets=TIME_BUCKETS,
+)
+QUERY_FETCH_SECONDS = Histogram (
+    'db_query_fetch_seconds',
+    'Time spent fetching a statement\'s result rows.',
+    ['statement'],
+    buckets=TIME_BUCKETS,
+)
+QUERY_ROWS = Histogram (
+    'db_query_rows',
+    'Rows returned or affected per statement.',
+    ['statement'],
+    buckets=ROW_BUCKETS,
+)
+SLOW_QUERIES = Counter (
+    'db_slow_queries',
+    'Statements slower than DB_SLOW_QUERY_MS.',
+    ['statement'],
+)
+
+# Prefixed to a slow statement, with its original parameters, to capture its plan.
+EXPLAIN_PREFIX = 'EXPLAIN (ANALYZE, BUFFERS) '
+
+# Statement shapes are used as label values; this keeps them readable in dashboards.
+STATEMENT_LABEL_LENGTH = 200
+
+class QueryObserver:
+    
+    """
+    Records per-statement timings and reports slow statements.
+
+    Statements are grouped by shape: their text with whitespace collapsed.
+    Queries are always parameterized, so the number of shapes stays small
+    and each one gets its own pool wait, execute, fetch and row histograms.
+
+    A statement whose total time, pool wait included, reaches `DB_SLOW_QUERY_MS`
+    is counted and logged. When `DB_SLOW_QUERY_EXPLAIN` is on, the caller is
+    also asked to capture an `EXPLAIN (ANALYZE, BUFFERS)` plan, at most once
+    per shape every `DB_SLOW_QUERY_EXPLAIN_INTERVAL` seconds, so a database
+    that is slow across the board is not loaded with a second copy of every
+    query.
+    """
+    
+    def __init__ (
+        self,
+        slow_query_ms: float = float(os.getenv('DB_SLOW_QUERY_MS', '500')),
+        explain: bool = os.getenv('DB_SLOW_QUERY_EXPLAIN', 'true').lower() == 'true',
+        explain_interval: float = float(os.getenv('DB_SLOW_QUERY_EXPLAIN_INTERVAL', '60')),
+        logger: logging.Logger = logging.getLogger('fastapi-logger'),
+    ) -> None:
+        
+        """
+        Initializes the QueryObserver.
+
+        Args:
+            slow_query_ms (float): Threshold in milliseconds; 0 or less disables the slow-query log.
+            explain (bool): Whether slow statements get their plan captured.
+            explain_interval (float): Minimum seconds between two plans for the same shape.
+            logger (logging.Logger): Where slow statements are reported.
+        """
+        
+        self.slow_query_ms = slow_query_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.logger = logger
+        
+        self._lock = threading.Lock()
+        self._last_explained: Dict[str, float] = {}
+    
+    @staticmethod
+    def statement_shape (
+        query: str,
+    ) -> str:
+        
+        """
+        Normalizes a statement into the label its metrics are recorded under.
+
+        Args:
+            query (str): The statement text.
+
+        Returns:
+            str: The statement with whitespace collapsed, cut to `STATEMENT_LABEL_LENGTH`.
+        """
+        
+        return ' '.join(query.split())[:STATEMENT_LABEL_LENGTH]
+    
+    def record (
+        self,
+        query: str,
+        pool_wait: float,
+        execute: float,
+        fetch: float,
+        rows: int,
+    ) -> bool:
+        
+        """
+        Records one statement's timings.
+
+        Args:
+            query (str): The statement text.
+            pool_wait (float): Seconds spent waiting for a connection.
+            execute (float): Seconds spent executing.
+            fetch (float): Seconds spent fetching rows.
+            rows (int): Rows returned or affected.
+
+        Returns:
+            bool: True if the statement was slow.
+        """
+        
+        statement = self.statement_shape(query)
+        
+        QUERY_POOL_WAIT_SECONDS.labels(statement=statement).observe(pool_wait)
+        QUERY_EXECUTE_SECONDS.labels(statement=statement).observe(execute)
+        QUERY_FETCH_SECONDS.labels(statement=statement).observe(fetch)
+        QUERY_ROWS.labels(statement=statement).observe(max(rows, 0))
+        
+        if self.slow_query_ms <= 0 or (pool_wait + execute + fetch) * 1000 < self.slow_query_ms:
+            return False
+        
+        SLOW_QUERIES.labels(statement=statement).inc()
+        return True
+    
+    def should_explain (
+        self,
+        query: str,
+    ) -> bool:
+        
+        """
+        Decides whether a slow statement's plan should be captured now.
+
+        Args:
+            query (str): The slow statement.
+
+        Returns:
+            bool: True at most once per shape per `explain_interval` seconds.
+        """
+        
+        if not self.explain:
+            return False
+        
+        statement = self.statement_shape(query)
+        now = time.monotonic()
+        
+        with self._lock:
+            last = self._last_explained.get(statement)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._last_explained[statement] = now
+            return True
+    
+    def log_slow (
+        self,
+        query: str,
+        pool_wait: float,
+        execute: float,
+        fetch: float,
+        rows: int,
+        plan: Optional[str] = None,
+    ) -> None:
+        
+        """
+        Logs a slow statement with its timing breakdown and, if captured, its plan.
+
+        Parameters are left out of the log because they may carry user data.
+
+        Args:
+            query (str): The slow statement.
+            pool_wait (float): Seconds spent waiting for a connection.
+            execute (float): Seconds spent executing.
+            fetch (float): Seconds spent fetching rows.
+            rows (int): Rows returned or affected.
+            plan (Optional[str]): The `EXPLAIN (ANALYZE, BUFFERS)` output.
+        """
+        
+        total_ms = (pool_wait + execute + fetch) * 1000
+        message = (
+            f'Slow query ({total_ms:.1f} ms: pool wait {pool_wait * 1000:.1f} ms, '
+            f'execute {execute * 1000:.1f} ms, fetch {fetch * 1000:.1f} ms, {rows} rows): '
+            f'{self.statement_shape(query)}'
+        )
+        
+        if plan:
+            message += f'\n{plan}'
+        
+        self.logger.warning(message)
@@ -0,0 +1,266 @@
+import threading
+import itertools
+from typing import Dict, List, Optional
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+from prometheus_client import Counter, Gauge
+
+from grpc_service.modules.database.connection_pool.connection_pool import InstrumentedConnectionPool
+
+REPLICA_LAG_SECONDS = Gauge (
+    'db_replica_lag_seconds',
+    'Replication lag last measured on each read replica.',
+    ['replica'],
+)
+REPLICA_IN_ROTATION = Gauge (
+    'db_replica_in_rotation',
+    'Whether the replica currently receives reads (1) or not (0).',
+    ['replica'],
+)
+READ_ROUTES = Counter (
+    'db_read_routes',
+    'Read connections handed out, by the pool that served them.',
+    ['pool'],
+)
+
+# Zero when the replica has replayed everything it received, so an idle
+# primary does not make a caught-up replica look stale.
+REPLICA_LAG_QUERY = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+'''
+
+class ReplicaRouter:
+    
+    """
+    Spreads read connections over a set of Postgres read replicas.
+
+    Replicas are handed out round-robin. A background thread measures each
+    replica's replication lag every `check_interval` seconds; a replica
+    lagging more than `max_lag` seconds, or one that cannot be reached, is
+    taken out of rotation until a later check finds it healthy again.
+
+    When no replica is in rotation `getconn` returns None and the caller falls
+    back to the primary, so reads keep working through replica outages.
+    """
+    
+    def __init__ (
+        self,
+        replicas: Dict[str, InstrumentedConnectionPool],
+        max_lag: float = 5.0,
+        check_interval: float = 5.0,
+        checkout_timeout: float = 1.0,
+    ) -> None:
+        
+        """
+        Initializes the router. Replicas stay out of rotation until `start` checks them.
+
+        Args:
+            replicas (Dict[str, InstrumentedConnectionPool]): Pools keyed by replica name.
+            max_lag (float): Seconds of lag above which a replica stops receiving reads.
+            check_interval (float): Seconds between lag checks.
+            checkout_timeout (float): Seconds to wait for a replica connection before falling back.
+        """
+        
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.checkout_timeout = checkout_timeout
+        
+        self._lock = threading.Lock()
+        self._in_rotation: List[str] = []
+        self._owners: Dict[int, InstrumentedConnectionPool] = {}
+        self._next = itertools.count()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        for name in replicas:
+            REPLICA_IN_ROTATION.labels(replica=name).set(0)
+    
+    def start (
+        self,
+    ) -> None:
+        
+        """
+        Checks every replica once, then keeps checking in a daemon thread.
+        """
+        
+        self.check()
+        self._thread = threading.Thread (
+            target=self._monitor,
+            name='replica-lag-monitor',
+            daemon=True,
+        )
+        self._thread.start()
+    
+    def close (
+        self,
+    ) -> None:
+        
+        """
+        Stops the lag monitor and closes every replica pool.
+        """
+        
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(self.check_interval)
+        
+        for pool in self.replicas.values():
+            pool.closeall()
+    
+    def in_rotation (
+        self,
+    ) -> List[str]:
+        
+        """
+        Returns the names of the replicas currently receiving reads.
+
+        Returns:
+            List[str]: Replica names, in configuration order.
+        """
+        
+        with self._lock:
+            return list(self._in_rotation)
+    
+    def getconn (
+        self,
+    ) -> Optional[extensions.connection]:
+        
+        """
+        Checks out a connection from the next replica in rotation.
+
+        A replica that fails to hand out a connection is taken out of rotation
+        immediately rather than at the next lag check.
+
+        Returns:
+            Optional[extensions.connection]: A replica connection, or None if no replica is usable.
+        """
+        
+        with self._lock:
+            if not self._in_rotation:
+                return None
+            name = self._in_rotation[next(self._next) % len(self._in_rotation)]
+        
+        pool = self.replicas[name]
+        
+        try:
+            connection = pool.getconn(self.checkout_timeout)
+        except (psycopg2.Error, PoolError):
+            self._set_in_rotation(name, False)
+            return None
+        
+        with self._lock:
+            self._owners[id(connection)] = pool
+        
+        READ_ROUTES.labels(pool=name).inc()
+        return connection
+    
+    def putconn (
+        self,
+        connection: extensions.connection,
+    ) -> bool:
+        
+        """
+        Returns a connection to the replica pool it came from.
+
+        Args:
+            connection (extensions.connection): A connection obtained from `getconn`.
+
+        Returns:
+            bool: False if the connection did not come from a replica.
+        """
+        
+        with self._lock:
+            pool = self._owners.pop(id(connection), None)
+        
+        if pool is None:
+            return False
+        
+        pool.putconn(connection)
+        return True
+    
+    def check (
+        self,
+    ) -> None:
+        
+        """
+        Measures every replica's lag and updates the rotation.
+        """
+        
+        for name, pool in self.replicas.items():
+            lag = self._measure_lag(pool)
+            
+            if lag is not None:
+                REPLICA_LAG_SECONDS.labels(replica=name).set(lag)
+            
+            self._set_in_rotation(name, lag is not None and lag <= self.max_lag)
+    
+    def _monitor (
+        self,
+    ) -> None:
+        
+        """
+        Runs `check` every `check_interval` seconds until `close` is called.
+        """
+        
+        while not self._stopped.wait(self.check_interval):
+            self.check()
+    
+    def _measure_lag (
+        self,
+        pool: InstrumentedConnectionPool,
+    ) -> Optional[float]:
+        
+        """
+        Queries a replica for its replication lag.
+
+        Args:
+            pool (InstrumentedConnectionPool): The replica's pool.
+
+        Returns:
+            Optional[float]: Lag in seconds, or None if the replica could not be queried.
+        """
+        
+        try:
+            connection = pool.getconn(self.checkout_timeout)
+        except (psycopg2.Error, PoolError):
+            return None
+        
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(REPLICA_LAG_QUERY)
+                lag = float(cursor.fetchone()[0])
+            connection.rollback()
+            pool.putconn(connection)
+            return lag
+        
+        except psycopg2.Error:
+            pool.putconn(connection, close=True)
+            return None
+    
+    def _set_in_rotation (
+        self,
+        name: str,
+        healthy: bool,
+    ) -> None:
+        
+        """
+        Adds a replica to, or removes it from, the rotation.
+
+        Args:
+            name (str): The replica name.
+            healthy (bool): Whether it should receive reads.
+        """
+        
+        with self._lock:
+            if healthy and name not in self._in_rotation:
+                self._in_rotation = [replica for replica in self.replicas if replica in self._in_rotation or replica == name]
+            elif not healthy and name in self._in_rotation:
+                self._in_rotation = [replica for replica in self._in_rotation if replica != name]
+        
+        REPLICA_IN_ROTATION.labels(replica=name).set(1 if healthy else 0)
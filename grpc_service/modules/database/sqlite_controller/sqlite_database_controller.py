@@ -0,0 +1,714 @@
+import os
+import re
+import time
+import asyncio
+import sqlite3
+import threading
+from contextlib import AsyncExitStack, contextmanager, asynccontextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from grpc_service.modules.database.storage_backend.storage_backend import RETURNING_QUERY_KINDS, StorageBackend, AsyncStorageBackend
+from grpc_service.modules.database.unit_of_work.unit_of_work import UnitOfWork
+from grpc_service.modules.database.query_deadline.query_deadline import (
+    DEADLINE_EXCEEDED_QUERIES,
+    QueryDeadlineExceeded,
+    query_time_remaining,
+)
+
+# Only the columns BookService reads and writes.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS base_book (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        book_name VARCHAR(100) NOT NULL,
+        author VARCHAR(100) NOT NULL,
+        uploaded_at TIMESTAMPTZ NOT NULL,
+        version INTEGER NOT NULL DEFAULT 1,
+        isbn VARCHAR(13) UNIQUE
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS base_book_uploaded_at_id_idx ON base_book (uploaded_at DESC, id DESC)',
+)
+
+# `= ANY(%s)` with a list, plain `%s` placeholders and `%%` escapes.
+PLACEHOLDER_PATTERN = re.compile(r'=\s*ANY\(%s\)|%s|%%', re.I)
+COPY_PATTERN = re.compile(r'^\s*COPY\s+(?P<table>\w+)\s*\((?P<columns>[^)]*)\)\s+FROM\s+STDIN\s*;?\s*$', re.S | re.I)
+
+# Statement kinds each helper accepts, as named in its error message.
+QUERY_KINDS = {
+    'select': 'a SELECT',
+    'insert': 'an INSERT',
+    'delete': 'a DELETE',
+    'update': 'an UPDATE',
+}
+
+# SQLite VM instructions between deadline checks.
+PROGRESS_INTERVAL = 1000
+
+def to_sqlite_timestamp (
+    value: datetime,
+) -> str:
+    
+    """
+    Stores a datetime as fixed-width UTC ISO-8601 text, so text order is time order.
+
+    Naive datetimes are taken as UTC.
+    """
+    
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    
+    return value.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+def from_sqlite_timestamp (
+    value: bytes,
+) -> datetime:
+    
+    """
+    Reads a TIMESTAMPTZ column back as an aware datetime.
+    """
+    
+    return datetime.fromisoformat(value.decode())
+
+sqlite3.register_converter('TIMESTAMPTZ', from_sqlite_timestamp)
+
+class SQLiteDatabaseController(StorageBackend):
+    
+    """
+    Storage backend on SQLite (`DB_BACKEND=sqlite`).
+
+    Statements written for DatabaseController are translated on the way in:
+    `%s` becomes `?`, `= ANY(%s)` becomes an `IN (...)` list, `NOW()` is a
+    registered function and `COPY ... FROM STDIN` becomes one `executemany`
+    INSERT in a transaction. Timestamps are stored as UTC text and come back
+    as aware datetimes, as psycopg2 returns them.
+
+    One connection serves every thread, serialized by a lock, which is what
+    SQLite does for writers anyway. `DB_SQLITE_PATH` defaults to `:memory:`,
+    a private database that lives as long as the controller; the
+    `base_book` table is created when missing.
+
+    A unit of work holds the lock from `BEGIN` to `COMMIT`, so other threads'
+    statements wait for it instead of landing in its transaction; statements
+    issued inside the unit skip the lock they already hold.
+
+    Statements honour the calling RPC's deadline: they are not started once
+    it has passed, and a progress handler interrupts one still running when
+    it does, raising QueryDeadlineExceeded.
+    """
+    
+    def __init__ (
+        self,
+        path: Optional[str] = None,
+    ) -> None:
+        
+        """
+        Opens the database and creates the schema.
+
+        Args:
+            path (Optional[str], optional): Database file; defaults to `DB_SQLITE_PATH`.
+        """
+        
+        self.path = path or os.getenv('DB_SQLITE_PATH', ':memory:')
+        self.stream_chunk_size = int(os.getenv('DB_STREAM_CHUNK_SIZE', '500'))
+        self.lock = threading.Lock()
+        self.active_unit: ContextVar[Optional[UnitOfWork]] = ContextVar(f'sqlite_unit_{id(self)}', default=None)
+        
+        self.connection = sqlite3.connect (
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        self.connection.create_function('NOW', 0, lambda: to_sqlite_timestamp(datetime.now(timezone.utc)))
+        
+        with self.lock:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+    
+    def execute_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+        primary: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Executes a SELECT query and returns the result as a list of rows.
+
+        `prepare` is accepted for interface compatibility; sqlite3 caches
+        compiled statements per connection on its own. So is `primary`: there
+        is one database file and no replica.
+
+        Raises:
+            ValueError: If the provided query does not start with 'SELECT'.
+        """
+        
+        self.__check_kind(query, 'select')
+        return self.__run(query, params, lambda cursor: cursor.fetchall())
+    
+    def stream_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        
+        """
+        Executes a SELECT query and yields the result in chunks.
+
+        The rows are read under the connection lock before the first chunk is
+        yielded, so a slow consumer does not hold up other statements.
+
+        Raises:
+            ValueError: If the provided query does not start with 'SELECT'.
+        """
+        
+        self.__check_kind(query, 'select')
+        chunk_size = chunk_size or self.stream_chunk_size
+        rows = self.__run(query, params, lambda cursor: cursor.fetchall())
+        
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+    
+    def execute_insert_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Executes an INSERT query and returns the ID of the inserted row if available.
+
+        Raises:
+            ValueError: If the provided query does not start with 'INSERT'.
+        """
+        
+        self.__check_kind(query, 'insert')
+        return self.__run(query, params, lambda cursor: cursor.fetchone()[0] if cursor.description else -1)
+    
+    def execute_delete_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Executes a DELETE query and returns the number of rows deleted.
+
+        Raises:
+            ValueError: If the provided query does not start with 'DELETE'.
+        """
+        
+        self.__check_kind(query, 'delete')
+        return self.__run(query, params, lambda cursor: cursor.rowcount)
+    
+    def execute_edit_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Executes an UPDATE query and returns the number of rows updated.
+
+        Raises:
+            ValueError: If the provided query does not start with 'UPDATE'.
+        """
+        
+        self.__check_kind(query, 'update')
+        return self.__run(query, params, lambda cursor: cursor.rowcount)
+    
+    def execute_returning_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Executes an INSERT, UPDATE or DELETE with a `RETURNING` list and returns its rows.
+
+        SQLite supports `RETURNING` itself (3.35+), so the statement runs as written.
+
+        Raises:
+            ValueError: If the provided query is not an INSERT, UPDATE or DELETE.
+        """
+        
+        if not query.strip().lower().startswith(RETURNING_QUERY_KINDS):
+            raise ValueError('Provided query is not an INSERT, UPDATE or DELETE query.')
+        
+        return self.__run(query, params, lambda cursor: cursor.fetchall())
+    
+    def execute_copy_query (
+        self,
+        query: str,
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> int:
+        
+        """
+        Loads rows for a `COPY table (columns) FROM STDIN` statement in one transaction,
+        or in a savepoint of the open unit of work.
+
+        Raises:
+            ValueError: If the provided query is not a `COPY ... FROM STDIN` statement.
+
+        Returns:
+            int: The number of rows loaded.
+        """
+        
+        match = COPY_PATTERN.match(query)
+        if match is None:
+            raise ValueError('Provided query is not a COPY FROM STDIN query.')
+        
+        columns = [column.strip() for column in match['columns'].split(',')]
+        insert = f'INSERT INTO {match["table"]} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+        values = [tuple(self.__to_sqlite(value) for value in row) for row in rows]
+        
+        with self.unit_of_work(), self.__deadline():
+            self.connection.executemany(insert, values)
+        
+        return len(values)
+    
+    @contextmanager
+    def unit_of_work (
+        self,
+    ) -> Iterator[None]:
+        
+        """
+        Runs the statements issued inside the block in one transaction.
+
+        Commits when the block exits and rolls back when it raises; a nested
+        unit is a `SAVEPOINT`, rolled back to on its own.
+        """
+        
+        unit, savepoint = self._open_unit()
+        token = self.active_unit.set(unit)
+        
+        try:
+            yield
+        except BaseException:
+            self._close_unit(savepoint, commit=False)
+            raise
+        else:
+            self._close_unit(savepoint, commit=True)
+        finally:
+            self.active_unit.reset(token)
+    
+    def _open_unit (
+        self,
+    ) -> Tuple[UnitOfWork, Optional[str]]:
+        
+        """
+        Begins a transaction under the lock, or a savepoint inside the open unit of work.
+
+        Returns:
+            Tuple[UnitOfWork, Optional[str]]: The unit and the savepoint's name, None for a transaction.
+        """
+        
+        unit = self.__joined_unit()
+        
+        if unit is not None:
+            savepoint = unit.next_savepoint()
+            self.connection.execute(f'SAVEPOINT {savepoint}')
+            return unit, savepoint
+        
+        self.lock.acquire()
+        
+        try:
+            self.connection.execute('BEGIN')
+        except BaseException:
+            self.lock.release()
+            raise
+        
+        return UnitOfWork(self.connection), None
+    
+    def _close_unit (
+        self,
+        savepoint: Optional[str],
+        commit: bool,
+    ) -> None:
+        
+        """
+        Ends what `_open_unit` began: commits or rolls back, then releases the lock.
+
+        Args:
+            savepoint (Optional[str]): The savepoint to release or roll back to, None for the transaction.
+            commit (bool): Keep the unit's writes.
+        """
+        
+        if savepoint is not None:
+            self.__joined_unit()
+            if not commit:
+                self.connection.execute(f'ROLLBACK TO {savepoint}')
+            self.connection.execute(f'RELEASE {savepoint}')
+            return
+        
+        try:
+            if commit:
+                self.connection.execute('COMMIT')
+        finally:
+            if self.connection.in_transaction:
+                self.connection.execute('ROLLBACK')
+            self.lock.release()
+    
+    def __run (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]],
+        read: Callable[[sqlite3.Cursor], Any],
+    ) -> Any:
+        
+        """
+        Translates and executes one statement under the lock and the RPC deadline.
+
+        Args:
+            query (str): The statement, with `%s` placeholders.
+            params (Optional[Tuple[Any, ...]]): Its parameters.
+            read (Callable[[sqlite3.Cursor], Any]): Reads the result off the cursor.
+
+        Returns:
+            Any: What `read` returned.
+        """
+        
+        statement, statement_params = self.__translate(query, params or ())
+        lock = nullcontext() if self.__joined_unit() is not None else self.lock
+        
+        with lock, self.__deadline():
+            cursor = self.connection.execute(statement, statement_params)
+            try:
+                return read(cursor)
+            finally:
+                cursor.close()
+    
+    def __joined_unit (
+        self,
+    ) -> Optional[UnitOfWork]:
+        
+        """
+        Returns the unit of work open in the current context, if any.
+
+        Raises:
+            sqlite3.OperationalError: If SQLite has already rolled back the unit's
+                transaction, as it does when a write inside it is interrupted.
+        """
+        
+        unit = self.active_unit.get()
+        
+        if unit is not None and not self.connection.in_transaction:
+            raise sqlite3.OperationalError('The unit of work was rolled back by SQLite.')
+        
+        return unit
+    
+    def __deadline (
+        self,
+    ) -> 'SQLiteDeadline':
+        
+        """
+        Bounds the statement about to run by the calling RPC's deadline.
+
+        Raises:
+            QueryDeadlineExceeded: If the deadline has already passed.
+        """
+        
+        return SQLiteDeadline(self.connection, query_time_remaining())
+    
+    def __translate (
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+    ) -> Tuple[str, Tuple[Any, ...]]:
+        
+        """
+        Rewrites a Postgres-style statement and its parameters for sqlite3.
+
+        Returns:
+            Tuple[str, Tuple[Any, ...]]: The statement with `?` placeholders and the flat parameters.
+        """
+        
+        values = iter(params)
+        flat: List[Any] = []
+        
+        def replace (
+            match: re.Match,
+        ) -> str:
+            
+            token = match.group(0)
+            
+            if token == '%%':
+                return '%'
+            
+            if token == '%s':
+                flat.append(self.__to_sqlite(next(values)))
+                return '?'
+            
+            items = [self.__to_sqlite(item) for item in next(values)]
+            flat.extend(items)
+            return f'IN ({", ".join("?" * len(items))})'
+        
+        statement = PLACEHOLDER_PATTERN.sub(replace, query.strip().rstrip(';'))
+        return statement, tuple(flat)
+    
+    @staticmethod
+    def __to_sqlite (
+        value: Any,
+    ) -> Any:
+        
+        """
+        Converts a parameter to a value sqlite3 stores the way the schema expects.
+        """
+        
+        return to_sqlite_timestamp(value) if isinstance(value, datetime) else value
+    
+    @staticmethod
+    def __check_kind (
+        query: str,
+        kind: str,
+    ) -> None:
+        
+        """
+        Rejects a statement of the wrong kind, as DatabaseController does.
+        """
+        
+        if not query.strip().lower().startswith(kind):
+            raise ValueError(f'Provided query is not {QUERY_KINDS[kind]} query.')
+
+class SQLiteDeadline:
+    
+    """
+    Context manager that interrupts the connection's statement once the RPC deadline passes.
+    """
+    
+    def __init__ (
+        self,
+        connection: sqlite3.Connection,
+        time_remaining: Optional[float],
+    ) -> None:
+        
+        """
+        Initializes the deadline of one statement.
+
+        Args:
+            connection (sqlite3.Connection): The connection about to run a statement.
+            time_remaining (Optional[float]): Seconds left, or None for no deadline.
+        """
+        
+        self.connection = connection
+        self.deadline = None if time_remaining is None else time.monotonic() + time_remaining
+    
+    def __enter__ (
+        self,
+    ) -> None:
+        
+        """
+        Installs the progress handler when there is a deadline.
+        """
+        
+        if self.deadline is not None:
+            self.connection.set_progress_handler(self.__expired, PROGRESS_INTERVAL)
+    
+    def __exit__ (
+        self,
+        exc_type: Any,
+        exc: Optional[BaseException],
+        traceback: Any,
+    ) -> None:
+        
+        """
+        Removes the progress handler and reports an interrupted statement as QueryDeadlineExceeded.
+        """
+        
+        if self.deadline is None:
+            return
+        
+        self.connection.set_progress_handler(None, 0)
+        
+        if isinstance(exc, sqlite3.OperationalError) and 'interrupted' in str(exc):
+            DEADLINE_EXCEEDED_QUERIES.inc()
+            raise QueryDeadlineExceeded('The RPC deadline passed while the query was running.') from exc
+    
+    def __expired (
+        self,
+    ) -> int:
+        
+        """
+        Returns non-zero, which makes SQLite abort the statement, once the deadline has passed.
+        """
+        
+        return int(time.monotonic() >= self.deadline)
+
+class AsyncSQLiteDatabaseController(AsyncStorageBackend):
+    
+    """
+    Coroutine interface of SQLiteDatabaseController, standing in for AsyncDatabaseController.
+
+    sqlite3 blocks, so each statement runs in the default executor; the
+    calling RPC's deadline is carried over with its context.
+
+    Statements queue for the database on `lock` in the event loop rather
+    than on the controller's lock in an executor thread: a unit of work
+    holds the database across awaits, and callers blocked in every
+    executor thread would leave none to run the unit's next statement.
+    """
+    
+    def __init__ (
+        self,
+        path: Optional[str] = None,
+    ) -> None:
+        
+        """
+        Opens the database through a SQLiteDatabaseController.
+
+        Args:
+            path (Optional[str], optional): Database file; defaults to `DB_SQLITE_PATH`.
+        """
+        
+        self.controller = SQLiteDatabaseController(path)
+        self.lock = asyncio.Lock()
+    
+    async def execute_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+        primary: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Executes a SELECT query and returns the result as a list of rows.
+        """
+        
+        return await self.__run(self.controller.execute_get_query, query, params, prepare)
+    
+    async def stream_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        
+        """
+        Executes a SELECT query and yields the result in chunks.
+        """
+        
+        chunks = await self.__run(lambda: list(self.controller.stream_get_query(query, params, chunk_size)))
+        
+        for chunk in chunks:
+            yield chunk
+    
+    async def execute_insert_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Executes an INSERT query and returns the ID of the inserted row if available.
+        """
+        
+        return await self.__run(self.controller.execute_insert_query, query, params, prepare)
+    
+    async def execute_delete_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Executes a DELETE query and returns the number of rows deleted.
+        """
+        
+        return await self.__run(self.controller.execute_delete_query, query, params, prepare)
+    
+    async def execute_edit_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Executes an UPDATE query and returns the number of rows updated.
+        """
+        
+        return await self.__run(self.controller.execute_edit_query, query, params, prepare)
+    
+    async def execute_returning_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Executes an INSERT, UPDATE or DELETE with a `RETURNING` list and returns its rows.
+        """
+        
+        return await self.__run(self.controller.execute_returning_query, query, params, prepare)
+    
+    async def execute_copy_query (
+        self,
+        query: str,
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> int:
+        
+        """
+        Loads rows for a `COPY ... FROM STDIN` statement in one transaction.
+        """
+        
+        return await self.__run(self.controller.execute_copy_query, query, rows)
+    
+    @asynccontextmanager
+    async def unit_of_work (
+        self,
+    ) -> AsyncIterator[None]:
+        
+        """
+        Runs the statements awaited inside the block in one transaction.
+
+        The unit is opened and closed in the executor, but recorded in the
+        calling task's context, which every statement's executor call copies.
+        An outer unit holds `lock` until it closes.
+        """
+        
+        async with AsyncExitStack() as stack:
+            if self.controller.active_unit.get() is None:
+                await stack.enter_async_context(self.lock)
+            
+            unit, savepoint = await asyncio.to_thread(self.controller._open_unit)
+            token = self.controller.active_unit.set(unit)
+            
+            try:
+                yield
+            except BaseException:
+                await asyncio.to_thread(self.controller._close_unit, savepoint, False)
+                raise
+            else:
+                await asyncio.to_thread(self.controller._close_unit, savepoint, True)
+            finally:
+                self.controller.active_unit.reset(token)
+    
+    async def __run (
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+    ) -> Any:
+        
+        """
+        Runs a blocking controller call in the executor, after taking `lock`
+        unless the call joins the unit of work that holds it.
+        """
+        
+        if self.controller.active_unit.get() is not None:
+            return await asyncio.to_thread(fn, *args)
+        
+        async with self.lock:
+            return await asyncio.to_thread(fn, *args)
@@ -0,0 +1,100 @@
+import os
+from typing import Optional
+
+from grpc_service.modules.database.storage_backend.storage_backend import (
+    POSTGRES_BACKEND,
+    MEMORY_BACKEND,
+    SQLITE_BACKEND,
+    STORAGE_BACKENDS,
+    StorageBackend,
+    AsyncStorageBackend,
+)
+from grpc_service.modules.database.controller.database_controller import DatabaseController
+from grpc_service.modules.database.async_controller.async_database_controller import AsyncDatabaseController
+from grpc_service.modules.database.memory_controller.memory_database_controller import (
+    InMemoryDatabaseController,
+    AsyncInMemoryDatabaseController,
+)
+from grpc_service.modules.database.sqlite_controller.sqlite_database_controller import (
+    SQLiteDatabaseController,
+    AsyncSQLiteDatabaseController,
+)
+
+def storage_backend_name (
+    backend: Optional[str] = None,
+) -> str:
+    
+    """
+    Resolves which storage backend to use.
+
+    Args:
+        backend (Optional[str], optional): `postgres`, `memory` or `sqlite`; defaults to `DB_BACKEND`.
+
+    Raises:
+        ValueError: If the backend is not a known one.
+
+    Returns:
+        str: The backend name.
+    """
+    
+    backend = backend or os.getenv('DB_BACKEND', POSTGRES_BACKEND)
+    
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f'Unknown storage backend: {backend}; expected any of {", ".join(STORAGE_BACKENDS)}.')
+    
+    return backend
+
+def create_storage_backend (
+    backend: Optional[str] = None,
+) -> StorageBackend:
+    
+    """
+    Creates the storage backend BookService runs its statements on.
+
+    Args:
+        backend (Optional[str], optional): `postgres`, `memory` or `sqlite`; defaults to `DB_BACKEND`.
+
+    Returns:
+        StorageBackend: DatabaseController, InMemoryDatabaseController or SQLiteDatabaseController.
+    """
+    
+    backend = storage_backend_name(backend)
+    
+    if backend == MEMORY_BACKEND:
+        return InMemoryDatabaseController(memory_statement_latency())
+    if backend == SQLITE_BACKEND:
+        return SQLiteDatabaseController()
+    
+    return DatabaseController()
+
+def create_async_storage_backend (
+    backend: Optional[str] = None,
+) -> AsyncStorageBackend:
+    
+    """
+    Creates the storage backend AsyncBookService awaits its statements on.
+
+    Args:
+        backend (Optional[str], optional): `postgres`, `memory` or `sqlite`; defaults to `DB_BACKEND`.
+
+    Returns:
+        AsyncStorageBackend: AsyncDatabaseController, AsyncInMemoryDatabaseController
+            or AsyncSQLiteDatabaseController.
+    """
+    
+    backend = storage_backend_name(backend)
+    
+    if backend == MEMORY_BACKEND:
+        return AsyncInMemoryDatabaseController(memory_statement_latency())
+    if backend == SQLITE_BACKEND:
+        return AsyncSQLiteDatabaseController()
+    
+    return AsyncDatabaseController()
+
+def memory_statement_latency() -> float:
+    
+    """
+    Returns the `DB_MEMORY_STATEMENT_LATENCY_MS` every in-memory statement takes, in seconds.
+    """
+    
+    return float(os.getenv('DB_MEMORY_STATEMENT_LATENCY_MS', '0')) / 1000
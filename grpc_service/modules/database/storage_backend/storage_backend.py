@@ -0,0 +1,223 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncContextManager, AsyncIterator, ContextManager, Iterator, List, Optional, Sequence, Tuple
+
+POSTGRES_BACKEND = 'postgres'
+MEMORY_BACKEND = 'memory'
+SQLITE_BACKEND = 'sqlite'
+STORAGE_BACKENDS = (POSTGRES_BACKEND, MEMORY_BACKEND, SQLITE_BACKEND)
+
+# Statement kinds `execute_returning_query` accepts, as lowercase prefixes.
+RETURNING_QUERY_KINDS = ('insert', 'update', 'delete')
+
+class StorageBackend(ABC):
+    
+    """
+    Interface BookService uses to reach `base_book`.
+
+    Statements are written for Postgres with `%s` placeholders. DatabaseController
+    runs them as they are; the other backends accept the statement shapes
+    BookService issues and answer them with the same return values, so the
+    service layers can be measured without a Postgres server.
+    """
+    
+    @abstractmethod
+    def execute_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+        primary: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Runs a SELECT and returns its rows.
+
+        With `primary`, the rows come from the primary even where reads are
+        otherwise spread over replicas, so they include every committed write.
+        """
+    
+    @abstractmethod
+    def stream_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        
+        """
+        Runs a SELECT and yields its rows in chunks of up to `chunk_size`.
+        """
+    
+    @abstractmethod
+    def execute_insert_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Runs an INSERT and returns the id from its `RETURNING id`, otherwise -1.
+        """
+    
+    @abstractmethod
+    def execute_delete_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Runs a DELETE and returns the number of rows deleted.
+        """
+    
+    @abstractmethod
+    def execute_edit_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Runs an UPDATE and returns the number of rows updated.
+        """
+    
+    @abstractmethod
+    def execute_returning_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Runs an INSERT, UPDATE or DELETE with a `RETURNING` list and returns the rows it wrote.
+        """
+    
+    @abstractmethod
+    def execute_copy_query (
+        self,
+        query: str,
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> int:
+        
+        """
+        Loads rows for a `COPY ... FROM STDIN` statement and returns how many were loaded.
+        """
+
+    @abstractmethod
+    def unit_of_work (
+        self,
+    ) -> ContextManager[None]:
+        
+        """
+        Opens a unit of work: the statements run inside it share one transaction.
+
+        It commits when the block exits and rolls back when it raises. A unit
+        opened inside another becomes a savepoint, so a failing inner block
+        rolls back alone and the outer one carries on.
+        """
+
+class AsyncStorageBackend(ABC):
+    
+    """
+    Coroutine interface of StorageBackend, used by AsyncBookService.
+    """
+    
+    @abstractmethod
+    async def execute_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+        primary: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Runs a SELECT and returns its rows, from the primary when `primary` is set.
+        """
+    
+    @abstractmethod
+    def stream_get_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        
+        """
+        Runs a SELECT and yields its rows in chunks of up to `chunk_size`.
+        """
+    
+    @abstractmethod
+    async def execute_insert_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Runs an INSERT and returns the id from its `RETURNING id`, otherwise -1.
+        """
+    
+    @abstractmethod
+    async def execute_delete_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Runs a DELETE and returns the number of rows deleted.
+        """
+    
+    @abstractmethod
+    async def execute_edit_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> int:
+        
+        """
+        Runs an UPDATE and returns the number of rows updated.
+        """
+    
+    @abstractmethod
+    async def execute_returning_query (
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        prepare: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Runs an INSERT, UPDATE or DELETE with a `RETURNING` list and returns the rows it wrote.
+        """
+    
+    @abstractmethod
+    async def execute_copy_query (
+        self,
+        query: str,
+        rows: Sequence[Tuple[Any, ...]],
+    ) -> int:
+        
+        """
+        Loads rows for a `COPY ... FROM STDIN` statement and returns how many were loaded.
+        """
+    
+    @abstractmethod
+    def unit_of_work (
+        self,
+    ) -> AsyncContextManager[None]:
+        
+        """
+        Opens a unit of work: the statements awaited inside it share one transaction.
+
+        It commits when the block exits and rolls back when it raises; a
+        nested unit becomes a savepoint.
+        """
@@ -0,0 +1,41 @@
+import itertools
+from typing import Any, List
+
+class UnitOfWork:
+    
+    """
+    An open unit of work: the connection holding its transaction and the savepoints nested in it.
+
+    Storage backends keep the unit open in the current context in a
+    ContextVar, so every statement run through the backend while it is open
+    joins its transaction, and a nested `unit_of_work()` becomes a savepoint.
+    """
+    
+    def __init__ (
+        self,
+        connection: Any = None,
+    ) -> None:
+        
+        """
+        Initializes the unit of work.
+
+        Args:
+            connection (Any, optional): The connection the transaction runs on, if the backend has one.
+        """
+        
+        self.connection = connection
+        self.savepoint_ids = itertools.count(1)
+        
+        # Savepoints opened but not sent yet, for backends that send them with the next statement.
+        self.pending_savepoints: List[str] = []
+        self.statement_timeout_set = False
+    
+    def next_savepoint (
+        self,
+    ) -> str:
+        
+        """
+        Returns a savepoint name not yet used in this transaction.
+        """
+        
+        return f'unit_of_work_{next(self.savepoint_ids)}'
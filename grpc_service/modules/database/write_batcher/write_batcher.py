@@ -0,0 +1,435 @@
+import time
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, List, Optional
+
+from prometheus_client import Histogram
+
+from grpc_service.modules.database.storage_backend.storage_backend import StorageBackend, AsyncStorageBackend
+from grpc_service.modules.database.query_metrics.query_metrics import TIME_BUCKETS
+from grpc_service.modules.database.query_deadline.query_deadline import QUERY_DEADLINE
+
+WRITE_BATCH_SIZE = Histogram (
+    'write_batch_size',
+    'Writes committed together by one group-commit batch.',
+    ['batcher'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+WRITE_BATCH_WAIT_SECONDS = Histogram (
+    'write_batch_wait_seconds',
+    'Time a write waited for its batch to start.',
+    ['batcher'],
+    buckets=TIME_BUCKETS,
+)
+WRITE_BATCH_LATENCY_SECONDS = Histogram (
+    'write_batch_latency_seconds',
+    'Time from submitting a write until its batch committed or failed.',
+    ['batcher'],
+    buckets=TIME_BUCKETS,
+)
+
+class PendingWrite:
+    
+    """
+    One caller's write waiting in a batch, and the outcome the caller waits for.
+    """
+    
+    def __init__ (
+        self,
+        fn: Callable[[], Any],
+    ) -> None:
+        
+        """
+        Initializes a write submitted now, under the caller's RPC deadline.
+
+        Args:
+            fn (Callable[[], Any]): Runs the caller's statements.
+        """
+        
+        self.fn = fn
+        self.deadline = QUERY_DEADLINE.get()
+        self.submitted = time.perf_counter()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class BaseWriteBatcher:
+    
+    """
+    Settings and metrics shared by WriteBatcher and AsyncWriteBatcher.
+    """
+    
+    def __init__ (
+        self,
+        name: str,
+        window: float,
+        max_batch_size: int,
+    ) -> None:
+        
+        """
+        Initializes the batcher.
+
+        Args:
+            name (str): Label used in the write batch metrics.
+            window (float): Seconds a batch waits for other writes to join.
+            max_batch_size (int): Writes after which a batch starts without waiting further.
+        """
+        
+        self.name = name
+        self.window = window
+        self.max_batch_size = max_batch_size
+        
+        self._batch_size = WRITE_BATCH_SIZE.labels(batcher=name)
+        self._wait_seconds = WRITE_BATCH_WAIT_SECONDS.labels(batcher=name)
+        self._latency_seconds = WRITE_BATCH_LATENCY_SECONDS.labels(batcher=name)
+    
+    def _observe_batch (
+        self,
+        writes: List[PendingWrite],
+    ) -> None:
+        
+        """
+        Records the size of a batch about to run and how long each of its writes waited.
+        """
+        
+        started = time.perf_counter()
+        self._batch_size.observe(len(writes))
+        
+        for write in writes:
+            self._wait_seconds.observe(started - write.submitted)
+    
+    def _outcome (
+        self,
+        write: PendingWrite,
+    ) -> Any:
+        
+        """
+        Records a finished write's latency and hands its result, or error, to its caller.
+        """
+        
+        self._latency_seconds.observe(time.perf_counter() - write.submitted)
+        
+        if write.error is not None:
+            raise write.error
+        return write.result
+    
+    @staticmethod
+    def _fail_uncommitted (
+        writes: List[PendingWrite],
+        error: Exception,
+    ) -> None:
+        
+        """
+        Gives the error that stopped the batch's commit to every write that had succeeded.
+        """
+        
+        for write in writes:
+            if write.error is None:
+                write.error = error
+
+class WriteBatch:
+    
+    """
+    Writes gathered for one transaction of a WriteBatcher.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes an empty batch still open to new writes.
+        """
+        
+        self.writes: List[PendingWrite] = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+class WriteBatcher(BaseWriteBatcher):
+    
+    """
+    Commits concurrent writes together (group commit).
+
+    The first write to arrive opens a batch and leads it: it waits up to
+    `window` seconds, or until `max_batch_size` writes have joined, then
+    runs every write of the batch in one unit of work, each in a nested
+    unit of its own. A failing write rolls back to its savepoint and only
+    its caller gets the error; the others share a single commit, and a
+    single WAL flush, instead of paying one each. If the commit itself
+    fails, every write that had succeeded gets that error.
+
+    A batch of one runs its write on its own, as it would without the
+    batcher. Every write runs under its own caller's RPC deadline.
+    """
+    
+    def __init__ (
+        self,
+        name: str,
+        database_controller: StorageBackend,
+        window: float,
+        max_batch_size: int,
+    ) -> None:
+        
+        """
+        Initializes the WriteBatcher.
+
+        Args:
+            name (str): Label used in the write batch metrics.
+            database_controller (StorageBackend): The backend whose units of work batches run in.
+            window (float): Seconds the leader waits for other writes to join.
+            max_batch_size (int): Writes after which a batch starts without waiting further.
+        """
+        
+        super().__init__(name, window, max_batch_size)
+        
+        self.database_controller = database_controller
+        self._lock = threading.Lock()
+        self._open: Optional[WriteBatch] = None
+    
+    def submit (
+        self,
+        fn: Callable[[], Any],
+    ) -> Any:
+        
+        """
+        Runs `fn` in the next batch and waits until the batch has committed.
+
+        Args:
+            fn (Callable[[], Any]): Runs the caller's statements through the backend.
+
+        Returns:
+            Any: What `fn` returned.
+
+        Raises:
+            Exception: Whatever `fn` raised, or the error that failed the batch's commit.
+        """
+        
+        write = PendingWrite(fn)
+        
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            
+            if leader:
+                batch = self._open = WriteBatch()
+            
+            batch.writes.append(write)
+            
+            if len(batch.writes) >= self.max_batch_size:
+                self._open = None
+                batch.full.set()
+        
+        if leader:
+            batch.full.wait(self.window)
+            
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            
+            try:
+                self._run(batch.writes)
+            finally:
+                batch.done.set()
+        
+        batch.done.wait()
+        return self._outcome(write)
+    
+    def _run (
+        self,
+        writes: List[PendingWrite],
+    ) -> None:
+        
+        """
+        Runs a sealed batch and records each write's outcome on it.
+        """
+        
+        self._observe_batch(writes)
+        
+        if len(writes) == 1:
+            self._run_write(writes[0], writes[0].fn)
+            return
+        
+        try:
+            with self.database_controller.unit_of_work():
+                for write in writes:
+                    self._run_write(write, lambda: self._run_nested(write.fn))
+        
+        except Exception as e:
+            self._fail_uncommitted(writes, e)
+    
+    def _run_nested (
+        self,
+        fn: Callable[[], Any],
+    ) -> Any:
+        
+        """
+        Runs one write in a nested unit of work, so its failure rolls back only its own statements.
+        """
+        
+        with self.database_controller.unit_of_work():
+            return fn()
+    
+    @staticmethod
+    def _run_write (
+        write: PendingWrite,
+        run: Callable[[], Any],
+    ) -> None:
+        
+        """
+        Runs a write under its caller's deadline and keeps its result or error.
+        """
+        
+        token = QUERY_DEADLINE.set(write.deadline)
+        
+        try:
+            write.result = run()
+        except Exception as e:
+            write.error = e
+        finally:
+            QUERY_DEADLINE.reset(token)
+
+class AsyncWriteBatch:
+    
+    """
+    Writes gathered for one transaction of an AsyncWriteBatcher.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes an empty batch still open to new writes.
+        """
+        
+        self.writes: List[PendingWrite] = []
+        self.full = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+class AsyncWriteBatcher(BaseWriteBatcher):
+    
+    """
+    asyncio counterpart of WriteBatcher.
+
+    Each batch runs as its own task that callers await through
+    `asyncio.shield`, so a cancelled caller, the one that opened the batch
+    included, does not abort the other writes.
+    """
+    
+    def __init__ (
+        self,
+        name: str,
+        database_controller: AsyncStorageBackend,
+        window: float,
+        max_batch_size: int,
+    ) -> None:
+        
+        """
+        Initializes the AsyncWriteBatcher.
+
+        Args:
+            name (str): Label used in the write batch metrics.
+            database_controller (AsyncStorageBackend): The backend whose units of work batches run in.
+            window (float): Seconds a batch waits for other writes to join.
+            max_batch_size (int): Writes after which a batch starts without waiting further.
+        """
+        
+        super().__init__(name, window, max_batch_size)
+        
+        self.database_controller = database_controller
+        self._open: Optional[AsyncWriteBatch] = None
+    
+    async def submit (
+        self,
+        fn: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        
+        """
+        Awaits `fn()` in the next batch and returns once the batch has committed.
+
+        Args:
+            fn (Callable[[], Awaitable[Any]]): Returns the coroutine running the caller's statements.
+
+        Returns:
+            Any: What `fn()` returned.
+
+        Raises:
+            Exception: Whatever `fn()` raised, or the error that failed the batch's commit.
+        """
+        
+        write = PendingWrite(fn)
+        batch = self._open
+        
+        if batch is None:
+            batch = self._open = AsyncWriteBatch()
+            batch.task = asyncio.ensure_future(self._lead(batch))
+        
+        batch.writes.append(write)
+        
+        if len(batch.writes) >= self.max_batch_size:
+            self._open = None
+            batch.full.set()
+        
+        await asyncio.shield(batch.task)
+        return self._outcome(write)
+    
+    async def _lead (
+        self,
+        batch: AsyncWriteBatch,
+    ) -> None:
+        
+        """
+        Waits out the window, or until the batch is full, then runs it.
+        """
+        
+        try:
+            await asyncio.wait_for(batch.full.wait(), self.window)
+        except asyncio.TimeoutError:
+            pass
+        
+        if self._open is batch:
+            self._open = None
+        
+        self._observe_batch(batch.writes)
+        
+        if len(batch.writes) == 1:
+            await self._run_write(batch.writes[0], batch.writes[0].fn)
+            return
+        
+        try:
+            async with self.database_controller.unit_of_work():
+                for write in batch.writes:
+                    await self._run_write(write, lambda: self._run_nested(write.fn))
+        
+        except Exception as e:
+            self._fail_uncommitted(batch.writes, e)
+    
+    async def _run_nested (
+        self,
+        fn: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        
+        """
+        Awaits one write in a nested unit of work, so its failure rolls back only its own statements.
+        """
+        
+        async with self.database_controller.unit_of_work():
+            return await fn()
+    
+    @staticmethod
+    async def _run_write (
+        write: PendingWrite,
+        run: Callable[[], Awaitable[Any]],
+    ) -> None:
+        
+        """
+        Awaits a write under its caller's deadline and keeps its result or error.
+        """
+        
+        token = QUERY_DEADLINE.set(write.deadline)
+        
+        try:
+            write.result = await run()
+        except Exception as e:
+            write.error = e
+        finally:
+            QUERY_DEADLINE.reset(token)
@@ -0,0 +1,131 @@
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple, Type
+
+from google.protobuf.message import Message
+from google.protobuf.descriptor import FieldDescriptor
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAIVE_EPOCH = datetime(1970, 1, 1)
+TIMESTAMP_TYPE = 'google.protobuf.Timestamp'
+
+RowMapper = Callable[[Sequence[Any]], Message]
+
+def timestamp_fields (
+    value: datetime,
+) -> Dict[str, int]:
+    
+    """
+    Converts a datetime into the fields of a `google.protobuf.Timestamp`.
+
+    Naive datetimes are taken as UTC, as `Timestamp.FromDatetime` does.
+
+    Args:
+        value (datetime): The datetime to convert.
+
+    Returns:
+        Dict[str, int]: `seconds` and `nanos` since the Unix epoch.
+    """
+    
+    delta = value - (EPOCH if value.tzinfo is not None else NAIVE_EPOCH)
+    return {'seconds': delta.days * 86400 + delta.seconds, 'nanos': delta.microseconds * 1000}
+
+def project_columns (
+    paths: Iterable[str],
+    columns: Tuple[str, ...],
+    required: Tuple[str, ...] = (),
+) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    
+    """
+    Resolves the paths of a `google.protobuf.FieldMask` against a column list.
+
+    An empty mask selects every column. Otherwise the requested columns, plus
+    the `required` ones the caller needs to read back from each row (keys,
+    cursor columns), are selected in `columns` order, so equal projections
+    produce the same SELECT list and share statements and mappers.
+
+    Args:
+        paths (Iterable[str]): The mask paths; each must be one of `columns`.
+        columns (Tuple[str, ...]): Every column that may be selected, in SELECT order.
+        required (Tuple[str, ...], optional): Columns selected even when not requested.
+
+    Raises:
+        ValueError: If a path is not one of `columns`.
+
+    Returns:
+        Tuple[Tuple[str, ...], Tuple[str, ...]]: The columns to select, and the
+            ones to populate in the response.
+    """
+    
+    requested = set(paths)
+    
+    if not requested:
+        return columns, columns
+    
+    unknown = requested.difference(columns)
+    if unknown:
+        raise ValueError(f'Unknown fields {", ".join(sorted(unknown))}; expected any of {", ".join(columns)}.')
+    
+    selected = tuple(column for column in columns if column in requested or column in required)
+    fields = tuple(column for column in columns if column in requested)
+    
+    return selected, fields
+
+@lru_cache(maxsize=None)
+def compile_row_mapper (
+    message_class: Type[Message],
+    columns: Tuple[str, ...],
+    fields: Optional[Tuple[str, ...]] = None,
+) -> RowMapper:
+    
+    """
+    Builds a function that turns a database row into a protobuf message.
+
+    The function is generated once per message class and column list, with
+    every column bound to its field by position, so mapping a row is a
+    single constructor call: no per-row name lookups, no intermediate
+    messages and no `CopyFrom`. Timestamp fields are filled with seconds and
+    nanos computed straight from the row's datetime; a NULL leaves the field
+    unset.
+
+    When `fields` is given, only those columns are copied into the message;
+    the others are still read by position but left out, which is how a
+    projection selects key columns it needs without returning them.
+
+    Args:
+        message_class (Type[Message]): The generated message class to build.
+        columns (Tuple[str, ...]): The SELECT list, in order; each name must be a field of the message.
+        fields (Optional[Tuple[str, ...]], optional): The columns to populate; all of them if None.
+
+    Raises:
+        ValueError: If a column has no matching field, or maps to a message
+                    field other than a Timestamp.
+
+    Returns:
+        RowMapper: A function taking a row and returning a new message.
+    """
+    
+    descriptors = message_class.DESCRIPTOR.fields_by_name
+    arguments = []
+    
+    for index, column in enumerate(columns):
+        field = descriptors.get(column)
+        
+        if field is None:
+            raise ValueError(f'{message_class.__name__} has no field for column {column!r}.')
+        
+        if fields is not None and column not in fields:
+            continue
+        
+        if field.type != FieldDescriptor.TYPE_MESSAGE:
+            arguments.append(f'{column}=row[{index}]')
+        elif field.message_type.full_name == TIMESTAMP_TYPE:
+            arguments.append(f'{column}=None if row[{index}] is None else timestamp_fields(row[{index}])')
+        else:
+            raise ValueError(f'Column {column!r} maps to {field.message_type.full_name}, which is not supported.')
+    
+    source = f'def map_row(row):\n    return message_class({", ".join(arguments)})\n'
+    namespace = {'message_class': message_class, 'timestamp_fields': timestamp_fields}
+    exec(compile(source, f'<row mapper {message_class.__name__}{fields or columns}>', 'exec'), namespace)
+    
+    return namespace['map_row']
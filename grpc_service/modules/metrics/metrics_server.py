@@ -0,0 +1,67 @@
+import os
+import logging
+import threading
+from typing import Optional
+from wsgiref.simple_server import WSGIServer
+
+from prometheus_client import start_http_server
+
+class MetricsServer:
+    
+    """
+    Side HTTP listener exposing the process metrics in Prometheus text format.
+
+    gRPC has no HTTP endpoint to hang `/metrics` on, so the metrics are
+    served from a small background HTTP server on `GRPC_METRICS_PORT`.
+    Nothing is started when the variable is unset.
+    """
+    
+    def __init__ (
+        self,
+        port: Optional[int] = int(os.environ['GRPC_METRICS_PORT']) if os.getenv('GRPC_METRICS_PORT') else None,
+        addr: str = os.getenv('GRPC_METRICS_ADDR', '0.0.0.0'),
+        logger: logging.Logger = logging.getLogger('fastapi-logger'),
+    ) -> None:
+        
+        """
+        Initializes the MetricsServer.
+
+        Args:
+            port (Optional[int]): Port to listen on, or None to disable the listener.
+            addr (str): Address to bind to.
+            logger (logging.Logger): Logger that reports where the listener is running.
+        """
+        
+        self.port = port
+        self.addr = addr
+        self.logger = logger
+        self.server: Optional[WSGIServer] = None
+        self.thread: Optional[threading.Thread] = None
+    
+    def start (
+        self,
+    ) -> None:
+        
+        """
+        Starts serving `/metrics` on a daemon thread if a port is configured.
+        """
+        
+        if self.port is None or self.server is not None:
+            return
+        
+        self.server, self.thread = start_http_server(self.port, addr=self.addr)
+        self.logger.info('Metrics server running on port %s', self.server.server_port)
+    
+    def stop (
+        self,
+    ) -> None:
+        
+        """
+        Stops the listener if it is running.
+        """
+        
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.thread = None
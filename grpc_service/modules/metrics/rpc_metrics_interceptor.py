@@ -0,0 +1,517 @@
+import time
+import inspect
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+import grpc
+from prometheus_client import Counter, Gauge, Histogram
+
+SERVER_HANDLING_SECONDS = Histogram (
+    'grpc_server_handling_seconds',
+    'Time from receiving an RPC until its handler finished.',
+    ['grpc_service', 'grpc_method', 'grpc_type'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+SERVER_RESPONSE_BYTES = Histogram (
+    'grpc_server_response_bytes',
+    'Serialized size of all messages sent in response to one RPC.',
+    ['grpc_service', 'grpc_method', 'grpc_type'],
+    buckets=(0, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864),
+)
+SERVER_HANDLED = Counter (
+    'grpc_server_handled',
+    'RPCs completed, by status code.',
+    ['grpc_service', 'grpc_method', 'grpc_type', 'grpc_code'],
+)
+SERVER_IN_FLIGHT = Gauge (
+    'grpc_server_in_flight',
+    'RPCs currently being handled.',
+    ['grpc_service', 'grpc_method'],
+)
+
+GRPC_TYPES = {
+    (False, False): 'unary',
+    (False, True): 'server_stream',
+    (True, False): 'client_stream',
+    (True, True): 'bidi_stream',
+}
+
+# grpc.aio contexts may report the code as its integer value.
+STATUS_CODES_BY_VALUE = {code.value[0]: code for code in grpc.StatusCode}
+
+def message_size (
+    message: Any,
+) -> int:
+    
+    """
+    Returns the serialized size of a response message.
+
+    Args:
+        message (Any): A protobuf message, or bytes from a raw-bytes handler.
+
+    Returns:
+        int: The size in bytes, 0 for anything else.
+    """
+    
+    if isinstance(message, bytes):
+        return len(message)
+    
+    byte_size = getattr(message, 'ByteSize', None)
+    return byte_size() if byte_size is not None else 0
+
+def status_code (
+    context: Any,
+    failed: bool,
+) -> grpc.StatusCode:
+    
+    """
+    Works out the status an RPC finished with.
+
+    Args:
+        context (Any): The servicer context of the RPC.
+        failed (bool): Whether the handler raised.
+
+    Returns:
+        grpc.StatusCode: The code the handler set, else UNKNOWN if it raised and OK otherwise.
+    """
+    
+    code = context.code()
+    
+    if not code:
+        return grpc.StatusCode.UNKNOWN if failed else grpc.StatusCode.OK
+    
+    if isinstance(code, int):
+        return STATUS_CODES_BY_VALUE.get(code, grpc.StatusCode.UNKNOWN)
+    
+    return code
+
+class StatusRecordingContext:
+    
+    """
+    Servicer context proxy that remembers the status code set through it.
+
+    grpc.aio hands plain-function behaviors a context without `code()`, so
+    the code they set through `set_code` or `abort` is captured on the way
+    through instead. Everything else is forwarded to the real context.
+    """
+    
+    def __init__ (
+        self,
+        context: Any,
+    ) -> None:
+        
+        """
+        Initializes the proxy.
+
+        Args:
+            context (Any): The context to forward to.
+        """
+        
+        self._context = context
+        self._code: Optional[grpc.StatusCode] = None
+    
+    def code (
+        self,
+    ) -> Optional[grpc.StatusCode]:
+        
+        """
+        Returns the last code set through the proxy, if any.
+        """
+        
+        return self._code
+    
+    def set_code (
+        self,
+        code: grpc.StatusCode,
+    ) -> None:
+        
+        """
+        Records and forwards the status code.
+        """
+        
+        self._code = code
+        self._context.set_code(code)
+    
+    def abort (
+        self,
+        code: grpc.StatusCode,
+        details: str,
+    ) -> None:
+        
+        """
+        Records the status code, then aborts the RPC.
+        """
+        
+        self._code = code
+        self._context.abort(code, details)
+    
+    def __getattr__ (
+        self,
+        name: str,
+    ) -> Any:
+        
+        return getattr(self._context, name)
+
+class MethodMetrics:
+    
+    """
+    The metric children of one RPC method, resolved once and reused by every call.
+
+    Looking label values up is the costly part of a prometheus_client update,
+    so each method pays for it on its first call only.
+    """
+    
+    def __init__ (
+        self,
+        full_method: str,
+        grpc_type: str,
+    ) -> None:
+        
+        """
+        Initializes the MethodMetrics.
+
+        Args:
+            full_method (str): The method path, e.g. `/book.BookService/GetAllBooks`.
+            grpc_type (str): One of `unary`, `server_stream`, `client_stream`, `bidi_stream`.
+        """
+        
+        service, _, method = full_method.lstrip('/').rpartition('/')
+        
+        self.labels = (service, method, grpc_type)
+        self.handling_seconds = SERVER_HANDLING_SECONDS.labels(*self.labels)
+        self.response_bytes = SERVER_RESPONSE_BYTES.labels(*self.labels)
+        self.in_flight = SERVER_IN_FLIGHT.labels(service, method)
+        self.handled: Dict[grpc.StatusCode, Any] = {}
+    
+    def started (
+        self,
+    ) -> float:
+        
+        """
+        Records an RPC entering its handler.
+
+        Returns:
+            float: The start time to pass to `finished`.
+        """
+        
+        self.in_flight.inc()
+        return time.perf_counter()
+    
+    def finished (
+        self,
+        started: float,
+        code: grpc.StatusCode,
+        response_bytes: int,
+    ) -> None:
+        
+        """
+        Records an RPC leaving its handler.
+
+        Args:
+            started (float): The value returned by `started`.
+            code (grpc.StatusCode): The status the RPC finished with.
+            response_bytes (int): Serialized size of everything it sent.
+        """
+        
+        self.handling_seconds.observe(time.perf_counter() - started)
+        self.response_bytes.observe(response_bytes)
+        self.in_flight.dec()
+        
+        handled = self.handled.get(code)
+        if handled is None:
+            handled = self.handled[code] = SERVER_HANDLED.labels(*self.labels, code.name)
+        handled.inc()
+
+class MethodMetricsRegistry:
+    
+    """
+    Thread-safe cache of MethodMetrics keyed by method path.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes an empty registry.
+        """
+        
+        self._lock = threading.Lock()
+        self._methods: Dict[str, MethodMetrics] = {}
+    
+    def get (
+        self,
+        full_method: str,
+        handler: grpc.RpcMethodHandler,
+    ) -> MethodMetrics:
+        
+        """
+        Returns the metrics for a method, creating them on its first call.
+
+        Args:
+            full_method (str): The method path.
+            handler (grpc.RpcMethodHandler): The handler serving it, which gives the RPC type.
+
+        Returns:
+            MethodMetrics: The method's metric children.
+        """
+        
+        metrics = self._methods.get(full_method)
+        
+        if metrics is None:
+            grpc_type = GRPC_TYPES[(handler.request_streaming, handler.response_streaming)]
+            
+            with self._lock:
+                metrics = self._methods.setdefault(full_method, MethodMetrics(full_method, grpc_type))
+        
+        return metrics
+
+def behavior_name (
+    handler: grpc.RpcMethodHandler,
+) -> str:
+    
+    """
+    Returns the name of the handler field holding its behavior, e.g. `unary_stream`.
+    """
+    
+    return '_'.join (
+        'stream' if streaming else 'unary'
+        for streaming in (handler.request_streaming, handler.response_streaming)
+    )
+
+class RpcMetricsInterceptor(grpc.ServerInterceptor):
+    
+    """
+    Server interceptor recording per-method latency, response size, status codes and concurrency.
+
+    Every method handler is wrapped once per call; the wrapper updates the
+    `grpc_server_*` metrics, which the MetricsServer side listener exposes in
+    Prometheus text format. Unary and streaming methods are both covered: a
+    streaming response is timed until its last message has been produced and
+    its size is the sum of all its messages.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes the RpcMetricsInterceptor.
+        """
+        
+        self.registry = MethodMetricsRegistry()
+    
+    def intercept_service (
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Optional[grpc.RpcMethodHandler]],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> Optional[grpc.RpcMethodHandler]:
+        
+        """
+        Wraps the method's handler with metric recording.
+
+        Args:
+            continuation (Callable): Resolves the handler for the call.
+            handler_call_details (grpc.HandlerCallDetails): Method name and metadata of the call.
+
+        Returns:
+            Optional[grpc.RpcMethodHandler]: The wrapped handler, or None for unknown methods.
+        """
+        
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        
+        metrics = self.registry.get(handler_call_details.method, handler)
+        name = behavior_name(handler)
+        behavior = getattr(handler, name)
+        
+        if handler.response_streaming:
+            wrapped = self._wrap_stream(behavior, metrics)
+        else:
+            wrapped = self._wrap_unary(behavior, metrics)
+        
+        return handler._replace(**{name: wrapped})
+    
+    @staticmethod
+    def _wrap_unary (
+        behavior: Callable[[Any, grpc.ServicerContext], Any],
+        metrics: MethodMetrics,
+    ) -> Callable[[Any, grpc.ServicerContext], Any]:
+        
+        """
+        Wraps a behavior returning a single response.
+        """
+        
+        def wrapped(request: Any, context: grpc.ServicerContext) -> Any:
+            started = metrics.started()
+            
+            try:
+                response = behavior(request, context)
+            except Exception:
+                metrics.finished(started, status_code(context, failed=True), 0)
+                raise
+            
+            metrics.finished(started, status_code(context, failed=False), message_size(response))
+            return response
+        
+        return wrapped
+    
+    @staticmethod
+    def _wrap_stream (
+        behavior: Callable[[Any, grpc.ServicerContext], Iterator[Any]],
+        metrics: MethodMetrics,
+    ) -> Callable[[Any, grpc.ServicerContext], Iterator[Any]]:
+        
+        """
+        Wraps a behavior yielding a stream of responses.
+
+        A client that goes away closes the generator, which is recorded as CANCELLED.
+        """
+        
+        def wrapped(request: Any, context: grpc.ServicerContext) -> Iterator[Any]:
+            started = metrics.started()
+            size = 0
+            code = grpc.StatusCode.CANCELLED
+            
+            try:
+                for response in behavior(request, context):
+                    size += message_size(response)
+                    yield response
+                code = status_code(context, failed=False)
+            except Exception:
+                code = status_code(context, failed=True)
+                raise
+            finally:
+                metrics.finished(started, code, size)
+        
+        return wrapped
+
+class AsyncRpcMetricsInterceptor(grpc.aio.ServerInterceptor):
+    
+    """
+    grpc.aio counterpart of RpcMetricsInterceptor, recording the same metrics.
+
+    Coroutine and async generator behaviors are wrapped in kind, so grpc.aio
+    keeps running them on the event loop, and plain functions are wrapped
+    as plain functions so they keep going to the migration thread pool.
+    Messages a streaming handler sends through `context.write` are not seen
+    by the interceptor and do not count towards the response size.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        """
+        Initializes the AsyncRpcMetricsInterceptor.
+        """
+        
+        self.registry = MethodMetricsRegistry()
+    
+    async def intercept_service (
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Awaitable[Optional[grpc.RpcMethodHandler]]],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> Optional[grpc.RpcMethodHandler]:
+        
+        """
+        Wraps the method's handler with metric recording.
+
+        Args:
+            continuation (Callable): Resolves the handler for the call.
+            handler_call_details (grpc.HandlerCallDetails): Method name and metadata of the call.
+
+        Returns:
+            Optional[grpc.RpcMethodHandler]: The wrapped handler, or None for unknown methods.
+        """
+        
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        
+        metrics = self.registry.get(handler_call_details.method, handler)
+        name = behavior_name(handler)
+        behavior = getattr(handler, name)
+        
+        if inspect.isasyncgenfunction(behavior):
+            wrapped = self._wrap_async_stream(behavior, metrics)
+        elif inspect.iscoroutinefunction(behavior):
+            wrapped = self._wrap_coroutine(behavior, metrics)
+        elif handler.response_streaming:
+            wrapped = self._with_status_recording(RpcMetricsInterceptor._wrap_stream(behavior, metrics))
+        else:
+            wrapped = self._with_status_recording(RpcMetricsInterceptor._wrap_unary(behavior, metrics))
+        
+        return handler._replace(**{name: wrapped})
+    
+    @staticmethod
+    def _with_status_recording (
+        behavior: Callable[[Any, Any], Any],
+    ) -> Callable[[Any, Any], Any]:
+        
+        """
+        Hands a plain-function behavior a StatusRecordingContext instead of the grpc.aio one.
+        """
+        
+        def wrapped(request: Any, context: Any) -> Any:
+            return behavior(request, StatusRecordingContext(context))
+        
+        return wrapped
+    
+    @staticmethod
+    def _wrap_coroutine (
+        behavior: Callable[[Any, grpc.aio.ServicerContext], Awaitable[Any]],
+        metrics: MethodMetrics,
+    ) -> Callable[[Any, grpc.aio.ServicerContext], Awaitable[Any]]:
+        
+        """
+        Wraps a coroutine behavior; its result, if any, is the single response.
+
+        An RPC cancelled while it waits is recorded as CANCELLED.
+        """
+        
+        async def wrapped(request: Any, context: grpc.aio.ServicerContext) -> Any:
+            started = metrics.started()
+            code = grpc.StatusCode.CANCELLED
+            response = None
+            
+            try:
+                response = await behavior(request, context)
+                code = status_code(context, failed=False)
+                return response
+            except Exception:
+                code = status_code(context, failed=True)
+                raise
+            finally:
+                metrics.finished(started, code, message_size(response))
+        
+        return wrapped
+    
+    @staticmethod
+    def _wrap_async_stream (
+        behavior: Callable[[Any, grpc.aio.ServicerContext], Any],
+        metrics: MethodMetrics,
+    ) -> Callable[[Any, grpc.aio.ServicerContext], Any]:
+        
+        """
+        Wraps an async generator behavior yielding a stream of responses.
+        """
+        
+        async def wrapped(request: Any, context: grpc.aio.ServicerContext) -> Any:
+            started = metrics.started()
+            size = 0
+            code = grpc.StatusCode.CANCELLED
+            
+            try:
+                async for response in behavior(request, context):
+                    size += message_size(response)
+                    yield response
+                code = status_code(context, failed=False)
+            except Exception:
+                code = status_code(context, failed=True)
+                raise
+            finally:
+                metrics.finished(started, code, size)
+        
+        return wrapped
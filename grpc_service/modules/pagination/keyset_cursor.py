@@ -0,0 +1,65 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+class KeysetCursor:
+    
+    """
+    Encodes and decodes the opaque page cursor used by ListBooks.
+
+    A cursor is the `(uploaded_at, id)` key of the last book on a page. It is
+    handed to clients as URL-safe base64 so they treat it as a token rather
+    than something to build themselves, and so it can travel unchanged in a
+    FastAPI query string.
+    """
+    
+    @staticmethod
+    def encode (
+        uploaded_at: datetime,
+        book_id: int,
+    ) -> str:
+        
+        """
+        Builds a cursor pointing just past the given book.
+
+        Args:
+            uploaded_at (datetime): The `uploaded_at` value of the last book on the page.
+            book_id (int): The `id` of the last book on the page.
+
+        Returns:
+            str: The opaque cursor string.
+        """
+        
+        payload = json.dumps (
+            [uploaded_at.isoformat(), book_id],
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode (
+        cursor: str,
+    ) -> Tuple[datetime, int]:
+        
+        """
+        Recovers the `(uploaded_at, id)` key from a cursor.
+
+        Args:
+            cursor (str): A cursor previously returned by `encode`.
+
+        Returns:
+            Tuple[datetime, int]: The keyset position to continue after.
+
+        Raises:
+            ValueError: If the cursor is malformed or was not produced by `encode`.
+        """
+        
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            uploaded_at, book_id = json.loads(base64.urlsafe_b64decode(padded))
+            return datetime.fromisoformat(uploaded_at), int(book_id)
+        
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+            raise ValueError(f'Invalid cursor: {cursor!r}') from e
@@ -0,0 +1,166 @@
+import time
+import asyncio
+import threading
+import unittest
+
+import grpc
+
+from grpc_service.grpc_server.admission_control import (
+    AdmissionThreadPoolExecutor,
+    AdmissionInterceptor,
+    AsyncAdmissionInterceptor,
+    RETRY_PUSHBACK_KEY,
+)
+
+SERVICE = 'test.AdmissionService'
+
+def wait_until (
+    condition,
+    timeout: float = 2.0,
+) -> bool:
+    
+    """
+    Polls a condition until it holds or the timeout passes.
+    """
+    
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+class TestAdmissionInterceptor(unittest.TestCase):
+    
+    """
+    Tests shedding on the thread-pool server with one worker and no queue.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Starts a one-worker server whose Block method holds the worker until released.
+        """
+        
+        self.release = threading.Event()
+        
+        def block(request: bytes, context: grpc.ServicerContext) -> bytes:
+            self.release.wait(5)
+            return request
+        
+        def echo(request: bytes, context: grpc.ServicerContext) -> bytes:
+            return request
+        
+        handler = grpc.method_handlers_generic_handler (
+            SERVICE,
+            {
+                'Block': grpc.unary_unary_rpc_method_handler(block),
+                'Echo': grpc.unary_unary_rpc_method_handler(echo),
+            },
+        )
+        
+        self.executor = AdmissionThreadPoolExecutor(max_workers=1)
+        self.server = grpc.server (
+            self.executor,
+            interceptors=[AdmissionInterceptor(self.executor, max_queue=0, retry_after_ms=150)],
+        )
+        self.server.add_generic_rpc_handlers((handler,))
+        port = self.server.add_insecure_port('localhost:0')
+        self.server.start()
+        
+        self.channel = grpc.insecure_channel(f'localhost:{port}')
+    
+    def tearDown (
+        self,
+    ) -> None:
+        
+        """
+        Releases any blocked call and stops the server.
+        """
+        
+        self.release.set()
+        self.channel.close()
+        self.server.stop(0)
+    
+    def test_rpc_is_shed_with_retry_pushback_when_workers_are_busy (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a saturated server rejects fast and accepts again once a worker frees up.
+        """
+        
+        blocked = self.channel.unary_unary(f'/{SERVICE}/Block').future(b'slow')
+        self.assertTrue(wait_until(lambda: self.executor.running == 1))
+        
+        started = time.perf_counter()
+        with self.assertRaises(grpc.RpcError) as raised:
+            self.channel.unary_unary(f'/{SERVICE}/Echo')(b'fast', timeout=2)
+        
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(raised.exception.code(), grpc.StatusCode.RESOURCE_EXHAUSTED)
+        self.assertIn((RETRY_PUSHBACK_KEY, '150'), raised.exception.trailing_metadata())
+        
+        self.release.set()
+        
+        self.assertEqual(blocked.result(timeout=2), b'slow')
+        self.assertTrue(wait_until(lambda: self.executor.running == 0))
+        self.assertEqual(self.channel.unary_unary(f'/{SERVICE}/Echo')(b'fast', timeout=2), b'fast')
+        self.assertEqual(self.executor.queued, 0)
+
+class TestAsyncAdmissionInterceptor(unittest.TestCase):
+    
+    """
+    Tests the in-flight limit on the grpc.aio server.
+    """
+    
+    def test_rpc_over_in_flight_limit_is_shed (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a second concurrent RPC is shed while the first one runs.
+        """
+        
+        async def call() -> None:
+            release = asyncio.Event()
+            entered = asyncio.Event()
+            interceptor = AsyncAdmissionInterceptor(max_in_flight=1, retry_after_ms=150)
+            
+            async def block(request: bytes, context: grpc.aio.ServicerContext) -> bytes:
+                entered.set()
+                await release.wait()
+                return request
+            
+            handler = grpc.method_handlers_generic_handler (
+                SERVICE,
+                {'Block': grpc.unary_unary_rpc_method_handler(block)},
+            )
+            
+            server = grpc.aio.server(interceptors=[interceptor])
+            server.add_generic_rpc_handlers((handler,))
+            port = server.add_insecure_port('localhost:0')
+            await server.start()
+            
+            async with grpc.aio.insecure_channel(f'localhost:{port}') as channel:
+                method = channel.unary_unary(f'/{SERVICE}/Block')
+                first = asyncio.ensure_future(method(b'first'))
+                await entered.wait()
+                
+                with self.assertRaises(grpc.aio.AioRpcError) as raised:
+                    await method(b'second')
+                
+                self.assertEqual(raised.exception.code(), grpc.StatusCode.RESOURCE_EXHAUSTED)
+                self.assertIn((RETRY_PUSHBACK_KEY, '150'), tuple(raised.exception.trailing_metadata()))
+                
+                release.set()
+                self.assertEqual(await first, b'first')
+                self.assertEqual(interceptor.in_flight, 0)
+            
+            await server.stop(0)
+        
+        asyncio.run(call())
+
+
+if __name__ == '__main__':
+    unittest.main()
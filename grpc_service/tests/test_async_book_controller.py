@@ -0,0 +1,319 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import grpc
+from psycopg import errors
+
+from grpc_service.books_pb import books_pb2
+from grpc_service.controllers.async_book_controller.async_book_controller import AsyncBookService
+from grpc_service.modules.cache.single_flight import AsyncSingleFlight
+from grpc_service.modules.database.write_batcher.write_batcher import AsyncWriteBatcher
+from grpc_service.modules.database.query_deadline.query_deadline import QueryDeadlineExceeded
+
+class TestAsyncBookService(unittest.IsolatedAsyncioTestCase):
+    
+    """
+    Unit tests for the `AsyncBookService` grpc.aio servicer.
+
+    The async database controller is replaced with an `AsyncMock`, so every
+    RPC is awaited exactly as the grpc.aio server would do it.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Sets up the service with a mocked async database controller and context.
+        """
+        
+        self.database_controller = AsyncMock()
+        # `unit_of_work()` returns an async context manager rather than a coroutine.
+        self.database_controller.unit_of_work = MagicMock()
+        self.service = AsyncBookService(database_controller=self.database_controller)
+        self.service.logger = MagicMock()
+        self.context = MagicMock()
+    
+    def test_builds_only_async_helpers (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the service builds asyncio single flights and batcher without building the blocking ones.
+        """
+        
+        module = 'grpc_service.controllers.book_controller.book_controller'
+        
+        with (
+            patch(f'{module}.SingleFlight') as single_flight,
+            patch(f'{module}.WriteBatcher') as write_batcher,
+            patch.dict('os.environ', {'GRPC_WRITE_BATCH': 'true'}),
+        ):
+            service = AsyncBookService(database_controller=self.database_controller)
+        
+        single_flight.assert_not_called()
+        write_batcher.assert_not_called()
+        self.assertIsInstance(service.book_flight, AsyncSingleFlight)
+        self.assertIsInstance(service.all_books_flight, AsyncSingleFlight)
+        self.assertIsInstance(service.write_batcher, AsyncWriteBatcher)
+    
+    async def test_get_book_by_id_found (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a found row is mapped with its stored `uploaded_at`.
+        """
+        
+        uploaded_at = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        self.database_controller.execute_get_query.return_value = [
+            (1, 'Book Name', 'Author', uploaded_at, 1),
+        ]
+        
+        response = await self.service.GetBookById (
+            books_pb2.BookRequest(book_id=1),
+            self.context,
+        )
+        
+        self.assertEqual(response.id, 1)
+        self.assertEqual(response.book_name, 'Book Name')
+        self.assertEqual(response.uploaded_at.ToDatetime(tzinfo=timezone.utc), uploaded_at)
+        self.assertEqual (
+            self.database_controller.execute_get_query.await_args.args[1],
+            (1,),
+        )
+    
+    async def test_get_book_by_id_not_found (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a missing book sets NOT_FOUND.
+        """
+        
+        self.database_controller.execute_get_query.return_value = []
+        
+        response = await self.service.GetBookById (
+            books_pb2.BookRequest(book_id=1),
+            self.context,
+        )
+        
+        self.assertEqual(response.id, 0)
+        self.context.set_code.assert_called_with(grpc.StatusCode.NOT_FOUND)
+    
+    async def test_get_book_by_id_fills_cache_from_primary (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a book posted here is read from the primary while replicas may lack it, and cached as found.
+        """
+        
+        row = (7, 'New', 'Author', datetime(2024, 5, 1, tzinfo=timezone.utc), 1)
+        
+        async def execute_get_query(*args, **kwargs):
+            # The replica has not caught up with the insert; only the primary has the row.
+            return [row] if kwargs.get('primary') else []
+        
+        self.database_controller.execute_returning_query.return_value = [row]
+        self.database_controller.execute_get_query.side_effect = execute_get_query
+        await self.service.PostBook(books_pb2.PostBookRequest(book_name='New', book_author='Author'), self.context)
+        request = books_pb2.BookRequest(book_id=7)
+        
+        first = await self.service.GetBookById(request, self.context)
+        second = await self.service.GetBookById(request, self.context)
+        
+        self.assertEqual(first.id, 7)
+        self.assertIs(first, second)
+        self.assertEqual(self.database_controller.execute_get_query.await_count, 1)
+        self.database_controller.unit_of_work.assert_not_called()
+        self.context.set_code.assert_not_called()
+    
+    async def test_import_books_drops_cached_misses (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a book cached as not found is served once an import has inserted it.
+        """
+        
+        async def requests():
+            yield books_pb2.ImportBooksRequest(rows=[books_pb2.ImportBookRow(line=1, book_name='Dune', author='Herbert')])
+        
+        request = books_pb2.BookRequest(book_id=7)
+        self.database_controller.execute_get_query.return_value = []
+        await self.service.GetBookById(request, self.context)
+        
+        self.database_controller.execute_copy_query.side_effect = lambda query, rows: len(rows)
+        await self.service.ImportBooks(requests(), MagicMock())
+        
+        self.database_controller.execute_get_query.return_value = [(7, 'Dune', 'Herbert', datetime(2024, 5, 1, tzinfo=timezone.utc), 1)]
+        response = await self.service.GetBookById(request, MagicMock())
+        
+        self.assertEqual(response.book_name, 'Dune')
+        self.assertEqual(self.database_controller.execute_get_query.await_count, 2)
+    
+    async def test_import_books_broken_stream_keeps_committed_chunks (
+        self,
+    ) -> None:
+        
+        """
+        Tests that chunks committed before the stream breaks stay imported and are reported in the trailing metadata.
+        """
+        
+        async def requests():
+            yield books_pb2.ImportBooksRequest(rows=[books_pb2.ImportBookRow(line=1, book_name='Dune', author='Herbert')])
+            raise ConnectionError('client went away')
+        
+        self.service.import_chunk_size = 1
+        self.database_controller.execute_copy_query.side_effect = lambda query, rows: len(rows)
+        
+        response = await self.service.ImportBooks(requests(), self.context)
+        
+        self.assertEqual((response.received, response.imported), (1, 1))
+        self.database_controller.unit_of_work.assert_called_once()
+        self.context.set_code.assert_called_with(grpc.StatusCode.INTERNAL)
+        self.context.set_trailing_metadata.assert_called_once_with((('imported-rows', '1'),))
+    
+    async def test_get_all_books (
+        self,
+    ) -> None:
+        
+        """
+        Tests retrieving all books.
+        """
+        
+        self.database_controller.execute_get_query.return_value = [
+            (1, 'Book1', 'Author1', datetime.now(timezone.utc), 1),
+            (2, 'Book2', 'Author2', datetime.now(timezone.utc), 1),
+        ]
+        
+        response = await self.service.GetAllBooks (
+            books_pb2.EmptyRequest(),
+            self.context,
+        )
+        
+        self.assertEqual(len(response.books), 2)
+    
+    async def test_post_book_database_failure (
+        self,
+    ) -> None:
+        
+        """
+        Tests that database errors are reported as INTERNAL.
+        """
+        
+        self.database_controller.execute_returning_query.side_effect = Exception('Database insert failed')
+        
+        await self.service.PostBook (
+            books_pb2.PostBookRequest(book_name='New Book', book_author='Author'),
+            self.context,
+        )
+        
+        self.context.set_code.assert_called_with(grpc.StatusCode.INTERNAL)
+        self.context.set_details.assert_called_with('Unexpected error: Database insert failed')
+    
+    async def test_deadline_errors_are_reported_as_deadline_exceeded (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a cancelled or timed-out query sets DEADLINE_EXCEEDED without logging an error.
+        """
+        
+        self.database_controller.execute_get_query.side_effect = QueryDeadlineExceeded('The RPC deadline passed while the query was running.')
+        self.database_controller.execute_returning_query.side_effect = errors.QueryCanceled('canceling statement due to statement timeout')
+        
+        book = await self.service.GetBookById(books_pb2.BookRequest(book_id=1), self.context)
+        await self.service.PostBook (
+            books_pb2.PostBookRequest(book_name='New Book', book_author='Author'),
+            self.context,
+        )
+        
+        self.assertEqual(book.id, 0)
+        self.assertEqual(self.context.set_code.call_args_list, [((grpc.StatusCode.DEADLINE_EXCEEDED,),)] * 2)
+        self.service.logger.error.assert_not_called()
+    
+    async def test_delete_book_success (
+        self,
+    ) -> None:
+        
+        """
+        Tests deleting a book successfully and returning the deleted row.
+        """
+        
+        self.database_controller.execute_returning_query.return_value = [(1, 'Old Book', 'Author', None, 1)]
+        
+        response = await self.service.DeleteBook (
+            books_pb2.DeleteBookRequest(book_id=1),
+            self.context,
+        )
+        
+        self.context.set_details.assert_called_with('Deleted Successfully')
+        self.assertEqual(response.book_name, 'Old Book')
+    
+    async def test_update_book_not_found (
+        self,
+    ) -> None:
+        
+        """
+        Tests that updating a missing book sets NOT_FOUND.
+        """
+        
+        self.database_controller.execute_returning_query.return_value = []
+        
+        await self.service.UpdateBook (
+            books_pb2.UpdateBookRequest(book_id=1, book_name='Updated Name'),
+            self.context,
+        )
+        
+        self.context.set_code.assert_called_with(grpc.StatusCode.NOT_FOUND)
+
+    async def test_update_book_version_mismatch (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a book no longer at `expected_version` is left alone and the call is ABORTED.
+        """
+        
+        self.database_controller.execute_returning_query.return_value = []
+        self.database_controller.execute_get_query.return_value = [(5,)]
+        
+        await self.service.UpdateBook (
+            books_pb2.UpdateBookRequest(book_id=1, book_name='Updated Name', expected_version=3),
+            self.context,
+        )
+        
+        self.assertIn('AND version = %s', self.database_controller.execute_returning_query.await_args.args[0])
+        self.context.set_code.assert_called_with(grpc.StatusCode.ABORTED)
+        self.context.set_details.assert_called_with('Book is at version 5, not 3.')
+
+    async def test_upsert_books (
+        self,
+    ) -> None:
+        
+        """
+        Tests that UpsertBooks awaits one statement for the batch and counts its returned rows.
+        """
+        
+        self.database_controller.execute_returning_query.return_value = [(7, 1)]
+        
+        response = await self.service.UpsertBooks (
+            books_pb2.UpsertBooksRequest (
+                books=[
+                    books_pb2.UpsertBookRow(isbn='9780000000001', book_name='Dune', author='Herbert'),
+                    books_pb2.UpsertBookRow(isbn='9780000000002', book_name='Emma', author='Austen'),
+                ],
+            ),
+            self.context,
+        )
+        
+        self.assertEqual((response.inserted, response.updated, response.unchanged), (1, 0, 1))
+        self.assertIn('ON CONFLICT (isbn)', self.database_controller.execute_returning_query.await_args.args[0])
+        self.context.set_code.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
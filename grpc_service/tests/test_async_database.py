@@ -0,0 +1,279 @@
+import unittest
+from typing import Any, List, Optional, Tuple
+
+from grpc_service.modules.database.async_controller.async_database_controller import AsyncDatabaseController
+
+class FakeAsyncCursor:
+    
+    """
+    A fake async cursor that records the executed statement.
+    """
+    
+    def __init__ (
+        self,
+        result: Optional[List[Tuple[Any, ...]]] = None,
+        rowcount: int = 1,
+    ) -> None:
+        
+        """
+        Initializes the fake cursor with a result set and row count.
+        """
+        
+        self.result = result or []
+        self.rowcount = rowcount
+        self.description = None
+        self.executed = []
+    
+    async def execute (
+        self,
+        query,
+        params=None,
+        prepare=None,
+    ) -> None:
+        
+        """
+        Simulates executing a SQL query.
+        """
+        
+        self.executed.append((query, params))
+        self.description = ('dummy',) if 'RETURNING' in query.upper() else None
+    
+    async def fetchall (
+        self,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Returns all rows from the result set.
+        """
+        
+        return self.result
+    
+    async def fetchone (
+        self,
+    ) -> Optional[Tuple[Any, ...]]:
+        
+        """
+        Returns a single row from the result set.
+        """
+        
+        return self.result[0] if self.result else None
+    
+    async def __aenter__ (
+        self,
+    ) -> 'FakeAsyncCursor':
+        
+        """
+        Enables the use of 'async with' statements.
+        """
+        
+        return self
+    
+    async def __aexit__ (
+        self,
+        exc_type,
+        exc_val,
+        exc_tb,
+    ) -> None:
+        
+        """
+        Handles exit from 'async with' statements.
+        """
+        
+        pass
+
+class FakeAsyncConnection:
+    
+    """
+    A fake async connection that hands out a single shared cursor.
+    """
+    
+    def __init__ (
+        self,
+        cursor: FakeAsyncCursor,
+    ) -> None:
+        
+        """
+        Initializes the fake connection.
+        """
+        
+        self.cursor_obj = cursor
+        self.committed = False
+        self.rolled_back = False
+        self.closed = False
+        self.autocommit = False
+        self.autocommit_changes = []
+    
+    def cursor (
+        self,
+    ) -> FakeAsyncCursor:
+        
+        """
+        Returns the fake cursor.
+        """
+        
+        return self.cursor_obj
+    
+    async def set_autocommit (
+        self,
+        value: bool,
+    ) -> None:
+        
+        """
+        Simulates switching autocommit mode.
+        """
+        
+        self.autocommit = value
+        self.autocommit_changes.append(value)
+    
+    async def commit (
+        self,
+    ) -> None:
+        
+        """
+        Simulates committing a transaction.
+        """
+        
+        self.committed = True
+    
+    async def rollback (
+        self,
+    ) -> None:
+        
+        """
+        Simulates rolling back a transaction.
+        """
+        
+        self.rolled_back = True
+
+class FakeAsyncDatabase:
+    
+    """
+    A fake async pool that tracks checkouts and releases.
+    """
+    
+    def __init__ (
+        self,
+        connection: FakeAsyncConnection,
+    ) -> None:
+        
+        """
+        Initializes the fake database.
+        """
+        
+        self.connection = connection
+        self.released = False
+    
+    async def get_connection (
+        self,
+    ) -> FakeAsyncConnection:
+        
+        """
+        Simulates retrieving a database connection.
+        """
+        
+        return self.connection
+    
+    async def release_connection (
+        self,
+        conn: FakeAsyncConnection,
+    ) -> None:
+        
+        """
+        Simulates releasing a database connection.
+        """
+        
+        self.released = True
+
+class TestAsyncDatabaseController(unittest.IsolatedAsyncioTestCase):
+    
+    """
+    Unit tests for the AsyncDatabaseController class.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Sets up the controller with a fake async pool.
+        """
+        
+        self.cursor = FakeAsyncCursor (
+            result=[(1, 'Test Book', 'Test Author', '2021-01-01 00:00:00')],
+        )
+        self.connection = FakeAsyncConnection(self.cursor)
+        self.fake_db = FakeAsyncDatabase(self.connection)
+        self.controller = AsyncDatabaseController()
+        self.controller.db = self.fake_db
+    
+    async def test_execute_get_query_with_params (
+        self,
+    ) -> None:
+        
+        """
+        Tests that SELECT parameters are forwarded and the connection is released.
+        """
+        
+        result = await self.controller.execute_get_query (
+            'SELECT * FROM base_book WHERE id = %s',
+            (1,),
+        )
+        
+        self.assertEqual(result, [(1, 'Test Book', 'Test Author', '2021-01-01 00:00:00')])
+        self.assertEqual(self.cursor.executed, [('SELECT * FROM base_book WHERE id = %s', (1,))])
+        self.assertTrue(self.fake_db.released)
+    
+    async def test_execute_insert_query_returning (
+        self,
+    ) -> None:
+        
+        """
+        Tests that an INSERT ... RETURNING yields the new id as one autocommitted statement.
+        """
+        
+        inserted_id = await self.controller.execute_insert_query (
+            'INSERT INTO base_book (book_name) VALUES (%s) RETURNING id',
+            ('New Book',),
+        )
+        
+        self.assertEqual(inserted_id, 1)
+        self.assertEqual(len(self.cursor.executed), 1)
+        self.assertFalse(self.connection.committed)
+        self.assertEqual(self.connection.autocommit_changes, [True, False])
+    
+    async def test_execute_edit_query_rolls_back_on_error (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a failing UPDATE leaves autocommit mode and releases the connection.
+        """
+        
+        async def failing_execute(query, params=None, prepare=None):
+            raise RuntimeError('boom')
+        
+        self.cursor.execute = failing_execute
+        
+        with self.assertRaises(RuntimeError):
+            await self.controller.execute_edit_query (
+                'UPDATE base_book SET book_name = %s WHERE id = %s',
+                ('Name', 1),
+            )
+        
+        self.assertFalse(self.connection.autocommit)
+        self.assertTrue(self.fake_db.released)
+    
+    async def test_execute_delete_query_invalid_query (
+        self,
+    ) -> None:
+        
+        """
+        Tests that executing a non-DELETE query raises ValueError.
+        """
+        
+        with self.assertRaises(ValueError):
+            await self.controller.execute_delete_query('SELECT * FROM base_book')
+
+
+if __name__ == '__main__':
+    unittest.main()
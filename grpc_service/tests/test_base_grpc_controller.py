@@ -5,6 +5,7 @@ from unittest.mock import MagicMock
 from grpc_service.controllers.base_grpc_controller.base_grpc_controller import (
     BaseGRPCController,
 )
+from grpc_service.modules.database.query_deadline.query_deadline import QueryDeadlineExceeded
 
 class TestBaseGRPCController(unittest.TestCase):
     
@@ -50,5 +51,50 @@ class TestBaseGRPCController(unittest.TestCase):
         context.set_details.assert_called_with(message)
         self.assertIsNone(result)  
 
+    def test_deadline_exceeded_response (
+        self,
+    ) -> None:
+        
+        """Tests that `deadline_exceeded_response` sets DEADLINE_EXCEEDED and logs a warning, not an error."""
+        
+        context = MagicMock()
+        
+        self.controller.deadline_exceeded_response(context, Exception("canceling statement due to statement timeout"))
+        
+        context.set_code.assert_called_with(grpc.StatusCode.DEADLINE_EXCEEDED)
+        context.set_details.assert_called_with('Deadline exceeded: canceling statement due to statement timeout')
+        self.logger_mock.warning.assert_called_once()
+        self.logger_mock.error.assert_not_called()
+
+    def test_rpc_errors_maps_deadline_errors (
+        self,
+    ) -> None:
+        
+        """Tests that `rpc_errors` answers a statement cut short by the deadline with DEADLINE_EXCEEDED."""
+        
+        context = MagicMock()
+        
+        with self.controller.rpc_errors(context, 'listing books'):
+            raise QueryDeadlineExceeded('The RPC deadline passed before the query could run.')
+        
+        context.set_code.assert_called_once_with(grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.logger_mock.error.assert_not_called()
+    
+    def test_rpc_errors_maps_other_errors_to_internal (
+        self,
+    ) -> None:
+        
+        """Tests that `rpc_errors` logs any other error with its traceback and answers INTERNAL."""
+        
+        context = MagicMock()
+        
+        with self.controller.rpc_errors(context, 'listing books'):
+            raise RuntimeError('connection lost')
+        
+        context.set_code.assert_called_once_with(grpc.StatusCode.INTERNAL)
+        context.set_details.assert_called_once_with('Unexpected error: connection lost')
+        self.logger_mock.error.assert_called_once()
+        self.assertIn('listing books', self.logger_mock.error.call_args.args)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,11 +1,16 @@
 import unittest
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Iterator
 from unittest.mock import MagicMock
 
 import grpc
 from dotenv import load_dotenv
+from psycopg2 import errors
 
+from grpc_service.books_pb import books_pb2
 from grpc_service.controllers.book_controller.book_controller import BookService
+from grpc_service.modules.pagination.keyset_cursor import KeysetCursor
+from grpc_service.modules.database.query_deadline.query_deadline import QueryDeadlineExceeded
 
 class TestBookService(unittest.TestCase):
     
@@ -50,7 +55,8 @@ class TestBookService(unittest.TestCase):
         request = MagicMock()
         request.book_id = 1
         
-        self.database_controller.execute_get_query.return_value = (1, "Book Name", "Author", datetime.utcnow())
+        uploaded_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        self.database_controller.execute_get_query.return_value = [(1, "Book Name", "Author", uploaded_at, 1)]
         
         response = self.service.GetBookById (
             request, 
@@ -60,7 +66,95 @@ class TestBookService(unittest.TestCase):
         self.assertEqual(response.id, 1)
         self.assertEqual(response.book_name, "Book Name")
         self.assertEqual(response.author, "Author")
+        self.assertEqual(response.uploaded_at.ToDatetime(tzinfo=timezone.utc), uploaded_at)
+        self.database_controller.execute_get_query.assert_called_once_with (
+            unittest.mock.ANY,
+            (1,),
+            prepare=True,
+            primary=False,
+        )
 
+    def test_get_book_by_id_served_from_cache_until_updated (
+        self,
+    ) -> None:
+        
+        """
+        Tests that repeated lookups hit the cache and UpdateBook invalidates the entry.
+        """
+        
+        uploaded_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        self.database_controller.execute_get_query.return_value = [(1, "Book Name", "Author", uploaded_at, 1)]
+        self.database_controller.execute_returning_query.return_value = [(1, "Renamed", "Author", uploaded_at, 1)]
+        request = books_pb2.BookRequest(book_id=1)
+        
+        first = self.service.GetBookById(request, self.context)
+        second = self.service.GetBookById(request, self.context)
+        
+        self.assertIs(first, second)
+        self.assertEqual(self.database_controller.execute_get_query.call_count, 1)
+        
+        self.service.UpdateBook (
+            books_pb2.UpdateBookRequest(book_id=1, book_name="Renamed"),
+            MagicMock(),
+        )
+        self.service.GetBookById(request, self.context)
+        
+        self.assertEqual(self.database_controller.execute_get_query.call_count, 2)
+    
+    def test_get_book_by_id_caches_not_found_until_posted (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a missing id is answered from the cache until PostBook creates it.
+        """
+        
+        self.database_controller.execute_get_query.return_value = []
+        self.database_controller.execute_returning_query.return_value = [(7, "New", "Author", datetime(2024, 5, 1, tzinfo=timezone.utc), 1)]
+        request = books_pb2.BookRequest(book_id=7)
+        
+        self.service.GetBookById(request, self.context)
+        self.service.GetBookById(request, self.context)
+        
+        self.assertEqual(self.database_controller.execute_get_query.call_count, 1)
+        self.assertEqual(self.context.set_code.call_args_list, [((grpc.StatusCode.NOT_FOUND,),)] * 2)
+        
+        self.service.PostBook (
+            books_pb2.PostBookRequest(book_name="New", book_author="Author"),
+            MagicMock(),
+        )
+        self.service.GetBookById(request, self.context)
+        
+        self.assertEqual(self.database_controller.execute_get_query.call_count, 2)
+    
+    def test_get_book_by_id_fills_cache_from_primary (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a book posted here is read from the primary while replicas may lack it, and cached as found.
+        """
+        
+        row = (7, "New", "Author", datetime(2024, 5, 1, tzinfo=timezone.utc), 1)
+        
+        def execute_get_query(*args, **kwargs):
+            # The replica has not caught up with the insert; only the primary has the row.
+            return [row] if kwargs.get('primary') else []
+        
+        self.database_controller.execute_returning_query.return_value = [row]
+        self.database_controller.execute_get_query.side_effect = execute_get_query
+        self.service.PostBook(books_pb2.PostBookRequest(book_name="New", book_author="Author"), self.context)
+        request = books_pb2.BookRequest(book_id=7)
+        
+        first = self.service.GetBookById(request, self.context)
+        second = self.service.GetBookById(request, self.context)
+        
+        self.assertEqual(first.id, 7)
+        self.assertIs(first, second)
+        self.assertEqual(self.database_controller.execute_get_query.call_count, 1)
+        self.database_controller.unit_of_work.assert_not_called()
+        self.context.set_code.assert_not_called()
+    
     def test_get_book_by_id_not_found (
         self,
     ) -> None:
@@ -100,8 +194,8 @@ class TestBookService(unittest.TestCase):
         
         request = MagicMock()
         books_data = [
-            (1, "Book1", "Author1", datetime.utcnow()),
-            (2, "Book2", "Author2", datetime.utcnow())
+            (1, "Book1", "Author1", datetime.utcnow(), 1),
+            (2, "Book2", "Author2", datetime.utcnow(), 1)
         ]
         
         self.database_controller.execute_get_query.return_value = books_data
@@ -123,17 +217,22 @@ class TestBookService(unittest.TestCase):
         - Mocks a successful insert operation in the database
         - Calls `PostBook`
         - Asserts that the correct success message is set in the gRPC context
+        - Asserts that the response is the row the INSERT returned
         """
         
         request = MagicMock()
         request.book_name = "New Book"
         request.book_author = "New Author"
         
-        self.database_controller.execute_insert_query.return_value = 1
+        uploaded_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        self.database_controller.execute_returning_query.return_value = [(1, "New Book", "New Author", uploaded_at, 1)]
         
         response = self.service.PostBook(request, self.context)
         
         self.context.set_details.assert_called_with("Inserted Successfully")
+        self.assertEqual(response.id, 1)
+        self.assertEqual(response.uploaded_at.ToDatetime(tzinfo=timezone.utc), uploaded_at)
+        self.assertIn("RETURNING id, book_name, author, uploaded_at", self.database_controller.execute_returning_query.call_args[0][0])
     
     def test_delete_book_success (
         self,
@@ -144,13 +243,35 @@ class TestBookService(unittest.TestCase):
 
         - Calls `DeleteBook`
         - Asserts that the correct success message is set in the gRPC context
+        - Asserts that the response is the row the DELETE returned
         """
         
         request = MagicMock()
         request.book_id = 1
         
+        self.database_controller.execute_returning_query.return_value = [(1, "Old Book", "Author", datetime(2024, 5, 1, tzinfo=timezone.utc), 1)]
+        
         response = self.service.DeleteBook(request, self.context)
         self.context.set_details.assert_called_with("Deleted Successfully")
+        self.assertEqual(response.book_name, "Old Book")
+    
+    def test_delete_book_not_found (
+        self,
+    ) -> None:
+        
+        """
+        Tests deleting a book that does not exist.
+
+        - Mocks a DELETE that returned no row
+        - Asserts that NOT_FOUND is set
+        """
+        
+        self.database_controller.execute_returning_query.return_value = []
+        
+        self.service.DeleteBook(books_pb2.DeleteBookRequest(book_id=1), self.context)
+        
+        self.context.set_code.assert_called_with(grpc.StatusCode.NOT_FOUND)
+        self.context.set_details.assert_called_with("Book not found.")
     
     def test_update_book_success (
         self,
@@ -168,14 +289,21 @@ class TestBookService(unittest.TestCase):
         request.book_id = 1
         request.book_name = "Updated Name"
         request.author = "Updated Author"
+        request.expected_version = 0
         
-        self.database_controller.execute_edit_query.return_value = (1, "Updated Name", "Updated Author", datetime.utcnow())
+        self.database_controller.execute_returning_query.return_value = [(1, "Updated Name", "Updated Author", datetime.now(timezone.utc), 2)]
         
         response = self.service.UpdateBook(request, self.context)
+        query, params = self.database_controller.execute_returning_query.call_args[0]
         
         self.assertEqual(response.id, 1)
         self.assertEqual(response.book_name, "Updated Name")
         self.assertEqual(response.author, "Updated Author")
+        self.assertEqual(response.version, 2)
+        self.assertTrue(response.HasField("uploaded_at"))
+        self.assertIn("version = version + 1 WHERE id = %s RETURNING", query)
+        self.assertTrue(query.endswith("RETURNING id, book_name, author, uploaded_at, version"))
+        self.assertEqual(params, ("Updated Name", "Updated Author", 1))
     
     def test_update_book_not_found (
         self,
@@ -193,21 +321,84 @@ class TestBookService(unittest.TestCase):
         request.book_id = 1
         request.book_name = "Updated Name"
         request.author = "Updated Author"
+        request.expected_version = 0
         
-        self.database_controller.execute_edit_query.return_value = None
+        self.database_controller.execute_returning_query.return_value = []
         
         response = self.service.UpdateBook(request, self.context)
         
         self.context.set_code.assert_called_with(grpc.StatusCode.NOT_FOUND)
         self.context.set_details.assert_called_with("Book not found.")
+        self.database_controller.execute_get_query.assert_not_called()
+    
+    def test_update_book_with_expected_version (
+        self,
+    ) -> None:
+        
+        """
+        Tests that `expected_version` makes the UPDATE match only a book still at that version.
+        """
+        
+        self.database_controller.execute_returning_query.return_value = [(1, "Updated Name", "Author", None, 4)]
+        
+        response = self.service.UpdateBook (
+            books_pb2.UpdateBookRequest(book_id=1, book_name="Updated Name", expected_version=3),
+            self.context,
+        )
+        query, params = self.database_controller.execute_returning_query.call_args[0]
+        
+        self.assertEqual(response.version, 4)
+        self.assertIn("WHERE id = %s AND version = %s RETURNING", query)
+        self.assertEqual(params, ("Updated Name", 1, 3))
+        self.context.set_code.assert_not_called()
+    
+    def test_update_book_version_mismatch (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a book no longer at `expected_version` is left alone and the call is ABORTED.
+        """
+        
+        self.database_controller.execute_returning_query.return_value = []
+        self.database_controller.execute_get_query.return_value = [(5,)]
+        
+        response = self.service.UpdateBook (
+            books_pb2.UpdateBookRequest(book_id=1, book_name="Updated Name", expected_version=3),
+            self.context,
+        )
+        
+        self.assertEqual(response, books_pb2.BookResponse())
+        self.context.set_code.assert_called_with(grpc.StatusCode.ABORTED)
+        self.context.set_details.assert_called_with("Book is at version 5, not 3.")
+        self.database_controller.unit_of_work.assert_not_called()
+        self.database_controller.execute_get_query.assert_called_once_with("SELECT version FROM base_book WHERE id = %s", (1,), prepare=True, primary=True)
+    
+    def test_update_book_with_expected_version_not_found (
+        self,
+    ) -> None:
         
+        """
+        Tests that a conditional update of a missing book is still NOT_FOUND.
+        """
+        
+        self.database_controller.execute_returning_query.return_value = []
+        self.database_controller.execute_get_query.return_value = []
+        
+        self.service.UpdateBook (
+            books_pb2.UpdateBookRequest(book_id=1, book_name="Updated Name", expected_version=3),
+            self.context,
+        )
+        
+        self.context.set_code.assert_called_with(grpc.StatusCode.NOT_FOUND)
+    
     def test_get_book_by_id_none_returned (
         self,
     ) -> None:
         
         """
         Tests retrieving a book by ID when the database returns None for the query.
-        
+
         - Mocks the database returning None (not found)
         - Asserts that the response is handled gracefully with status code NOT_FOUND
         """
@@ -232,7 +423,7 @@ class TestBookService(unittest.TestCase):
         
         """
         Tests retrieving all books when there are no books in the database.
-        
+
         - Mocks an empty database response
         - Asserts that the response contains an empty list of books
         """
@@ -255,7 +446,7 @@ class TestBookService(unittest.TestCase):
         
         """
         Tests posting a duplicate book.
-        
+
         - Mocks a failed insert operation due to a duplicate book
         - Asserts that the appropriate error message and status code are set
         """
@@ -265,7 +456,7 @@ class TestBookService(unittest.TestCase):
         request.book_author = "Same Author"
         
         # Mocks failure due to duplicate book
-        self.database_controller.execute_insert_query.side_effect = Exception("Duplicate book.")
+        self.database_controller.execute_returning_query.side_effect = Exception("Duplicate book.")
         
         response = self.service.PostBook (
             request, 
@@ -281,7 +472,7 @@ class TestBookService(unittest.TestCase):
         
         """
         Tests for database errors while fetching a book.
-        
+
         - Mocks a database exception during the `execute_get_query`
         - Asserts that the error is logged and handled with a generic error response
         """
@@ -298,7 +489,57 @@ class TestBookService(unittest.TestCase):
         )
         
         self.context.set_code.assert_called_with(grpc.StatusCode.INTERNAL)
-        self.context.set_details.assert_called_with("Internal server error: Database error")
+        self.context.set_details.assert_called_with("Unexpected error: Database error")
+    
+    def test_get_all_books_database_error (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a failed GetAllBooks answers INTERNAL with an empty BooksResponse.
+        """
+        
+        self.database_controller.execute_get_query.side_effect = Exception("Database error")
+        
+        response = self.service.GetAllBooks(books_pb2.EmptyRequest(), self.context)
+        
+        self.assertEqual(response, books_pb2.BooksResponse())
+        self.context.set_code.assert_called_with(grpc.StatusCode.INTERNAL)
+    
+    def test_get_book_by_id_statement_timeout (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a query cancelled by `statement_timeout` is answered with DEADLINE_EXCEEDED and not logged as an error.
+        """
+        
+        self.service.logger = MagicMock()
+        self.database_controller.execute_get_query.side_effect = errors.QueryCanceled("canceling statement due to statement timeout")
+        
+        response = self.service.GetBookById(books_pb2.BookRequest(book_id=1), self.context)
+        
+        self.assertEqual(response.id, 0)
+        self.context.set_code.assert_called_with(grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.service.logger.error.assert_not_called()
+    
+    def test_writes_past_the_deadline (
+        self,
+    ) -> None:
+        
+        """
+        Tests that PostBook, DeleteBook and UpdateBook answer DEADLINE_EXCEEDED once the deadline has passed.
+        """
+        
+        self.service.logger = MagicMock()
+        self.database_controller.execute_returning_query.side_effect = QueryDeadlineExceeded("The RPC deadline passed before the query could run.")
+        
+        self.service.PostBook(books_pb2.PostBookRequest(book_name="Dune", book_author="Herbert"), self.context)
+        self.service.DeleteBook(books_pb2.DeleteBookRequest(book_id=1), self.context)
+        self.service.UpdateBook(books_pb2.UpdateBookRequest(book_id=1, book_name="Dune"), self.context)
+        
+        self.assertEqual(self.context.set_code.call_args_list, [((grpc.StatusCode.DEADLINE_EXCEEDED,),)] * 3)
+        self.service.logger.error.assert_not_called()
     
     def test_post_book_database_failure (
         self,
@@ -306,7 +547,7 @@ class TestBookService(unittest.TestCase):
         
         """
         Tests posting a book when the database fails to insert the data.
-        
+
         - Mocks a database insertion failure
         - Asserts that the appropriate error response is returned
         """
@@ -316,7 +557,7 @@ class TestBookService(unittest.TestCase):
         request.book_author = "Author Name"
         
         # Mocks failure to insert the book into the database
-        self.database_controller.execute_insert_query.side_effect = Exception('Database insert failed')
+        self.database_controller.execute_returning_query.side_effect = Exception('Database insert failed')
         
         response = self.service.PostBook (
             request, 
@@ -332,7 +573,7 @@ class TestBookService(unittest.TestCase):
         
         """
         Tests deleting a book when the database fails to delete the book.
-        
+
         - Mocks a failure during the deletion operation
         - Asserts that the error is handled with a generic error message
         """
@@ -341,7 +582,7 @@ class TestBookService(unittest.TestCase):
         request.book_id = 1
         
         # Mocks failure to delete the book from the database
-        self.database_controller.execute_delete_query.side_effect = Exception("Database delete failed.")
+        self.database_controller.execute_returning_query.side_effect = Exception("Database delete failed.")
         
         response = self.service.DeleteBook (
             request, 
@@ -351,6 +592,524 @@ class TestBookService(unittest.TestCase):
         self.context.set_code.assert_called_with(grpc.StatusCode.INTERNAL)
         self.context.set_details.assert_called_with("Unexpected error: Database delete failed.")
     
+    def test_stream_books_yields_one_message_per_chunk (
+        self,
+    ) -> None:
+        
+        """
+        Tests streaming books chunk by chunk.
+
+        - Mocks two chunks returned by the server-side cursor
+        - Asserts that each chunk becomes its own BooksResponse with the requested chunk size
+        """
+        
+        request = books_pb2.StreamBooksRequest(chunk_size=2)
+        uploaded_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        
+        self.database_controller.stream_get_query.return_value = iter([
+            [(1, "Book1", "Author1", uploaded_at, 1), (2, "Book2", "Author2", uploaded_at, 1)],
+            [(3, "Book3", "Author3", uploaded_at, 1)],
+        ])
+        
+        responses = list(self.service.StreamBooks(request, self.context))
+        
+        self.assertEqual([len(response.books) for response in responses], [2, 1])
+        self.assertEqual(responses[1].books[0].id, 3)
+        self.assertEqual(responses[0].books[0].uploaded_at.ToDatetime(tzinfo=timezone.utc), uploaded_at)
+        self.assertEqual (
+            self.database_controller.stream_get_query.call_args.kwargs["chunk_size"], 
+            2,
+        )
+    
+    def test_stream_books_negative_chunk_size (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a negative chunk size is rejected before querying.
+        """
+        
+        request = books_pb2.StreamBooksRequest(chunk_size=-1)
+        
+        responses = list(self.service.StreamBooks(request, self.context))
+        
+        self.assertEqual(responses, [])
+        self.context.set_code.assert_called_with(grpc.StatusCode.INVALID_ARGUMENT)
+        self.database_controller.stream_get_query.assert_not_called()
+    
+    def test_stream_books_database_failure (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a failure mid-stream sets INTERNAL.
+        """
+        
+        def failing_chunks():
+            yield [(1, "Book1", "Author1", None, 1)]
+            raise Exception("Cursor lost")
+        
+        self.database_controller.stream_get_query.return_value = failing_chunks()
+        
+        responses = list(self.service.StreamBooks(books_pb2.StreamBooksRequest(), self.context))
+        
+        self.assertEqual(len(responses), 1)
+        self.context.set_code.assert_called_with(grpc.StatusCode.INTERNAL)
+        self.context.set_details.assert_called_with("Unexpected error: Cursor lost")
+    
+    def test_list_books_first_page_has_next_cursor (
+        self,
+    ) -> None:
+        
+        """
+        Tests the first ListBooks page when more books exist.
+
+        - Mocks `page_size + 1` rows so a next page is detected
+        - Asserts that only `page_size` books are returned and the cursor points at the last one
+        """
+        
+        uploaded_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        self.database_controller.execute_get_query.return_value = [
+            (3, "Book3", "Author3", uploaded_at, 1),
+            (2, "Book2", "Author2", uploaded_at, 1),
+            (1, "Book1", "Author1", uploaded_at, 1),
+        ]
+        
+        response = self.service.ListBooks (
+            books_pb2.ListBooksRequest(page_size=2), 
+            self.context,
+        )
+        
+        query, params = self.database_controller.execute_get_query.call_args.args
+        
+        self.assertEqual([book.id for book in response.books], [3, 2])
+        self.assertEqual(KeysetCursor.decode(response.next_cursor), (uploaded_at, 2))
+        self.assertNotIn("WHERE", query)
+        self.assertNotIn("OFFSET", query)
+        self.assertEqual(params, (3,))
+    
+    def test_list_books_with_cursor_uses_keyset (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a cursor becomes a keyset predicate and that the last page has no cursor.
+        """
+        
+        uploaded_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        self.database_controller.execute_get_query.return_value = [
+            (1, "Book1", "Author1", uploaded_at, 1),
+        ]
+        
+        response = self.service.ListBooks (
+            books_pb2.ListBooksRequest (
+                page_size=2, 
+                cursor=KeysetCursor.encode(uploaded_at, 2),
+            ), 
+            self.context,
+        )
+        
+        query, params = self.database_controller.execute_get_query.call_args.args
+        
+        self.assertIn("(uploaded_at, id) < (%s, %s)", query)
+        self.assertEqual(params, (uploaded_at, 2, 3))
+        self.assertEqual(len(response.books), 1)
+        self.assertEqual(response.next_cursor, "")
+    
+    def test_list_books_invalid_cursor (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a malformed cursor is rejected with INVALID_ARGUMENT before querying.
+        """
+        
+        self.service.ListBooks (
+            books_pb2.ListBooksRequest(cursor="not-a-cursor"), 
+            self.context,
+        )
+        
+        self.context.set_code.assert_called_with(grpc.StatusCode.INVALID_ARGUMENT)
+        self.database_controller.execute_get_query.assert_not_called()
+    
+    def test_batch_get_books_preserves_request_order (
+        self,
+    ) -> None:
+        
+        """
+        Tests that BatchGetBooks runs one query and answers in request order.
+
+        - Mocks rows returned in a different order than requested
+        - Asserts order, duplicates and the not-found marker for a missing ID
+        """
+        
+        self.database_controller.execute_get_query.return_value = [
+            (1, "Book1", "Author1", None, 1),
+            (3, "Book3", "Author3", None, 1),
+        ]
+        
+        response = self.service.BatchGetBooks (
+            books_pb2.BatchGetBooksRequest(book_ids=[3, 2, 1, 3]), 
+            self.context,
+        )
+        
+        query, params = self.database_controller.execute_get_query.call_args.args
+        
+        self.database_controller.execute_get_query.assert_called_once()
+        self.assertIn("id = ANY(%s)", query)
+        self.assertEqual(sorted(params[0]), [1, 2, 3])
+        self.assertEqual([result.book_id for result in response.results], [3, 2, 1, 3])
+        self.assertEqual([result.found for result in response.results], [True, False, True, True])
+        self.assertEqual(response.results[0].book.book_name, "Book3")
+        self.assertFalse(response.results[1].HasField("book"))
+    
+    def test_batch_get_books_too_many_ids (
+        self,
+    ) -> None:
+        
+        """
+        Tests that oversized batches are rejected without querying.
+        """
+        
+        self.service.batch_max_ids = 2
+        
+        self.service.BatchGetBooks (
+            books_pb2.BatchGetBooksRequest(book_ids=[1, 2, 3]), 
+            self.context,
+        )
+        
+        self.context.set_code.assert_called_with(grpc.StatusCode.INVALID_ARGUMENT)
+        self.database_controller.execute_get_query.assert_not_called()
+    
+    def test_get_all_books_selects_only_masked_columns (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a `fields` mask narrows both the SELECT list and the returned books.
+        """
+        
+        self.database_controller.execute_get_query.return_value = [(1, "Book1"), (2, "Book2")]
+        
+        response = self.service.GetAllBooks (
+            books_pb2.EmptyRequest(fields={"paths": ["book_name", "id"]}),
+            self.context,
+        )
+        
+        self.database_controller.execute_get_query.assert_called_once_with (
+            "SELECT id, book_name FROM base_book",
+        )
+        self.assertEqual (
+            list(response.books),
+            [books_pb2.BookResponse(id=1, book_name="Book1"), books_pb2.BookResponse(id=2, book_name="Book2")],
+        )
+    
+    def test_unknown_field_is_invalid_argument (
+        self,
+    ) -> None:
+        
+        """
+        Tests that every read rejects a mask naming an unknown field before querying.
+        """
+        
+        mask = {"paths": ["description"]}
+        
+        self.service.GetBookById(books_pb2.BookRequest(book_id=1, fields=mask), self.context)
+        self.service.GetAllBooks(books_pb2.EmptyRequest(fields=mask), self.context)
+        list(self.service.StreamBooks(books_pb2.StreamBooksRequest(fields=mask), self.context))
+        self.service.ListBooks(books_pb2.ListBooksRequest(fields=mask), self.context)
+        self.service.BatchGetBooks(books_pb2.BatchGetBooksRequest(book_ids=[1], fields=mask), self.context)
+        
+        self.assertEqual (
+            [call.args[0] for call in self.context.set_code.call_args_list],
+            [grpc.StatusCode.INVALID_ARGUMENT] * 5,
+        )
+        self.database_controller.execute_get_query.assert_not_called()
+        self.database_controller.stream_get_query.assert_not_called()
+    
+    def test_get_book_by_id_masks_the_cached_book (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a masked call is served from the whole cached book without changing it.
+        """
+        
+        self.database_controller.execute_get_query.return_value = [(1, "Book Name", "Author", None, 1)]
+        
+        whole = self.service.GetBookById(books_pb2.BookRequest(book_id=1), self.context)
+        masked = self.service.GetBookById (
+            books_pb2.BookRequest(book_id=1, fields={"paths": ["author"]}),
+            self.context,
+        )
+        
+        self.database_controller.execute_get_query.assert_called_once()
+        self.assertEqual(masked, books_pb2.BookResponse(author="Author"))
+        self.assertEqual(whole.book_name, "Book Name")
+    
+    def test_list_books_mask_keeps_cursor_columns (
+        self,
+    ) -> None:
+        
+        """
+        Tests that ListBooks still selects the keyset columns it needs for the cursor but does not return them.
+        """
+        
+        uploaded_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        self.database_controller.execute_get_query.return_value = [
+            (2, "Book2", uploaded_at),
+            (1, "Book1", uploaded_at),
+        ]
+        
+        response = self.service.ListBooks (
+            books_pb2.ListBooksRequest(page_size=1, fields={"paths": ["book_name"]}),
+            self.context,
+        )
+        
+        query, _ = self.database_controller.execute_get_query.call_args.args
+        
+        self.assertIn("SELECT id, book_name, uploaded_at", query)
+        self.assertEqual(list(response.books), [books_pb2.BookResponse(book_name="Book2")])
+        self.assertEqual(KeysetCursor.decode(response.next_cursor), (uploaded_at, 2))
+    
+    def test_batch_get_books_mask_keeps_id (
+        self,
+    ) -> None:
+        
+        """
+        Tests that BatchGetBooks selects `id` to match rows to IDs even when only other fields are requested.
+        """
+        
+        self.database_controller.execute_get_query.return_value = [(3, "Author3")]
+        
+        response = self.service.BatchGetBooks (
+            books_pb2.BatchGetBooksRequest(book_ids=[3], fields={"paths": ["author"]}),
+            self.context,
+        )
+        
+        query, _ = self.database_controller.execute_get_query.call_args.args
+        
+        self.assertIn("SELECT id, author", query)
+        self.assertEqual(response.results[0].book, books_pb2.BookResponse(author="Author3"))
+    
+    def test_import_books_copies_in_chunks (
+        self,
+    ) -> None:
+        
+        """
+        Tests ImportBooks chunking and validation.
+
+        - Streams two request batches with one invalid row
+        - Asserts one COPY per chunk and the per-row error for the invalid row
+        """
+        
+        self.service.import_chunk_size = 2
+        self.database_controller.execute_copy_query.side_effect = lambda query, rows: len(rows)
+        
+        requests = [
+            books_pb2.ImportBooksRequest (
+                rows=[
+                    books_pb2.ImportBookRow(line=2, book_name="Dune", author="Herbert"),
+                    books_pb2.ImportBookRow(line=3, book_name=" ", author="Nobody"),
+                ],
+            ),
+            books_pb2.ImportBooksRequest (
+                rows=[
+                    books_pb2.ImportBookRow(line=4, book_name="Emma", author="Austen"),
+                    books_pb2.ImportBookRow(line=5, book_name="Ulysses", author="Joyce"),
+                ],
+            ),
+        ]
+        
+        response = self.service.ImportBooks(iter(requests), self.context)
+        
+        copies = self.database_controller.execute_copy_query.call_args_list
+        
+        self.assertEqual(len(copies), 2)
+        self.assertTrue(copies[0].args[0].startswith("COPY base_book"))
+        self.assertEqual([row[0] for row in copies[0].args[1]], ["Dune", "Emma"])
+        self.assertEqual((response.received, response.imported, response.failed), (4, 3, 1))
+        self.assertEqual(response.errors[0].line, 3)
+        self.context.set_code.assert_not_called()
     
+    def test_import_books_drops_cached_misses (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a book cached as not found is served once an import has inserted it.
+        """
+        
+        request = books_pb2.BookRequest(book_id=7)
+        self.database_controller.execute_get_query.return_value = []
+        self.service.GetBookById(request, self.context)
+        
+        self.database_controller.execute_copy_query.side_effect = lambda query, rows: len(rows)
+        self.service.ImportBooks (
+            iter([books_pb2.ImportBooksRequest(rows=[books_pb2.ImportBookRow(line=1, book_name="Dune", author="Herbert")])]),
+            MagicMock(),
+        )
+        
+        self.database_controller.execute_get_query.return_value = [(7, "Dune", "Herbert", datetime(2024, 5, 1, tzinfo=timezone.utc), 1)]
+        response = self.service.GetBookById(request, MagicMock())
+        
+        self.assertEqual(response.book_name, "Dune")
+        self.assertEqual(self.database_controller.execute_get_query.call_count, 2)
+    
+    def test_import_books_rejected_chunk (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a chunk refused by the database is reported row by row and capped.
+        """
+        
+        self.service.import_max_errors = 1
+        self.database_controller.execute_copy_query.side_effect = Exception("value too long")
+        
+        request = books_pb2.ImportBooksRequest (
+            rows=[
+                books_pb2.ImportBookRow(line=1, book_name="Dune", author="Herbert"),
+                books_pb2.ImportBookRow(line=2, book_name="Emma", author="Austen"),
+            ],
+        )
+        
+        response = self.service.ImportBooks(iter([request]), self.context)
+        
+        self.assertEqual((response.received, response.imported, response.failed), (2, 0, 2))
+        self.assertEqual(len(response.errors), 1)
+        self.assertIn("value too long", response.errors[0].message)
+    
+    def test_import_books_statement_timeout_stops_the_import (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a chunk cancelled by `statement_timeout` ends the import with DEADLINE_EXCEEDED instead of being reported as bad rows.
+        """
+        
+        self.service.import_chunk_size = 1
+        self.database_controller.execute_copy_query.side_effect = errors.QueryCanceled("canceling statement due to statement timeout")
+        
+        request = books_pb2.ImportBooksRequest (
+            rows=[
+                books_pb2.ImportBookRow(line=1, book_name="Dune", author="Herbert"),
+                books_pb2.ImportBookRow(line=2, book_name="Emma", author="Austen"),
+            ],
+        )
+        
+        response = self.service.ImportBooks(iter([request]), self.context)
+        
+        self.assertEqual((response.imported, response.failed), (0, 0))
+        self.assertEqual(self.database_controller.execute_copy_query.call_count, 1)
+        self.context.set_code.assert_called_with(grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.context.set_trailing_metadata.assert_called_once_with((('imported-rows', '0'),))
+    
+    def test_import_books_broken_stream_keeps_committed_chunks (
+        self,
+    ) -> None:
+        
+        """
+        Tests that chunks committed before the stream breaks stay imported and are reported in the trailing metadata.
+        """
+        
+        self.service.import_chunk_size = 1
+        self.database_controller.execute_copy_query.side_effect = lambda query, rows: len(rows)
+        
+        def requests () -> Iterator[books_pb2.ImportBooksRequest]:
+            yield books_pb2.ImportBooksRequest(rows=[books_pb2.ImportBookRow(line=1, book_name="Dune", author="Herbert")])
+            raise ConnectionError("client went away")
+        
+        response = self.service.ImportBooks(requests(), self.context)
+        
+        self.assertEqual((response.received, response.imported), (1, 1))
+        self.database_controller.unit_of_work.assert_called_once()
+        self.context.set_code.assert_called_with(grpc.StatusCode.INTERNAL)
+        self.context.set_trailing_metadata.assert_called_once_with((('imported-rows', '1'),))
+
+    def test_upsert_books_in_chunks (
+        self,
+    ) -> None:
+        
+        """
+        Tests UpsertBooks chunking and counting.
+
+        - Sends four books, one ISBN twice, with two books per chunk
+        - Asserts one ON CONFLICT statement per chunk, in ISBN order, in one unit of work
+        - Asserts rows returned at version 1 count as inserted, others as updated, missing ones as unchanged
+        """
+        
+        self.service.upsert_chunk_size = 2
+        self.database_controller.execute_returning_query.side_effect = [[(1, 1), (2, 4)], []]
+        
+        response = self.service.UpsertBooks (
+            books_pb2.UpsertBooksRequest (
+                books=[
+                    books_pb2.UpsertBookRow(isbn="9780000000003", book_name="Emma", author="Austen"),
+                    books_pb2.UpsertBookRow(isbn="9780000000001", book_name="Dune", author="Herbert"),
+                    books_pb2.UpsertBookRow(isbn="9780000000002", book_name="Ulysses", author="Joyce"),
+                    books_pb2.UpsertBookRow(isbn="9780000000001", book_name="Dune", author="Frank Herbert"),
+                ],
+            ),
+            self.context,
+        )
+        
+        statements = self.database_controller.execute_returning_query.call_args_list
+        
+        self.assertEqual((response.inserted, response.updated, response.unchanged), (1, 1, 1))
+        self.assertEqual(len(statements), 2)
+        self.assertIn("ON CONFLICT (isbn) DO UPDATE", statements[0].args[0])
+        self.assertEqual (
+            statements[0].args[1], 
+            ("9780000000001", "Dune", "Frank Herbert", "9780000000002", "Ulysses", "Joyce"),
+        )
+        self.assertEqual(statements[1].args[1], ("9780000000003", "Emma", "Austen"))
+        self.assertEqual([statement.kwargs["prepare"] for statement in statements], [True, False])
+        self.database_controller.unit_of_work.assert_called_once()
+        self.context.set_code.assert_not_called()
+    
+    def test_upsert_books_invalid_row (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a batch with an invalid book is rejected as a whole without touching the database.
+        """
+        
+        response = self.service.UpsertBooks (
+            books_pb2.UpsertBooksRequest (
+                books=[
+                    books_pb2.UpsertBookRow(isbn="9780000000001", book_name="Dune", author="Herbert"),
+                    books_pb2.UpsertBookRow(isbn="97800000000020", book_name="Emma", author="Austen"),
+                ],
+            ),
+            self.context,
+        )
+        
+        self.assertEqual(response, books_pb2.UpsertBooksResponse())
+        self.context.set_code.assert_called_with(grpc.StatusCode.INVALID_ARGUMENT)
+        self.context.set_details.assert_called_with("books[1]: isbn is longer than 13 characters.")
+        self.database_controller.execute_returning_query.assert_not_called()
+    
+    def test_upsert_books_too_many (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a batch over `GRPC_UPSERT_MAX_BOOKS` is rejected.
+        """
+        
+        self.service.upsert_max_books = 1
+        
+        self.service.UpsertBooks (
+            books_pb2.UpsertBooksRequest (
+                books=[books_pb2.UpsertBookRow(isbn=str(n), book_name="Dune", author="Herbert") for n in range(2)],
+            ),
+            self.context,
+        )
+        
+        self.context.set_code.assert_called_with(grpc.StatusCode.INVALID_ARGUMENT)
+        self.database_controller.execute_returning_query.assert_not_called()
+
 if __name__ == "__main__":
     unittest.main()
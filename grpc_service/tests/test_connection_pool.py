@@ -0,0 +1,264 @@
+import time
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from grpc_service.modules.database.connection_pool.connection_pool import (
+    InstrumentedConnectionPool,
+    PoolTimeout,
+)
+
+class FakePoolCursor:
+    
+    """
+    A fake cursor whose `execute` can be made to fail.
+    """
+    
+    def __init__ (
+        self, 
+        connection: 'FakePoolConnection',
+    ) -> None:
+        
+        self.connection = connection
+    
+    def execute (
+        self, 
+        query: str,
+    ) -> None:
+        
+        self.connection.pings += 1
+        if self.connection.broken:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+    
+    def __enter__ (
+        self,
+    ) -> 'FakePoolCursor':
+        
+        return self
+    
+    def __exit__ (
+        self, 
+        *args,
+    ) -> None:
+        
+        pass
+
+class FakePoolConnection:
+    
+    """
+    A fake psycopg2 connection exposing what the pool inspects.
+    """
+    
+    def __init__ (
+        self,
+    ) -> None:
+        
+        self.closed = 0
+        self.broken = False
+        self.pings = 0
+        self.rollbacks = 0
+        self.info = SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+    
+    def cursor (
+        self,
+    ) -> FakePoolCursor:
+        
+        return FakePoolCursor(self)
+    
+    def rollback (
+        self,
+    ) -> None:
+        
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+    
+    def close (
+        self,
+    ) -> None:
+        
+        self.closed = 1
+
+class TestInstrumentedConnectionPool(unittest.TestCase):
+    
+    """
+    Unit tests for the `InstrumentedConnectionPool` class.
+
+    This test suite ensures that:
+    - `minconn` connections are opened up front.
+    - Exhausted pools block and time out instead of raising immediately.
+    - Old, broken and dirty connections are handled on checkout and return.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Patches `psycopg2.connect` to hand out fake connections.
+        """
+        
+        self.opened = []
+        
+        def connect(**kwargs):
+            connection = FakePoolConnection()
+            self.opened.append(connection)
+            return connection
+        
+        patcher = patch (
+            'grpc_service.modules.database.connection_pool.connection_pool.psycopg2.connect',
+            side_effect=connect,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_prewarms_minconn (
+        self,
+    ) -> None:
+        
+        """
+        Tests that `minconn` connections exist before the first checkout.
+        """
+        
+        pool = InstrumentedConnectionPool(2, 5, name='test', host='db')
+        
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(pool.stats(), {'size': 2, 'in_use': 0, 'idle': 2, 'waiters': 0, 'max': 5})
+    
+    def test_exhausted_pool_times_out (
+        self,
+    ) -> None:
+        
+        """
+        Tests that checkout waits for the timeout and then raises PoolTimeout.
+        """
+        
+        pool = InstrumentedConnectionPool(0, 1, name='test')
+        pool.getconn()
+        
+        started = time.monotonic()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(timeout=0.05)
+        
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertIsInstance(PoolTimeout(), PoolError)
+    
+    def test_waiter_receives_returned_connection (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a blocked caller is handed the connection another thread returns.
+        """
+        
+        pool = InstrumentedConnectionPool(0, 1, name='test')
+        connection = pool.getconn()
+        received = []
+        
+        waiter = threading.Thread(target=lambda: received.append(pool.getconn(timeout=5)))
+        waiter.start()
+        
+        while pool.stats()['waiters'] == 0:
+            time.sleep(0.001)
+        pool.putconn(connection)
+        waiter.join(timeout=5)
+        
+        self.assertEqual(received, [connection])
+        self.assertEqual(len(self.opened), 1)
+    
+    def test_recycles_connections_by_age (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a connection older than `max_age` is replaced on checkout.
+        """
+        
+        pool = InstrumentedConnectionPool(1, 1, name='test', max_age=0)
+        old = self.opened[0]
+        time.sleep(0.001)
+        
+        connection = pool.getconn()
+        
+        self.assertIsNot(connection, old)
+        self.assertTrue(old.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+    
+    def test_health_check_replaces_dead_connection (
+        self,
+    ) -> None:
+        
+        """
+        Tests that an idle connection failing `SELECT 1` is replaced on checkout.
+        """
+        
+        pool = InstrumentedConnectionPool(1, 1, name='test', health_check_after=0)
+        dead = self.opened[0]
+        dead.broken = True
+        time.sleep(0.001)
+        
+        connection = pool.getconn()
+        
+        self.assertEqual(dead.pings, 1)
+        self.assertIsNot(connection, dead)
+        self.assertTrue(dead.closed)
+    
+    def test_putconn_rolls_back_open_transaction (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a connection returned mid-transaction is rolled back before reuse.
+        """
+        
+        pool = InstrumentedConnectionPool(0, 1, name='test')
+        connection = pool.getconn()
+        connection.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        
+        pool.putconn(connection)
+        
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertIs(pool.getconn(), connection)
+    
+    def test_putconn_discards_closed_connection (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a closed connection frees its slot instead of returning to the pool.
+        """
+        
+        pool = InstrumentedConnectionPool(0, 1, name='test')
+        connection = pool.getconn()
+        connection.closed = 2
+        
+        pool.putconn(connection)
+        
+        self.assertEqual(pool.stats(), {'size': 0, 'in_use': 0, 'idle': 0, 'waiters': 0, 'max': 1})
+        self.assertIsNot(pool.getconn(), connection)
+    
+    def test_closeall (
+        self,
+    ) -> None:
+        
+        """
+        Tests that closeall closes connections and later checkouts fail.
+        """
+        
+        pool = InstrumentedConnectionPool(1, 2, name='test')
+        in_use = pool.getconn()
+        
+        pool.closeall()
+        pool.putconn(in_use)
+        
+        self.assertTrue(all(connection.closed for connection in self.opened))
+        with self.assertRaises(PoolError):
+            pool.getconn()
+
+
+if __name__ == "__main__":
+    unittest.main()
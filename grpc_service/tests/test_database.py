@@ -1,9 +1,16 @@
 import unittest
 from typing import Any, List, Optional, Tuple
 
+from psycopg2 import errors
 from psycopg2.extensions import connection
 
 from grpc_service.modules.database.controller.database_controller import DatabaseController
+from grpc_service.modules.database.query_metrics.query_metrics import QueryObserver
+from grpc_service.modules.database.query_deadline.query_deadline import (
+    QueryDeadlineExceeded,
+    set_query_deadline,
+    reset_query_deadline,
+)
 
 class FakeCursor:
     
@@ -15,12 +22,14 @@ class FakeCursor:
         self, 
         result: Optional[List[Tuple[Any, ...]]] = None, 
         rowcount: int = 1,
+        connection: Optional['FakeConnection'] = None,
     ) -> None:
         
         """
         Initializes the fake cursor with a result set and row count.
         """
         
+        self.connection = connection
         self.result = result or []
         self.rowcount = rowcount
         self.executed_query = None
@@ -40,6 +49,14 @@ class FakeCursor:
         self.executed_query = query
         self.executed_params = params
         
+        if self.connection is not None:
+            self.connection.executed.append((query, params))
+            self.connection.autocommit_seen = self.connection.autocommit
+            
+            if self.connection.lost_statements and query.startswith("EXECUTE"):
+                self.connection.lost_statements = False
+                raise errors.InvalidSqlStatementName("prepared statement does not exist")
+        
         if "RETURNING" in query.upper():
             self.description = ("dummy",)
             if not self.result:
@@ -67,6 +84,32 @@ class FakeCursor:
         
         return self.result[0] if self.result else None
 
+    def fetchmany (
+        self,
+        size: int,
+    ) -> List[Tuple[Any, ...]]:
+        
+        """
+        Returns and consumes up to `size` rows from the result set.
+        """
+        
+        rows, self.result = self.result[:size], self.result[size:]
+        return rows
+    
+    def copy_expert (
+        self, 
+        query, 
+        file,
+    ) -> None:
+        
+        """
+        Simulates a COPY FROM STDIN by reading the whole input.
+        """
+        
+        self.executed_query = query
+        self.copied = file.read()
+        self.rowcount = self.copied.count('\n')
+    
     def __enter__ (
         self,
     )  -> 'FakeCursor':
@@ -110,19 +153,28 @@ class FakeConnection:
         self.rowcount = rowcount
         self.committed = False
         self.rolled_back = False
+        self.executed = []
+        self.lost_statements = False
+        self.closed = 0
+        self.autocommit = False
+        self.autocommit_seen = None
 
     def cursor (
         self,
+        name: Optional[str] = None,
     ) -> FakeCursor:
         
         """
         Returns a fake cursor instance.
         """
         
-        return FakeCursor (
+        self.cursor_name = name
+        self.last_cursor = FakeCursor (
             self.cursor_result, 
             self.rowcount,
+            self,
         )
+        return self.last_cursor
 
     def commit (
         self,
@@ -163,6 +215,9 @@ class FakeDatabase:
         self.cursor_result = cursor_result
         self.rowcount = rowcount
         self.released = False
+        self.connection = None
+        self.reuse_connection = False
+        self.read_connections = 0
 
     def get_connection (
         self,
@@ -172,11 +227,24 @@ class FakeDatabase:
         Simulates retrieving a database connection.
         """
         
-        return FakeConnection (
-            self.cursor_result, 
-            self.rowcount,
-        )
+        if not (self.reuse_connection and self.connection):
+            self.connection = FakeConnection (
+                self.cursor_result, 
+                self.rowcount,
+            )
+        return self.connection
 
+    def get_read_connection (
+        self,
+    ) -> connection:
+        
+        """
+        Simulates retrieving a read connection, recording that a read was routed.
+        """
+        
+        self.read_connections += 1
+        return self.get_connection()
+    
     def release_connection (
         self, 
         conn: connection,
@@ -375,5 +443,406 @@ class TestDatabaseController(unittest.TestCase):
                 params=("Test",),
             )
 
+    def test_single_statement_queries_run_in_autocommit (
+        self,
+    ) -> None:
+        
+        """
+        Tests that SELECT and write helpers send only their statement, with no BEGIN or COMMIT.
+        """
+        
+        calls = [
+            (self.controller.execute_get_query, "SELECT id FROM base_book WHERE id = %s"),
+            (self.controller.execute_insert_query, "INSERT INTO base_book (book_name) VALUES (%s) RETURNING id"),
+            (self.controller.execute_delete_query, "DELETE FROM base_book WHERE id = %s"),
+            (self.controller.execute_edit_query, "UPDATE base_book SET book_name = %s WHERE id = %s"),
+            (self.controller.execute_returning_query, "DELETE FROM base_book WHERE id = %s RETURNING id, book_name"),
+        ]
+        
+        for execute, query in calls:
+            with self.subTest(query=query):
+                execute(query, (1,))
+                connection_obj = self.fake_db.connection
+                
+                self.assertEqual(connection_obj.executed, [(query, (1,))])
+                self.assertTrue(connection_obj.autocommit_seen)
+                self.assertFalse(connection_obj.autocommit)
+                self.assertFalse(connection_obj.committed)
+    
+    def test_only_selects_use_read_connections (
+        self,
+    ) -> None:
+        
+        """
+        Tests that SELECTs and streams are routed as reads while writes stay on the primary.
+        """
+        
+        self.controller.execute_get_query("SELECT id FROM base_book")
+        list(self.controller.stream_get_query("SELECT id FROM base_book"))
+        self.controller.execute_edit_query("UPDATE base_book SET book_name = %s WHERE id = %s", ("Name", 1))
+        self.controller.execute_delete_query("DELETE FROM base_book WHERE id = %s", (1,))
+        self.controller.execute_returning_query("UPDATE base_book SET book_name = %s WHERE id = %s RETURNING id", ("Name", 1))
+        
+        self.assertEqual(self.fake_db.read_connections, 2)
+    
+    def test_primary_select_skips_read_connections (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a SELECT asked of the primary runs on a primary connection without a transaction.
+        """
+        
+        self.fake_db.cursor_result = [(1,)]
+        
+        result = self.controller.execute_get_query("SELECT id FROM base_book", primary=True)
+        
+        self.assertEqual(result, [(1,)])
+        self.assertEqual(self.fake_db.read_connections, 0)
+        self.assertTrue(self.fake_db.connection.autocommit_seen)
+        self.assertFalse(self.fake_db.connection.committed)
+    
+    def test_slow_query_is_logged_with_explain_plan (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a slow SELECT gets its plan captured in a rolled-back transaction and logged.
+        """
+        
+        self.fake_db.cursor_result = [("Seq Scan on base_book",)]
+        self.fake_db.reuse_connection = True
+        self.controller.query_observer = QueryObserver(slow_query_ms=1e-9, explain_interval=60)
+        query = "SELECT id FROM base_book WHERE author = %s"
+        
+        with self.assertLogs('fastapi-logger', level='WARNING') as logs:
+            self.controller.execute_get_query(query, ("Author",))
+            self.controller.execute_get_query(query, ("Author",))
+        
+        executed = self.fake_db.connection.executed
+        
+        self.assertEqual(executed[1], ("EXPLAIN (ANALYZE, BUFFERS) " + query, ("Author",)))
+        self.assertEqual(len([statement for statement, _ in executed if statement.startswith("EXPLAIN")]), 1)
+        self.assertTrue(self.fake_db.connection.rolled_back)
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("Seq Scan on base_book", logs.output[0])
+        self.assertNotIn("Seq Scan on base_book", logs.output[1])
+    
+    def test_stream_get_query_yields_chunks (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a streamed SELECT is read through a named cursor in chunks.
+        """
+        
+        self.fake_db.cursor_result = [(i, f"Book {i}") for i in range(5)]
+        
+        chunks = list (
+            self.controller.stream_get_query (
+                "SELECT id, book_name FROM base_book",
+                chunk_size=2,
+            )
+        )
+        
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertTrue(self.fake_db.connection.cursor_name.startswith("stream_"))
+        self.assertTrue(self.fake_db.connection.committed)
+        self.assertTrue(self.fake_db.released)
+    
+    def test_stream_get_query_abandoned_stream_rolls_back (
+        self,
+    ) -> None:
+        
+        """
+        Tests that closing the generator early rolls back and releases the connection.
+        """
+        
+        self.fake_db.cursor_result = [(i, f"Book {i}") for i in range(5)]
+        
+        chunks = self.controller.stream_get_query (
+            "SELECT id, book_name FROM base_book",
+            chunk_size=2,
+        )
+        next(chunks)
+        chunks.close()
+        
+        self.assertTrue(self.fake_db.connection.rolled_back)
+        self.assertFalse(self.fake_db.connection.committed)
+        self.assertTrue(self.fake_db.released)
+
+    def test_execute_copy_query_encodes_text_format (
+        self,
+    ) -> None:
+        
+        """
+        Tests that rows are escaped into COPY text format and committed.
+        """
+        
+        rowcount = self.controller.execute_copy_query (
+            "COPY base_book (book_name, author, description) FROM STDIN",
+            [("Tab\tBook", "Back\\slash", None), ("Line\nBreak", "Author", "x")],
+        )
+        
+        self.assertEqual(rowcount, 2)
+        self.assertEqual (
+            self.fake_db.connection.last_cursor.copied,
+            "Tab\\tBook\tBack\\\\slash\t\\N\nLine\\nBreak\tAuthor\tx\n",
+        )
+        self.assertTrue(self.fake_db.connection.committed)
+        self.assertTrue(self.fake_db.released)
+    
+    def test_execute_copy_query_invalid_query (
+        self,
+    ) -> None:
+        
+        """
+        Tests that execute_copy_query raises ValueError for anything but COPY FROM STDIN.
+        """
+        
+        with self.assertRaises(ValueError):
+            self.controller.execute_copy_query("COPY base_book TO STDOUT", [])
+
+    def test_prepared_query_is_prepared_once_per_connection (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a prepared query is PREPAREd on first use and only EXECUTEd afterwards.
+        """
+        
+        self.fake_db.reuse_connection = True
+        query = "SELECT id FROM base_book WHERE id = %s AND book_name LIKE 'a%%'"
+        
+        self.controller.execute_get_query(query, (1,), prepare=True)
+        self.controller.execute_get_query(query, (2,), prepare=True)
+        
+        executed = self.fake_db.connection.executed
+        name = executed[0][0].split()[1]
+        
+        self.assertEqual (
+            executed,
+            [
+                (f"PREPARE {name} AS SELECT id FROM base_book WHERE id = $1 AND book_name LIKE 'a%'", None),
+                (f"EXECUTE {name} (%s)", (1,)),
+                (f"EXECUTE {name} (%s)", (2,)),
+            ],
+        )
+    
+    def test_prepared_query_is_prepared_again_on_new_connection (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the statement cache is kept per connection.
+        """
+        
+        query = "DELETE FROM base_book WHERE id = %s"
+        
+        self.controller.execute_delete_query(query, (1,), prepare=True)
+        self.controller.execute_delete_query(query, (1,), prepare=True)
+        
+        self.assertTrue(self.fake_db.connection.executed[0][0].startswith("PREPARE"))
+    
+    def test_prepared_cache_evicts_least_recently_used (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the oldest statement is deallocated once the cache is full.
+        """
+        
+        self.fake_db.reuse_connection = True
+        self.controller.prepared_cache_size = 1
+        
+        self.controller.execute_get_query("SELECT 1", prepare=True)
+        self.controller.execute_get_query("SELECT 2", prepare=True)
+        
+        executed = [query for query, _ in self.fake_db.connection.executed]
+        first = executed[0].split()[1]
+        
+        self.assertEqual(executed[3], f"DEALLOCATE {first}")
+        self.assertEqual(executed[4], f"EXECUTE {executed[2].split()[1]}")
+    
+    def test_prepared_query_recovers_lost_statement (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a statement dropped by the server is prepared again and the query retried.
+        """
+        
+        self.fake_db.reuse_connection = True
+        query = "SELECT id FROM base_book WHERE id = %s"
+        
+        self.controller.execute_get_query(query, (1,), prepare=True)
+        self.fake_db.connection.lost_statements = True
+        self.controller.execute_get_query(query, (1,), prepare=True)
+        
+        executed = [query for query, _ in self.fake_db.connection.executed]
+        
+        self.assertTrue(self.fake_db.connection.rolled_back)
+        self.assertEqual([query.split()[0] for query in executed], ["PREPARE", "EXECUTE", "EXECUTE", "PREPARE", "EXECUTE"])
+    
+    def test_rpc_deadline_becomes_statement_timeout (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the time left on the RPC is sent as a SET LOCAL in the same query string.
+        """
+        
+        self.fake_db.reuse_connection = True
+        token = set_query_deadline(2.0)
+        
+        try:
+            self.controller.execute_get_query("SELECT id FROM base_book WHERE id = %s", (1,))
+            self.controller.execute_get_query("SELECT id FROM base_book WHERE id = %s", (1,), prepare=True)
+        finally:
+            reset_query_deadline(token)
+        
+        self.controller.execute_get_query("SELECT 1")
+        
+        executed = [query for query, _ in self.fake_db.connection.executed]
+        timeout_ms = int(executed[0].split()[4].rstrip(';'))
+        
+        self.assertTrue(0 < timeout_ms <= 2000)
+        self.assertTrue(executed[0].endswith("; SELECT id FROM base_book WHERE id = %s"))
+        self.assertTrue(executed[1].startswith("PREPARE"))
+        self.assertRegex(executed[2], r"^SET LOCAL statement_timeout = \d+; EXECUTE ")
+        self.assertEqual(executed[3], "SELECT 1")
+    
+    def test_expired_deadline_skips_the_query (
+        self,
+    ) -> None:
+        
+        """
+        Tests that no statement is sent once the RPC deadline has passed.
+        """
+        
+        self.fake_db.reuse_connection = True
+        token = set_query_deadline(-1.0)
+        
+        try:
+            with self.assertRaises(QueryDeadlineExceeded):
+                self.controller.execute_delete_query("DELETE FROM base_book WHERE id = %s", (1,))
+        finally:
+            reset_query_deadline(token)
+        
+        self.assertEqual(self.fake_db.connection.executed, [])
+        self.assertTrue(self.fake_db.released)
+
+    
+    def test_unit_of_work_shares_one_transaction (
+        self,
+    ) -> None:
+        
+        """
+        Tests that statements in a unit of work run on one primary connection, committed once.
+        """
+        
+        with self.controller.unit_of_work():
+            self.controller.execute_insert_query("INSERT INTO base_book (book_name) VALUES (%s) RETURNING id", ("Dune",))
+            self.controller.execute_edit_query("UPDATE base_book SET book_name = %s WHERE id = %s", ("Emma", 1))
+            self.controller.execute_get_query("SELECT id FROM base_book WHERE id = %s", (1,))
+            self.assertFalse(self.fake_db.released)
+        
+        connection_obj = self.fake_db.connection
+        
+        self.assertEqual(len(connection_obj.executed), 3)
+        self.assertFalse(connection_obj.autocommit_seen)
+        self.assertTrue(connection_obj.committed)
+        self.assertFalse(connection_obj.rolled_back)
+        self.assertTrue(self.fake_db.released)
+        self.assertEqual(self.fake_db.read_connections, 0)
+    
+    def test_nested_unit_of_work_rolls_back_to_its_savepoint (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a failing nested unit rolls back to its savepoint and the outer one still commits.
+        """
+        
+        with self.controller.unit_of_work():
+            with self.assertRaises(RuntimeError):
+                with self.controller.unit_of_work():
+                    self.controller.execute_delete_query("DELETE FROM base_book WHERE id = %s", (1,))
+                    raise RuntimeError("rejected")
+        
+        executed = [statement for statement, _ in self.fake_db.connection.executed]
+        
+        self.assertEqual (
+            executed,
+            ["SAVEPOINT unit_of_work_1; DELETE FROM base_book WHERE id = %s", "ROLLBACK TO SAVEPOINT unit_of_work_1"],
+        )
+        self.assertTrue(self.fake_db.connection.committed)
+        self.assertFalse(self.fake_db.connection.rolled_back)
+    
+    def test_nested_unit_of_work_without_statements_sends_nothing (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a nested unit which ran no statement costs no savepoint round trip, even when it fails.
+        """
+        
+        with self.controller.unit_of_work():
+            with self.controller.unit_of_work():
+                pass
+            
+            with self.assertRaises(RuntimeError):
+                with self.controller.unit_of_work():
+                    raise RuntimeError("rejected before its statement")
+            
+            self.controller.execute_delete_query("DELETE FROM base_book WHERE id = %s", (1,))
+        
+        self.assertEqual(self.fake_db.connection.executed, [("DELETE FROM base_book WHERE id = %s", (1,))])
+    
+    def test_unit_of_work_resets_a_previous_statement_timeout (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a statement without a deadline does not inherit the SET LOCAL timeout of an earlier one in the unit.
+        """
+        
+        query = "DELETE FROM base_book WHERE id = %s"
+        
+        with self.controller.unit_of_work():
+            token = set_query_deadline(2.0)
+            try:
+                self.controller.execute_delete_query(query, (1,))
+            finally:
+                reset_query_deadline(token)
+            
+            self.controller.execute_delete_query(query, (2,))
+            self.controller.execute_delete_query(query, (3,))
+        
+        executed = [statement for statement, _ in self.fake_db.connection.executed]
+        
+        self.assertRegex(executed[0], r"^SET LOCAL statement_timeout = \d+; DELETE")
+        self.assertEqual(executed[1], "SET LOCAL statement_timeout TO DEFAULT; " + query)
+        self.assertEqual(executed[2], query)
+    
+    def test_failed_unit_of_work_rolls_back (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a unit of work whose block raises is rolled back and its connection released.
+        """
+        
+        with self.assertRaises(RuntimeError):
+            with self.controller.unit_of_work():
+                self.controller.execute_copy_query("COPY base_book (book_name) FROM STDIN", [("Dune",)])
+                raise RuntimeError("stream broken")
+        
+        self.assertFalse(self.fake_db.connection.committed)
+        self.assertTrue(self.fake_db.connection.rolled_back)
+        self.assertTrue(self.fake_db.released)
+        self.assertIsNone(self.controller.active_unit.get())
+
+
 if __name__ == '__main__':
     unittest.main()
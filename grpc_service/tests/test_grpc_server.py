@@ -1,19 +1,23 @@
 import os
+import time
+import asyncio
 import unittest
 from concurrent import futures
-from unittest.mock import patch
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
 
 import grpc
 
 import grpc_service.books_pb.books_pb2 as books_pb2
 import grpc_service.books_pb.books_pb2_grpc as books_pb2_grpc
 from grpc_service.grpc_server.grpc_server import GRPCServerFactory
+from grpc_service.controllers.book_controller.book_controller import BookService, ALL_BOOKS_QUERY
 
 class TestGRPCServer(unittest.TestCase):
     
     """
     Unit tests for verifying the functionality of the gRPC server.
-    
+
     Uses `unittest` for test case management and `patch.dict` to override environment variables.
     """
     
@@ -58,7 +62,7 @@ class TestGRPCServer(unittest.TestCase):
         try:
             response = self.stub.GetAllBooks(books_pb2.EmptyRequest())
             self.assertIsNotNone(response)
-            
+        
         except grpc.RpcError as e:
             self.fail(f"gRPC сервер не отвечает: {e}")
 
@@ -76,6 +80,151 @@ class TestGRPCServer(unittest.TestCase):
         self.server.stop(0)
         self.server_thread.shutdown(wait=True)
 
+class TestGRPCServerFactoryModes(unittest.TestCase):
+    
+    """
+    Unit tests for selecting between the thread-pool and grpc.aio server modes.
+    """
+    
+    def test_unknown_mode_is_rejected (
+        self,
+    ) -> None:
+        
+        """
+        Tests that an unknown server mode raises ValueError.
+        """
+        
+        with self.assertRaises(ValueError):
+            GRPCServerFactory(max_workers=1, port=0, server_mode='fibers')
+    
+    def test_sync_mode_creates_thread_pool_server (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the default mode builds a `grpc.Server`.
+        """
+        
+        factory = GRPCServerFactory(max_workers=1, port=0, server_mode='sync')
+        server = factory.create_server()
+        
+        self.assertIsInstance(server, grpc.Server)
+        server.stop(0)
+    
+    def test_async_mode_creates_aio_server (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the async mode builds a `grpc.aio.Server` inside an event loop.
+        """
+        
+        factory = GRPCServerFactory(max_workers=1, port=0, server_mode='async')
+        
+        async def create_and_stop() -> grpc.aio.Server:
+            server = factory.create_server()
+            await server.stop(0)
+            return server
+        
+        server = asyncio.run(create_and_stop())
+        self.assertIsInstance(server, grpc.aio.Server)
+
+class TestBooksSnapshotHandler(unittest.TestCase):
+    
+    """
+    Tests that GetAllBooks is served from the pre-serialized snapshot over a real channel.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Starts a thread-pool server on a free port with a mocked database controller.
+        """
+        
+        self.database_controller = MagicMock()
+        self.database_controller.execute_get_query.return_value = [
+            (1, 'Book1', 'Author1', datetime(2024, 5, 1, tzinfo=timezone.utc), 1),
+        ]
+        self.book_service = BookService(database_controller=self.database_controller)
+        
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+        GRPCServerFactory(max_workers=2, port=0).add_book_service(self.book_service, self.server)
+        port = self.server.add_insecure_port('localhost:0')
+        self.server.start()
+        
+        self.channel = grpc.insecure_channel(f'localhost:{port}')
+        self.stub = books_pb2_grpc.BookServiceStub(self.channel)
+    
+    def tearDown (
+        self,
+    ) -> None:
+        
+        """
+        Closes the channel and stops the server.
+        """
+        
+        self.channel.close()
+        self.server.stop(0)
+    
+    def test_get_all_books_is_served_from_snapshot (
+        self,
+    ) -> None:
+        
+        """
+        Tests that repeated calls decode to the same books while the database is queried once.
+        """
+        
+        first = self.stub.GetAllBooks(books_pb2.EmptyRequest())
+        second = self.stub.GetAllBooks(books_pb2.EmptyRequest())
+        
+        self.assertEqual(first, second)
+        self.assertEqual([book.book_name for book in first.books], ['Book1'])
+        self.assertEqual(first.books[0].uploaded_at.ToDatetime().year, 2024)
+        self.database_controller.execute_get_query.assert_called_once_with(ALL_BOOKS_QUERY)
+    
+    def test_write_rebuilds_snapshot (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a PostBook bumps the snapshot and later calls see the new row.
+        """
+        
+        self.stub.GetAllBooks(books_pb2.EmptyRequest())
+        
+        self.database_controller.execute_get_query.return_value = [
+            (1, 'Book1', 'Author1', None, 1),
+            (2, 'Book2', 'Author2', None, 1),
+        ]
+        self.database_controller.execute_returning_query.return_value = [(2, 'Book2', 'Author2', None, 1)]
+        self.stub.PostBook(books_pb2.PostBookRequest(book_name='Book2', book_author='Author2'))
+        
+        deadline = time.monotonic() + 1
+        response = self.stub.GetAllBooks(books_pb2.EmptyRequest())
+        
+        while len(response.books) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            response = self.stub.GetAllBooks(books_pb2.EmptyRequest())
+        
+        self.assertEqual([book.id for book in response.books], [1, 2])
+
+    def test_masked_request_bypasses_snapshot (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a GetAllBooks with a `fields` mask is answered from a projected query.
+        """
+        
+        self.database_controller.execute_get_query.return_value = [(1, 'Author1')]
+        
+        response = self.stub.GetAllBooks(books_pb2.EmptyRequest(fields={'paths': ['author', 'id']}))
+        
+        self.assertEqual(list(response.books), [books_pb2.BookResponse(id=1, author='Author1')])
+        self.database_controller.execute_get_query.assert_called_once_with('SELECT id, author FROM base_book')
+
 
 if __name__ == "__main__":
     unittest.main()
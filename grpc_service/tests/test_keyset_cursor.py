@@ -0,0 +1,42 @@
+import unittest
+from datetime import datetime, timezone
+
+from grpc_service.modules.pagination.keyset_cursor import KeysetCursor
+
+class TestKeysetCursor(unittest.TestCase):
+    
+    """
+    Unit tests for the opaque ListBooks cursor.
+    """
+    
+    def test_round_trip (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a cursor decodes to the exact key it was built from, microseconds included.
+        """
+        
+        uploaded_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        
+        cursor = KeysetCursor.encode(uploaded_at, 42)
+        
+        self.assertEqual(KeysetCursor.decode(cursor), (uploaded_at, 42))
+        self.assertNotIn("=", cursor)
+    
+    def test_decode_rejects_garbage (
+        self,
+    ) -> None:
+        
+        """
+        Tests that malformed cursors raise ValueError.
+        """
+        
+        for cursor in ("not-a-cursor", "", "W10", "eyJhIjoxfQ"):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    KeysetCursor.decode(cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+import unittest
+
+import grpc
+
+import grpc_service.books_pb.books_pb2 as books_pb2
+import grpc_service.books_pb.books_pb2_grpc as books_pb2_grpc
+from grpc_service.benchmarks.load.baseline import compare_to_baseline
+from grpc_service.benchmarks.load.latency_histogram import LatencyHistogram
+from grpc_service.benchmarks.load.load_generator import BenchmarkServer, LoadGenerator, parse_mix
+
+class TestLatencyHistogram(unittest.TestCase):
+    
+    """
+    Tests for the HDR-style latency histogram.
+    """
+    
+    def test_percentiles_keep_three_significant_figures (
+        self,
+    ) -> None:
+        
+        """
+        Tests that percentiles of 1..100000 µs are within 0.1% of the exact values.
+        """
+        
+        histogram = LatencyHistogram()
+        for value in range(1, 100_001):
+            histogram.record_value(value)
+        
+        for percentile, exact in ((50, 50_000), (90, 90_000), (99, 99_000), (99.9, 99_900)):
+            self.assertAlmostEqual(histogram.value_at_percentile(percentile), exact, delta=exact / 1000)
+        
+        self.assertEqual(histogram.value_at_percentile(100), 100_000)
+        self.assertEqual(histogram.summary()['min'], 1)
+        self.assertEqual(histogram.summary()['mean'], 50_000.5)
+    
+    def test_merge_equals_recording_into_one (
+        self,
+    ) -> None:
+        
+        """
+        Tests that merged histograms report what a single histogram of all values would.
+        """
+        
+        single, first, second = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for value in range(0, 5000, 7):
+            single.record_value(value)
+            (first if value % 2 else second).record_value(value)
+        
+        self.assertEqual(LatencyHistogram.merged([first, second]).summary(), single.summary())
+    
+    def test_merge_rejects_other_precision (
+        self,
+    ) -> None:
+        
+        """
+        Tests that histograms of different precision are not merged.
+        """
+        
+        with self.assertRaises(ValueError):
+            LatencyHistogram(3).merge(LatencyHistogram(2))
+    
+    def test_empty_histogram (
+        self,
+    ) -> None:
+        
+        """
+        Tests that an empty histogram reports zeros.
+        """
+        
+        summary = LatencyHistogram().summary()
+        
+        self.assertEqual(summary['count'], 0)
+        self.assertEqual(summary['percentiles']['p99'], 0)
+        self.assertEqual(summary['buckets'], [])
+
+class TestCompareToBaseline(unittest.TestCase):
+    
+    """
+    Tests for the baseline comparison.
+    """
+    
+    @staticmethod
+    def report (
+        throughput: float,
+        p50: int,
+        p99: int,
+    ) -> dict:
+        
+        """
+        Builds a report with one `get` operation.
+        """
+        
+        latency = {'percentiles': {'p50': p50, 'p99': p99}}
+        return {
+            'throughput_rps': throughput,
+            'latency_us': latency,
+            'operations': {'get': {'throughput_rps': throughput, 'latency_us': latency}},
+        }
+    
+    def test_changes_within_tolerance_pass (
+        self,
+    ) -> None:
+        
+        """
+        Tests that small drops and rises, and improvements, are not regressions.
+        """
+        
+        baseline = self.report(1000, 500, 2000)
+        
+        self.assertEqual(compare_to_baseline(self.report(950, 540, 2100), baseline, 0.1), [])
+        self.assertEqual(compare_to_baseline(self.report(3000, 100, 400), baseline, 0.1), [])
+    
+    def test_throughput_drop_and_latency_rise_are_flagged (
+        self,
+    ) -> None:
+        
+        """
+        Tests that lower throughput and higher latency beyond the tolerance are reported.
+        """
+        
+        regressions = compare_to_baseline(self.report(800, 500, 3000), self.report(1000, 500, 2000), 0.1)
+        
+        self.assertEqual (
+            [regression['metric'] for regression in regressions],
+            [
+                'throughput_rps',
+                'latency_us.percentiles.p99',
+                'operations.get.throughput_rps',
+                'operations.get.latency_us.percentiles.p99',
+            ],
+        )
+        self.assertEqual(regressions[0]['change'], -0.2)
+    
+    def test_operations_missing_from_baseline_are_skipped (
+        self,
+    ) -> None:
+        
+        """
+        Tests that an operation the baseline did not run is not compared.
+        """
+        
+        report = self.report(1000, 500, 2000)
+        report['operations']['post'] = {'throughput_rps': 1, 'latency_us': {'percentiles': {'p50': 1, 'p99': 1}}}
+
+        self.assertEqual(compare_to_baseline(report, self.report(1000, 500, 2000), 0.1), [])
+
+class TestLoadGenerator(unittest.TestCase):
+    
+    """
+    Tests for the operation mix and a short run against the in-memory database.
+    """
+    
+    def test_parse_mix (
+        self,
+    ) -> None:
+        
+        """
+        Tests that zero weights are dropped and invalid mixes are rejected.
+        """
+        
+        self.assertEqual(parse_mix('get=70, post=10,delete=0'), {'get': 70, 'post': 10})
+        
+        for mix in ('get=1,fetch=1', 'get=-1', 'get=0'):
+            with self.assertRaises(ValueError):
+                parse_mix(mix)
+    
+    def test_run_reports_and_cleans_up (
+        self,
+    ) -> None:
+        
+        """
+        Tests a short closed loop run through the factory-built server.
+        """
+        
+        server = BenchmarkServer(workers=4)
+        target = server.start()
+        
+        try:
+            with grpc.insecure_channel(target) as channel:
+                report = LoadGenerator (
+                    channel,
+                    parse_mix('get=8,get_all=1,post=1,delete=1'),
+                    duration=0.3,
+                    concurrency=2,
+                    books=10,
+                ).run()
+                
+                remaining = books_pb2_grpc.BookServiceStub(channel).GetAllBooks(books_pb2.EmptyRequest())
+        finally:
+            server.stop()
+        
+        self.assertEqual(set(report['operations']), {'get', 'get_all', 'post', 'delete'})
+        self.assertGreater(report['requests'], 0)
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['latency_us']['count'], report['requests'])
+        self.assertIn('p99.9', report['latency_us']['percentiles'])
+        self.assertEqual(len(remaining.books), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import urllib.request
+from unittest.mock import MagicMock
+
+from grpc_service.modules.metrics.metrics_server import MetricsServer
+
+class TestMetricsServer(unittest.TestCase):
+    
+    """
+    Unit tests for the MetricsServer side listener.
+    """
+    
+    def test_start_serves_metrics_and_logs_the_port (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a started listener answers `/metrics` and reports its port through the logger.
+        """
+        
+        logger = MagicMock()
+        server = MetricsServer(port=0, addr='127.0.0.1', logger=logger)
+        
+        server.start()
+        self.addCleanup(server.stop)
+        port = server.server.server_port
+        
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+            self.assertEqual(response.status, 200)
+        logger.info.assert_called_once_with('Metrics server running on port %s', port)
+    
+    def test_start_without_port_does_nothing (
+        self,
+    ) -> None:
+        
+        """
+        Tests that no listener is started when no port is configured.
+        """
+        
+        server = MetricsServer(port=None, logger=MagicMock())
+        
+        server.start()
+        
+        self.assertIsNone(server.server)
+        server.logger.info.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
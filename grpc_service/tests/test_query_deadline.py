@@ -0,0 +1,234 @@
+import asyncio
+import unittest
+from concurrent import futures
+
+import grpc
+
+from grpc_service.grpc_server.deadline_interceptor import DeadlineInterceptor, AsyncDeadlineInterceptor
+from grpc_service.modules.database.query_deadline.query_deadline import (
+    MAX_STATEMENT_TIMEOUT_MS,
+    QueryDeadlineExceeded,
+    query_timeout,
+    set_query_deadline,
+    reset_query_deadline,
+    statement_timeout_ms,
+)
+
+SERVICE = 'test.DeadlineService'
+
+def timeout_behavior(request: bytes, context: grpc.ServicerContext) -> bytes:
+    
+    """
+    Answers with the statement timeout a query would get, or `None`.
+    """
+    
+    return str(statement_timeout_ms()).encode()
+
+class TestQueryDeadline(unittest.TestCase):
+    
+    """
+    Tests the conversion of an RPC deadline into a statement timeout.
+    """
+    
+    def test_no_deadline_means_no_statement_timeout (
+        self,
+    ) -> None:
+        
+        """
+        Tests that queries outside an RPC with a deadline are left unbounded.
+        """
+        
+        self.assertIsNone(statement_timeout_ms())
+        
+        token = set_query_deadline(None)
+        try:
+            self.assertIsNone(statement_timeout_ms())
+        finally:
+            reset_query_deadline(token)
+    
+    def test_statement_timeout_is_rounded_up_and_capped (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the timeout is whole milliseconds, never 0, and dropped past the Postgres limit.
+        """
+        
+        token = set_query_deadline(1.5)
+        try:
+            self.assertTrue(1400 < statement_timeout_ms() <= 1500)
+        finally:
+            reset_query_deadline(token)
+        
+        token = set_query_deadline(0.01)
+        try:
+            self.assertIn(statement_timeout_ms(), range(1, 11))
+        finally:
+            reset_query_deadline(token)
+        
+        token = set_query_deadline(MAX_STATEMENT_TIMEOUT_MS)
+        try:
+            self.assertIsNone(statement_timeout_ms())
+        finally:
+            reset_query_deadline(token)
+    
+    def test_passed_deadline_raises (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a passed deadline is reported instead of a zero timeout.
+        """
+        
+        token = set_query_deadline(-0.1)
+        try:
+            with self.assertRaises(QueryDeadlineExceeded):
+                statement_timeout_ms()
+        finally:
+            reset_query_deadline(token)
+    
+    def test_query_timeout_cancels_a_running_statement (
+        self,
+    ) -> None:
+        
+        """
+        Tests that an awaited statement outliving the deadline is cancelled.
+        """
+        
+        async def run() -> None:
+            token = set_query_deadline(0.05)
+            try:
+                async with query_timeout():
+                    await asyncio.sleep(5)
+            finally:
+                reset_query_deadline(token)
+        
+        with self.assertRaises(QueryDeadlineExceeded):
+            asyncio.run(asyncio.wait_for(run(), 2))
+
+class TestDeadlineInterceptor(unittest.TestCase):
+    
+    """
+    Tests deadline propagation through the thread-pool server.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Starts a server whose method reports the statement timeout it would use.
+        """
+        
+        handler = grpc.method_handlers_generic_handler (
+            SERVICE,
+            {'Timeout': grpc.unary_unary_rpc_method_handler(timeout_behavior)},
+        )
+        
+        self.server = grpc.server (
+            futures.ThreadPoolExecutor(max_workers=2),
+            interceptors=[DeadlineInterceptor()],
+        )
+        self.server.add_generic_rpc_handlers((handler,))
+        port = self.server.add_insecure_port('localhost:0')
+        self.server.start()
+        
+        self.channel = grpc.insecure_channel(f'localhost:{port}')
+    
+    def tearDown (
+        self,
+    ) -> None:
+        
+        """
+        Stops the server.
+        """
+        
+        self.channel.close()
+        self.server.stop(0)
+    
+    def test_client_deadline_reaches_the_query (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the client's timeout arrives as the statement timeout, and its absence as none.
+        """
+        
+        method = self.channel.unary_unary(f'/{SERVICE}/Timeout')
+        
+        # grpc-timeout is sent rounded, so the server may see slightly more than was set.
+        self.assertAlmostEqual(int(method(b'', timeout=2)), 2000, delta=100)
+        self.assertEqual(method(b''), b'None')
+    
+    def test_expired_deadline_is_not_handled (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a behavior is never run for an RPC whose deadline already passed.
+        """
+        
+        called = []
+        
+        class Context:
+            def time_remaining(self) -> float:
+                return 0.0
+            def abort(self, code: grpc.StatusCode, details: str) -> None:
+                raise RuntimeError(code)
+        
+        wrapped = DeadlineInterceptor._wrap_unary(lambda request, context: called.append(request))
+        
+        with self.assertRaises(RuntimeError) as raised:
+            wrapped(b'', Context())
+        
+        self.assertEqual(raised.exception.args[0], grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.assertEqual(called, [])
+
+class TestAsyncDeadlineInterceptor(unittest.TestCase):
+    
+    """
+    Tests deadline propagation through the grpc.aio server.
+    """
+    
+    def test_client_deadline_reaches_coroutine_and_thread_handlers (
+        self,
+    ) -> None:
+        
+        """
+        Tests both a coroutine behavior and a plain one on the migration thread pool.
+        """
+        
+        async def async_timeout_behavior(request: bytes, context: grpc.aio.ServicerContext) -> bytes:
+            return timeout_behavior(request, context)
+        
+        async def run() -> list:
+            handler = grpc.method_handlers_generic_handler (
+                SERVICE,
+                {
+                    'Timeout': grpc.unary_unary_rpc_method_handler(async_timeout_behavior),
+                    'ThreadTimeout': grpc.unary_unary_rpc_method_handler(timeout_behavior),
+                },
+            )
+            server = grpc.aio.server(interceptors=[AsyncDeadlineInterceptor()])
+            server.add_generic_rpc_handlers((handler,))
+            port = server.add_insecure_port('localhost:0')
+            await server.start()
+            
+            try:
+                async with grpc.aio.insecure_channel(f'localhost:{port}') as channel:
+                    return [
+                        await channel.unary_unary(f'/{SERVICE}/Timeout')(b'', timeout=2),
+                        await channel.unary_unary(f'/{SERVICE}/ThreadTimeout')(b'', timeout=2),
+                        await channel.unary_unary(f'/{SERVICE}/Timeout')(b''),
+                    ]
+            finally:
+                await server.stop(0)
+        
+        coroutine_timeout, thread_timeout, no_timeout = asyncio.run(run())
+        
+        self.assertAlmostEqual(int(coroutine_timeout), 2000, delta=100)
+        self.assertAlmostEqual(int(thread_timeout), 2000, delta=100)
+        self.assertEqual(no_timeout, b'None')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+from grpc_service.modules.database.query_metrics.query_metrics import QueryObserver
+
+class TestQueryObserver(unittest.TestCase):
+    
+    """
+    Unit tests for the QueryObserver class.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Creates an observer with a 100 ms slow-query threshold.
+        """
+        
+        self.observer = QueryObserver (
+            slow_query_ms=100,
+            explain=True,
+            explain_interval=60,
+        )
+    
+    def test_statement_shape_collapses_whitespace (
+        self,
+    ) -> None:
+        
+        """
+        Tests that statements differing only in layout share a shape.
+        """
+        
+        self.assertEqual (
+            QueryObserver.statement_shape('\n    SELECT id\n    FROM base_book\n    WHERE id = %s\n'),
+            'SELECT id FROM base_book WHERE id = %s',
+        )
+    
+    def test_record_observes_histograms_and_flags_slow_statements (
+        self,
+    ) -> None:
+        
+        """
+        Tests that timings land in the per-shape histograms and only slow statements count as slow.
+        """
+        
+        query = 'SELECT id FROM base_book WHERE book_name = %s'
+        
+        self.assertFalse(self.observer.record(query, 0.001, 0.01, 0.002, 3))
+        self.assertTrue(self.observer.record(query, 0.05, 0.04, 0.02, 7))
+        
+        labels = {'statement': query}
+        
+        self.assertEqual(REGISTRY.get_sample_value('db_query_execute_seconds_count', labels), 2)
+        self.assertEqual(REGISTRY.get_sample_value('db_query_rows_sum', labels), 10)
+        self.assertEqual(REGISTRY.get_sample_value('db_slow_queries_total', labels), 1)
+    
+    def test_non_positive_threshold_disables_slow_log (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a threshold of 0 never reports a statement as slow.
+        """
+        
+        observer = QueryObserver(slow_query_ms=0)
+        
+        self.assertFalse(observer.record('SELECT pg_sleep(%s)', 0, 10, 0, 1))
+    
+    def test_should_explain_once_per_interval (
+        self,
+    ) -> None:
+        
+        """
+        Tests that plans are captured at most once per shape per interval.
+        """
+        
+        with patch('grpc_service.modules.database.query_metrics.query_metrics.time.monotonic', side_effect=[0, 30, 61, 0]):
+            self.assertTrue(self.observer.should_explain('SELECT 1'))
+            self.assertFalse(self.observer.should_explain('SELECT  1'))
+            self.assertTrue(self.observer.should_explain('SELECT 1'))
+            self.assertTrue(self.observer.should_explain('SELECT 2'))
+    
+    def test_log_slow_includes_breakdown_and_plan (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the slow-query log line carries the timing breakdown and the plan.
+        """
+        
+        with self.assertLogs('fastapi-logger', level='WARNING') as logs:
+            self.observer.log_slow('DELETE FROM base_book WHERE id = %s', 0.01, 0.2, 0, 1, 'Delete on base_book')
+        
+        self.assertIn('210.0 ms', logs.output[0])
+        self.assertIn('DELETE FROM base_book WHERE id = %s', logs.output[0])
+        self.assertIn('Delete on base_book', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+
+from grpc_service.modules.cache.recent_writes import RecentWrites
+
+class TestRecentWrites(unittest.TestCase):
+    
+    """
+    Unit tests for the RecentWrites class.
+    """
+    
+    def test_written_key_is_recent_until_window_passes (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a recorded key is reported until its window has passed.
+        """
+        
+        writes = RecentWrites(window=5)
+        
+        with patch('grpc_service.modules.cache.recent_writes.time.monotonic', return_value=100):
+            writes.record(1)
+            self.assertIn(1, writes)
+            self.assertNotIn(2, writes)
+        
+        with patch('grpc_service.modules.cache.recent_writes.time.monotonic', return_value=105):
+            self.assertNotIn(1, writes)
+    
+    def test_expired_keys_are_dropped_on_record (
+        self,
+    ) -> None:
+        
+        """
+        Tests that recording a write forgets the keys whose window has passed.
+        """
+        
+        writes = RecentWrites(window=5)
+        
+        with patch('grpc_service.modules.cache.recent_writes.time.monotonic', return_value=100):
+            writes.record(1)
+            writes.record(2)
+        
+        with patch('grpc_service.modules.cache.recent_writes.time.monotonic', return_value=103):
+            writes.record(1)
+        
+        with patch('grpc_service.modules.cache.recent_writes.time.monotonic', return_value=106):
+            writes.record(3)
+            self.assertEqual(list(writes.expiries), [1, 3])
+            self.assertIn(1, writes)
+    
+    def test_record_all_covers_every_key (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a bulk write makes every key recent for one window.
+        """
+        
+        writes = RecentWrites(window=5)
+        
+        with patch('grpc_service.modules.cache.recent_writes.time.monotonic', return_value=100):
+            writes.record_all()
+            self.assertIn(42, writes)
+        
+        with patch('grpc_service.modules.cache.recent_writes.time.monotonic', return_value=105):
+            self.assertNotIn(42, writes)
+
+if __name__ == '__main__':
+    unittest.main()
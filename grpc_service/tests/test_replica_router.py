@@ -0,0 +1,207 @@
+import unittest
+from typing import List, Optional
+
+import psycopg2
+from psycopg2.pool import PoolError
+
+from grpc_service.modules.database.replica_router.replica_router import ReplicaRouter
+
+class FakeReplicaCursor:
+    
+    """
+    A fake cursor answering the lag query with the replica's configured lag.
+    """
+    
+    def __init__ (
+        self,
+        pool: 'FakeReplicaPool',
+    ) -> None:
+        
+        self.pool = pool
+    
+    def execute (
+        self,
+        query: str,
+    ) -> None:
+        
+        if self.pool.lag is None:
+            raise psycopg2.OperationalError('recovery is not running')
+    
+    def fetchone (
+        self,
+    ) -> tuple:
+        
+        return (self.pool.lag,)
+    
+    def __enter__ (
+        self,
+    ) -> 'FakeReplicaCursor':
+        
+        return self
+    
+    def __exit__ (
+        self,
+        *args,
+    ) -> None:
+        
+        pass
+
+class FakeReplicaConnection:
+    
+    """
+    A fake replica connection.
+    """
+    
+    def __init__ (
+        self,
+        pool: 'FakeReplicaPool',
+    ) -> None:
+        
+        self.pool = pool
+    
+    def cursor (
+        self,
+    ) -> FakeReplicaCursor:
+        
+        return FakeReplicaCursor(self.pool)
+    
+    def rollback (
+        self,
+    ) -> None:
+        
+        pass
+
+class FakeReplicaPool:
+    
+    """
+    A fake replica pool with a settable lag and reachability.
+    """
+    
+    def __init__ (
+        self,
+        lag: Optional[float] = 0.0,
+    ) -> None:
+        
+        self.lag = lag
+        self.reachable = True
+        self.checked_out: List[FakeReplicaConnection] = []
+        self.returned: List[FakeReplicaConnection] = []
+        self.closed = False
+    
+    def getconn (
+        self,
+        timeout: Optional[float] = None,
+    ) -> FakeReplicaConnection:
+        
+        if not self.reachable:
+            raise PoolError('no connection available')
+        
+        connection = FakeReplicaConnection(self)
+        self.checked_out.append(connection)
+        return connection
+    
+    def putconn (
+        self,
+        connection: FakeReplicaConnection,
+        close: bool = False,
+    ) -> None:
+        
+        self.returned.append(connection)
+    
+    def closeall (
+        self,
+    ) -> None:
+        
+        self.closed = True
+
+class TestReplicaRouter(unittest.TestCase):
+    
+    """
+    Unit tests for the ReplicaRouter class.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Creates a router over two healthy replicas.
+        """
+        
+        self.first = FakeReplicaPool()
+        self.second = FakeReplicaPool()
+        self.router = ReplicaRouter (
+            {'replica-1': self.first, 'replica-2': self.second},
+            max_lag=5.0,
+        )
+        self.router.check()
+    
+    def test_reads_are_spread_round_robin (
+        self,
+    ) -> None:
+        
+        """
+        Tests that consecutive checkouts alternate between replicas.
+        """
+        
+        connections = [self.router.getconn() for _ in range(4)]
+        
+        self.assertEqual (
+            [connection.pool for connection in connections],
+            [self.first, self.second, self.first, self.second],
+        )
+    
+    def test_lagging_replica_leaves_and_rejoins_rotation (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a replica over the lag threshold stops receiving reads until it catches up.
+        """
+        
+        self.second.lag = 12.5
+        self.router.check()
+        
+        self.assertEqual(self.router.in_rotation(), ['replica-1'])
+        self.assertIs(self.router.getconn().pool, self.first)
+        
+        self.second.lag = 0.2
+        self.router.check()
+        
+        self.assertEqual(self.router.in_rotation(), ['replica-1', 'replica-2'])
+    
+    def test_failed_checks_and_checkouts_remove_replica (
+        self,
+    ) -> None:
+        
+        """
+        Tests that an unreachable or failing replica is taken out of rotation.
+        """
+        
+        self.first.lag = None
+        self.router.check()
+        
+        self.assertEqual(self.router.in_rotation(), ['replica-2'])
+        
+        self.second.reachable = False
+        
+        self.assertIsNone(self.router.getconn())
+        self.assertEqual(self.router.in_rotation(), [])
+    
+    def test_putconn_returns_connection_to_its_replica (
+        self,
+    ) -> None:
+        
+        """
+        Tests that connections go back to the pool they came from and foreign ones are refused.
+        """
+        
+        connection = self.router.getconn()
+        
+        self.assertTrue(self.router.putconn(connection))
+        self.assertIn(connection, self.first.returned)
+        self.assertFalse(self.router.putconn(object()))
+
+
+if __name__ == '__main__':
+    unittest.main()
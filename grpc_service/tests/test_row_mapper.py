@@ -0,0 +1,153 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from google.protobuf.timestamp_pb2 import Timestamp
+
+import grpc_service.books_pb.books_pb2 as books_pb2
+from grpc_service.modules.mapping.row_mapper import compile_row_mapper, project_columns, timestamp_fields
+
+BOOK_COLUMNS = ('id', 'book_name', 'author', 'uploaded_at')
+
+class TestRowMapper(unittest.TestCase):
+    
+    """
+    Tests for the compiled row-to-message mappers.
+    """
+    
+    def test_row_maps_like_from_datetime (
+        self,
+    ) -> None:
+        
+        """
+        Tests that columns land in their fields and timestamps match `FromDatetime`.
+        """
+        
+        mapper = compile_row_mapper(books_pb2.BookResponse, ('id', 'book_name', 'author', 'uploaded_at'))
+        uploaded_at = datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone(timedelta(hours=3)))
+        
+        book = mapper((7, 'Dune', 'Herbert', uploaded_at))
+        
+        expected = books_pb2.BookResponse(id=7, book_name='Dune', author='Herbert')
+        expected.uploaded_at.FromDatetime(uploaded_at)
+        
+        self.assertEqual(book, expected)
+        self.assertEqual(book.uploaded_at.nanos, 123456000)
+    
+    def test_naive_datetime_is_taken_as_utc (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a naive datetime converts the same way `Timestamp.FromDatetime` does.
+        """
+        
+        expected = Timestamp()
+        expected.FromDatetime(datetime(1969, 12, 31, 23, 59, 59, 500000))
+        
+        self.assertEqual (
+            timestamp_fields(datetime(1969, 12, 31, 23, 59, 59, 500000)),
+            {'seconds': expected.seconds, 'nanos': expected.nanos},
+        )
+    
+    def test_null_timestamp_and_column_order (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a NULL leaves the field unset and columns may come in any order.
+        """
+        
+        mapper = compile_row_mapper(books_pb2.BookResponse, ('uploaded_at', 'id'))
+        
+        book = mapper((None, 3))
+        
+        self.assertEqual(book.id, 3)
+        self.assertFalse(book.HasField('uploaded_at'))
+    
+    def test_mapper_is_compiled_once_per_shape (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the same message and column list reuse one mapper.
+        """
+        
+        columns = ('id', 'book_name')
+        
+        self.assertIs (
+            compile_row_mapper(books_pb2.BookResponse, columns),
+            compile_row_mapper(books_pb2.BookResponse, columns),
+        )
+    
+    def test_unknown_column_is_rejected (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a column without a matching field fails when the mapper is built.
+        """
+        
+        with self.assertRaises(ValueError):
+            compile_row_mapper(books_pb2.BookResponse, ('id', 'title'))
+
+    def test_fields_limit_what_is_populated (
+        self,
+    ) -> None:
+        
+        """
+        Tests that columns outside `fields` are read past but left unset.
+        """
+        
+        mapper = compile_row_mapper(books_pb2.BookResponse, BOOK_COLUMNS, ('book_name',))
+        
+        book = mapper((7, 'Dune', 'Herbert', datetime(2024, 1, 1)))
+        
+        self.assertEqual(book, books_pb2.BookResponse(book_name='Dune'))
+
+class TestProjectColumns(unittest.TestCase):
+    
+    """
+    Tests for resolving FieldMask paths into a column list.
+    """
+    
+    def test_empty_mask_selects_everything (
+        self,
+    ) -> None:
+        
+        """
+        Tests that no paths means every column, selected and returned.
+        """
+        
+        self.assertEqual(project_columns([], BOOK_COLUMNS), (BOOK_COLUMNS, BOOK_COLUMNS))
+    
+    def test_columns_keep_table_order_and_required_keys (
+        self,
+    ) -> None:
+        
+        """
+        Tests that paths are deduplicated, ordered like the table, and joined by the required columns.
+        """
+        
+        columns, fields = project_columns (
+            ['book_name', 'id', 'book_name'],
+            BOOK_COLUMNS,
+            required=('id', 'uploaded_at'),
+        )
+        
+        self.assertEqual(columns, ('id', 'book_name', 'uploaded_at'))
+        self.assertEqual(fields, ('id', 'book_name'))
+    
+    def test_unknown_path_is_rejected (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a path naming no column, including a nested one, raises ValueError.
+        """
+        
+        for path in ('description', 'uploaded_at.seconds'):
+            with self.subTest(path=path), self.assertRaises(ValueError):
+                project_columns(['id', path], BOOK_COLUMNS)
+
+if __name__ == '__main__':
+    unittest.main()
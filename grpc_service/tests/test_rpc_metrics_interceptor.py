@@ -0,0 +1,206 @@
+import asyncio
+import unittest
+from concurrent import futures
+from typing import Iterator
+
+import grpc
+from prometheus_client import REGISTRY
+
+from grpc_service.modules.metrics.rpc_metrics_interceptor import RpcMetricsInterceptor, AsyncRpcMetricsInterceptor
+
+SERVICE = 'test.MetricsService'
+
+def echo (
+    request: bytes,
+    context: grpc.ServicerContext,
+) -> bytes:
+    
+    return request
+
+def fail (
+    request: bytes,
+    context: grpc.ServicerContext,
+) -> bytes:
+    
+    context.set_code(grpc.StatusCode.NOT_FOUND)
+    return b''
+
+def crash (
+    request: bytes,
+    context: grpc.ServicerContext,
+) -> bytes:
+    
+    raise RuntimeError('boom')
+
+def repeat (
+    request: bytes,
+    context: grpc.ServicerContext,
+) -> Iterator[bytes]:
+    
+    for _ in range(3):
+        yield request
+
+def sample (
+    name: str,
+    method: str,
+    **labels: str,
+) -> float:
+    
+    """
+    Reads a metric sample for a method of the test service, 0 if absent.
+    """
+    
+    value = REGISTRY.get_sample_value(name, {'grpc_service': SERVICE, 'grpc_method': method, **labels})
+    return value or 0.0
+
+class TestRpcMetricsInterceptor(unittest.TestCase):
+    
+    """
+    Tests the thread-pool interceptor against a real server and channel.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Starts a server with raw-bytes unary and streaming methods behind the interceptor.
+        """
+        
+        handler = grpc.method_handlers_generic_handler (
+            SERVICE,
+            {
+                'Echo': grpc.unary_unary_rpc_method_handler(echo),
+                'Fail': grpc.unary_unary_rpc_method_handler(fail),
+                'Crash': grpc.unary_unary_rpc_method_handler(crash),
+                'Repeat': grpc.unary_stream_rpc_method_handler(repeat),
+            },
+        )
+        
+        self.server = grpc.server (
+            futures.ThreadPoolExecutor(max_workers=2),
+            interceptors=[RpcMetricsInterceptor()],
+        )
+        self.server.add_generic_rpc_handlers((handler,))
+        port = self.server.add_insecure_port('localhost:0')
+        self.server.start()
+        
+        self.channel = grpc.insecure_channel(f'localhost:{port}')
+    
+    def tearDown (
+        self,
+    ) -> None:
+        
+        """
+        Closes the channel and stops the server.
+        """
+        
+        self.channel.close()
+        self.server.stop(0)
+    
+    def test_unary_call_records_latency_size_and_code (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a unary call is timed, sized and counted as OK, and leaves nothing in flight.
+        """
+        
+        before = sample('grpc_server_handling_seconds_count', 'Echo', grpc_type='unary')
+        
+        self.channel.unary_unary(f'/{SERVICE}/Echo')(b'12345')
+        
+        self.assertEqual(sample('grpc_server_handling_seconds_count', 'Echo', grpc_type='unary'), before + 1)
+        self.assertGreaterEqual(sample('grpc_server_response_bytes_sum', 'Echo', grpc_type='unary'), 5)
+        self.assertGreaterEqual(sample('grpc_server_handled_total', 'Echo', grpc_type='unary', grpc_code='OK'), 1)
+        self.assertEqual(sample('grpc_server_in_flight', 'Echo'), 0)
+    
+    def test_status_codes_are_counted (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a code set by the handler and an exception are both counted by code.
+        """
+        
+        for method in ('Fail', 'Crash'):
+            with self.assertRaises(grpc.RpcError):
+                self.channel.unary_unary(f'/{SERVICE}/{method}')(b'')
+        
+        self.assertEqual(sample('grpc_server_handled_total', 'Fail', grpc_type='unary', grpc_code='NOT_FOUND'), 1)
+        self.assertEqual(sample('grpc_server_handled_total', 'Crash', grpc_type='unary', grpc_code='UNKNOWN'), 1)
+    
+    def test_server_stream_sums_message_sizes (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a streaming call is recorded once with the size of all its messages.
+        """
+        
+        responses = list(self.channel.unary_stream(f'/{SERVICE}/Repeat')(b'abcd'))
+        
+        self.assertEqual(len(responses), 3)
+        self.assertEqual(sample('grpc_server_handling_seconds_count', 'Repeat', grpc_type='server_stream'), 1)
+        self.assertEqual(sample('grpc_server_response_bytes_sum', 'Repeat', grpc_type='server_stream'), 12)
+
+class TestAsyncRpcMetricsInterceptor(unittest.TestCase):
+    
+    """
+    Tests the grpc.aio interceptor with coroutine and async generator behaviors.
+    """
+    
+    def test_coroutine_and_async_stream_are_recorded (
+        self,
+    ) -> None:
+        
+        """
+        Tests that async unary and streaming calls are timed, sized and counted, and
+        that plain functions run from the migration thread pool report their codes.
+        """
+        
+        async def async_echo(request: bytes, context: grpc.aio.ServicerContext) -> bytes:
+            return request
+        
+        async def async_repeat(request: bytes, context: grpc.aio.ServicerContext):
+            for _ in range(2):
+                yield request
+        
+        async def call() -> None:
+            handler = grpc.method_handlers_generic_handler (
+                SERVICE,
+                {
+                    'AsyncEcho': grpc.unary_unary_rpc_method_handler(async_echo),
+                    'AsyncRepeat': grpc.unary_stream_rpc_method_handler(async_repeat),
+                    'SyncFail': grpc.unary_unary_rpc_method_handler(fail),
+                },
+            )
+            
+            server = grpc.aio.server (
+                migration_thread_pool=futures.ThreadPoolExecutor(max_workers=1),
+                interceptors=[AsyncRpcMetricsInterceptor()],
+            )
+            server.add_generic_rpc_handlers((handler,))
+            port = server.add_insecure_port('localhost:0')
+            await server.start()
+            
+            async with grpc.aio.insecure_channel(f'localhost:{port}') as channel:
+                await channel.unary_unary(f'/{SERVICE}/AsyncEcho')(b'123')
+                [response async for response in channel.unary_stream(f'/{SERVICE}/AsyncRepeat')(b'xy')]
+                
+                with self.assertRaises(grpc.RpcError):
+                    await channel.unary_unary(f'/{SERVICE}/SyncFail')(b'')
+            
+            await server.stop(0)
+        
+        asyncio.run(call())
+        
+        self.assertEqual(sample('grpc_server_handled_total', 'AsyncEcho', grpc_type='unary', grpc_code='OK'), 1)
+        self.assertEqual(sample('grpc_server_response_bytes_sum', 'AsyncEcho', grpc_type='unary'), 3)
+        self.assertEqual(sample('grpc_server_response_bytes_sum', 'AsyncRepeat', grpc_type='server_stream'), 4)
+        self.assertEqual(sample('grpc_server_in_flight', 'AsyncRepeat'), 0)
+        self.assertEqual(sample('grpc_server_handled_total', 'SyncFail', grpc_type='unary', grpc_code='NOT_FOUND'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
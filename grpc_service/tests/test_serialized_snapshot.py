@@ -0,0 +1,140 @@
+import time
+import unittest
+import threading
+from typing import List
+
+from grpc_service.modules.cache.serialized_snapshot import SerializedSnapshot
+
+class TestSerializedSnapshot(unittest.TestCase):
+    
+    """
+    Unit tests for the SerializedSnapshot class.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Creates a snapshot whose builder returns the number of builds so far.
+        """
+        
+        self.builds: List[int] = []
+        self.built = threading.Event()
+        self.snapshot = SerializedSnapshot('test', self.build, max_age=0)
+    
+    def build (
+        self,
+    ) -> bytes:
+        
+        """
+        Records a build and returns its sequence number as bytes.
+        """
+        
+        self.builds.append(len(self.builds) + 1)
+        self.built.set()
+        return str(len(self.builds)).encode()
+    
+    def wait_for_payload (
+        self,
+        expected: bytes,
+    ) -> bytes:
+        
+        """
+        Polls the snapshot until it serves the expected payload or a second passes.
+        """
+        
+        deadline = time.monotonic() + 1
+        payload = self.snapshot.get()
+        
+        while payload != expected and time.monotonic() < deadline:
+            time.sleep(0.01)
+            payload = self.snapshot.get()
+        
+        return payload
+    
+    def test_first_get_builds_and_later_gets_reuse_the_bytes (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the payload is built once and then served as the same object.
+        """
+        
+        first = self.snapshot.get()
+        
+        self.assertEqual(first, b'1')
+        self.assertIs(self.snapshot.get(), first)
+        self.assertEqual(self.builds, [1])
+    
+    def test_non_blocking_get_does_not_build (
+        self,
+    ) -> None:
+        
+        """
+        Tests that `get(block=False)` returns None instead of building the first payload.
+        """
+        
+        self.assertIsNone(self.snapshot.get(block=False))
+        self.assertEqual(self.builds, [])
+    
+    def test_bump_rebuilds_in_background (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a bump keeps serving the old payload until the rebuild lands.
+        """
+        
+        self.snapshot.get()
+        self.built.clear()
+        
+        self.snapshot.bump()
+        
+        self.assertTrue(self.built.wait(1))
+        self.assertEqual(self.wait_for_payload(b'2'), b'2')
+    
+    def test_failed_rebuild_keeps_previous_payload (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a rebuild error leaves the last good payload in place.
+        """
+        
+        self.snapshot.get()
+        failed = threading.Event()
+        
+        def failing_build() -> bytes:
+            failed.set()
+            raise RuntimeError('database is down')
+        
+        self.snapshot.build = failing_build
+        self.snapshot.retry_delay = 0
+        
+        with self.assertLogs('fastapi-logger', level='ERROR'):
+            self.snapshot.bump()
+            self.assertTrue(failed.wait(1))
+            time.sleep(0.05)
+        
+        self.assertEqual(self.snapshot.get(), b'1')
+    
+    def test_first_build_error_is_raised (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a failure building the first payload reaches the caller.
+        """
+        
+        def failing_build() -> bytes:
+            raise RuntimeError('database is down')
+        
+        snapshot = SerializedSnapshot('failing', failing_build)
+        
+        with self.assertRaises(RuntimeError):
+            snapshot.get()
+
+
+if __name__ == '__main__':
+    unittest.main()
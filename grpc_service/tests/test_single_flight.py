@@ -0,0 +1,325 @@
+import time
+import asyncio
+import threading
+import unittest
+
+from prometheus_client import REGISTRY
+
+from grpc_service.modules.cache.single_flight import SingleFlight, AsyncSingleFlight
+from grpc_service.modules.database.query_deadline.query_deadline import (
+    QueryDeadlineExceeded,
+    set_query_deadline,
+    reset_query_deadline,
+)
+
+def flight_count (
+    name: str,
+    flight: str,
+) -> float:
+    
+    """
+    Reads a single-flight counter for one flight.
+    """
+    
+    return REGISTRY.get_sample_value(f'{name}_total', {'flight': flight}) or 0.0
+
+class TestSingleFlight(unittest.TestCase):
+    
+    """
+    Tests for the thread-based SingleFlight.
+    """
+    
+    def run_concurrently (
+        self,
+        flight: SingleFlight,
+        fn,
+        callers: int,
+    ) -> list:
+        
+        """
+        Calls `flight.do` from several threads while the leader's `fn` is held, and collects the outcomes.
+        """
+        
+        started = threading.Event()
+        release = threading.Event()
+        outcomes = []
+        
+        def held():
+            started.set()
+            release.wait(5)
+            return fn()
+        
+        def call():
+            try:
+                outcomes.append(flight.do('key', held))
+            except Exception as e:
+                outcomes.append(e)
+        
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        threads[0].start()
+        started.wait(5)
+        
+        for thread in threads[1:]:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while flight_count('single_flight_collapsed', flight.name) < callers - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        return outcomes
+    
+    def test_concurrent_calls_share_one_run (
+        self,
+    ) -> None:
+        
+        """
+        Tests that callers arriving during a run get its result without running the work.
+        """
+        
+        flight = SingleFlight('test_shared')
+        runs = []
+        
+        outcomes = self.run_concurrently(flight, lambda: runs.append(1) or ['row'], callers=8)
+        
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(outcomes, [['row']] * 8)
+        self.assertTrue(all(outcome is outcomes[0] for outcome in outcomes))
+        self.assertEqual(flight_count('single_flight_executions', 'test_shared'), 1)
+        self.assertEqual(flight_count('single_flight_collapsed', 'test_shared'), 7)
+    
+    def test_error_reaches_every_caller (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a failed run fails the whole flight and the next call runs again.
+        """
+        
+        flight = SingleFlight('test_error')
+        
+        def fail():
+            raise RuntimeError('database down')
+        
+        outcomes = self.run_concurrently(flight, fail, callers=3)
+        
+        self.assertEqual([str(outcome) for outcome in outcomes], ['database down'] * 3)
+        self.assertEqual(flight.do('key', lambda: 'recovered'), 'recovered')
+    
+    def test_forget_starts_a_new_flight (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a call made after `forget` does not join the flight in progress.
+        """
+        
+        flight = SingleFlight('test_forget')
+        results = []
+        
+        def old_read():
+            flight.forget('key')
+            results.append(flight.do('key', lambda: 'new'))
+            return 'old'
+        
+        results.append(flight.do('key', old_read))
+        
+        self.assertEqual(results, ['new', 'old'])
+        self.assertEqual(flight_count('single_flight_executions', 'test_forget'), 2)
+
+    def test_follower_outlives_leader_deadline (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a follower with time left runs the work itself when the leader's deadline ends the run.
+        """
+        
+        flight = SingleFlight('test_deadline_retry')
+        outcomes = {}
+        
+        def cut_short():
+            deadline = time.monotonic() + 5
+            while flight_count('single_flight_collapsed', flight.name) < 1 and time.monotonic() < deadline:
+                time.sleep(0.001)
+            raise QueryDeadlineExceeded('leader deadline')
+        
+        def leader():
+            token = set_query_deadline(0.05)
+            try:
+                outcomes['leader'] = flight.do('key', cut_short)
+            except Exception as e:
+                outcomes['leader'] = e
+            finally:
+                reset_query_deadline(token)
+        
+        def follower():
+            outcomes['follower'] = flight.do('key', lambda: 'row')
+        
+        leader_thread = threading.Thread(target=leader)
+        leader_thread.start()
+        deadline = time.monotonic() + 5
+        while 'key' not in flight._calls and time.monotonic() < deadline:
+            time.sleep(0.001)
+        follower_thread = threading.Thread(target=follower)
+        follower_thread.start()
+        
+        leader_thread.join(5)
+        follower_thread.join(5)
+        
+        self.assertIsInstance(outcomes['leader'], QueryDeadlineExceeded)
+        self.assertEqual(outcomes['follower'], 'row')
+        self.assertEqual(flight_count('single_flight_executions', 'test_deadline_retry'), 2)
+    
+    def test_follower_stops_waiting_at_its_own_deadline (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a follower with a shorter deadline than the leader gives up without ending the run.
+        """
+        
+        flight = SingleFlight('test_deadline_follower')
+        started = threading.Event()
+        release = threading.Event()
+        outcomes = []
+        
+        def slow():
+            started.set()
+            release.wait(5)
+            return 'row'
+        
+        leader = threading.Thread(target=lambda: outcomes.append(flight.do('key', slow)))
+        leader.start()
+        started.wait(5)
+        
+        token = set_query_deadline(0.05)
+        try:
+            with self.assertRaises(QueryDeadlineExceeded):
+                flight.do('key', lambda: 'unused')
+        finally:
+            reset_query_deadline(token)
+        
+        release.set()
+        leader.join(5)
+        
+        self.assertEqual(outcomes, ['row'])
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    
+    """
+    Tests for the asyncio AsyncSingleFlight.
+    """
+    
+    async def test_concurrent_calls_share_one_run (
+        self,
+    ) -> None:
+        
+        """
+        Tests that concurrent awaits of the same key run the coroutine once.
+        """
+        
+        flight = AsyncSingleFlight('test_async_shared')
+        runs = []
+        
+        async def query():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return ['row']
+        
+        results = await asyncio.gather(*(flight.do('key', query) for _ in range(5)))
+        
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(results, [['row']] * 5)
+        self.assertEqual(flight_count('single_flight_collapsed', 'test_async_shared'), 4)
+        self.assertEqual(flight._tasks, {})
+    
+    async def test_cancelled_leader_does_not_cancel_followers (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the run survives the caller that started it going away.
+        """
+        
+        flight = AsyncSingleFlight('test_async_cancel')
+        release = asyncio.Event()
+        
+        async def query():
+            await release.wait()
+            return 'row'
+        
+        leader = asyncio.create_task(flight.do('key', query))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do('key', query))
+        await asyncio.sleep(0)
+        
+        leader.cancel()
+        release.set()
+        
+        self.assertEqual(await follower, 'row')
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+
+    async def test_follower_outlives_leader_deadline (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a follower with time left runs the work itself when the leader's deadline ends the run.
+        """
+        
+        flight = AsyncSingleFlight('test_async_deadline_retry')
+        
+        async def cut_short():
+            await asyncio.sleep(0.01)
+            raise QueryDeadlineExceeded('leader deadline')
+        
+        async def query():
+            return 'row'
+        
+        token = set_query_deadline(0.05)
+        leader = asyncio.create_task(flight.do('key', cut_short))
+        reset_query_deadline(token)
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do('key', query))
+        
+        outcomes = await asyncio.gather(leader, follower, return_exceptions=True)
+        
+        self.assertIsInstance(outcomes[0], QueryDeadlineExceeded)
+        self.assertEqual(outcomes[1], 'row')
+        self.assertEqual(flight_count('single_flight_executions', 'test_async_deadline_retry'), 2)
+    
+    async def test_follower_stops_waiting_at_its_own_deadline (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a follower with a shorter deadline than the leader gives up without ending the run.
+        """
+        
+        flight = AsyncSingleFlight('test_async_deadline_follower')
+        release = asyncio.Event()
+        
+        async def slow():
+            await release.wait()
+            return 'row'
+        
+        leader = asyncio.create_task(flight.do('key', slow))
+        await asyncio.sleep(0)
+        
+        token = set_query_deadline(0.05)
+        try:
+            with self.assertRaises(QueryDeadlineExceeded):
+                await asyncio.wait_for(flight.do('key', slow), 5)
+        finally:
+            reset_query_deadline(token)
+        
+        release.set()
+        
+        self.assertEqual(await leader, 'row')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,476 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import grpc
+
+import grpc_service.books_pb.books_pb2 as books_pb2
+from grpc_service.controllers.book_controller.book_controller import BookService
+from grpc_service.controllers.async_book_controller.async_book_controller import AsyncBookService
+from grpc_service.modules.database.storage_backend.storage_backend import StorageBackend, AsyncStorageBackend
+from grpc_service.modules.database.storage_backend.backend_factory import create_storage_backend, create_async_storage_backend
+from grpc_service.modules.database.controller.database_controller import DatabaseController
+from grpc_service.modules.database.memory_controller.memory_database_controller import InMemoryDatabaseController
+from grpc_service.modules.database.sqlite_controller.sqlite_database_controller import SQLiteDatabaseController, AsyncSQLiteDatabaseController
+from grpc_service.modules.database.query_deadline.query_deadline import QueryDeadlineExceeded, set_query_deadline, reset_query_deadline
+
+KEYSET_QUERY = """
+    SELECT id FROM base_book
+    WHERE (uploaded_at, id) < (%s, %s)
+    ORDER BY uploaded_at DESC, id DESC
+    LIMIT %s
+"""
+
+class StorageBackendContract:
+    
+    """
+    Checks every non-Postgres backend answers BookService's statements like DatabaseController.
+    """
+    
+    def create_backend (
+        self,
+    ) -> StorageBackend:
+        
+        """
+        Returns an empty backend to test.
+        """
+        
+        raise NotImplementedError
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Loads three books uploaded a minute apart.
+        """
+        
+        self.database = self.create_backend()
+        self.started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        
+        self.database.execute_copy_query (
+            'COPY base_book (book_name, author, uploaded_at) FROM STDIN',
+            [(f'Book {index}', 'Author', self.started + timedelta(minutes=index)) for index in range(3)],
+        )
+    
+    def test_select_shapes (
+        self,
+    ) -> None:
+        
+        """
+        Tests the all-rows, by-id, `ANY` and keyset SELECTs with projected columns.
+        """
+        
+        self.assertEqual(self.database.execute_get_query('SELECT id FROM base_book ORDER BY id'), [(1,), (2,), (3,)])
+        self.assertEqual (
+            self.database.execute_get_query('SELECT book_name, id FROM base_book WHERE id = %s', (2,), prepare=True),
+            [('Book 1', 2)],
+        )
+        self.assertEqual (
+            sorted(self.database.execute_get_query('SELECT id FROM base_book WHERE id = ANY(%s)', ([1, 3, 9],))),
+            [(1,), (3,)],
+        )
+        self.assertEqual (
+            self.database.execute_get_query(KEYSET_QUERY, (self.started + timedelta(minutes=2), 3, 1)),
+            [(2,)],
+        )
+    
+    def test_timestamps_come_back_aware (
+        self,
+    ) -> None:
+        
+        """
+        Tests that `uploaded_at` is returned as the aware datetime that was stored.
+        """
+        
+        [(uploaded_at,)] = self.database.execute_get_query('SELECT uploaded_at FROM base_book WHERE id = %s', (3,))
+        
+        self.assertEqual(uploaded_at, self.started + timedelta(minutes=2))
+        self.assertIsNotNone(uploaded_at.tzinfo)
+    
+    def test_stream_yields_chunks (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a streamed SELECT is split into chunks of the requested size.
+        """
+        
+        chunks = list(self.database.stream_get_query('SELECT id FROM base_book ORDER BY id', chunk_size=2))
+        
+        self.assertEqual(chunks, [[(1,), (2,)], [(3,)]])
+    
+    def test_writes_return_like_database_controller (
+        self,
+    ) -> None:
+        
+        """
+        Tests that inserts return the new id and updates and deletes their rowcounts.
+        """
+        
+        book_id = self.database.execute_insert_query (
+            'INSERT INTO base_book (book_name, author, uploaded_at) VALUES (%s, %s, NOW()) RETURNING id;',
+            ('Dune', 'Herbert'),
+        )
+        update = 'UPDATE base_book SET author = %s WHERE id = %s'
+        delete = 'DELETE FROM base_book WHERE id = %s'
+        
+        self.assertEqual(book_id, 4)
+        self.assertEqual(self.database.execute_edit_query(update, ('Frank', 4)), 1)
+        self.assertEqual(self.database.execute_get_query('SELECT author FROM base_book WHERE id = %s', (4,)), [('Frank',)])
+        self.assertEqual(self.database.execute_delete_query(delete, (4,)), 1)
+        self.assertEqual(self.database.execute_delete_query(delete, (4,)), 0)
+        self.assertEqual(self.database.execute_edit_query(update, ('Frank', 4)), 0)
+    
+    def test_writes_return_their_rows (
+        self,
+    ) -> None:
+        
+        """
+        Tests that writes with a RETURNING list return the rows they wrote, and none for a missing id.
+        """
+        
+        returning = ' RETURNING id, book_name, author, uploaded_at, version'
+        inserted = self.database.execute_returning_query (
+            'INSERT INTO base_book (book_name, author, uploaded_at) VALUES (%s, %s, NOW())' + returning,
+            ('Dune', 'Herbert'),
+        )
+        book_id, _, _, uploaded_at, _ = inserted[0]
+        update = 'UPDATE base_book SET author = %s WHERE id = %s' + returning
+        delete = 'DELETE FROM base_book WHERE id = %s' + returning
+        
+        self.assertEqual(inserted, [(4, 'Dune', 'Herbert', uploaded_at, 1)])
+        self.assertIsNotNone(uploaded_at.tzinfo)
+        self.assertEqual(self.database.execute_returning_query(update, ('Frank', book_id)), [(4, 'Dune', 'Frank', uploaded_at, 1)])
+        self.assertEqual(self.database.execute_returning_query(delete, (book_id,)), [(4, 'Dune', 'Frank', uploaded_at, 1)])
+        self.assertEqual(self.database.execute_returning_query(delete, (book_id,)), [])
+        self.assertEqual(self.database.execute_returning_query(update, ('Frank', book_id)), [])
+        
+        with self.assertRaises(ValueError):
+            self.database.execute_returning_query('SELECT id FROM base_book')
+    
+    def test_conditional_update_bumps_version (
+        self,
+    ) -> None:
+        
+        """
+        Tests that `version = version + 1` bumps the row version and `AND version = %s` only matches that version.
+        """
+        
+        update = 'UPDATE base_book SET author = %s, version = version + 1 WHERE id = %s AND version = %s RETURNING author, version'
+        
+        self.assertEqual(self.database.execute_returning_query(update, ('Frank', 1, 1)), [('Frank', 2)])
+        self.assertEqual(self.database.execute_returning_query(update, ('Brian', 1, 1)), [])
+        self.assertEqual(self.database.execute_returning_query(update, ('Brian', 1, 2)), [('Brian', 3)])
+        self.assertEqual(self.database.execute_get_query('SELECT version FROM base_book WHERE id = %s', (2,)), [(1,)])
+    
+    def test_failed_unit_of_work_is_rolled_back (
+        self,
+    ) -> None:
+        
+        """
+        Tests that every write of a unit of work whose block raises is undone.
+        """
+        
+        with self.assertRaises(RuntimeError):
+            with self.database.unit_of_work():
+                self.database.execute_insert_query (
+                    'INSERT INTO base_book (book_name, author, uploaded_at) VALUES (%s, %s, NOW()) RETURNING id;',
+                    ('Dune', 'Herbert'),
+                )
+                self.database.execute_edit_query('UPDATE base_book SET author = %s WHERE id = %s', ('Frank', 1))
+                self.database.execute_delete_query('DELETE FROM base_book WHERE id = %s', (2,))
+                raise RuntimeError('abandoned')
+        
+        self.assertEqual (
+            self.database.execute_get_query('SELECT id, author FROM base_book ORDER BY id'),
+            [(1, 'Author'), (2, 'Author'), (3, 'Author')],
+        )
+    
+    def test_nested_unit_of_work_rolls_back_alone (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a failing nested unit undoes only its own writes and the outer unit commits.
+        """
+        
+        with self.database.unit_of_work():
+            self.database.execute_edit_query('UPDATE base_book SET author = %s WHERE id = %s', ('Kept', 1))
+            
+            with self.assertRaises(RuntimeError):
+                with self.database.unit_of_work():
+                    self.database.execute_edit_query('UPDATE base_book SET author = %s WHERE id = %s', ('Undone', 2))
+                    raise RuntimeError('rejected')
+            
+            self.database.execute_copy_query (
+                'COPY base_book (book_name, author, uploaded_at) FROM STDIN',
+                [('Emma', 'Austen', self.started)],
+            )
+        
+        self.assertEqual (
+            self.database.execute_get_query('SELECT id, author FROM base_book ORDER BY id'),
+            [(1, 'Kept'), (2, 'Author'), (3, 'Author'), (4, 'Austen')],
+        )
+    
+    def test_book_service_round_trip (
+        self,
+    ) -> None:
+        
+        """
+        Tests BookService end to end on the backend: post, read back, then delete.
+        """
+        
+        service = BookService(database_controller=self.database)
+        context = MagicMock()
+        
+        service.PostBook(books_pb2.PostBookRequest(book_name='Dune', book_author='Herbert'), context)
+        book = service.GetBookById(books_pb2.BookRequest(book_id=4), context)
+        service.DeleteBook(books_pb2.DeleteBookRequest(book_id=4), context)
+        books = service.GetAllBooks(books_pb2.EmptyRequest(), context)
+        
+        self.assertEqual((book.id, book.book_name, book.author), (4, 'Dune', 'Herbert'))
+        self.assertEqual([book.id for book in books.books], [1, 2, 3])
+
+    def test_book_service_rejects_stale_version (
+        self,
+    ) -> None:
+        
+        """
+        Tests that of two UpdateBook calls made against the same version, only the first one applies.
+        """
+        
+        service = BookService(database_controller=self.database)
+        context = MagicMock()
+        
+        first = service.UpdateBook(books_pb2.UpdateBookRequest(book_id=1, author='Frank', expected_version=1), context)
+        second = service.UpdateBook(books_pb2.UpdateBookRequest(book_id=1, author='Brian', expected_version=1), context)
+        
+        self.assertEqual((first.author, first.version), ('Frank', 2))
+        self.assertEqual(second, books_pb2.BookResponse())
+        context.set_code.assert_called_once_with(grpc.StatusCode.ABORTED)
+        self.assertEqual(service.GetBookById(books_pb2.BookRequest(book_id=1), context).author, 'Frank')
+
+    def test_book_service_upserts_by_isbn (
+        self,
+    ) -> None:
+        
+        """
+        Tests that replaying a feed through UpsertBooks inserts new ISBNs and only updates changed books.
+        """
+        
+        service = BookService(database_controller=self.database)
+        context = MagicMock()
+        
+        def upsert(*books):
+            return service.UpsertBooks (
+                books_pb2.UpsertBooksRequest(books=[books_pb2.UpsertBookRow(isbn=isbn, book_name=name, author='Author') for isbn, name in books]),
+                context,
+            )
+        
+        first = upsert(('9780000000001', 'Dune'), ('9780000000002', 'Emma'))
+        second = upsert(('9780000000001', 'Dune'), ('9780000000002', 'Emma II'), ('9780000000003', 'Ulysses'))
+        
+        self.assertEqual((first.inserted, first.updated, first.unchanged), (2, 0, 0))
+        self.assertEqual((second.inserted, second.updated, second.unchanged), (1, 1, 1))
+        self.assertEqual (
+            self.database.execute_get_query('SELECT book_name, version FROM base_book ORDER BY id')[3:],
+            [('Dune', 1), ('Emma II', 2), ('Ulysses', 1)],
+        )
+        context.set_code.assert_not_called()
+
+class TestInMemoryDatabaseController(StorageBackendContract, unittest.TestCase):
+    
+    """
+    Tests for the in-memory storage backend.
+    """
+    
+    def create_backend (
+        self,
+    ) -> StorageBackend:
+        
+        """
+        Returns an empty in-memory backend.
+        """
+        
+        return InMemoryDatabaseController()
+    
+    def test_unknown_statement_is_rejected (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a statement outside the supported shapes raises instead of answering wrongly.
+        """
+        
+        with self.assertRaises(ValueError):
+            self.database.execute_get_query('SELECT id FROM base_book WHERE author = %s', ('Author',))
+
+class TestSQLiteDatabaseController(StorageBackendContract, unittest.TestCase):
+    
+    """
+    Tests for the SQLite storage backend.
+    """
+    
+    def create_backend (
+        self,
+    ) -> StorageBackend:
+        
+        """
+        Returns a backend on a private in-memory SQLite database.
+        """
+        
+        return SQLiteDatabaseController(':memory:')
+    
+    def test_wrong_statement_kind_is_rejected (
+        self,
+    ) -> None:
+        
+        """
+        Tests that each helper only runs its own kind of statement.
+        """
+        
+        with self.assertRaisesRegex(ValueError, 'not an UPDATE query'):
+            self.database.execute_edit_query('DELETE FROM base_book WHERE id = %s', (1,))
+    
+    def test_failed_copy_loads_nothing (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a COPY with a bad row is rolled back as a whole.
+        """
+        
+        with self.assertRaises(Exception):
+            self.database.execute_copy_query (
+                'COPY base_book (book_name, author, uploaded_at) FROM STDIN',
+                [('Dune', 'Herbert', self.started), ('Emma', None, self.started)],
+            )
+        
+        self.assertEqual(len(self.database.execute_get_query('SELECT id FROM base_book')), 3)
+    
+    def test_passed_deadline_is_not_run (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a statement is refused once the RPC deadline has passed.
+        """
+        
+        token = set_query_deadline(0)
+        
+        try:
+            with self.assertRaises(QueryDeadlineExceeded):
+                self.database.execute_get_query('SELECT id FROM base_book')
+        finally:
+            reset_query_deadline(token)
+    
+    def test_running_statement_is_interrupted_at_deadline (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a statement still running at the deadline is interrupted.
+        """
+        
+        endless = """
+            SELECT count(*) FROM (
+                WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers)
+                SELECT n FROM numbers
+            )
+        """
+        token = set_query_deadline(0.05)
+        
+        try:
+            with self.assertRaises(QueryDeadlineExceeded):
+                self.database.execute_get_query(endless)
+        finally:
+            reset_query_deadline(token)
+        
+        self.assertEqual(len(self.database.execute_get_query('SELECT id FROM base_book')), 3)
+
+class TestAsyncSQLiteDatabaseController(unittest.IsolatedAsyncioTestCase):
+    
+    """
+    Tests for the coroutine interface of the SQLite backend.
+    """
+    
+    async def test_async_book_service_round_trip (
+        self,
+    ) -> None:
+        
+        """
+        Tests AsyncBookService on SQLite: post, then read back by id and streamed.
+        """
+        
+        service = AsyncBookService(database_controller=AsyncSQLiteDatabaseController(':memory:'))
+        context = MagicMock()
+        
+        await service.PostBook(books_pb2.PostBookRequest(book_name='Dune', book_author='Herbert'), context)
+        book = await service.GetBookById(books_pb2.BookRequest(book_id=1), context)
+        chunks = [chunk async for chunk in service.StreamBooks(books_pb2.StreamBooksRequest(), context)]
+        
+        self.assertEqual((book.id, book.book_name), (1, 'Dune'))
+        self.assertEqual([book.id for chunk in chunks for book in chunk.books], [1])
+    
+    async def test_unit_of_work_spans_executor_calls (
+        self,
+    ) -> None:
+        
+        """
+        Tests that statements awaited in a unit share its transaction and a failure undoes them.
+        """
+        
+        database = AsyncSQLiteDatabaseController(':memory:')
+        insert = 'INSERT INTO base_book (book_name, author, uploaded_at) VALUES (%s, %s, NOW())'
+        
+        async with database.unit_of_work():
+            await database.execute_insert_query(insert, ('Dune', 'Herbert'))
+        
+        with self.assertRaises(RuntimeError):
+            async with database.unit_of_work():
+                await database.execute_insert_query(insert, ('Emma', 'Austen'))
+                raise RuntimeError('abandoned')
+        
+        self.assertEqual(await database.execute_get_query('SELECT book_name FROM base_book'), [('Dune',)])
+
+class TestBackendFactory(unittest.TestCase):
+    
+    """
+    Tests for choosing the backend with `DB_BACKEND`.
+    """
+    
+    def test_backend_follows_environment (
+        self,
+    ) -> None:
+        
+        """
+        Tests that `DB_BACKEND` picks the backend and Postgres is the default.
+        """
+        
+        with patch.dict(os.environ, {'DB_BACKEND': 'memory'}):
+            self.assertIsInstance(create_storage_backend(), InMemoryDatabaseController)
+            self.assertIsInstance(create_async_storage_backend(), AsyncStorageBackend)
+        
+        with patch.dict(os.environ, {'DB_BACKEND': 'sqlite', 'DB_SQLITE_PATH': ':memory:'}):
+            self.assertIsInstance(create_storage_backend(), SQLiteDatabaseController)
+            self.assertIsInstance(create_async_storage_backend(), AsyncSQLiteDatabaseController)
+        
+        with patch.dict(os.environ):
+            os.environ.pop('DB_BACKEND', None)
+            self.assertIsInstance(create_storage_backend(), DatabaseController)
+    
+    def test_unknown_backend_is_rejected (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a misspelt backend fails loudly instead of falling back to Postgres.
+        """
+        
+        with self.assertRaises(ValueError):
+            create_storage_backend('mysql')
+
+if __name__ == '__main__':
+    unittest.main()
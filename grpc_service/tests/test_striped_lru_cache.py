@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+from grpc_service.modules.cache.striped_lru_cache import CACHE_MISS, StripedLRUCache
+
+class TestStripedLRUCache(unittest.TestCase):
+    
+    """
+    Unit tests for the StripedLRUCache class.
+    """
+    
+    def sample (
+        self,
+        name: str,
+        **labels: str,
+    ) -> float:
+        
+        """
+        Reads a cache counter for the cache under test.
+        """
+        
+        return REGISTRY.get_sample_value(name, {'cache': self.id(), **labels}) or 0
+    
+    def test_get_returns_stored_value_and_counts_hits (
+        self,
+    ) -> None:
+        
+        """
+        Tests a miss followed by a fill and a hit, including a cached None.
+        """
+        
+        cache = StripedLRUCache(self.id(), max_size=10, ttl=30)
+        
+        self.assertIs(cache.get(1), CACHE_MISS)
+        self.assertTrue(cache.put(1, 'book', cache.token(1)))
+        self.assertTrue(cache.put(2, None, cache.token(2)))
+        
+        self.assertEqual(cache.get(1), 'book')
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(self.sample('cache_hits_total'), 2)
+        self.assertEqual(self.sample('cache_misses_total'), 1)
+    
+    def test_least_recently_used_entry_is_evicted (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a full stripe drops its least recently used entry.
+        """
+        
+        cache = StripedLRUCache(self.id(), max_size=2, ttl=30, stripes=1)
+        
+        for key in (1, 2):
+            cache.put(key, key, cache.token(key))
+        cache.get(1)
+        cache.put(3, 3, cache.token(3))
+        
+        self.assertIs(cache.get(2), CACHE_MISS)
+        self.assertEqual(cache.get(1), 1)
+        self.assertEqual(self.sample('cache_evictions_total', reason='size'), 1)
+    
+    def test_entries_expire_after_ttl (
+        self,
+    ) -> None:
+        
+        """
+        Tests that an entry older than the TTL is dropped on lookup.
+        """
+        
+        cache = StripedLRUCache(self.id(), max_size=10, ttl=5)
+        
+        with patch('grpc_service.modules.cache.striped_lru_cache.time.monotonic', side_effect=[100, 104, 106]):
+            cache.put(1, 'book', cache.token(1))
+            
+            self.assertEqual(cache.get(1), 'book')
+            self.assertIs(cache.get(1), CACHE_MISS)
+        
+        self.assertEqual(self.sample('cache_evictions_total', reason='ttl'), 1)
+    
+    def test_invalidate_fences_in_flight_fill (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a value loaded before an invalidation is not stored after it.
+        """
+        
+        cache = StripedLRUCache(self.id(), max_size=10, ttl=30)
+        cache.put(1, 'old', cache.token(1))
+        
+        token = cache.token(1)
+        cache.invalidate(1)
+        
+        self.assertFalse(cache.put(1, 'old', token))
+        self.assertIs(cache.get(1), CACHE_MISS)
+        self.assertEqual(self.sample('cache_evictions_total', reason='invalidated'), 1)
+    
+    def test_zero_size_disables_cache (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a cache of size 0 never stores anything.
+        """
+        
+        cache = StripedLRUCache(self.id(), max_size=0, ttl=30)
+        
+        self.assertFalse(cache.put(1, 'book', cache.token(1)))
+        self.assertIs(cache.get(1), CACHE_MISS)
+
+
+if __name__ == '__main__':
+    unittest.main()
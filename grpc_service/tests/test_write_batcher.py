@@ -0,0 +1,195 @@
+import time
+import asyncio
+import threading
+import unittest
+
+from prometheus_client import REGISTRY
+
+from grpc_service.modules.database.write_batcher.write_batcher import WriteBatcher, AsyncWriteBatcher
+from grpc_service.modules.database.sqlite_controller.sqlite_database_controller import SQLiteDatabaseController, AsyncSQLiteDatabaseController
+from grpc_service.modules.database.query_deadline.query_deadline import QUERY_DEADLINE, set_query_deadline, reset_query_deadline
+
+INSERT = 'INSERT INTO base_book (book_name, author, uploaded_at) VALUES (%s, %s, NOW()) RETURNING id;'
+
+def batch_sizes (
+    batcher: str,
+) -> tuple:
+    
+    """
+    Reads how many batches a batcher ran and how many writes they held.
+    """
+    
+    return (
+        REGISTRY.get_sample_value('write_batch_size_count', {'batcher': batcher}) or 0.0,
+        REGISTRY.get_sample_value('write_batch_size_sum', {'batcher': batcher}) or 0.0,
+    )
+
+class TestWriteBatcher(unittest.TestCase):
+    
+    """
+    Tests for the thread-based WriteBatcher.
+    """
+    
+    def setUp (
+        self,
+    ) -> None:
+        
+        """
+        Starts each test on an empty SQLite database.
+        """
+        
+        self.database = SQLiteDatabaseController(':memory:')
+    
+    def submit_concurrently (
+        self,
+        batcher: WriteBatcher,
+        fns: list,
+    ) -> list:
+        
+        """
+        Submits each of `fns` from its own thread and collects the outcomes in submission order.
+        """
+        
+        outcomes = [None] * len(fns)
+        
+        def call(index, fn):
+            try:
+                outcomes[index] = batcher.submit(fn)
+            except Exception as e:
+                outcomes[index] = e
+        
+        threads = [threading.Thread(target=call, args=(index, fn)) for index, fn in enumerate(fns)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        
+        return outcomes
+    
+    def insert (
+        self,
+        name: str,
+    ):
+        
+        """
+        Returns a write inserting one book called `name`.
+        """
+        
+        return lambda: self.database.execute_insert_query(INSERT, (name, 'Author'))
+    
+    def test_concurrent_writes_share_one_batch (
+        self,
+    ) -> None:
+        
+        """
+        Tests that writes arriving together run as one batch that starts once it is full.
+        """
+        
+        batcher = WriteBatcher('shared', self.database, window=5, max_batch_size=4)
+        started = time.monotonic()
+        
+        outcomes = self.submit_concurrently(batcher, [self.insert(f'Book {n}') for n in range(4)])
+        
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(sorted(outcomes), [1, 2, 3, 4])
+        self.assertEqual(batch_sizes('shared'), (1.0, 4.0))
+        self.assertEqual(len(self.database.execute_get_query('SELECT id FROM base_book')), 4)
+    
+    def test_failing_write_gets_its_own_error (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a failing write rolls back alone while the rest of its batch commits.
+        """
+        
+        def rejected():
+            self.database.execute_insert_query(INSERT, ('Rejected', 'Author'))
+            raise ValueError('rejected')
+        
+        batcher = WriteBatcher('failing', self.database, window=5, max_batch_size=3)
+        
+        outcomes = self.submit_concurrently(batcher, [self.insert('Dune'), rejected, self.insert('Emma')])
+        
+        self.assertIsInstance(outcomes[1], ValueError)
+        self.assertEqual(batch_sizes('failing'), (1.0, 3.0))
+        self.assertEqual (
+            sorted(self.database.execute_get_query('SELECT book_name FROM base_book')),
+            [('Dune',), ('Emma',)],
+        )
+    
+    def test_lone_write_runs_after_window (
+        self,
+    ) -> None:
+        
+        """
+        Tests that a write nobody joins runs by itself once the window has passed.
+        """
+        
+        batcher = WriteBatcher('lone', self.database, window=0.01, max_batch_size=64)
+        
+        self.assertEqual(batcher.submit(self.insert('Dune')), 1)
+        self.assertEqual(batch_sizes('lone'), (1.0, 1.0))
+        self.assertIsNone(self.database.active_unit.get())
+    
+    def test_writes_run_under_their_callers_deadline (
+        self,
+    ) -> None:
+        
+        """
+        Tests that the leader runs every write under the deadline of the RPC that submitted it.
+        """
+        
+        batcher = WriteBatcher('deadline', self.database, window=5, max_batch_size=2)
+        deadlines = [30, 60]
+        outcomes = [None, None]
+        
+        def call(index):
+            token = set_query_deadline(deadlines[index])
+            try:
+                outcomes[index] = batcher.submit(QUERY_DEADLINE.get) - time.monotonic()
+            finally:
+                reset_query_deadline(token)
+        
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        
+        self.assertEqual([round(remaining) for remaining in outcomes], deadlines)
+
+class TestAsyncWriteBatcher(unittest.IsolatedAsyncioTestCase):
+    
+    """
+    Tests for the asyncio AsyncWriteBatcher.
+    """
+    
+    async def test_concurrent_writes_share_one_batch (
+        self,
+    ) -> None:
+        
+        """
+        Tests that awaited writes share one batch and a failing one rolls back alone.
+        """
+        
+        database = AsyncSQLiteDatabaseController(':memory:')
+        batcher = AsyncWriteBatcher('async_shared', database, window=5, max_batch_size=3)
+        
+        async def rejected():
+            await database.execute_insert_query(INSERT, ('Rejected', 'Author'))
+            raise ValueError('rejected')
+        
+        outcomes = await asyncio.gather (
+            batcher.submit(lambda: database.execute_insert_query(INSERT, ('Dune', 'Author'))),
+            batcher.submit(rejected),
+            batcher.submit(lambda: database.execute_insert_query(INSERT, ('Emma', 'Author'))),
+            return_exceptions=True,
+        )
+        
+        self.assertIsInstance(outcomes[1], ValueError)
+        self.assertEqual(batch_sizes('async_shared'), (1.0, 3.0))
+        self.assertEqual (
+            sorted(await database.execute_get_query('SELECT book_name FROM base_book')),
+            [('Dune',), ('Emma',)],
+        )